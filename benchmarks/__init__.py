@@ -0,0 +1,6 @@
+"""
+Database benchmarks
+
+    python -m benchmarks.generate_data   # load a synthetic dataset with COPY
+    python -m benchmarks.db_bench        # benchmark every Database method
+"""
@@ -0,0 +1,491 @@
+"""
+Database benchmark suite
+
+Runs every Database method against the configured PostgreSQL database (load a
+dataset first with benchmarks.generate_data), reports latency percentiles and
+throughput, captures the EXPLAIN plan of every statement each method issues,
+and compares the run with a saved baseline.
+
+Usage:
+    python -m benchmarks.db_bench --save-baseline benchmarks/baseline.json
+    python -m benchmarks.db_bench --compare benchmarks/baseline.json --fail-on-regression
+    python -m benchmarks.db_bench --only get_team_members,get_leaderboard --iterations 1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables FIRST so DATABASE_URL is set when the db module loads
+load_dotenv()
+
+from database.db import db
+from benchmarks.generate_data import BENCH_USER_ID_BASE
+
+
+# Rows written by the write benchmarks (removed again at the end of the run)
+WRITE_USER_ID_BASE = BENCH_USER_ID_BASE + 50_000_000
+WRITE_TEAM_PREFIX = "Bench Write "
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0-100) of a list of samples"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# Statement capture
+
+class _RecordingConnection:
+    """Connection proxy that records the statements a Database method runs"""
+    
+    def __init__(self, conn, recorder: 'StatementRecorder'):
+        self._conn = conn
+        self._recorder = recorder
+    
+    def _record(self, query, args):
+        if self._recorder.capturing:
+            self._recorder.statements.append((query, args))
+    
+    async def execute(self, query, *args, **kwargs):
+        self._record(query, args)
+        return await self._conn.execute(query, *args, **kwargs)
+    
+    async def fetch(self, query, *args, **kwargs):
+        self._record(query, args)
+        return await self._conn.fetch(query, *args, **kwargs)
+    
+    async def fetchrow(self, query, *args, **kwargs):
+        self._record(query, args)
+        return await self._conn.fetchrow(query, *args, **kwargs)
+    
+    async def fetchval(self, query, *args, **kwargs):
+        self._record(query, args)
+        return await self._conn.fetchval(query, *args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class _RecordingAcquire:
+    def __init__(self, ctx, recorder: 'StatementRecorder'):
+        self._ctx = ctx
+        self._recorder = recorder
+    
+    async def __aenter__(self):
+        return _RecordingConnection(await self._ctx.__aenter__(), self._recorder)
+    
+    async def __aexit__(self, *exc):
+        return await self._ctx.__aexit__(*exc)
+
+
+class StatementRecorder:
+    """Pool proxy - when capturing, remembers every (query, args) pair issued"""
+    
+    def __init__(self, pool):
+        self._pool = pool
+        self.capturing = False
+        self.statements = []
+    
+    def acquire(self):
+        return _RecordingAcquire(self._pool.acquire(), self)
+    
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+# Sample data
+
+class BenchData:
+    """Keys sampled from the dataset plus the rows created by write benchmarks"""
+    
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.players: List[Dict] = []
+        self.teams: List[Dict] = []
+        self.members: List[Dict] = []
+        self.banned: List[int] = []
+        self.regions: List[str] = []
+        self.captains: List[int] = []
+        self.created_players = deque()
+        self.stats_players = deque()
+        self.created_teams = deque()
+        self.added_members = deque()
+        self.banned_by_bench = deque()
+        self._next_player = 0
+        self._next_team = 0
+    
+    async def load(self, pool, sample_size: int):
+        async with pool.acquire() as conn:
+            self.players = [dict(r) for r in await conn.fetch(
+                "SELECT discord_id, ign FROM players TABLESAMPLE SYSTEM (5) LIMIT $1", sample_size
+            )] or [dict(r) for r in await conn.fetch("SELECT discord_id, ign FROM players LIMIT $1", sample_size)]
+            self.teams = [dict(r) for r in await conn.fetch(
+                "SELECT id, team_name, team_tag, captain_discord_id FROM teams ORDER BY random() LIMIT $1", sample_size
+            )]
+            self.members = [dict(r) for r in await conn.fetch(
+                "SELECT discord_id, role FROM team_members ORDER BY random() LIMIT $1", sample_size
+            )]
+            self.banned = [r['discord_id'] for r in await conn.fetch(
+                "SELECT discord_id FROM banned_players LIMIT $1", sample_size
+            )]
+            self.regions = [r['region'] for r in await conn.fetch("SELECT DISTINCT region FROM players")]
+        self.captains = [t['captain_discord_id'] for t in self.teams if t['captain_discord_id']]
+        
+        if not self.players or not self.teams:
+            print("❌ No data to benchmark - run `python -m benchmarks.generate_data` first")
+            sys.exit(1)
+        print(f"✓ Sampled {len(self.players)} players, {len(self.teams)} teams, {len(self.members)} memberships")
+    
+    def player(self) -> Dict:
+        return self.rng.choice(self.players)
+    
+    def team(self) -> Dict:
+        return self.rng.choice(self.teams)
+    
+    def captain(self) -> int:
+        return self.rng.choice(self.captains) if self.captains else self.player()['discord_id']
+    
+    def member(self) -> Dict:
+        return self.rng.choice(self.members) if self.members else {'discord_id': self.player()['discord_id'], 'role': 'player'}
+    
+    def region(self) -> str:
+        return self.rng.choice(self.regions) if self.regions else 'India'
+    
+    def new_player_id(self) -> int:
+        self._next_player += 1
+        return WRITE_USER_ID_BASE + self._next_player
+    
+    def new_team_index(self) -> int:
+        self._next_team += 1
+        return self._next_team
+
+
+# Cases
+
+class Case:
+    """One benchmarked Database method; run(data) performs a single call"""
+    
+    def __init__(self, name: str, run: Callable, writes: bool = False):
+        self.name = name
+        self.run = run
+        self.writes = writes
+
+
+async def _create_player(d: BenchData):
+    discord_id = d.new_player_id()
+    await db.create_player(discord_id, f"bw_{discord_id - WRITE_USER_ID_BASE}", "1", d.region(), "Sage")
+    d.created_players.append(discord_id)
+
+
+async def _create_player_stats(d: BenchData):
+    discord_id = d.created_players.popleft()
+    await db.create_player_stats(discord_id)
+    d.created_players.append(discord_id)
+    d.stats_players.append(discord_id)
+
+
+async def _update_player(d: BenchData):
+    d.created_players.rotate(-1)
+    await db.update_player(d.created_players[0], region=d.region())
+
+
+async def _update_player_stats(d: BenchData):
+    d.stats_players.rotate(-1)
+    await db.update_player_stats(d.stats_players[0], kills=d.rng.randint(0, 500), wins=d.rng.randint(0, 20))
+
+
+async def _create_team(d: BenchData):
+    index = d.new_team_index()
+    team = await db.create_team(
+        f"{WRITE_TEAM_PREFIX}{index}", f"w{index:04d}"[-5:], d.region(), d.player()['discord_id']
+    )
+    d.created_teams.append(team['id'])
+
+
+async def _add_team_member(d: BenchData):
+    d.created_teams.rotate(-1)
+    team_id = d.created_teams[0]
+    discord_id = d.new_player_id()
+    await db.add_team_member(team_id, discord_id, 'player')
+    d.added_members.append((team_id, discord_id))
+
+
+async def _update_team(d: BenchData):
+    d.created_teams.rotate(-1)
+    await db.update_team(d.created_teams[0], region=d.region())
+
+
+async def _remove_team_member(d: BenchData):
+    team_id, discord_id = d.added_members.popleft()
+    await db.remove_team_member(team_id, discord_id)
+
+
+async def _delete_team(d: BenchData):
+    await db.delete_team(d.created_teams.popleft())
+
+
+async def _ban_player(d: BenchData):
+    discord_id = d.new_player_id()
+    await db.ban_player(discord_id, BENCH_USER_ID_BASE, "Benchmark")
+    d.banned_by_bench.append(discord_id)
+
+
+async def _unban_player(d: BenchData):
+    await db.unban_player(d.banned_by_bench.popleft())
+
+
+async def _delete_player(d: BenchData):
+    await db.delete_player(d.created_players.popleft())
+
+
+# Order matters: write cases build on the rows created by the ones before them
+CASES = [
+    Case("get_player_by_discord_id", lambda d: db.get_player_by_discord_id(d.player()['discord_id'])),
+    Case("get_player_by_ign", lambda d: db.get_player_by_ign(d.player()['ign'])),
+    Case("get_all_players", lambda d: db.get_all_players(d.region())),
+    Case("get_players_with_notifications", lambda d: db.get_players_with_notifications()),
+    Case("get_player_stats", lambda d: db.get_player_stats(d.player()['discord_id'])),
+    Case("get_leaderboard", lambda d: db.get_leaderboard(d.rng.choice(["kills", "wins", "mvps"]), d.region())),
+    Case("get_leaderboard_global", lambda d: db.get_leaderboard("kills")),
+    Case("get_player_count", lambda d: db.get_player_count(d.region())),
+    Case("get_team_by_name", lambda d: db.get_team_by_name(d.team()['team_name'])),
+    Case("get_team_by_tag", lambda d: db.get_team_by_tag(d.team()['team_tag'])),
+    Case("get_team_by_captain", lambda d: db.get_team_by_captain(d.captain())),
+    Case("get_team_by_id", lambda d: db.get_team_by_id(d.team()['id'])),
+    Case("get_all_teams", lambda d: db.get_all_teams()),
+    Case("get_team_members", lambda d: db.get_team_members(d.team()['id'])),
+    Case("get_user_teams_by_role", lambda d: db.get_user_teams_by_role(d.member()['discord_id'], d.member()['role'])),
+    Case("is_player_banned", lambda d: db.is_player_banned(
+        d.rng.choice(d.banned) if d.banned and d.rng.random() < 0.5 else d.player()['discord_id']
+    )),
+    Case("get_all_banned_players", lambda d: db.get_all_banned_players()),
+    Case("get_player_profile", lambda d: db.get_player_profile(d.player()['discord_id'])),
+    Case("get_team_profile", lambda d: db.get_team_profile(d.team()['id'])),
+    Case("create_player", _create_player, writes=True),
+    Case("create_player_stats", _create_player_stats, writes=True),
+    Case("update_player", _update_player, writes=True),
+    Case("update_player_stats", _update_player_stats, writes=True),
+    Case("create_team", _create_team, writes=True),
+    Case("add_team_member", _add_team_member, writes=True),
+    Case("update_team", _update_team, writes=True),
+    Case("remove_team_member", _remove_team_member, writes=True),
+    Case("delete_team", _delete_team, writes=True),
+    Case("ban_player", _ban_player, writes=True),
+    Case("unban_player", _unban_player, writes=True),
+    Case("delete_player", _delete_player, writes=True),
+]
+
+# Full-table reads are much slower - fewer iterations keep the suite quick
+HEAVY_CASES = {"get_all_players", "get_players_with_notifications", "get_all_teams", "get_all_banned_players"}
+
+
+# Plans
+
+def _plan_nodes(plan: Dict) -> List[str]:
+    """Flatten a JSON plan into readable node descriptions (scans name their index/table)"""
+    label = plan['Node Type']
+    if plan.get('Index Name'):
+        label += f" using {plan['Index Name']}"
+    if plan.get('Relation Name'):
+        label += f" on {plan['Relation Name']}"
+    nodes = [label]
+    for child in plan.get('Plans', []):
+        nodes.extend(_plan_nodes(child))
+    return nodes
+
+
+async def explain(recorder: StatementRecorder, statements, writes: bool) -> List[Dict]:
+    """EXPLAIN every captured statement (ANALYZE only for reads, writes would run)"""
+    plans = []
+    options = "FORMAT JSON" if writes else "ANALYZE, BUFFERS, FORMAT JSON"
+    async with recorder._pool.acquire() as conn:
+        for query, args in statements:
+            try:
+                raw = await conn.fetchval(f"EXPLAIN ({options}) {query}", *args)
+                plan = json.loads(raw)[0] if isinstance(raw, str) else raw[0]
+                plans.append({
+                    'query': " ".join(query.split())[:200],
+                    'nodes': _plan_nodes(plan['Plan']),
+                    'total_cost': plan['Plan']['Total Cost'],
+                    'execution_ms': plan.get('Execution Time'),
+                    'plan': plan
+                })
+            except Exception as e:
+                plans.append({'query': " ".join(query.split())[:200], 'error': str(e), 'nodes': []})
+    return plans
+
+
+# Running
+
+async def run_case(case: Case, data: BenchData, recorder: StatementRecorder, iterations: int, warmup: int, concurrency: int) -> Dict:
+    for _ in range(warmup):
+        await case.run(data)
+    
+    latencies = []
+    
+    async def worker(count: int):
+        for _ in range(count):
+            started = time.perf_counter()
+            await case.run(data)
+            latencies.append(time.perf_counter() - started)
+    
+    # Write cases depend on each other's rows, so they always run one call at a time
+    workers = 1 if case.writes else max(1, min(concurrency, iterations))
+    share, extra = divmod(iterations, workers)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(share + (1 if i < extra else 0)) for i in range(workers)))
+    elapsed = time.perf_counter() - started
+    
+    # One more call with statement capture on, for the plans
+    recorder.statements = []
+    recorder.capturing = True
+    try:
+        await case.run(data)
+    finally:
+        recorder.capturing = False
+    plans = await explain(recorder, recorder.statements, case.writes)
+    
+    return {
+        'iterations': len(latencies),
+        'concurrency': workers,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': max(latencies) * 1000,
+        'ops_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'plans': plans
+    }
+
+
+async def cleanup_writes(pool):
+    async with pool.acquire() as conn:
+        await conn.execute("DELETE FROM teams WHERE team_name LIKE $1", f"{WRITE_TEAM_PREFIX}%")
+        for table in ("team_members", "banned_players", "players"):
+            await conn.execute(
+                f"DELETE FROM {table} WHERE discord_id >= $1 AND discord_id < $2",
+                WRITE_USER_ID_BASE, WRITE_USER_ID_BASE + 50_000_000
+            )
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """List regressions against a baseline: slower p50/p99 or new sequential scans"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for key in ('p50_ms', 'p99_ms'):
+            delta = result[key] - base[key]
+            if base[key] and delta > min_delta_ms and result[key] > base[key] * (1 + threshold):
+                regressions.append(f"{name}: {key} {base[key]:.2f} → {result[key]:.2f}ms (+{delta / base[key] * 100:.0f}%)")
+        
+        old_nodes = {node for plan in base.get('plans', []) for node in plan.get('nodes', [])}
+        new_nodes = {node for plan in result.get('plans', []) for node in plan.get('nodes', [])}
+        for node in sorted(new_nodes - old_nodes):
+            if node.startswith("Seq Scan"):
+                regressions.append(f"{name}: plan now uses {node}")
+    return regressions
+
+
+def print_results(results: Dict, baseline: Optional[Dict]):
+    print()
+    print(f"{'Method':<32}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'ops/s':>10}{'vs base':>9}  Plan")
+    for name, result in results.items():
+        change = ""
+        if baseline and name in baseline and baseline[name]['p50_ms']:
+            change = f"{(result['p50_ms'] / baseline[name]['p50_ms'] - 1) * 100:+.0f}%"
+        nodes = [node for plan in result['plans'] for node in plan['nodes'] if 'Scan' in node]
+        print(f"{name:<32}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+              f"{result['ops_per_sec']:>10.0f}{change:>9}  {', '.join(nodes[:3])}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark every Database method")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent callers for read methods")
+    parser.add_argument("--only", help="Comma separated method names to run")
+    parser.add_argument("--skip-writes", action="store_true", help="Only run read-only methods")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write full results (including plans) to this JSON file")
+    parser.add_argument("--save-baseline", help="Save this run as the baseline JSON")
+    parser.add_argument("--compare", help="Baseline JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.2, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+    
+    if not db.database_url:
+        print("❌ DATABASE_URL not found in environment variables!")
+        sys.exit(1)
+    
+    only = set(args.only.split(",")) if args.only else None
+    cases = [c for c in CASES if (not only or c.name in only) and not (args.skip_writes and c.writes)]
+    
+    await db.connect()
+    recorder = StatementRecorder(db.pool)
+    db.pool = recorder
+    try:
+        data = BenchData(random.Random(args.seed))
+        await data.load(recorder._pool, 1000)
+        
+        results = {}
+        for case in cases:
+            iterations = max(10, args.iterations // 10) if case.name in HEAVY_CASES else args.iterations
+            try:
+                results[case.name] = await run_case(case, data, recorder, iterations, args.warmup, args.concurrency)
+                print(f"✓ {case.name}")
+            except IndexError:
+                # A write case whose setup case was filtered out with --only
+                print(f"✗ {case.name} skipped (needs the write cases that run before it)")
+    finally:
+        await cleanup_writes(recorder._pool)
+        db.pool = recorder._pool
+        await db.close()
+    
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    
+    print_results(results, baseline)
+    
+    run = {
+        'created_at': time.time(),
+        'iterations': args.iterations,
+        'concurrency': args.concurrency,
+        'results': results
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(run, f, indent=2, default=str)
+        print(f"✓ Results written to {path}")
+    
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        print()
+        if regressions:
+            print(f"⚠️  {len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            if args.fail_on_regression:
+                sys.exit(1)
+        else:
+            print(f"✅ No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
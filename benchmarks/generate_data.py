@@ -0,0 +1,224 @@
+"""
+Synthetic tournament-scale data generator
+
+Bulk loads players, player stats, teams, team members, team stats and bans with
+COPY so benchmark datasets of 100k+ rows load in seconds. Generated rows use a
+reserved Discord ID range and a "Bench Team" name prefix; every run removes the
+previous dataset first. Point it at a disposable database, never production.
+
+Usage:
+    python -m benchmarks.generate_data
+    python -m benchmarks.generate_data --players 100000 --teams 20000 --members 100000 --bans 2000
+    python -m benchmarks.generate_data --reset-only
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import asyncpg
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+# Far above real snowflakes and away from the load-test range
+BENCH_USER_ID_BASE = 800_000_000_000_000_000
+BENCH_TEAM_PREFIX = "Bench Team "
+
+# Roughly the registration mix we see (India heavy)
+REGION_WEIGHTS = {
+    'India': 45, 'AP': 15, 'EU': 12, 'NA': 10, 'BR': 6, 'LATAM': 5, 'KR': 4, 'CN': 3
+}
+AGENTS = ['Sage', 'Phoenix', 'Reyna', 'Jett', 'Omen', 'Sova', 'Killjoy', 'Raze', 'Cypher', 'Brimstone']
+ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def team_tag(index: int) -> str:
+    """Unique base-36 tag (team_tag is VARCHAR(5) UNIQUE)"""
+    digits = []
+    for _ in range(5):
+        index, remainder = divmod(index, 36)
+        digits.append(ALPHABET[remainder])
+    return "".join(reversed(digits))
+
+
+async def reset(conn):
+    """Remove every row previously created by the generator"""
+    upper = BENCH_USER_ID_BASE + 100_000_000
+    await conn.execute("DELETE FROM teams WHERE team_name LIKE $1", f"{BENCH_TEAM_PREFIX}%")
+    await conn.execute(
+        "DELETE FROM team_members WHERE discord_id >= $1 AND discord_id < $2",
+        BENCH_USER_ID_BASE, upper
+    )
+    await conn.execute(
+        "DELETE FROM banned_players WHERE discord_id >= $1 AND discord_id < $2",
+        BENCH_USER_ID_BASE, upper
+    )
+    await conn.execute(
+        "DELETE FROM players WHERE discord_id >= $1 AND discord_id < $2",
+        BENCH_USER_ID_BASE, upper
+    )
+    print("✓ Removed previous benchmark data")
+
+
+async def copy_rows(conn, table: str, columns: list, records, count: int):
+    started = time.perf_counter()
+    await conn.copy_records_to_table(table, records=records, columns=columns)
+    elapsed = time.perf_counter() - started
+    print(f"✓ {table:<15} {count:>8} rows in {elapsed:6.2f}s ({count / elapsed if elapsed else 0:,.0f} rows/s)")
+
+
+async def generate(conn, players: int, teams: int, members: int, bans: int, seed: int):
+    rng = random.Random(seed)
+    now = datetime.now()
+    regions = list(REGION_WEIGHTS)
+    weights = list(REGION_WEIGHTS.values())
+    player_regions = rng.choices(regions, weights=weights, k=players)
+    
+    def player_rows():
+        for i in range(players):
+            registered = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+            yield (
+                BENCH_USER_ID_BASE + i,
+                f"bench_{i}",
+                str(100_000_000 + i),
+                player_regions[i],
+                rng.choice(AGENTS),
+                rng.random() < 0.9,
+                registered,
+                registered
+            )
+    
+    await copy_rows(
+        conn, 'players',
+        ['discord_id', 'ign', 'player_id', 'region', 'agent', 'tournament_notifications', 'registered_at', 'updated_at'],
+        player_rows(), players
+    )
+    
+    def stats_rows():
+        for i in range(players):
+            matches = rng.randint(0, 60)
+            wins = rng.randint(0, matches)
+            yield (
+                BENCH_USER_ID_BASE + i,
+                rng.randint(0, matches * 25),
+                rng.randint(0, matches * 20),
+                rng.randint(0, matches * 10),
+                matches,
+                wins,
+                matches - wins,
+                rng.randint(0, wins),
+                rng.randint(0, matches * 30)
+            )
+    
+    await copy_rows(
+        conn, 'player_stats',
+        ['discord_id', 'kills', 'deaths', 'assists', 'matches_played', 'wins', 'losses', 'mvps', 'points'],
+        stats_rows(), players
+    )
+    
+    # Each team gets a roster of distinct players, walking a shuffled player order
+    order = list(range(players))
+    rng.shuffle(order)
+    roster_size = max(1, members // max(teams, 1))
+    rosters = []
+    cursor = 0
+    for t in range(teams):
+        roster = []
+        for _ in range(min(roster_size, players)):
+            roster.append(order[cursor % players])
+            cursor += 1
+        rosters.append(roster)
+    
+    def team_rows():
+        for t in range(teams):
+            # ~10% of teams were created by a manager and have no captain yet
+            captain = None if rng.random() < 0.1 else BENCH_USER_ID_BASE + rosters[t][0]
+            yield (
+                f"{BENCH_TEAM_PREFIX}{t}",
+                team_tag(t),
+                player_regions[rosters[t][0]],
+                captain,
+                None,
+                rng.randint(1_000_000_000_000_000_000, 1_200_000_000_000_000_000),
+                now - timedelta(seconds=rng.randint(0, 60 * 86400))
+            )
+    
+    await copy_rows(
+        conn, 'teams',
+        ['team_name', 'team_tag', 'region', 'captain_discord_id', 'logo_url', 'role_id', 'created_at'],
+        team_rows(), teams
+    )
+    
+    team_ids = await conn.fetch(
+        "SELECT id, captain_discord_id FROM teams WHERE team_name LIKE $1 ORDER BY id",
+        f"{BENCH_TEAM_PREFIX}%"
+    )
+    
+    def member_rows():
+        for (team_id, captain), roster in zip(team_ids, rosters):
+            for position, index in enumerate(roster):
+                if position == 0:
+                    role = 'captain' if captain else 'manager'
+                elif position == len(roster) - 1 and rng.random() < 0.2:
+                    role = 'coach'
+                else:
+                    role = 'player'
+                yield (team_id, BENCH_USER_ID_BASE + index, role, now - timedelta(seconds=rng.randint(0, 60 * 86400)))
+    
+    await copy_rows(conn, 'team_members', ['team_id', 'discord_id', 'role', 'joined_at'], member_rows(), teams * roster_size)
+    
+    def team_stats_rows():
+        for team_id, _ in team_ids:
+            matches = rng.randint(0, 30)
+            wins = rng.randint(0, matches)
+            yield (team_id, wins, matches - wins, matches)
+    
+    await copy_rows(conn, 'team_stats', ['team_id', 'wins', 'losses', 'matches_played'], team_stats_rows(), len(team_ids))
+    
+    banned = rng.sample(range(players), min(bans, players))
+    
+    def ban_rows():
+        for index in banned:
+            yield (BENCH_USER_ID_BASE + index, BENCH_USER_ID_BASE, "Benchmark ban", now)
+    
+    await copy_rows(conn, 'banned_players', ['discord_id', 'banned_by', 'reason', 'banned_at'], ban_rows(), len(banned))
+    
+    # Fresh statistics so the planner sees the new row counts
+    await conn.execute("ANALYZE players, player_stats, teams, team_members, team_stats, banned_players")
+    print("✓ Tables analyzed")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic tournament data for benchmarks")
+    parser.add_argument("--players", type=int, default=100_000)
+    parser.add_argument("--teams", type=int, default=20_000)
+    parser.add_argument("--members", type=int, default=100_000, help="Total team_members rows (split evenly across teams)")
+    parser.add_argument("--bans", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset-only", action="store_true", help="Only remove previously generated data")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+    
+    if not args.database_url:
+        print("❌ DATABASE_URL not found in environment variables!")
+        sys.exit(1)
+    
+    conn = await asyncpg.connect(args.database_url)
+    try:
+        await reset(conn)
+        if not args.reset_only:
+            started = time.perf_counter()
+            await generate(conn, args.players, args.teams, args.members, args.bans, args.seed)
+            print(f"\n✅ Dataset generated in {time.perf_counter() - started:.1f}s")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,9 +3,24 @@ from discord import app_commands
 from discord.ext import commands
 import os
 import asyncio
+import io
+import tempfile
 from datetime import datetime
 from typing import Optional
+from database.backend import EXPORT_TABLES, RosterLimitError
 from database.db import db
+from utils.config import config, RESTART_KEYS
+from utils import data_export
+from utils.member_cache import get_or_fetch_member
+from utils.permissions import admin_or_bots
+from utils.metrics import metrics
+from utils.loop_monitor import loop_monitor
+from utils.profiler import profiler
+from utils.registration_capacity import registration_capacity
+from utils.role_reconciler import ReconcileError, reconcile_roles
+from utils.stats_import import ImportFileError, import_stats
+from utils.team_provisioning import ProvisionError, provision_teams, teardown_teams
+from utils.team_index import team_autocomplete, team_index
 
 
 class EditFieldSelect(discord.ui.Select):
@@ -162,9 +177,9 @@ class EditValueModal(discord.ui.Modal):
             print(f"✓ Confirmation sent to admin")
             
             # Log to bot logs channel
-            logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+            logs_channel_id = config.bot_logs_channel_id
             if logs_channel_id:
-                logs_channel = interaction.client.get_channel(int(logs_channel_id))
+                logs_channel = interaction.client.get_channel(logs_channel_id)
                 if logs_channel:
                     log_embed = discord.Embed(
                         title="🛠️ Admin: Player Registration Edited",
@@ -293,46 +308,34 @@ class TeamSelectDropdown(discord.ui.Select):
             return
         
         try:
-            # Check if user is already a member
-            team_members = await db.get_team_members(team_id)
-            is_member = any(m['discord_id'] == self.user_to_add.id for m in team_members)
-            
             if self.action_type == 'captain':
                 # Check if team already has a captain
                 team_info = await db.get_team_by_id(team_id)
                 current_captain_id = team_info.get('captain_discord_id')
                 
-                if is_member:
-                    # Update existing member to captain role
-                    await db.pool.execute(
-                        "UPDATE team_members SET role = 'captain' WHERE team_id = $1 AND discord_id = $2",
-                        team_id, self.user_to_add.id
-                    )
-                else:
-                    # Add as new captain
-                    await db.add_team_member(team_id, self.user_to_add.id, 'captain')
+                # Make them captain (adding them if needed) and demote a previous
+                # captain to player in one statement, so the single-captain limit holds
+                roles = {self.user_to_add.id: 'captain'}
+                if current_captain_id and current_captain_id != self.user_to_add.id and (
+                    team_id in await db.get_member_team_roles(current_captain_id)
+                ):
+                    roles[current_captain_id] = 'player'
+                await db.set_team_roles(team_id, roles)
                 
                 # Update teams table
                 await db.update_team(team_id, captain_discord_id=self.user_to_add.id)
                 
-                # If there was a previous captain, demote them to player
-                if current_captain_id and current_captain_id != self.user_to_add.id:
-                    await db.pool.execute(
-                        "UPDATE team_members SET role = 'player' WHERE team_id = $1 AND discord_id = $2",
-                        team_id, current_captain_id
-                    )
-                
                 # Assign captain role
                 try:
-                    captain_role_id = os.getenv('CAPTAIN_ROLE_ID')
+                    captain_role_id = config.captain_role_id
                     if captain_role_id:
-                        captain_role = interaction.guild.get_role(int(captain_role_id))
+                        captain_role = interaction.guild.get_role(captain_role_id)
                         if captain_role:
                             await self.user_to_add.add_roles(captain_role)
                     
                     # Remove captain role from old captain
                     if current_captain_id and current_captain_id != self.user_to_add.id:
-                        old_captain = interaction.guild.get_member(current_captain_id)
+                        old_captain = await get_or_fetch_member(interaction.guild, current_captain_id)
                         if old_captain and captain_role:
                             await old_captain.remove_roles(captain_role)
                 except Exception as e:
@@ -344,21 +347,14 @@ class TeamSelectDropdown(discord.ui.Select):
                 )
             
             elif self.action_type == 'manager':
-                if is_member:
-                    # Update existing member to manager role
-                    await db.pool.execute(
-                        "UPDATE team_members SET role = 'manager' WHERE team_id = $1 AND discord_id = $2",
-                        team_id, self.user_to_add.id
-                    )
-                else:
-                    # Add as new manager
-                    await db.add_team_member(team_id, self.user_to_add.id, 'manager')
+                # Add them or change their role (rejected by the database if the team is full)
+                await db.set_team_roles(team_id, {self.user_to_add.id: 'manager'})
                 
                 # Assign manager role
                 try:
-                    manager_role_id = os.getenv('MANAGER_ROLE_ID')
+                    manager_role_id = config.manager_role_id
                     if manager_role_id:
-                        manager_role = interaction.guild.get_role(int(manager_role_id))
+                        manager_role = interaction.guild.get_role(manager_role_id)
                         if manager_role:
                             await self.user_to_add.add_roles(manager_role)
                 except Exception as e:
@@ -370,15 +366,8 @@ class TeamSelectDropdown(discord.ui.Select):
                 )
             
             elif self.action_type == 'coach':
-                if is_member:
-                    # Update existing member to coach role
-                    await db.pool.execute(
-                        "UPDATE team_members SET role = 'coach' WHERE team_id = $1 AND discord_id = $2",
-                        team_id, self.user_to_add.id
-                    )
-                else:
-                    # Add as new coach
-                    await db.add_team_member(team_id, self.user_to_add.id, 'coach')
+                # Add them or change their role (rejected by the database if the team is full)
+                await db.set_team_roles(team_id, {self.user_to_add.id: 'coach'})
                 
                 await interaction.followup.send(
                     f"✅ {self.user_to_add.mention} has been added as coach of **{selected_team['team_name']}**!",
@@ -386,15 +375,8 @@ class TeamSelectDropdown(discord.ui.Select):
                 )
             
             elif self.action_type == 'player':
-                if is_member:
-                    # Update existing member to player role
-                    await db.pool.execute(
-                        "UPDATE team_members SET role = 'player' WHERE team_id = $1 AND discord_id = $2",
-                        team_id, self.user_to_add.id
-                    )
-                else:
-                    # Add as new player
-                    await db.add_team_member(team_id, self.user_to_add.id, 'player')
+                # Add them or change their role (rejected by the database if the team is full)
+                await db.set_team_roles(team_id, {self.user_to_add.id: 'player'})
                 
                 await interaction.followup.send(
                     f"✅ {self.user_to_add.mention} has been added as player to **{selected_team['team_name']}**!",
@@ -411,6 +393,11 @@ class TeamSelectDropdown(discord.ui.Select):
             except Exception as e:
                 print(f"Error assigning team role: {e}")
         
+        except RosterLimitError as e:
+            await interaction.followup.send(
+                f"❌ **{selected_team['team_name']}** has no room for another {e.role} (roster limit reached).",
+                ephemeral=True
+            )
         except Exception as e:
             await interaction.followup.send(
                 f"❌ Error: {str(e)}",
@@ -538,13 +525,14 @@ class RemoveManagerMemberSelectDropdown(discord.ui.Select):
                 "DELETE FROM team_members WHERE team_id = $1 AND discord_id = $2 AND role = 'manager'",
                 team_id, manager_discord_id
             )
+            db.forget_memberships(manager_discord_id)
             
             # Remove manager role from Discord user
             try:
-                manager_role_id = os.getenv('MANAGER_ROLE_ID')
+                manager_role_id = config.manager_role_id
                 if manager_role_id:
-                    manager_role = interaction.guild.get_role(int(manager_role_id))
-                    member = interaction.guild.get_member(manager_discord_id)
+                    manager_role = interaction.guild.get_role(manager_role_id)
+                    member = await get_or_fetch_member(interaction.guild, manager_discord_id)
                     if member and manager_role:
                         await member.remove_roles(manager_role)
                 
@@ -710,10 +698,11 @@ class RemovePlayerMemberSelectDropdown(discord.ui.Select):
                 "DELETE FROM team_members WHERE team_id = $1 AND discord_id = $2 AND role = 'player'",
                 team_id, player_discord_id
             )
+            db.forget_memberships(player_discord_id)
             
             # Remove Discord roles from user
             try:
-                member = interaction.guild.get_member(player_discord_id)
+                member = await get_or_fetch_member(interaction.guild, player_discord_id)
                 
                 if member:
                     # Check if player is in any other team
@@ -970,13 +959,13 @@ class EditTeamFieldSelect(discord.ui.Select):
                                 f.write(logo_data)
                             
                             # Upload to permanent Discord storage channel
-                            logo_storage_channel_id = os.getenv('LOGO_STORAGE_CHANNEL_ID')
+                            logo_storage_channel_id = config.logo_storage_channel_id
                             if not logo_storage_channel_id:
-                                logo_storage_channel_id = os.getenv('BOT_LOGS_CHANNEL_ID')
+                                logo_storage_channel_id = config.bot_logs_channel_id
                             
                             logo_url = None
                             if logo_storage_channel_id:
-                                storage_channel = interaction.guild.get_channel(int(logo_storage_channel_id))
+                                storage_channel = interaction.guild.get_channel(logo_storage_channel_id)
                                 if storage_channel:
                                     # Upload the saved file to get a permanent URL
                                     logo_file = discord.File(filename, filename=f"{self.team_data['team_name'].replace(' ', '_')}.png")
@@ -997,6 +986,7 @@ class EditTeamFieldSelect(discord.ui.Select):
                                     "UPDATE teams SET logo_url = $1, updated_at = NOW() WHERE id = $2",
                                     logo_url, self.team_data['id']
                                 )
+                                await team_index.refresh(self.team_data['id'])
                                 
                                 # Send confirmation
                                 confirm_embed = discord.Embed(
@@ -1090,6 +1080,7 @@ class EditTeamValueModal(discord.ui.Modal):
             # Update the team's field in database
             query = f"UPDATE teams SET {self.field} = $1, updated_at = NOW() WHERE id = $2"
             await db.pool.execute(query, new_value if new_value else None, self.team_data['id'])
+            await team_index.refresh(self.team_data['id'])
             
             # Send confirmation to admin
             embed = discord.Embed(
@@ -1120,6 +1111,15 @@ class Admin(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
     
+    async def _picker_teams(self, team_id: Optional[int], limit: Optional[int] = 25) -> list:
+        """Teams to offer in a team dropdown: the team picked via autocomplete, or the newest ones"""
+        if team_id is not None:
+            team = await db.get_team_by_id(team_id)
+            return [team] if team else []
+        
+        await team_index.ensure_loaded()
+        return team_index.newest(limit) if limit else team_index.teams()
+    
     @app_commands.command(
         name="admin-edit-player",
         description="[ADMIN] Edit a player's registration details"
@@ -1127,6 +1127,7 @@ class Admin(commands.Cog):
     @app_commands.describe(
         player="The player whose registration you want to edit"
     )
+    @admin_or_bots("❌ You don't have permission to use this command. Only administrators and bot managers can edit player registrations.")
     async def admin_edit_player(
         self,
         interaction: discord.Interaction,
@@ -1134,29 +1135,6 @@ class Admin(commands.Cog):
     ):
         """Edit a registered player's details."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command. Only administrators and bot managers can edit player registrations.",
-                ephemeral=True
-            )
-            return
-        
         # Defer response since we're doing database operations
         await interaction.response.defer(ephemeral=True)
         print(f"🔍 Admin checking player: {player.id}")
@@ -1230,6 +1208,7 @@ class Admin(commands.Cog):
         player="The player to ban",
         reason="Reason for the ban (optional)"
     )
+    @admin_or_bots("❌ You don't have permission to use this command. Only administrators and bot managers can ban players.")
     async def admin_ban_player(
         self,
         interaction: discord.Interaction,
@@ -1238,29 +1217,6 @@ class Admin(commands.Cog):
     ):
         """Ban a player from tournament registration."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command. Only administrators and bot managers can ban players.",
-                ephemeral=True
-            )
-            return
-        
         # Defer response
         await interaction.response.defer(ephemeral=True)
         print(f"🚫 Admin banning player: {player.id}")
@@ -1326,9 +1282,9 @@ class Admin(commands.Cog):
             print(f"✓ Player {player.id} banned successfully")
             
             # Log to bot logs channel
-            logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+            logs_channel_id = config.bot_logs_channel_id
             if logs_channel_id:
-                logs_channel = interaction.client.get_channel(int(logs_channel_id))
+                logs_channel = interaction.client.get_channel(logs_channel_id)
                 if logs_channel:
                     log_embed = discord.Embed(
                         title="🚫 Admin: Player Banned",
@@ -1392,6 +1348,7 @@ class Admin(commands.Cog):
     @app_commands.describe(
         player="The player to unban"
     )
+    @admin_or_bots("❌ You don't have permission to use this command. Only administrators and bot managers can unban players.")
     async def admin_unban_player(
         self,
         interaction: discord.Interaction,
@@ -1399,29 +1356,6 @@ class Admin(commands.Cog):
     ):
         """Unban a player and restore their registration privileges."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command. Only administrators and bot managers can unban players.",
-                ephemeral=True
-            )
-            return
-        
         # Defer response
         await interaction.response.defer(ephemeral=True)
         print(f"✅ Admin unbanning player: {player.id}")
@@ -1475,9 +1409,9 @@ class Admin(commands.Cog):
             print(f"✓ Player {player.id} unbanned successfully")
             
             # Log to bot logs channel
-            logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+            logs_channel_id = config.bot_logs_channel_id
             if logs_channel_id:
-                logs_channel = interaction.client.get_channel(int(logs_channel_id))
+                logs_channel = interaction.client.get_channel(logs_channel_id)
                 if logs_channel:
                     log_embed = discord.Embed(
                         title="✅ Admin: Player Unbanned",
@@ -1537,41 +1471,22 @@ class Admin(commands.Cog):
         name="admin-delete-team",
         description="[ADMIN] Permanently delete a team from the tournament"
     )
+    @app_commands.describe(team="Search for a team by name, tag or ID (otherwise the 25 newest are listed)")
+    @app_commands.autocomplete(team=team_autocomplete)
+    @admin_or_bots("❌ You don't have permission to use this command. Only administrators and bot managers can delete teams.")
     async def admin_delete_team(
         self,
-        interaction: discord.Interaction
+        interaction: discord.Interaction,
+        team: Optional[int] = None
     ):
         """Delete a team from the tournament."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command. Only administrators and bot managers can delete teams.",
-                ephemeral=True
-            )
-            return
-        
         # Defer response
         await interaction.response.defer(ephemeral=True)
         print(f"🗑️ Admin deleting team")
         
-        # Get all teams
-        all_teams = await db.get_all_teams()
+        # Teams to pick from
+        all_teams = await self._picker_teams(team)
         
         if not all_teams:
             embed = discord.Embed(
@@ -1603,6 +1518,7 @@ class Admin(commands.Cog):
     @app_commands.describe(
         player="The player to delete"
     )
+    @admin_or_bots("❌ You don't have permission to use this command. Only administrators and bot managers can delete players.")
     async def admin_delete_player(
         self,
         interaction: discord.Interaction,
@@ -1610,29 +1526,6 @@ class Admin(commands.Cog):
     ):
         """Delete a player's registration from the tournament."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command. Only administrators and bot managers can delete players.",
-                ephemeral=True
-            )
-            return
-        
         # Defer response
         await interaction.response.defer(ephemeral=True)
         print(f"🗑️ Admin deleting player: {player.id}")
@@ -1702,41 +1595,22 @@ class Admin(commands.Cog):
         name="admin-edit-team",
         description="[ADMIN] Edit a team's details"
     )
+    @app_commands.describe(team="Search for a team by name, tag or ID (otherwise the 25 newest are listed)")
+    @app_commands.autocomplete(team=team_autocomplete)
+    @admin_or_bots("❌ You don't have permission to use this command. Only administrators and bot managers can edit teams.")
     async def admin_edit_team(
         self,
-        interaction: discord.Interaction
+        interaction: discord.Interaction,
+        team: Optional[int] = None
     ):
         """Edit a registered team's details."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command. Only administrators and bot managers can edit teams.",
-                ephemeral=True
-            )
-            return
-        
         # Defer response
         await interaction.response.defer(ephemeral=True)
         print(f"🔧 Admin editing team")
         
-        # Get all teams
-        all_teams = await db.get_all_teams()
+        # Teams to pick from
+        all_teams = await self._picker_teams(team)
         
         if not all_teams:
             embed = discord.Embed(
@@ -1764,41 +1638,22 @@ class Admin(commands.Cog):
         name="admin-transfer-captain",
         description="[ADMIN] Transfer team captainship to another team member"
     )
+    @app_commands.describe(team="Search for a team by name, tag or ID (otherwise the 25 newest are listed)")
+    @app_commands.autocomplete(team=team_autocomplete)
+    @admin_or_bots("❌ You don't have permission to use this command. Only administrators and bot managers can transfer captainship.")
     async def admin_transfer_captain(
         self,
-        interaction: discord.Interaction
+        interaction: discord.Interaction,
+        team: Optional[int] = None
     ):
         """Transfer captainship of a team to another member."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command. Only administrators and bot managers can transfer captainship.",
-                ephemeral=True
-            )
-            return
-        
         # Defer response
         await interaction.response.defer(ephemeral=True)
         print(f"👑 Admin transferring captainship")
         
-        # Get all teams
-        all_teams = await db.get_all_teams()
+        # Teams to pick from
+        all_teams = await self._picker_teams(team)
         
         if not all_teams:
             embed = discord.Embed(
@@ -1826,32 +1681,10 @@ class Admin(commands.Cog):
         name="admin-all-teams",
         description="[ADMIN] View all registered teams"
     )
+    @admin_or_bots()
     async def admin_all_teams(self, interaction: discord.Interaction):
         """Display all registered teams with basic information."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-            return
-        
         await interaction.response.defer(ephemeral=True)
         
         # Get all teams
@@ -1907,32 +1740,10 @@ class Admin(commands.Cog):
         name="admin-team-info",
         description="[ADMIN] View detailed information about all teams and their members"
     )
+    @admin_or_bots()
     async def admin_team_info(self, interaction: discord.Interaction):
         """Display detailed information about all teams and their members."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-            return
-        
         await interaction.response.defer(ephemeral=True)
         
         # Get all teams
@@ -2039,37 +1850,16 @@ class Admin(commands.Cog):
         name="admin-assign-captain",
         description="[ADMIN] Assign a captain to a team"
     )
-    @app_commands.describe(user="The user to assign as captain")
-    async def admin_assign_captain(self, interaction: discord.Interaction, user: discord.Member):
+    @app_commands.describe(user="The user to assign as captain", team="Search for a team by name, tag or ID (otherwise the 25 newest are listed)")
+    @app_commands.autocomplete(team=team_autocomplete)
+    @admin_or_bots()
+    async def admin_assign_captain(self, interaction: discord.Interaction, user: discord.Member, team: Optional[int] = None):
         """Assign a captain to a team."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-            return
-        
         await interaction.response.defer(ephemeral=True)
         
-        # Get all teams
-        all_teams = await db.get_all_teams()
+        # Teams to pick from
+        all_teams = await self._picker_teams(team)
         
         if not all_teams:
             await interaction.followup.send(
@@ -2090,37 +1880,16 @@ class Admin(commands.Cog):
         name="admin-add-manager",
         description="[ADMIN] Add a manager to a team"
     )
-    @app_commands.describe(user="The user to add as manager")
-    async def admin_add_manager(self, interaction: discord.Interaction, user: discord.Member):
+    @app_commands.describe(user="The user to add as manager", team="Search for a team by name, tag or ID (otherwise the 25 newest are listed)")
+    @app_commands.autocomplete(team=team_autocomplete)
+    @admin_or_bots()
+    async def admin_add_manager(self, interaction: discord.Interaction, user: discord.Member, team: Optional[int] = None):
         """Add a manager to a team."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-            return
-        
         await interaction.response.defer(ephemeral=True)
         
-        # Get all teams
-        all_teams = await db.get_all_teams()
+        # Teams to pick from
+        all_teams = await self._picker_teams(team)
         
         if not all_teams:
             await interaction.followup.send(
@@ -2141,51 +1910,16 @@ class Admin(commands.Cog):
         name="admin-remove-manager",
         description="[ADMIN] Remove a manager from a team"
     )
-    async def admin_remove_manager(self, interaction: discord.Interaction):
+    @app_commands.describe(team="Search for a team by name, tag or ID (otherwise the 25 newest are listed)")
+    @app_commands.autocomplete(team=team_autocomplete)
+    @admin_or_bots()
+    async def admin_remove_manager(self, interaction: discord.Interaction, team: Optional[int] = None):
         """Remove a manager from a team."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-            return
-        
         await interaction.response.defer(ephemeral=True)
         
-        # Get all teams
-        all_teams = await db.get_all_teams()
-        
-        if not all_teams:
-            await interaction.followup.send(
-                "❌ No teams are registered yet.",
-                ephemeral=True
-            )
-            return
-        
-        # Filter teams that have managers
-        teams_with_managers = []
-        for team in all_teams:
-            members = await db.get_team_members(team['id'])
-            managers = [m for m in members if m['role'] == 'manager']
-            if managers:
-                teams_with_managers.append(team)
+        # Teams that have managers (the team picked via autocomplete, or the 25 newest - Discord limit)
+        teams_with_managers = await db.get_teams_with_role('manager', team_id=team, limit=25)
         
         if not teams_with_managers:
             await interaction.followup.send(
@@ -2206,37 +1940,16 @@ class Admin(commands.Cog):
         name="admin-add-coach",
         description="[ADMIN] Add a coach to a team"
     )
-    @app_commands.describe(user="The user to add as coach")
-    async def admin_add_coach(self, interaction: discord.Interaction, user: discord.Member):
+    @app_commands.describe(user="The user to add as coach", team="Search for a team by name, tag or ID (otherwise the 25 newest are listed)")
+    @app_commands.autocomplete(team=team_autocomplete)
+    @admin_or_bots()
+    async def admin_add_coach(self, interaction: discord.Interaction, user: discord.Member, team: Optional[int] = None):
         """Add a coach to a team."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-            return
-        
         await interaction.response.defer(ephemeral=True)
         
-        # Get all teams
-        all_teams = await db.get_all_teams()
+        # Teams to pick from
+        all_teams = await self._picker_teams(team)
         
         if not all_teams:
             await interaction.followup.send(
@@ -2257,37 +1970,16 @@ class Admin(commands.Cog):
         name="admin-add-player",
         description="[ADMIN] Add a player to a team"
     )
-    @app_commands.describe(user="The user to add as player")
-    async def admin_add_player(self, interaction: discord.Interaction, user: discord.Member):
+    @app_commands.describe(user="The user to add as player", team="Search for a team by name, tag or ID (otherwise the 25 newest are listed)")
+    @app_commands.autocomplete(team=team_autocomplete)
+    @admin_or_bots()
+    async def admin_add_player(self, interaction: discord.Interaction, user: discord.Member, team: Optional[int] = None):
         """Add a player to a team."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-            return
-        
         await interaction.response.defer(ephemeral=True)
         
-        # Get all teams
-        all_teams = await db.get_all_teams()
+        # Teams to pick from
+        all_teams = await self._picker_teams(team)
         
         if not all_teams:
             await interaction.followup.send(
@@ -2308,51 +2000,16 @@ class Admin(commands.Cog):
         name="admin-remove-player",
         description="[ADMIN] Remove a player from a team"
     )
-    async def admin_remove_player(self, interaction: discord.Interaction):
+    @app_commands.describe(team="Search for a team by name, tag or ID (otherwise the 25 newest are listed)")
+    @app_commands.autocomplete(team=team_autocomplete)
+    @admin_or_bots()
+    async def admin_remove_player(self, interaction: discord.Interaction, team: Optional[int] = None):
         """Remove a player from a team."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-            return
-        
         await interaction.response.defer(ephemeral=True)
         
-        # Get all teams
-        all_teams = await db.get_all_teams()
-        
-        if not all_teams:
-            await interaction.followup.send(
-                "❌ No teams are registered yet.",
-                ephemeral=True
-            )
-            return
-        
-        # Filter teams that have players
-        teams_with_players = []
-        for team in all_teams:
-            members = await db.get_team_members(team['id'])
-            players = [m for m in members if m['role'] == 'player']
-            if players:
-                teams_with_players.append(team)
+        # Teams that have players (the team picked via autocomplete, or the 25 newest - Discord limit)
+        teams_with_players = await db.get_teams_with_role('player', team_id=team, limit=25)
         
         if not teams_with_players:
             await interaction.followup.send(
@@ -2373,32 +2030,10 @@ class Admin(commands.Cog):
         name="admin-registration-info",
         description="[ADMIN] View all team registrations with detailed player information"
     )
+    @admin_or_bots()
     async def admin_registration_info(self, interaction: discord.Interaction):
         """Display all registered teams with complete player information."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-            return
-        
         await interaction.response.defer(ephemeral=True)
         
         # Get all teams
@@ -2414,9 +2049,12 @@ class Admin(commands.Cog):
         # Create embeds for each team (Discord has a limit of 10 embeds per message)
         embeds = []
         
+        roster_limit = (await db.get_roster_limits()).get('player')
+        
         for team in all_teams:
             # Get team members
             team_members = await db.get_team_members(team['id'])
+            player_count = sum(1 for m in team_members if m['role'] in ('captain', 'player'))
             
             # Create embed for this team
             embed = discord.Embed(
@@ -2432,7 +2070,7 @@ class Admin(commands.Cog):
                     f"**Region:** {team['region']}\n"
                     f"**Team ID:** `{team['id']}`\n"
                     f"**Created:** {team['created_at'].strftime('%Y-%m-%d %H:%M UTC')}\n"
-                    f"**Members:** {len(team_members)}/5"
+                    f"**Members:** {len(team_members)} ({player_count}/{roster_limit} players)"
                 ),
                 inline=False
             )
@@ -2539,32 +2177,10 @@ class Admin(commands.Cog):
         name="sync",
         description="[ADMIN] Sync slash commands with Discord"
     )
+    @admin_or_bots()
     async def sync_commands(self, interaction: discord.Interaction):
         """Sync all slash commands to Discord."""
         
-        # Check if user has administrator role or bots role
-        admin_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-        bots_role_id = os.getenv("BOTS_ROLE_ID")
-        
-        has_permission = False
-        
-        if admin_role_id:
-            admin_role = interaction.guild.get_role(int(admin_role_id))
-            if admin_role and admin_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission and bots_role_id:
-            bots_role = interaction.guild.get_role(int(bots_role_id))
-            if bots_role and bots_role in interaction.user.roles:
-                has_permission = True
-        
-        if not has_permission:
-            await interaction.response.send_message(
-                "❌ You don't have permission to use this command.",
-                ephemeral=True
-            )
-            return
-        
         await interaction.response.defer(ephemeral=True)
         
         try:
@@ -2639,6 +2255,521 @@ class Admin(commands.Cog):
             print(f"✗ Unexpected sync error: {e}")
             import traceback
             traceback.print_exc()
+    
+    @app_commands.command(
+        name="admin-metrics",
+        description="[ADMIN] View bot health metrics (event loop lag, stalls)"
+    )
+    @admin_or_bots()
+    async def admin_metrics(self, interaction: discord.Interaction):
+        """Display the in-process health metrics and recent event loop stalls."""
+        
+        embed = discord.Embed(
+            title="📈 Bot Health Metrics",
+            color=discord.Color.blue(),
+            timestamp=discord.utils.utcnow()
+        )
+        
+        metric_lines = metrics.format_lines()
+        embed.add_field(
+            name="📊 Metrics",
+            value="```\n" + "\n".join(metric_lines)[:1000] + "\n```" if metric_lines else "*No metrics recorded yet*",
+            inline=False
+        )
+        
+        if loop_monitor:
+            stalls = loop_monitor.recent_stalls(limit=3)
+            if stalls:
+                for stall in stalls:
+                    detected = datetime.utcfromtimestamp(stall['detected_at']).strftime('%H:%M:%S UTC')
+                    stack_tail = "".join(stall['stack'][-4:])[-700:] or "No stack captured"
+                    embed.add_field(
+                        name=f"⚠️ Stall at {detected} ({stall['duration_ms']:.0f}ms)",
+                        value=f"**Task:** `{stall['task']}`\n**Coroutine:** `{stall['coroutine']}`\n```py\n{stack_tail}\n```",
+                        inline=False
+                    )
+            else:
+                embed.add_field(name="✅ Event Loop", value="No stalls detected", inline=False)
+        else:
+            embed.add_field(name="⚠️ Event Loop", value="Loop monitor is disabled (`LOOP_MONITOR_ENABLED`)", inline=False)
+        
+        embed.set_footer(text=f"Requested by {interaction.user.name}")
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @app_commands.command(
+        name="admin-profiling",
+        description="[ADMIN] Start, stop or dump the command/view callback profiler"
+    )
+    @app_commands.describe(action="What to do with the profiler")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="Start sampling", value="start"),
+        app_commands.Choice(name="Stop sampling and write profiles", value="stop"),
+        app_commands.Choice(name="Write profiles to disk", value="dump"),
+        app_commands.Choice(name="Show hottest handlers", value="status"),
+        app_commands.Choice(name="Clear collected samples", value="reset")
+    ])
+    @admin_or_bots()
+    async def admin_profiling(self, interaction: discord.Interaction, action: app_commands.Choice[str]):
+        """Control the opt-in sampling profiler."""
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        embed = discord.Embed(
+            title="🔬 Profiler",
+            color=discord.Color.blue(),
+            timestamp=discord.utils.utcnow()
+        )
+        
+        if action.value == "start":
+            if not profiler.handlers:
+                profiler.register_bot(self.bot)
+            profiler.start()
+            embed.description = f"Sampling every **{profiler.interval * 1000:.0f}ms** across **{len(profiler.handlers)}** handlers."
+        elif action.value in ("stop", "dump"):
+            if action.value == "stop":
+                profiler.stop()
+            # Writing files is blocking - keep it off the event loop
+            paths = await asyncio.to_thread(profiler.dump)
+            embed.description = f"Wrote **{len(paths)}** folded-stack file(s) to `{profiler.output_dir}/`."
+        elif action.value == "reset":
+            profiler.reset()
+            embed.description = "Collected samples cleared."
+        
+        rows = profiler.summary(limit=10)
+        if rows:
+            embed.add_field(
+                name="🔥 Hottest Handlers",
+                value="\n".join(
+                    f"`{row['handler']}` - {row['samples']} samples (~{row['ms']:.0f}ms on loop)"
+                    for row in rows
+                )[:1024],
+                inline=False
+            )
+        embed.set_footer(text=f"Running: {'yes' if profiler.running else 'no'} • Total samples: {profiler.total_samples}")
+        
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(
+        name="admin-reload-config",
+        description="[ADMIN] Re-read the .env file without restarting the bot"
+    )
+    @admin_or_bots()
+    async def admin_reload_config(self, interaction: discord.Interaction):
+        """Reload role/channel settings from the .env file."""
+        
+        changed = config.reload()
+        restart_needed = [key for key in changed if key in RESTART_KEYS]
+        
+        embed = discord.Embed(
+            title="⚙️ Configuration Reloaded",
+            color=discord.Color.red() if config.errors else discord.Color.green(),
+            timestamp=discord.utils.utcnow()
+        )
+        embed.add_field(
+            name="Changed",
+            value=", ".join(f"`{key}`" for key in changed)[:1024] if changed else "Nothing changed",
+            inline=False
+        )
+        if restart_needed:
+            embed.add_field(
+                name="⚠️ Needs Restart",
+                value=", ".join(f"`{key}`" for key in restart_needed)[:1024],
+                inline=False
+            )
+        if config.errors:
+            embed.add_field(
+                name="❌ Invalid Values (ignored)",
+                value=", ".join(f"`{key}`" for key in config.errors)[:1024],
+                inline=False
+            )
+        
+        print(f"⚙️  Config reloaded by {interaction.user.name}: {', '.join(changed) or 'no changes'}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(
+        name="admin-import-stats",
+        description="[ADMIN] Import player stats from a CSV or JSON file"
+    )
+    @app_commands.describe(
+        file="CSV or JSON with discord_id and/or ign plus stat columns (kills, deaths, ...)",
+        mode="Add the values to the current stats or replace them",
+        dry_run="Only report what would change (default: yes)"
+    )
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="Add to current stats", value="add"),
+        app_commands.Choice(name="Replace current stats", value="set")
+    ])
+    @admin_or_bots()
+    async def admin_import_stats(
+        self,
+        interaction: discord.Interaction,
+        file: discord.Attachment,
+        mode: app_commands.Choice[str],
+        dry_run: bool = True
+    ):
+        """Bulk-import player stats, with a per-row report."""
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            summary, report = await import_stats(file, mode.value, dry_run)
+        except ImportFileError as e:
+            await interaction.followup.send(f"❌ {e}", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title=f"📥 Stats Import{' (Dry Run)' if dry_run else ''}",
+            description=f"`{file.filename}` • {mode.name}",
+            color=discord.Color.orange() if dry_run else discord.Color.green(),
+            timestamp=discord.utils.utcnow()
+        )
+        embed.add_field(
+            name="Rows",
+            value=(
+                f"**Valid:** `{summary['staged']}`\n"
+                f"**Invalid:** `{summary['invalid']}`\n"
+                f"**No matching player:** `{summary['rejected']}`"
+            ),
+            inline=True
+        )
+        embed.add_field(
+            name="Players",
+            value=f"**{'Would change' if dry_run else 'Changed'}:** `{summary['players']}`",
+            inline=True
+        )
+        totals = [f"{stat}: {delta:+}" for stat, delta in summary['totals'].items() if delta]
+        if totals:
+            embed.add_field(name="Total Change", value="```\n" + "\n".join(totals) + "\n```", inline=False)
+        if report.errors:
+            embed.add_field(
+                name="⚠️ Rejected Rows",
+                value="\n".join(report.errors)[:1000] + ("\n..." if report.invalid > len(report.errors) else ""),
+                inline=False
+            )
+        if dry_run:
+            embed.set_footer(text="Nothing was written - run again with dry_run: False to apply")
+        
+        print(
+            f"📥 Stats import by {interaction.user.name} ({mode.value}, dry run: {dry_run}): "
+            f"{summary['staged']} rows, {summary['players']} players"
+        )
+        report_name = f"{os.path.splitext(file.filename)[0]}_report.csv"
+        await interaction.followup.send(embed=embed, file=report.to_discord_file(report_name), ephemeral=True)
+
+    @app_commands.command(
+        name="admin-match-stats",
+        description="[ADMIN] Record a player's stats for one match"
+    )
+    @app_commands.describe(
+        player="The player",
+        kills="Kills in the match",
+        deaths="Deaths in the match",
+        assists="Assists in the match",
+        won="Whether the player's team won",
+        mvp="Whether the player was the match MVP",
+        source="Bracket or Swiss match (optional)",
+        match_id="Bracket/Swiss match ID (optional)"
+    )
+    @app_commands.choices(source=[
+        app_commands.Choice(name="Bracket", value="bracket"),
+        app_commands.Choice(name="Swiss", value="swiss")
+    ])
+    @admin_or_bots()
+    async def admin_match_stats(
+        self,
+        interaction: discord.Interaction,
+        player: discord.Member,
+        kills: app_commands.Range[int, 0],
+        deaths: app_commands.Range[int, 0],
+        assists: app_commands.Range[int, 0],
+        won: bool,
+        mvp: bool = False,
+        source: Optional[app_commands.Choice[str]] = None,
+        match_id: Optional[int] = None
+    ):
+        """Add one match line to the player's history, lifetime stats and form."""
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        if not await db.get_player_by_discord_id(player.id):
+            await interaction.followup.send(f"❌ {player.mention} is not a registered player.", ephemeral=True)
+            return
+        
+        # The team they play for (captain or player), if any
+        roles = await db.get_member_team_roles(player.id)
+        team_id = next((team_id for team_id, role in roles.items() if role in ('captain', 'player')), None)
+        await db.record_match_stats(
+            [{
+                'discord_id': player.id,
+                'team_id': team_id,
+                'kills': kills,
+                'deaths': deaths,
+                'assists': assists,
+                'won': won,
+                'mvp': mvp
+            }],
+            source=source.value if source else None,
+            match_id=match_id
+        )
+        profile = await db.get_player_profile(player.id)
+        
+        print(f"📊 Match stats recorded for {player} by {interaction.user.name}: {kills}/{deaths}/{assists}, won: {won}")
+        await interaction.followup.send(
+            f"✅ Recorded **{kills}/{deaths}/{assists}** ({'win' if won else 'loss'}{', MVP' if mvp else ''}) for {player.mention}.\n"
+            f"Form: {profile['form_wins']}W - {profile['form_matches'] - profile['form_wins']}L over the last "
+            f"{profile['form_matches']} matches.",
+            ephemeral=True
+        )
+    
+    @app_commands.command(
+        name="admin-export",
+        description="[ADMIN] Export players, teams, members, stats and bans as files"
+    )
+    @app_commands.describe(
+        format="File format (CSV and NDJSON are gzipped)",
+        table="Export one table (defaults to all of them)"
+    )
+    @app_commands.choices(
+        format=[app_commands.Choice(name=name.upper(), value=name) for name in data_export.FORMATS],
+        table=[app_commands.Choice(name=name, value=name) for name in EXPORT_TABLES]
+    )
+    @admin_or_bots()
+    async def admin_export(
+        self,
+        interaction: discord.Interaction,
+        format: app_commands.Choice[str],
+        table: Optional[app_commands.Choice[str]] = None
+    ):
+        """Stream tables to compressed files and upload them in parts."""
+        
+        await interaction.response.defer(ephemeral=True)
+        
+        tables = [table.value] if table else list(EXPORT_TABLES)
+        with tempfile.TemporaryDirectory(prefix="export-") as out_dir:
+            try:
+                result = await data_export.export(tables, format.value, out_dir, part_bytes=data_export.DISCORD_UPLOAD_BYTES)
+            except data_export.ExportError as e:
+                await interaction.followup.send(f"❌ {e}", ephemeral=True)
+                return
+            
+            embed = discord.Embed(
+                title="📤 Data Export",
+                description=(
+                    f"**{result['rows']:,}** rows in **{result['seconds']:.1f}s** "
+                    f"({result['rows_per_second']:,.0f} rows/s) • {result['bytes'] / (1024 * 1024):.1f} MB {format.name}"
+                ),
+                color=discord.Color.green(),
+                timestamp=discord.utils.utcnow()
+            )
+            for name, info in result['tables'].items():
+                embed.add_field(
+                    name=name,
+                    value=f"`{info['rows']:,}` rows\n{len(info['files'])} file(s), {info['bytes'] / 1024:,.0f} KB",
+                    inline=True
+                )
+            print(
+                f"📤 Export by {interaction.user.name} ({format.value}): {result['rows']} rows "
+                f"in {result['seconds']:.1f}s ({result['rows_per_second']:.0f} rows/s)"
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            
+            paths = [path for info in result['tables'].values() for path in info['files']]
+            for batch in data_export.upload_batches(paths):
+                await interaction.followup.send(
+                    files=[discord.File(path, filename=os.path.basename(path)) for path in batch],
+                    ephemeral=True
+                )
+    
+    @app_commands.command(
+        name="admin-reconcile-roles",
+        description="[ADMIN] Sync team, captain, manager and region roles with the database"
+    )
+    @app_commands.describe(dry_run="Only report which members are out of sync (default: yes)")
+    @admin_or_bots()
+    async def admin_reconcile_roles(self, interaction: discord.Interaction, dry_run: bool = True):
+        """Diff every member's managed roles against the database and fix them."""
+        
+        await interaction.response.defer(ephemeral=True)
+        title = f"🔄 Role Reconciliation{' (Dry Run)' if dry_run else ''}"
+        progress_message = await interaction.followup.send(
+            embed=discord.Embed(title=title, description="Reading the database...", color=discord.Color.blue()),
+            ephemeral=True, wait=True
+        )
+        
+        def counts(summary: dict) -> str:
+            return (
+                f"**Scanned:** `{summary['scanned']:,}` members\n"
+                f"**Out of sync:** `{summary['out_of_sync']:,}`\n"
+                f"**{'Would change' if summary['dry_run'] else 'Changed'}:** "
+                f"`{summary['out_of_sync'] if summary['dry_run'] else summary['applied']:,}`"
+                + (f"\n**Failed:** `{summary['failed']:,}`" if summary['failed'] else "")
+            )
+        
+        async def on_progress(summary: dict):
+            await progress_message.edit(embed=discord.Embed(
+                title=title,
+                description=f"**{summary['phase'].capitalize()}** • {summary['seconds']:.0f}s\n{counts(summary)}",
+                color=discord.Color.blue()
+            ))
+        
+        try:
+            summary = await reconcile_roles(interaction.guild, dry_run, on_progress)
+        except ReconcileError as e:
+            await progress_message.edit(embed=discord.Embed(title=title, description=f"❌ {e}", color=discord.Color.red()))
+            return
+        
+        embed = discord.Embed(
+            title=title,
+            description=f"Finished in **{summary['seconds']:.1f}s**\n{counts(summary)}",
+            color=discord.Color.orange() if dry_run else discord.Color.green(),
+            timestamp=discord.utils.utcnow()
+        )
+        for name, counter in (("Added", summary['added']), ("Removed", summary['removed'])):
+            if counter:
+                lines = []
+                for role_id, count in counter.most_common(10):
+                    role = interaction.guild.get_role(role_id)
+                    lines.append(f"{role.mention if role else role_id}: `{count:,}`")
+                embed.add_field(name=f"Roles {name}", value="\n".join(lines), inline=True)
+        if summary['not_in_guild']:
+            embed.add_field(name="Not in Server", value=f"`{summary['not_in_guild']:,}` registered users", inline=True)
+        if summary['unassignable']:
+            embed.add_field(
+                name="⚠️ Skipped Roles (above the bot's role)",
+                value=", ".join(summary['unassignable'])[:1000],
+                inline=False
+            )
+        if summary['errors']:
+            embed.add_field(name="⚠️ Failed Members", value="\n".join(summary['errors'])[:1000], inline=False)
+        if dry_run:
+            embed.set_footer(text="Nothing was changed - run again with dry_run: False to apply")
+        
+        print(
+            f"🔄 Role reconciliation by {interaction.user.name} (dry run: {dry_run}): {summary['scanned']} scanned, "
+            f"{summary['out_of_sync']} out of sync, {summary['applied']} changed, {summary['failed']} failed"
+        )
+        report = discord.File(io.BytesIO(summary['report']), filename="role_reconciliation.csv")
+        try:
+            await interaction.followup.send(embed=embed, file=report, ephemeral=True)
+        except discord.HTTPException:
+            # A long run outlives the 15 minute interaction token: send the result by DM
+            report.reset()
+            try:
+                await interaction.user.send(embed=embed, file=report)
+            except discord.HTTPException as e:
+                print(f"✗ Could not send the role reconciliation result to {interaction.user.name}: {e}")
+    
+    async def _run_provisioning(self, interaction: discord.Interaction, title: str, run) -> Optional[dict]:
+        """Run provision_teams/teardown_teams, editing one message with its progress"""
+        progress_message = await interaction.followup.send(
+            embed=discord.Embed(title=title, description="Planning...", color=discord.Color.blue()),
+            ephemeral=True, wait=True
+        )
+        
+        async def on_progress(summary: dict):
+            await progress_message.edit(embed=discord.Embed(
+                title=title,
+                description=(
+                    f"**{summary['phase'].capitalize()}** • {summary['seconds']:.0f}s\n"
+                    f"`{summary['done'] + summary['failed']}/{summary['total']}` done"
+                    + (f", `{summary['failed']}` failed" if summary['failed'] else "")
+                ),
+                color=discord.Color.blue()
+            ))
+        
+        try:
+            summary = await run(on_progress)
+        except ProvisionError as e:
+            await progress_message.edit(embed=discord.Embed(title=title, description=f"❌ {e}", color=discord.Color.red()))
+            return None
+        
+        embed = discord.Embed(
+            title=title,
+            description=(
+                f"**Teams:** `{summary['teams']}`\n"
+                f"**Roles:** `{summary['roles']}`\n"
+                f"**Categories:** `{summary['categories']}`\n"
+                f"**Channels:** `{summary['channels']}`"
+                + (f"\n**Members to give a team role:** `{summary['members']}`" if summary['members'] else "")
+            ),
+            color=discord.Color.orange() if summary['dry_run'] else (discord.Color.red() if summary['failed'] else discord.Color.green()),
+            timestamp=discord.utils.utcnow()
+        )
+        if not summary['dry_run']:
+            embed.add_field(
+                name="Result",
+                value=(
+                    f"**Done:** `{summary['done']}` of `{summary['total']}` in {summary['seconds']:.1f}s\n"
+                    f"**Teams updated:** `{summary['updated']}`"
+                    + (f"\n**Failed:** `{summary['failed']}`" if summary['failed'] else "")
+                    + (f"\n**Skipped:** `{summary['skipped']}` (role or category failed)" if summary['skipped'] else "")
+                    + (
+                        f"\n**Team roles given:** `{summary['assigned']}`"
+                        f" of `{summary['members']}`"
+                        + (f", `{summary['member_failures']}` failed" if summary['member_failures'] else "")
+                        + (f", `{summary['not_in_guild']}` not in the server" if summary['not_in_guild'] else "")
+                        if summary['members'] else ""
+                    )
+                ),
+                inline=False
+            )
+        if summary['errors']:
+            embed.add_field(name="⚠️ Errors", value="\n".join(summary['errors'])[:1000], inline=False)
+        if summary['dry_run']:
+            embed.set_footer(text="Nothing was changed - run again with dry_run: False to apply")
+        elif summary['failed'] or summary['skipped']:
+            embed.set_footer(text="Run the command again to retry - finished steps are not repeated")
+        
+        try:
+            await progress_message.edit(embed=embed)
+        except discord.HTTPException:
+            # A long run outlives the 15 minute interaction token
+            await interaction.channel.send(content=interaction.user.mention, embed=embed)
+        return summary
+    
+    @app_commands.command(
+        name="admin-provision-teams",
+        description="[ADMIN] Create a role and private text/voice channels for every team"
+    )
+    @app_commands.describe(dry_run="Only report what would be created (default: yes)")
+    @admin_or_bots()
+    async def admin_provision_teams(self, interaction: discord.Interaction, dry_run: bool = True):
+        """Provision every team's role and private channels, resuming an earlier run."""
+        
+        await interaction.response.defer(ephemeral=True)
+        title = f"🏗️ Team Provisioning{' (Dry Run)' if dry_run else ''}"
+        summary = await self._run_provisioning(
+            interaction, title, lambda on_progress: provision_teams(interaction.guild, dry_run, on_progress)
+        )
+        if summary:
+            print(
+                f"🏗️ Team provisioning by {interaction.user.name} (dry run: {dry_run}): "
+                f"{summary['done']}/{summary['total']} created, {summary['failed']} failed, {summary['updated']} teams updated"
+            )
+    
+    @app_commands.command(
+        name="admin-teardown-teams",
+        description="[ADMIN] Delete the team channels (and optionally roles) created by provisioning"
+    )
+    @app_commands.describe(
+        roles="Also delete the team roles provisioning created (default: no)",
+        dry_run="Only report what would be deleted (default: yes)"
+    )
+    @admin_or_bots()
+    async def admin_teardown_teams(self, interaction: discord.Interaction, roles: bool = False, dry_run: bool = True):
+        """Delete what team provisioning created."""
+        
+        await interaction.response.defer(ephemeral=True)
+        title = f"🧹 Team Teardown{' (Dry Run)' if dry_run else ''}"
+        summary = await self._run_provisioning(
+            interaction, title, lambda on_progress: teardown_teams(interaction.guild, roles, dry_run, on_progress)
+        )
+        if summary:
+            print(
+                f"🧹 Team teardown by {interaction.user.name} (roles: {roles}, dry run: {dry_run}): "
+                f"{summary['done']}/{summary['total']} deleted, {summary['failed']} failed"
+            )
 
 class AdminTransferCaptainTeamView(discord.ui.View):
     """View with team selection dropdown for captain transfer."""
@@ -2760,21 +2891,18 @@ class AdminTransferCaptainMemberSelect(discord.ui.Select):
         await interaction.response.defer(ephemeral=True)
         
         try:
+            # Swap roles in team_members in one statement (checked against the roster limits)
+            roles = {new_captain_id: 'captain'}
+            if any(m['discord_id'] == self.current_captain_id for m in self.team_members):
+                roles[self.current_captain_id] = 'player'
+            await db.set_team_roles(self.team_id, roles)
+            
             # Update captain in database
             await db.pool.execute(
                 "UPDATE teams SET captain_discord_id = $1, updated_at = NOW() WHERE id = $2",
                 new_captain_id, self.team_id
             )
-            
-            # Update roles in team_members table
-            await db.pool.execute(
-                "UPDATE team_members SET role = 'player' WHERE team_id = $1 AND discord_id = $2",
-                self.team_id, self.current_captain_id
-            )
-            await db.pool.execute(
-                "UPDATE team_members SET role = 'captain' WHERE team_id = $1 AND discord_id = $2",
-                self.team_id, new_captain_id
-            )
+            await team_index.refresh(self.team_id)
             
             # Send confirmation
             embed = discord.Embed(
@@ -2911,6 +3039,7 @@ class DeleteTeamView(discord.ui.View):
                 logo_path = str(filepath)
                 query = "UPDATE teams SET logo_url = $1, updated_at = NOW() WHERE id = $2"
                 await db.pool.execute(query, logo_path, self.team_data['id'])
+                await team_index.refresh(self.team_data['id'])
                 
                 # Delete the user's message with the image
                 await message.delete()
@@ -2950,9 +3079,9 @@ class DeleteTeamView(discord.ui.View):
                 )
                 
                 # Log to bot logs channel
-                logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+                logs_channel_id = config.bot_logs_channel_id
                 if logs_channel_id:
-                    logs_channel = interaction.client.get_channel(int(logs_channel_id))
+                    logs_channel = interaction.client.get_channel(logs_channel_id)
                     if logs_channel:
                         log_embed = discord.Embed(
                             title="🛠️ Admin: Team Logo Updated",
@@ -3074,6 +3203,7 @@ class EditTeamValueModal(discord.ui.Modal):
             # Update the team's field in database
             query = f"UPDATE teams SET {self.field} = $1, updated_at = NOW() WHERE id = $2"
             await db.pool.execute(query, new_value if new_value else None, self.team_data['id'])
+            await team_index.refresh(self.team_data['id'])
             print(f"✓ Team database updated successfully")
             
             # Field labels for logging
@@ -3117,9 +3247,9 @@ class EditTeamValueModal(discord.ui.Modal):
             print(f"✓ Confirmation sent to admin")
             
             # Log to bot logs channel
-            logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+            logs_channel_id = config.bot_logs_channel_id
             if logs_channel_id:
-                logs_channel = interaction.client.get_channel(int(logs_channel_id))
+                logs_channel = interaction.client.get_channel(logs_channel_id)
                 if logs_channel:
                     log_embed = discord.Embed(
                         title="🛠️ Admin: Team Details Edited",
@@ -3384,35 +3514,25 @@ class AdminTransferCaptainMemberSelect(discord.ui.Select):
                 )
                 return
             
-            # Update team captain in database
-            await db.pool.execute(
-                "UPDATE teams SET captain_discord_id = $1, updated_at = NOW() WHERE id = $2",
-                new_captain_id,
-                self.team['id']
-            )
-            
-            # Update old captain's role to their previous role or manager
+            # Update old captain's role to their previous role or manager, and the
+            # new captain's to captain, in one statement (checked against the roster limits)
+            roles = {new_captain_id: 'captain'}
             old_captain_member = next((m for m in self.members if m['discord_id'] == old_captain_id), None)
             if old_captain_member:
                 # If old captain was also a player, keep them as player, otherwise make them manager
                 new_role = 'player' if old_captain_member['role'] == 'captain' else old_captain_member['role']
                 if new_role == 'captain':  # Safety check
                     new_role = 'manager'
-                
-                await db.pool.execute(
-                    "UPDATE team_members SET role = $1 WHERE team_id = $2 AND discord_id = $3",
-                    new_role,
-                    self.team['id'],
-                    old_captain_id
-                )
+                roles[old_captain_id] = new_role
+            await db.set_team_roles(self.team['id'], roles)
             
-            # Update new captain's role to captain
+            # Update team captain in database
             await db.pool.execute(
-                "UPDATE team_members SET role = $1 WHERE team_id = $2 AND discord_id = $3",
-                'captain',
-                self.team['id'],
-                new_captain_id
+                "UPDATE teams SET captain_discord_id = $1, updated_at = NOW() WHERE id = $2",
+                new_captain_id,
+                self.team['id']
             )
+            await team_index.refresh(self.team['id'])
             
             # Send confirmation
             embed = discord.Embed(
@@ -3441,9 +3561,9 @@ class AdminTransferCaptainMemberSelect(discord.ui.Select):
             print(f"✓ Captainship transferred for team {self.team['id']}: {old_captain_id} → {new_captain_id}")
             
             # Log to bot logs channel
-            logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+            logs_channel_id = config.bot_logs_channel_id
             if logs_channel_id:
-                logs_channel = interaction.client.get_channel(int(logs_channel_id))
+                logs_channel = interaction.client.get_channel(logs_channel_id)
                 if logs_channel:
                     log_embed = discord.Embed(
                         title="👑 Admin: Captainship Transferred",
@@ -3607,9 +3727,9 @@ class DeletePlayerConfirmView(discord.ui.View):
             print(f"✓ Player {self.player.id} deleted by admin {self.admin_user.id}")
             
             # Log to bot logs channel
-            logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+            logs_channel_id = config.bot_logs_channel_id
             if logs_channel_id:
-                logs_channel = interaction.client.get_channel(int(logs_channel_id))
+                logs_channel = interaction.client.get_channel(logs_channel_id)
                 if logs_channel:
                     log_embed = discord.Embed(
                         title="🗑️ Admin: Player Registration Deleted",
@@ -3807,8 +3927,9 @@ class DeleteTeamConfirmView(discord.ui.View):
             except Exception as e:
                 print(f"✗ Failed to delete role: {e}")
         
-        # Delete the team (cascade deletes team_members)
+        # Delete the team (cascade deletes team_members); the slot may go to a waitlisted team
         success = await db.delete_team(team_id)
+        await registration_capacity.update()
         
         if success:
             # Send confirmation
@@ -3833,9 +3954,9 @@ class DeleteTeamConfirmView(discord.ui.View):
             print(f"✓ Team {team_id} ({team_name}) deleted by admin {self.admin_user.id}")
             
             # Log to bot logs channel
-            logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+            logs_channel_id = config.bot_logs_channel_id
             if logs_channel_id:
-                logs_channel = interaction.client.get_channel(int(logs_channel_id))
+                logs_channel = interaction.client.get_channel(logs_channel_id)
                 if logs_channel:
                     log_embed = discord.Embed(
                         title="🗑️ Admin: Team Deleted",
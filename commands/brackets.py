@@ -0,0 +1,265 @@
+"""
+Bracket commands
+"""
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+from datetime import datetime
+from typing import List, Optional
+from database.db import db
+from commands.check_in import check_in_window_autocomplete
+from utils.brackets import FORMATS, plan_bracket, seed_teams
+from utils.config import REGION_ROLE_KEYS
+from utils.permissions import admin_or_bots
+from utils.ratings import rate_match
+
+
+# Matches shown per page of a round
+MATCHES_PER_PAGE = 16
+
+STATUS_ICONS = {
+    'pending': '⏳',
+    'ready': '⚔️',
+    'completed': '✅',
+    'bye': '➖',
+}
+
+
+def _side(match: dict, side: str) -> str:
+    """Display text for one side of a match"""
+    if match[f'{side}_bye']:
+        return "*BYE*"
+    if match[f'{side}_id'] is None:
+        return "*TBD*"
+    seed = f"({match[f'{side}_seed']}) " if match[f'{side}_seed'] else ""
+    name = match[f'{side}_name'] or f"Team #{match[f'{side}_id']}"
+    if match['winner_id'] == match[f'{side}_id']:
+        return f"{seed}**{name}**"
+    return f"{seed}{name}"
+
+
+def format_match(match: dict) -> str:
+    icon = STATUS_ICONS.get(match['status'], '')
+    return f"{icon} `#{match['id']}` {_side(match, 'team1')} vs {_side(match, 'team2')}"
+
+
+class BracketView(discord.ui.View):
+    """Pages through a bracket one round (and one page of that round) at a time"""
+    
+    def __init__(self, bracket: dict, rounds: List[dict]):
+        super().__init__(timeout=600)
+        self.bracket = bracket
+        self.rounds = rounds
+        self.round_index = 0
+        self.page = 0
+    
+    @property
+    def current_round(self) -> dict:
+        return self.rounds[self.round_index]
+    
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-self.current_round['match_count'] // MATCHES_PER_PAGE))
+    
+    async def build_embed(self) -> discord.Embed:
+        """Load only the matches on the current page"""
+        current = self.current_round
+        matches = await db.get_bracket_round_matches(
+            self.bracket['id'], current['section'], current['round'],
+            offset=self.page * MATCHES_PER_PAGE, limit=MATCHES_PER_PAGE
+        )
+        
+        status = "🏁 Completed" if self.bracket['status'] == 'completed' else "🟢 In progress"
+        embed = discord.Embed(
+            title=f"🏆 {self.bracket['name']}",
+            description=(
+                f"**{current['name']}** - {current['match_count']} match(es)\n"
+                f"{self.bracket['format'].title()} elimination · {self.bracket['team_count']} teams · {status}\n\n"
+                + ("\n".join(format_match(match) for match in matches) or "No matches in this round.")
+            ),
+            color=discord.Color.gold(),
+            timestamp=datetime.utcnow()
+        )
+        embed.set_footer(
+            text=f"Round {self.round_index + 1}/{len(self.rounds)} · Page {self.page + 1}/{self.page_count}"
+        )
+        
+        self.previous_round.disabled = self.round_index == 0
+        self.next_round.disabled = self.round_index == len(self.rounds) - 1
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.page_count - 1
+        return embed
+    
+    async def show(self, interaction: discord.Interaction):
+        await interaction.response.edit_message(embed=await self.build_embed(), view=self)
+    
+    @discord.ui.button(label="◀ Round", style=discord.ButtonStyle.secondary, row=0)
+    async def previous_round(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.round_index -= 1
+        self.page = 0
+        await self.show(interaction)
+    
+    @discord.ui.button(label="Round ▶", style=discord.ButtonStyle.secondary, row=0)
+    async def next_round(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.round_index += 1
+        self.page = 0
+        await self.show(interaction)
+    
+    @discord.ui.button(label="◀ Page", style=discord.ButtonStyle.primary, row=1)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        await self.show(interaction)
+    
+    @discord.ui.button(label="Page ▶", style=discord.ButtonStyle.primary, row=1)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        await self.show(interaction)
+
+
+async def bracket_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[int]]:
+    brackets = await db.get_brackets()
+    current = current.lower()
+    return [
+        app_commands.Choice(name=f"{b['name']} (#{b['id']}, {b['status']})"[:100], value=b['id'])
+        for b in brackets
+        if current in b['name'].lower() or current == str(b['id'])
+    ][:25]
+
+
+async def match_winner_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[int]]:
+    """The two teams of the match picked in the match_id option"""
+    match_id = interaction.namespace.match_id
+    if not match_id:
+        return []
+    match = await db.get_bracket_match(match_id)
+    if not match:
+        return []
+    return [
+        app_commands.Choice(name=(match[f'{side}_name'] or f"Team #{match[f'{side}_id']}")[:100], value=match[f'{side}_id'])
+        for side in ('team1', 'team2')
+        if match[f'{side}_id'] is not None
+    ]
+
+
+class Brackets(commands.Cog):
+    """Tournament bracket commands"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+    
+    @app_commands.command(name="bracket-create", description="[ADMIN] Create an elimination bracket from registered teams")
+    @app_commands.describe(
+        name="Bracket name",
+        fmt="Single or double elimination",
+        region="Only include teams from this region",
+        check_in="Only include teams that checked in to this check-in"
+    )
+    @app_commands.choices(
+        fmt=[app_commands.Choice(name=f"{fmt.title()} elimination", value=fmt) for fmt in FORMATS],
+        region=[app_commands.Choice(name=region, value=region) for region in REGION_ROLE_KEYS]
+    )
+    @app_commands.rename(fmt="format")
+    @app_commands.autocomplete(check_in=check_in_window_autocomplete)
+    @admin_or_bots("❌ Only administrators and bot managers can create brackets.")
+    async def bracket_create(
+        self,
+        interaction: discord.Interaction,
+        name: str,
+        fmt: app_commands.Choice[str],
+        region: Optional[app_commands.Choice[str]] = None,
+        check_in: Optional[int] = None
+    ):
+        """Seed teams by rating and team_stats record and store the bracket"""
+        await interaction.response.defer(ephemeral=True)
+        
+        region_value = region.value if region else None
+        teams = await db.get_team_seeding(region_value)
+        if check_in is not None:
+            checked_in = set(await db.get_check_in_team_ids(check_in))
+            teams = [team for team in teams if team['id'] in checked_in]
+        if len(teams) < 2:
+            await interaction.followup.send("❌ A bracket needs at least 2 registered teams.", ephemeral=True)
+            return
+        
+        seeds = seed_teams(teams)
+        matches, rounds = plan_bracket(seeds, fmt.value)
+        bracket = await db.create_bracket(
+            name, fmt.value, region_value, interaction.user.id, len(seeds), matches, rounds
+        )
+        print(f"🏆 Bracket '{name}' created: {len(seeds)} teams, {len(matches)} matches ({fmt.value})")
+        
+        embed = discord.Embed(
+            title="✅ Bracket Created",
+            description=(
+                f"**{name}** (#{bracket['id']})\n"
+                f"{fmt.name} · {len(seeds)} teams · {len(matches)} matches · {len(rounds)} rounds\n\n"
+                "Use `/bracket` to view it and `/bracket-result` to report results."
+            ),
+            color=discord.Color.green(),
+            timestamp=datetime.utcnow()
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="bracket", description="View a tournament bracket round by round")
+    @app_commands.describe(bracket="Bracket to view (defaults to the latest active one)")
+    @app_commands.autocomplete(bracket=bracket_autocomplete)
+    async def bracket(self, interaction: discord.Interaction, bracket: Optional[int] = None):
+        """Show the first round of a bracket with round/page buttons"""
+        await interaction.response.defer()
+        
+        if bracket is not None:
+            bracket_data = await db.get_bracket(bracket)
+        else:
+            latest = await db.get_brackets(limit=1)
+            bracket_data = latest[0] if latest else None
+        
+        if not bracket_data:
+            await interaction.followup.send("❌ No bracket found.", ephemeral=True)
+            return
+        
+        view = BracketView(bracket_data, await db.get_bracket_rounds(bracket_data['id']))
+        await interaction.followup.send(embed=await view.build_embed(), view=view)
+    
+    @app_commands.command(name="bracket-result", description="[ADMIN] Report the winner of a bracket match")
+    @app_commands.describe(match_id="Match number shown in /bracket", winner="Winning team")
+    @app_commands.autocomplete(winner=match_winner_autocomplete)
+    @admin_or_bots("❌ Only administrators and bot managers can report results.")
+    async def bracket_result(self, interaction: discord.Interaction, match_id: int, winner: int):
+        """Record a result and advance both teams"""
+        await interaction.response.defer(ephemeral=True)
+        
+        match = await db.get_bracket_match(match_id)
+        if not match:
+            await interaction.followup.send(f"❌ Match `#{match_id}` not found.", ephemeral=True)
+            return
+        if match['status'] != 'ready':
+            await interaction.followup.send(
+                f"❌ Match `#{match_id}` is not ready for a result (status: {match['status']}).",
+                ephemeral=True
+            )
+            return
+        if winner not in (match['team1_id'], match['team2_id']):
+            await interaction.followup.send("❌ The winner must be one of the two teams in the match.", ephemeral=True)
+            return
+        
+        result = await db.record_bracket_result(match_id, winner)
+        if not result:
+            await interaction.followup.send("❌ The match was updated by someone else. Please check `/bracket`.", ephemeral=True)
+            return
+        
+        try:
+            await rate_match(match['team1_id'], match['team2_id'], winner)
+        except Exception as e:
+            print(f"❌ Error updating ratings for bracket match #{match_id}: {e}")
+        
+        winner_name = match['team1_name'] if winner == match['team1_id'] else match['team2_name']
+        message = f"✅ **{winner_name}** wins match `#{match_id}`."
+        if match['next_match_id'] is None:
+            message += f"\n🏆 **{winner_name}** are the bracket champions!"
+        print(f"🏆 Bracket match #{match_id} won by team {winner}")
+        await interaction.followup.send(message, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Brackets(bot))
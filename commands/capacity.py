@@ -0,0 +1,104 @@
+"""
+Registration capacity commands
+"""
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+from datetime import datetime
+from typing import Optional
+from database.backend import ALL_REGIONS
+from database.db import db
+from utils.config import REGION_ROLE_KEYS
+from utils.permissions import admin_or_bots
+from utils.registration_capacity import registration_capacity
+
+
+KIND_CHOICES = [
+    app_commands.Choice(name="Teams", value="team"),
+    app_commands.Choice(name="Players", value="player"),
+]
+
+
+class Capacity(commands.Cog):
+    """Registration caps and the team waitlist"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+    
+    @app_commands.command(name="registration-cap", description="[ADMIN] Cap how many teams or players can register")
+    @app_commands.describe(
+        kind="Teams or players",
+        capacity="Maximum registrations (leave empty to remove the cap)",
+        region="Cap one region (defaults to all regions together)"
+    )
+    @app_commands.choices(kind=KIND_CHOICES, region=[app_commands.Choice(name=region, value=region) for region in REGION_ROLE_KEYS])
+    @admin_or_bots("❌ Only administrators and bot managers can change registration caps.")
+    async def registration_cap(
+        self,
+        interaction: discord.Interaction,
+        kind: app_commands.Choice[str],
+        capacity: Optional[app_commands.Range[int, 0]] = None,
+        region: Optional[app_commands.Choice[str]] = None
+    ):
+        await interaction.response.defer(ephemeral=True)
+        
+        scope = region.value if region else ALL_REGIONS
+        row = await db.set_registration_cap(kind.value, scope, capacity)
+        await registration_capacity.update()
+        
+        where = region.value if region else "all regions"
+        message = (
+            f"✅ {kind.name} cap for {where}: **{capacity}** ({row['registered']} registered)."
+            if capacity is not None else f"✅ {kind.name} cap for {where} removed ({row['registered']} registered)."
+        )
+        if row['promoted']:
+            message += f"\n🎉 {row['promoted']} waitlisted team(s) were registered."
+        if capacity is not None and row['registered'] > capacity:
+            message += "\n⚠️ Already over the new cap: nobody is removed, but no one new can register."
+        print(f"📋 {kind.name} cap for {where} set to {capacity} by {interaction.user}")
+        await interaction.followup.send(message, ephemeral=True)
+    
+    @app_commands.command(name="registration-capacity", description="View registration counts, caps and the waitlist")
+    async def registration_capacity_view(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+        
+        await registration_capacity.refresh()
+        waiting = await db.get_waitlist_counts()
+        embed = discord.Embed(title="📋 Registration Capacity", color=discord.Color.blue(), timestamp=datetime.utcnow())
+        embed.add_field(name="Teams", value="\n".join(registration_capacity.lines('team')), inline=False)
+        embed.add_field(name="Players", value="\n".join(registration_capacity.lines('player')), inline=False)
+        embed.add_field(
+            name="Waitlist",
+            value="\n".join(f"**{region}:** `{count}`" for region, count in sorted(waiting.items())) or "Empty",
+            inline=False
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="waitlist", description="See your team's place on the registration waitlist")
+    async def waitlist(self, interaction: discord.Interaction):
+        entry = await db.get_waitlist_entry(interaction.user.id)
+        if entry is None:
+            await interaction.response.send_message("ℹ️ You are not on the waitlist.", ephemeral=True)
+            return
+        await interaction.response.send_message(
+            f"⏳ **{entry['team_name']}** [{entry['team_tag']}] is **#{entry['position']}** "
+            f"on the {entry['region']} waitlist. You'll get a DM when a slot opens up.",
+            ephemeral=True
+        )
+    
+    @app_commands.command(name="waitlist-leave", description="Remove your team from the registration waitlist")
+    async def waitlist_leave(self, interaction: discord.Interaction):
+        if await db.leave_waitlist(interaction.user.id):
+            await interaction.response.send_message("✅ Your team was removed from the waitlist.", ephemeral=True)
+        else:
+            await interaction.response.send_message("ℹ️ You are not on the waitlist.", ephemeral=True)
+
+
+async def setup(bot):
+    """Setup function for cog - loads the counters and starts the panel refresh loop"""
+    await bot.add_cog(Capacity(bot))
+    try:
+        await registration_capacity.start(bot)
+    except Exception as e:
+        print(f"❌ Failed to load registration capacity: {e}")
@@ -0,0 +1,162 @@
+"""
+Check-in commands
+"""
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+from datetime import datetime, timedelta
+from typing import List, Optional
+from database.db import db
+from utils.check_in import ALREADY, CHECKED_IN, check_in_embed, check_ins
+from utils.config import REGION_ROLE_KEYS
+from utils.permissions import admin_or_bots
+from utils.team_index import team_index
+
+
+def _team_names(team_ids: List[int]) -> str:
+    names = []
+    for team_id in team_ids:
+        team = team_index.get(team_id)
+        names.append(f"**{team['team_name']}**" if team else f"Team #{team_id}")
+    return ", ".join(names)
+
+
+async def check_in_window_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[int]]:
+    windows = await db.get_check_in_windows()
+    current = current.lower()
+    return [
+        app_commands.Choice(name=f"{w['name']} (#{w['id']}, {w['status']})"[:100], value=w['id'])
+        for w in windows
+        if current in w['name'].lower() or current == str(w['id'])
+    ][:25]
+
+
+class CheckInButtons(discord.ui.View):
+    """Persistent view with the check-in button (the window is looked up by message)"""
+    
+    def __init__(self):
+        super().__init__(timeout=None)
+    
+    @discord.ui.button(
+        label="Check In",
+        style=discord.ButtonStyle.success,
+        emoji="✅",
+        custom_id="check_in"
+    )
+    async def check_in(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Answer from memory; the check-in is written with the next batch"""
+        window = check_ins.for_message(interaction.message.id)
+        if window is None:
+            await interaction.response.send_message("🔒 This check-in is closed.", ephemeral=True)
+            return
+        
+        status, team_ids = await check_ins.check_in(window, interaction.user.id)
+        if status == CHECKED_IN:
+            message = f"✅ Checked in: {_team_names(team_ids)}"
+        elif status == ALREADY:
+            message = f"ℹ️ Already checked in: {_team_names(team_ids)}"
+        else:
+            message = "❌ Only captains and managers of " + (
+                f"{window.region} teams" if window.region else "registered teams"
+            ) + " can check in."
+        await interaction.response.send_message(message, ephemeral=True)
+
+
+class CheckIn(commands.Cog):
+    """Team check-in windows"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+    
+    @app_commands.command(name="check-in-open", description="[ADMIN] Post a check-in message that closes after a set time")
+    @app_commands.describe(
+        name="Event name",
+        minutes="How long check-in stays open",
+        region="Only teams from this region can check in",
+        channel="Channel for the check-in message (defaults to this one)"
+    )
+    @app_commands.choices(region=[app_commands.Choice(name=region, value=region) for region in REGION_ROLE_KEYS])
+    @admin_or_bots("❌ Only administrators and bot managers can open check-in.")
+    async def check_in_open(
+        self,
+        interaction: discord.Interaction,
+        name: str,
+        minutes: app_commands.Range[int, 1, 1440],
+        region: Optional[app_commands.Choice[str]] = None,
+        channel: Optional[discord.TextChannel] = None
+    ):
+        await interaction.response.defer(ephemeral=True)
+        
+        channel = channel or interaction.channel
+        row = await db.create_check_in_window(
+            name, region.value if region else None, datetime.utcnow() + timedelta(minutes=minutes), interaction.user.id
+        )
+        try:
+            message = await channel.send(
+                embed=discord.Embed(title=f"✅ Check-in: {name}", description="Opening...", color=discord.Color.green()),
+                view=CheckInButtons()
+            )
+        except discord.HTTPException as e:
+            await db.close_check_in_window(row['id'])
+            await interaction.followup.send(f"❌ Could not post in {channel.mention}: {e}", ephemeral=True)
+            return
+        
+        window = await check_ins.open(row, channel.id, message.id)
+        await message.edit(embed=check_in_embed(window))
+        print(f"✅ Check-in '{name}' opened: {len(window.team_regions)} eligible teams, closes in {minutes}m")
+        await interaction.followup.send(
+            f"✅ Check-in `#{window.id}` opened in {channel.mention} for {len(window.team_regions)} teams. "
+            f"It closes automatically in {minutes} minutes.",
+            ephemeral=True
+        )
+    
+    @app_commands.command(name="check-in-close", description="[ADMIN] Close a check-in now")
+    @app_commands.describe(window="Check-in to close (defaults to the latest open one)")
+    @app_commands.autocomplete(window=check_in_window_autocomplete)
+    @admin_or_bots("❌ Only administrators and bot managers can close check-in.")
+    async def check_in_close(self, interaction: discord.Interaction, window: Optional[int] = None):
+        await interaction.response.defer(ephemeral=True)
+        
+        if window is None:
+            open_windows = await db.get_check_in_windows('open', limit=1)
+            window = open_windows[0]['id'] if open_windows else None
+        field = await check_ins.close(window) if window is not None else None
+        if field is None:
+            await interaction.followup.send("❌ No open check-in found.", ephemeral=True)
+            return
+        await interaction.followup.send(f"🔒 Check-in `#{window}` closed: **{len(field)}** teams checked in.", ephemeral=True)
+    
+    @app_commands.command(name="check-in-status", description="View live check-in counts per region")
+    @app_commands.describe(window="Check-in (defaults to the latest one)")
+    @app_commands.autocomplete(window=check_in_window_autocomplete)
+    async def check_in_status(self, interaction: discord.Interaction, window: Optional[int] = None):
+        await interaction.response.defer(ephemeral=True)
+        
+        if window is None:
+            latest = await db.get_check_in_windows(limit=1)
+            window = latest[0]['id'] if latest else None
+        live = check_ins.get(window) if window is not None else None
+        if live is not None:
+            await interaction.followup.send(embed=check_in_embed(live), ephemeral=True)
+            return
+        
+        row = await db.get_check_in_window(window) if window is not None else None
+        if row is None:
+            await interaction.followup.send("❌ Check-in not found.", ephemeral=True)
+            return
+        team_ids = await db.get_check_in_team_ids(row['id'])
+        await interaction.followup.send(
+            f"🔒 Check-in **{row['name']}** (`#{row['id']}`) is {row['status']}: **{len(team_ids)}** teams checked in.",
+            ephemeral=True
+        )
+
+
+async def setup(bot):
+    """Setup function for cog - registers the persistent view and resumes open windows"""
+    await bot.add_cog(CheckIn(bot))
+    bot.add_view(CheckInButtons())
+    try:
+        await check_ins.start(bot)
+    except Exception as e:
+        print(f"❌ Failed to resume open check-ins: {e}")
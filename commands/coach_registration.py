@@ -2,7 +2,10 @@ import discord
 from discord.ext import commands
 import os
 import asyncio
+from database.backend import RosterLimitError
 from database.db import db
+from utils.config import config
+from utils.member_cache import get_or_fetch_member
 from utils.thread_manager import add_staff_to_thread
 from commands.registration import inactivity_warning_task, cancel_inactivity_warning, _active_threads
 
@@ -59,7 +62,7 @@ class CoachRegistrationButtons(discord.ui.View):
             return
         
         # Check if user already has an active coach registration thread (including temp placeholders)
-        for thread_id, thread_data in list(_active_threads.items()):
+        for thread_id, thread_data in _active_threads.items(interaction.guild.id):
             if thread_data['target_user_id'] == interaction.user.id:
                 # Check if it's a real thread or temp placeholder
                 if str(thread_id).startswith('temp_'):
@@ -86,10 +89,10 @@ class CoachRegistrationButtons(discord.ui.View):
         
         # Add placeholder to prevent duplicate thread creation during rapid clicks
         temp_id = f"temp_{interaction.user.id}_{interaction.id}"
-        _active_threads[temp_id] = {
+        _active_threads.put(interaction.guild.id, temp_id, {
             'task': None,
             'target_user_id': interaction.user.id
-        }
+        })
         
         # Create private thread
         try:
@@ -112,30 +115,10 @@ class CoachRegistrationButtons(discord.ui.View):
             )
             
             # Get teams with available coach slots (excluding teams user is already in)
-            teams = await db.get_all_teams()
-            print(f"[DEBUG] Total teams found: {len(teams)}")
-            
-            teams_with_slots = []
-            
-            for team in teams:
-                members = await db.get_team_members(team['id'])
-                print(f"[DEBUG] Team '{team['team_name']}' has {len(members)} members")
-                
-                # Skip if user is already a member of this team
-                if any(m['discord_id'] == interaction.user.id for m in members):
-                    print(f"[DEBUG] Skipping team '{team['team_name']}' - user already a member")
-                    continue
-                
-                coach_count = sum(1 for m in members if m['role'] == 'coach')
-                print(f"[DEBUG] Team '{team['team_name']}' has {coach_count} coaches")
-                
-                if coach_count < 1:  # Max 1 coach per team
-                    teams_with_slots.append({
-                        'team': team,
-                        'available_slots': 1 - coach_count
-                    })
-                    print(f"[DEBUG] Team '{team['team_name']}' added with coach slot")
-            
+            teams_with_slots = [
+                {'team': team, 'available_slots': team['open_slots']}
+                for team in await db.get_teams_with_open_slots('coach', interaction.user.id)
+            ]
             print(f"[DEBUG] Teams with available coach slots: {len(teams_with_slots)}")
             
             # Send team selection UI (split into multiple messages if more than 24 teams)
@@ -192,10 +175,10 @@ class CoachRegistrationButtons(discord.ui.View):
             if temp_id in _active_threads:
                 del _active_threads[temp_id]
             
-            _active_threads[thread.id] = {
+            _active_threads.put(thread.guild.id, thread.id, {
                 'task': task,
                 'target_user_id': interaction.user.id
-            }
+            })
             print(f"✓ Started inactivity monitoring for coach thread {thread.id}")
             
         except Exception as e:
@@ -315,7 +298,7 @@ class TeamSelect(discord.ui.Select):
         
         # Get captain
         captain_id = selected_team['captain_discord_id']
-        captain = interaction.guild.get_member(captain_id)
+        captain = await get_or_fetch_member(interaction.guild, captain_id)
         
         if not captain:
             await interaction.followup.send(
@@ -340,7 +323,7 @@ class TeamSelect(discord.ui.Select):
         for manager_data in existing_managers:
             if manager_data['discord_id'] != captain_id:
                 try:
-                    manager = interaction.guild.get_member(manager_data['discord_id'])
+                    manager = await get_or_fetch_member(interaction.guild, manager_data['discord_id'])
                     if manager:
                         await interaction.channel.add_user(manager)
                         print(f"✓ Added manager {manager.name} to thread")
@@ -354,7 +337,7 @@ class TeamSelect(discord.ui.Select):
             approver_mentions.append(captain.mention)
         for manager_data in existing_managers:
             if manager_data['discord_id'] != captain_id:
-                manager = interaction.guild.get_member(manager_data['discord_id'])
+                manager = await get_or_fetch_member(interaction.guild, manager_data['discord_id'])
                 if manager:
                     approver_mentions.append(manager.mention)
         
@@ -423,7 +406,7 @@ class CoachApprovalView(discord.ui.View):
             if team and team.get('role_id'):
                 try:
                     role = interaction.guild.get_role(team['role_id'])
-                    applicant = interaction.guild.get_member(self.applicant_id)
+                    applicant = await get_or_fetch_member(interaction.guild, self.applicant_id)
                     if role and applicant:
                         await applicant.add_roles(role)
                         print(f"✓ Assigned role {role.name} to coach {applicant.name}")
@@ -431,7 +414,7 @@ class CoachApprovalView(discord.ui.View):
                     print(f"✗ Failed to assign role: {e}")
             
             # Success message
-            applicant = interaction.guild.get_member(self.applicant_id)
+            applicant = await get_or_fetch_member(interaction.guild, self.applicant_id)
             success_embed = discord.Embed(
                 title="✅ Coach Approved!",
                 description=(
@@ -457,6 +440,11 @@ class CoachApprovalView(discord.ui.View):
             if isinstance(interaction.channel, discord.Thread):
                 await interaction.channel.delete()
             
+        except RosterLimitError:
+            await interaction.followup.send(
+                f"❌ **{self.team_name}** already has a coach.",
+                ephemeral=False
+            )
         except Exception as e:
             print(f"Error adding coach: {e}")
             await interaction.followup.send(
@@ -466,12 +454,12 @@ class CoachApprovalView(discord.ui.View):
     
     async def log_coach_addition(self, interaction: discord.Interaction, applicant: discord.Member, team: dict):
         """Log coach addition to bot logs channel"""
-        bot_logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+        bot_logs_channel_id = config.bot_logs_channel_id
         if not bot_logs_channel_id:
             return
         
         try:
-            channel = interaction.client.get_channel(int(bot_logs_channel_id))
+            channel = interaction.client.get_channel(bot_logs_channel_id)
             if not channel:
                 return
             
@@ -511,7 +499,7 @@ class CoachApprovalView(discord.ui.View):
         await interaction.response.defer()
         
         # Decline message
-        applicant = interaction.guild.get_member(self.applicant_id)
+        applicant = await get_or_fetch_member(interaction.guild, self.applicant_id)
         decline_embed = discord.Embed(
             title="❌ Coach Request Declined",
             description=(
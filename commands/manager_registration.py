@@ -2,7 +2,10 @@ import discord
 from discord.ext import commands
 import os
 import asyncio
+from database.backend import RosterLimitError
 from database.db import db
+from utils.config import config
+from utils.member_cache import get_or_fetch_member
 from utils.thread_manager import add_staff_to_thread
 from commands.registration import inactivity_warning_task, cancel_inactivity_warning, _active_threads
 
@@ -65,7 +68,7 @@ class ManagerRegistrationButtons(discord.ui.View):
             return
         
         # Check if user already has an active manager registration thread (including temp placeholders)
-        for thread_id, thread_data in list(_active_threads.items()):
+        for thread_id, thread_data in _active_threads.items(interaction.guild.id):
             if thread_data['target_user_id'] == interaction.user.id:
                 # Check if it's a real thread or temp placeholder
                 if str(thread_id).startswith('temp_'):
@@ -92,10 +95,10 @@ class ManagerRegistrationButtons(discord.ui.View):
         
         # Add placeholder to prevent duplicate thread creation during rapid clicks
         temp_id = f"temp_{interaction.user.id}_{interaction.id}"
-        _active_threads[temp_id] = {
+        _active_threads.put(interaction.guild.id, temp_id, {
             'task': None,
             'target_user_id': interaction.user.id
-        }
+        })
         
         # Create private thread
         try:
@@ -117,37 +120,12 @@ class ManagerRegistrationButtons(discord.ui.View):
                 ephemeral=True
             )
             
-            # Get teams with available manager slots
+            # Get teams with available manager slots (counted by the database)
             try:
-                teams = await db.get_all_teams()
-                print(f"[DEBUG] Total teams found: {len(teams)}")
-                
-                teams_with_slots = []
-                
-                for team in teams:
-                    try:
-                        members = await db.get_team_members(team['id'])
-                        print(f"[DEBUG] Team '{team['team_name']}' has {len(members)} members")
-                        
-                        # Skip if user is already a member of this team
-                        if any(m['discord_id'] == interaction.user.id for m in members):
-                            print(f"[DEBUG] Skipping team '{team['team_name']}' - user already a member")
-                            continue
-                        
-                        manager_count = sum(1 for m in members if m['role'] == 'manager')
-                        print(f"[DEBUG] Team '{team['team_name']}' has {manager_count} managers")
-                        
-                        if manager_count < 2:  # Max 2 managers per team
-                            available_slots = 2 - manager_count
-                            teams_with_slots.append({
-                                'team': team,
-                                'available_slots': available_slots
-                            })
-                            print(f"[DEBUG] Team '{team['team_name']}' added with {available_slots} slots")
-                    except Exception as team_error:
-                        print(f"[ERROR] Error processing team {team.get('team_name', 'unknown')}: {team_error}")
-                        continue
-                
+                teams_with_slots = [
+                    {'team': team, 'available_slots': team['open_slots']}
+                    for team in await db.get_teams_with_open_slots('manager', interaction.user.id)
+                ]
                 print(f"[DEBUG] Teams with available slots: {len(teams_with_slots)}")
             
             except Exception as db_error:
@@ -216,10 +194,10 @@ class ManagerRegistrationButtons(discord.ui.View):
             if temp_id in _active_threads:
                 del _active_threads[temp_id]
             
-            _active_threads[thread.id] = {
+            _active_threads.put(thread.guild.id, thread.id, {
                 'task': task,
                 'target_user_id': interaction.user.id
-            }
+            })
             print(f"✓ Started inactivity monitoring for manager thread {thread.id}")
             
         except Exception as e:
@@ -344,7 +322,7 @@ class TeamSelect(discord.ui.Select):
         
         # Get captain
         captain_id = selected_team['captain_discord_id']
-        captain = interaction.guild.get_member(captain_id)
+        captain = await get_or_fetch_member(interaction.guild, captain_id)
         
         if not captain:
             await interaction.followup.send(
@@ -369,7 +347,7 @@ class TeamSelect(discord.ui.Select):
         for manager_data in existing_managers:
             if manager_data['discord_id'] != captain_id:
                 try:
-                    manager = interaction.guild.get_member(manager_data['discord_id'])
+                    manager = await get_or_fetch_member(interaction.guild, manager_data['discord_id'])
                     if manager:
                         await interaction.channel.add_user(manager)
                         print(f"✓ Added manager {manager.name} to thread")
@@ -383,7 +361,7 @@ class TeamSelect(discord.ui.Select):
             approver_mentions.append(captain.mention)
         for manager_data in existing_managers:
             if manager_data['discord_id'] != captain_id:
-                manager = interaction.guild.get_member(manager_data['discord_id'])
+                manager = await get_or_fetch_member(interaction.guild, manager_data['discord_id'])
                 if manager:
                     approver_mentions.append(manager.mention)
         
@@ -451,7 +429,7 @@ class ManagerApprovalView(discord.ui.View):
             # Assign team role and manager role to manager
             if team and team.get('role_id'):
                 try:
-                    applicant = interaction.guild.get_member(self.applicant_id)
+                    applicant = await get_or_fetch_member(interaction.guild, self.applicant_id)
                     if applicant:
                         # Assign team role
                         team_role = interaction.guild.get_role(team['role_id'])
@@ -460,9 +438,9 @@ class ManagerApprovalView(discord.ui.View):
                             print(f"✓ Assigned team role {team_role.name} to manager {applicant.name}")
                         
                         # Assign manager role
-                        manager_role_id = os.getenv('MANAGER_ROLE_ID')
+                        manager_role_id = config.manager_role_id
                         if manager_role_id:
-                            manager_role = interaction.guild.get_role(int(manager_role_id))
+                            manager_role = interaction.guild.get_role(manager_role_id)
                             if manager_role:
                                 await applicant.add_roles(manager_role)
                                 print(f"✓ Assigned Manager role to {applicant.name}")
@@ -470,7 +448,7 @@ class ManagerApprovalView(discord.ui.View):
                     print(f"✗ Failed to assign role: {e}")
             
             # Success message
-            applicant = interaction.guild.get_member(self.applicant_id)
+            applicant = await get_or_fetch_member(interaction.guild, self.applicant_id)
             success_embed = discord.Embed(
                 title="✅ Manager Approved!",
                 description=(
@@ -496,6 +474,11 @@ class ManagerApprovalView(discord.ui.View):
             if isinstance(interaction.channel, discord.Thread):
                 await interaction.channel.delete()
             
+        except RosterLimitError:
+            await interaction.followup.send(
+                f"❌ **{self.team_name}** already has the maximum number of managers.",
+                ephemeral=False
+            )
         except Exception as e:
             print(f"Error adding manager: {e}")
             await interaction.followup.send(
@@ -505,12 +488,12 @@ class ManagerApprovalView(discord.ui.View):
     
     async def log_manager_addition(self, interaction: discord.Interaction, applicant: discord.Member, team: dict):
         """Log manager addition to bot logs channel"""
-        bot_logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+        bot_logs_channel_id = config.bot_logs_channel_id
         if not bot_logs_channel_id:
             return
         
         try:
-            channel = interaction.client.get_channel(int(bot_logs_channel_id))
+            channel = interaction.client.get_channel(bot_logs_channel_id)
             if not channel:
                 return
             
@@ -3,9 +3,11 @@ Profile commands
 """
 
 import discord
+import io
 from discord import app_commands
 from discord.ext import commands
 from database.db import db
+from utils.cards import card_renderer
 
 
 class Profile(commands.Cog):
@@ -56,6 +58,10 @@ class Profile(commands.Cog):
             else:
                 winrate = 0.0
             
+            # Rating rank (player_stats.points holds the rounded rating)
+            rating = await db.get_rating_rank('player', target_user.id)
+            rank_text = f"#{rating['rank']} of {rating['total']}" if rating else "-"
+            
             # Create profile embed
             embed = discord.Embed(
                 title=f"📊 Player Profile",
@@ -75,7 +81,7 @@ class Profile(commands.Cog):
             embed.add_field(
                 name="🎮 Game Info",
                 value=f"**IGN:** `{profile['ign']}`\n"
-                      f"**Rank:** `-`\n"
+                      f"**Rank:** `{rank_text}`\n"
                       f"**Points:** `{profile['points']}`\n"
                       f"**MVP:** `{profile['mvps']}`\n"
                       f"**Region:** `{profile['region']}`",
@@ -93,13 +99,54 @@ class Profile(commands.Cog):
                 inline=False
             )
             
+            # Form Section (totals over the player's most recent matches, kept by player_form)
+            form = None
+            if profile['form_matches'] > 0:
+                form_kdr = round(profile['form_kills'] / profile['form_deaths'], 2) if profile['form_deaths'] > 0 else profile['form_kills']
+                form_winrate = round((profile['form_wins'] / profile['form_matches']) * 100, 1)
+                embed.add_field(
+                    name=f"🔥 Form (last {profile['form_matches']} matches)",
+                    value=f"**KDR:** `{form_kdr}`\n"
+                          f"**Winrate:** `{form_winrate}%` ({profile['form_wins']}W - {profile['form_matches'] - profile['form_wins']}L)\n"
+                          f"**K/D/A:** `{profile['form_kills']}/{profile['form_deaths']}/{profile['form_assists']}`\n"
+                          f"**MVP:** `{profile['form_mvps']}`",
+                    inline=False
+                )
+                form = {'kdr': form_kdr, 'record': f"{profile['form_wins']}W-{profile['form_matches'] - profile['form_wins']}L"}
+            
             # Set thumbnail to user avatar
             embed.set_thumbnail(url=target_user.display_avatar.url)
             
             # Footer
             embed.set_footer(text=f"Registered on {profile['registered_at'].strftime('%b %d, %Y')}")
             
-            await interaction.followup.send(embed=embed, ephemeral=True)
+            # Image card (rendered off the event loop, cached until a stat or the avatar changes)
+            card = await card_renderer.render(
+                'player',
+                {
+                    'ign': profile['ign'],
+                    'region': profile['region'],
+                    'rank': rank_text,
+                    'points': profile['points'],
+                    'kills': profile['kills'],
+                    'deaths': profile['deaths'],
+                    'assists': profile['assists'],
+                    'wins': profile['wins'],
+                    'kdr': kdr,
+                    'winrate': winrate,
+                    'matches_played': profile['matches_played'],
+                    'mvps': profile['mvps'],
+                    'form': form
+                },
+                target_user.display_avatar.replace(size=256, static_format="png").url
+            )
+            if card:
+                embed.set_image(url="attachment://profile.png")
+                await interaction.followup.send(
+                    embed=embed, file=discord.File(io.BytesIO(card), filename="profile.png"), ephemeral=True
+                )
+            else:
+                await interaction.followup.send(embed=embed, ephemeral=True)
             
         except Exception as e:
             print(f"Error in profile command: {e}")
@@ -125,6 +172,9 @@ class Profile(commands.Cog):
                 captain = member
                 break
         
+        player_count = sum(1 for m in team_members if m['role'] in ('captain', 'player'))
+        roster_limit = (await db.get_roster_limits()).get('player')
+        
         # Create manager profile embed
         embed = discord.Embed(
             title=f"👔 Manager Profile",
@@ -150,7 +200,7 @@ class Profile(commands.Cog):
                   f"**Team Tag:** [{team['team_tag']}]\n"
                   f"**Region:** {team['region']}\n"
                   f"**Captain:** {captain_display}\n"
-                  f"**Members:** {len(team_members)}/5",
+                  f"**Members:** {len(team_members)} ({player_count}/{roster_limit} players)",
             inline=False
         )
         
@@ -0,0 +1,95 @@
+"""
+Rating commands
+"""
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+from datetime import datetime
+from typing import Optional
+from database.db import db
+from utils.config import REGION_ROLE_KEYS, config
+from utils.permissions import admin_or_bots
+from utils.ratings import recompute_ratings
+
+
+LEADERBOARD_SIZE = 20
+
+
+class Ratings(commands.Cog):
+    """Rating leaderboards and recompute"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+    
+    @app_commands.command(name="leaderboard", description="View the highest rated players or teams")
+    @app_commands.describe(kind="Players or teams", region="Only show this region")
+    @app_commands.choices(
+        kind=[app_commands.Choice(name="Players", value="player"), app_commands.Choice(name="Teams", value="team")],
+        region=[app_commands.Choice(name=region, value=region) for region in REGION_ROLE_KEYS]
+    )
+    @app_commands.rename(kind="type")
+    async def leaderboard(
+        self,
+        interaction: discord.Interaction,
+        kind: Optional[app_commands.Choice[str]] = None,
+        region: Optional[app_commands.Choice[str]] = None
+    ):
+        """Top players by points (their rating) or teams by rating"""
+        await interaction.response.defer()
+        
+        region_value = region.value if region else None
+        if kind and kind.value == "team":
+            rows = await db.get_team_rating_leaderboard(region_value, limit=LEADERBOARD_SIZE)
+            lines = [
+                f"`{rank:>2}.` **{row['team_name']}** [{row['team_tag']}] - `{round(row['rating'])}` ({row['games']} games)"
+                for rank, row in enumerate(rows, start=1)
+            ]
+            title = "🏆 Team Leaderboard"
+        else:
+            rows = await db.get_leaderboard("points", region_value, limit=LEADERBOARD_SIZE)
+            lines = [
+                f"`{rank:>2}.` **{row['ign']}** - `{row['points']}` points"
+                for rank, row in enumerate(rows, start=1)
+            ]
+            title = "🏆 Player Leaderboard"
+        
+        embed = discord.Embed(
+            title=title + (f" - {region_value}" if region_value else ""),
+            description="\n".join(lines) or "No ratings yet.",
+            color=discord.Color.gold(),
+            timestamp=datetime.utcnow()
+        )
+        embed.set_footer(text=f"{'Glicko-2' if config.rating_system == 'glicko2' else 'Elo'} ratings from bracket and Swiss results")
+        await interaction.followup.send(embed=embed)
+    
+    @app_commands.command(name="ratings-recompute", description="[ADMIN] Recompute every rating from match history")
+    @admin_or_bots("❌ Only administrators and bot managers can recompute ratings.")
+    async def ratings_recompute(self, interaction: discord.Interaction):
+        """Full recompute (replaces the incremental ratings)"""
+        await interaction.response.defer(ephemeral=True)
+        
+        summary = await recompute_ratings()
+        print(
+            f"📈 Ratings recomputed: {summary['matches']} matches, {summary['teams']} teams, "
+            f"{summary['players']} players (load {summary['load_seconds']:.2f}s, "
+            f"compute {summary['compute_seconds']:.2f}s, save {summary['save_seconds']:.2f}s)"
+        )
+        
+        embed = discord.Embed(
+            title="✅ Ratings Recomputed",
+            description=(
+                f"**Matches:** `{summary['matches']}`\n"
+                f"**Teams:** `{summary['teams']}`\n"
+                f"**Players:** `{summary['players']}`\n"
+                f"**Time:** load `{summary['load_seconds']:.2f}s` · compute `{summary['compute_seconds']:.2f}s` · "
+                f"save `{summary['save_seconds']:.2f}s`"
+            ),
+            color=discord.Color.green(),
+            timestamp=datetime.utcnow()
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Ratings(bot))
@@ -3,11 +3,16 @@ from discord.ext import commands
 from discord import app_commands
 import os
 import asyncio
+from database.backend import ALL_REGIONS, RegistrationFullError
 from database.db import db
+from utils.config import config
+from utils.member_cache import get_or_fetch_member, search_members
+from utils.registration_capacity import registration_capacity
+from utils.shard_state import ShardState
 from utils.thread_manager import add_staff_to_thread
 
 # Track threads with inactivity warnings
-_active_threads = {}  # thread_id: {'task': asyncio.Task, 'target_user_id': int}
+_active_threads = ShardState("active_threads")  # thread_id: {'task': asyncio.Task, 'target_user_id': int}
 
 
 async def inactivity_warning_task(thread: discord.Thread, target_user_id: int):
@@ -379,15 +384,23 @@ class ConsentView(discord.ui.View):
                 )
                 return
             
-            # Create player in database
-            await db.create_player(
-                discord_id=self.user_id,
-                ign=self.ign,
-                player_id=self.player_id,
-                region=self.region,
-                agent=self.agent,
-                tournament_notifications=True
-            )
+            # Create player in database (claims a registration slot)
+            try:
+                await db.create_player(
+                    discord_id=self.user_id,
+                    ign=self.ign,
+                    player_id=self.player_id,
+                    region=self.region,
+                    agent=self.agent,
+                    tournament_notifications=True
+                )
+            except RegistrationFullError as e:
+                full = "all regions" if e.region == ALL_REGIONS else e.region
+                await interaction.followup.send(
+                    f"⛔ Player registration is full for {full}. Please contact an administrator.",
+                    ephemeral=False
+                )
+                return
             
             # Create player stats entry
             await db.create_player_stats(self.user_id)
@@ -407,7 +420,7 @@ class ConsentView(discord.ui.View):
                         if team.get('role_id'):
                             try:
                                 role = interaction.guild.get_role(team['role_id'])
-                                member = interaction.guild.get_member(self.user_id)
+                                member = await get_or_fetch_member(interaction.guild, self.user_id)
                                 if role and member:
                                     await member.add_roles(role)
                                     print(f"✓ Assigned team role {role.name} to {self.ign}")
@@ -416,39 +429,14 @@ class ConsentView(discord.ui.View):
                     except Exception as e:
                         print(f"✗ Failed to add {self.ign} to team {team['team_name']}: {e}")
             
-            # Assign region role(s)
-            roles_to_assign = []
-            
-            # Define role mappings
-            role_mapping = {
-                'NA': 'AMERICAS_ROLE_ID',
-                'BR': 'AMERICAS_ROLE_ID',
-                'LATAM': 'AMERICAS_ROLE_ID',
-                'EU': 'EMEA_ROLE_ID',
-                'India': 'INDIA_ROLE_ID',
-                'AP': 'APAC_ROLE_ID',
-                'KR': 'APAC_ROLE_ID',
-                'CN': 'CN_ROLE_ID'
-            }
-            
-            # Get the role ID for the selected region
-            role_env_key = role_mapping.get(self.region)
-            if role_env_key:
-                role_id = os.getenv(role_env_key)
-                if role_id:
-                    roles_to_assign.append(int(role_id))
-            
-            # Special case: India also gets APAC role
-            if self.region == 'India':
-                apac_role_id = os.getenv('APAC_ROLE_ID')
-                if apac_role_id:
-                    roles_to_assign.append(int(apac_role_id))
+            # Assign region role(s) - India also gets the APAC role
+            roles_to_assign = config.region_role_ids(self.region)
             
             # Assign roles to the user
             assigned_roles = []
             if roles_to_assign:
                 try:
-                    member = interaction.guild.get_member(interaction.user.id)
+                    member = await get_or_fetch_member(interaction.guild, interaction.user.id)
                     if member:
                         for role_id in roles_to_assign:
                             role = interaction.guild.get_role(role_id)
@@ -466,10 +454,10 @@ class ConsentView(discord.ui.View):
             print(f"✅ Player registered: {self.ign} (Discord ID: {interaction.user.id})")
             
             # Send log to bot-logs channel
-            bot_logs_channel_id = os.getenv('BOT_LOGS_CHANNEL_ID')
+            bot_logs_channel_id = config.bot_logs_channel_id
             if bot_logs_channel_id:
                 try:
-                    logs_channel = interaction.guild.get_channel(int(bot_logs_channel_id))
+                    logs_channel = interaction.guild.get_channel(bot_logs_channel_id)
                     if logs_channel:
                         # Format timestamp
                         import datetime
@@ -619,10 +607,13 @@ class PlayerSearchModal(discord.ui.Modal, title="Search for Player"):
             except:
                 pass
         
+        # Members to search (a gateway name search when the member cache is lazy)
+        candidates = await search_members(guild, search_query) if not target_user else []
+        
         # If not found, search by username (case-insensitive)
         if not target_user:
             search_lower = search_query.lower()
-            for member in guild.members:
+            for member in candidates:
                 if (member.name.lower() == search_lower or 
                     member.display_name.lower() == search_lower or
                     str(member).lower() == search_lower):
@@ -633,7 +624,7 @@ class PlayerSearchModal(discord.ui.Modal, title="Search for Player"):
         if not target_user:
             search_lower = search_query.lower()
             matches = []
-            for member in guild.members:
+            for member in candidates:
                 if (search_lower in member.name.lower() or 
                     search_lower in member.display_name.lower()):
                     matches.append(member)
@@ -669,7 +660,7 @@ class PlayerSearchModal(discord.ui.Modal, title="Search for Player"):
             return
         
         # Check if target user already has an active registration thread
-        for thread_id, thread_data in list(_active_threads.items()):
+        for thread_id, thread_data in _active_threads.items(interaction.guild.id):
             if thread_data['target_user_id'] == target_user.id:
                 try:
                     thread = interaction.guild.get_thread(thread_id)
@@ -689,10 +680,10 @@ class PlayerSearchModal(discord.ui.Modal, title="Search for Player"):
         
         # Add placeholder to prevent duplicate thread creation during rapid clicks
         temp_id = f"temp_{target_user.id}_{interaction.id}"
-        _active_threads[temp_id] = {
+        _active_threads.put(interaction.guild.id, temp_id, {
             'task': None,
             'target_user_id': target_user.id
-        }
+        })
         
         # Create private thread
         try:
@@ -740,10 +731,10 @@ class PlayerSearchModal(discord.ui.Modal, title="Search for Player"):
             if temp_id in _active_threads:
                 del _active_threads[temp_id]
             
-            _active_threads[thread.id] = {
+            _active_threads.put(thread.guild.id, thread.id, {
                 'task': task,
                 'target_user_id': target_user.id
-            }
+            })
             print(f"✓ Started inactivity monitoring for thread {thread.id}")
             
             # Respond to original interaction
@@ -865,7 +856,7 @@ class RegistrationButtons(discord.ui.View):
     async def register(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Handle registration button click"""
         # Check if user already has an active registration thread (including temp placeholders)
-        for thread_id, thread_data in list(_active_threads.items()):
+        for thread_id, thread_data in _active_threads.items(interaction.guild.id):
             if thread_data['target_user_id'] == interaction.user.id:
                 # Check if it's a real thread or temp placeholder
                 if str(thread_id).startswith('temp_'):
@@ -892,14 +883,21 @@ class RegistrationButtons(discord.ui.View):
         
         # Add placeholder to prevent duplicate thread creation during rapid clicks
         temp_id = f"temp_{interaction.user.id}_{interaction.id}"
-        _active_threads[temp_id] = {
+        _active_threads.put(interaction.guild.id, temp_id, {
             'task': None,
             'target_user_id': interaction.user.id
-        }
+        })
         
         # Respond immediately to prevent timeout
         await interaction.response.defer(ephemeral=True)
         
+        # Don't start a form nobody can submit (per-region caps are checked on submit)
+        if registration_capacity.is_full('player'):
+            if temp_id in _active_threads:
+                del _active_threads[temp_id]
+            await interaction.followup.send("⛔ Player registration is full.", ephemeral=True)
+            return
+        
         # Check if user is already registered
         existing_player = await db.get_player_by_discord_id(interaction.user.id)
         if existing_player:
@@ -930,10 +928,10 @@ class RegistrationButtons(discord.ui.View):
             await add_staff_to_thread(thread, interaction.guild)
             
             # Add staff members (if configured) - only if online
-            staff_role_id = os.getenv("STAFF_ROLE_ID")
+            staff_role_id = config.staff_role_id
             if staff_role_id:
                 try:
-                    staff_role = interaction.guild.get_role(int(staff_role_id))
+                    staff_role = interaction.guild.get_role(staff_role_id)
                     if staff_role:
                         online_staff = [
                             member for member in staff_role.members
@@ -997,10 +995,10 @@ class RegistrationButtons(discord.ui.View):
             if temp_id in _active_threads:
                 del _active_threads[temp_id]
             
-            _active_threads[thread.id] = {
+            _active_threads.put(thread.guild.id, thread.id, {
                 'task': task,
                 'target_user_id': interaction.user.id
-            }
+            })
             print(f"✓ Started inactivity monitoring for thread {thread.id}")
             
             # Respond to button click with followup (since we deferred)
@@ -1090,13 +1088,13 @@ class RegistrationButtons(discord.ui.View):
             await thread.send(embed=prompt_embed)
             
             # Store thread info to track player mention
-            _active_threads[thread.id] = {
+            _active_threads.put(thread.guild.id, thread.id, {
                 'task': None,
                 'target_user_id': None,  # Will be set when player is mentioned
                 'awaiting_player_mention': True,
                 'requester_id': interaction.user.id,
                 'all_teams': all_teams
-            }
+            })
             print(f"✓ Created assisted registration thread {thread.id}, awaiting player mention")
             
         except Exception as e:
@@ -1310,7 +1308,7 @@ class RegistrationCog(commands.Cog):
             return
         
         # Check if target user has another active thread
-        for tid, tdata in list(_active_threads.items()):
+        for tid, tdata in _active_threads.items(message.guild.id):
             if tid != thread_id and tdata.get('target_user_id') == target_user.id:
                 try:
                     other_thread = message.guild.get_thread(tid)
@@ -1393,6 +1391,9 @@ class RegistrationCog(commands.Cog):
             inline=False
         )
         
+        # Live registered/cap counters (kept current by registration_capacity)
+        registration_capacity.apply(embed, 'player')
+        
         embed.set_footer(text="Click the button below to start registration")
         
         return embed
@@ -1421,11 +1422,12 @@ class RegistrationCog(commands.Cog):
                 file = discord.File(logo_path, filename="LOGO.jpeg")
                 embed.set_thumbnail(url="attachment://LOGO.jpeg")
                 # Send the message with embed, logo, and buttons
-                await channel.send(file=file, embed=embed, view=view)
+                message = await channel.send(file=file, embed=embed, view=view)
                 print(f"✅ Registration message sent to channel: {channel.name}")
             else:
                 print(f"⚠️  Logo not found at {logo_path}, sending without logo")
-                await channel.send(embed=embed, view=view)
+                message = await channel.send(embed=embed, view=view)
+            registration_capacity.track_panel('player', message, embed)
             
         except Exception as e:
             print(f"❌ Error sending registration message: {e}")
@@ -0,0 +1,237 @@
+"""
+Schedule commands
+"""
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from database.db import db
+from utils.permissions import admin_or_bots, captain_or_manager_of_team, has_roles, permissions
+from utils.scheduler import STAFF_ROLES, generate_schedule, move_scheduled_match
+from utils.team_index import team_autocomplete
+
+
+MATCHES_PER_PAGE = 15
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DAY_CHOICES = {
+    "every-day": list(range(7)),
+    "weekdays": list(range(5)),
+    "weekends": [5, 6],
+    **{name.lower(): [i] for i, name in enumerate(DAY_NAMES)},
+}
+
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def _parse_minute(value: str) -> Optional[int]:
+    """Minute of the day from HH:MM (24:00 allowed as the end of the day)"""
+    try:
+        hours, minutes = (int(part) for part in value.strip().split(":"))
+    except ValueError:
+        return None
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or (hours == 24 and minutes):
+        return None
+    return hours * 60 + minutes
+
+
+def _parse_time(value: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(value.strip(), TIME_FORMAT)
+    except ValueError:
+        return None
+
+
+def _minute_text(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def format_scheduled(entry: dict) -> str:
+    when = discord.utils.format_dt(entry['starts_at'].replace(tzinfo=discord.utils.utc), 'f')
+    crew = []
+    if entry['caster_discord_id']:
+        crew.append(f"🎙️ <@{entry['caster_discord_id']}>")
+    if entry['staff_discord_id']:
+        crew.append(f"🛡️ <@{entry['staff_discord_id']}>")
+    teams = f"{entry['team1_name'] or 'TBD'} vs {entry['team2_name'] or 'TBD'}"
+    return f"`#{entry['id']}` {when} - **{teams}** ({entry['source']} #{entry['match_id']})" + (
+        f"\n    {' · '.join(crew)}" if crew else ""
+    )
+
+
+class Schedule(commands.Cog):
+    """Match scheduling commands"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+    
+    async def _managed_team(self, interaction: discord.Interaction, team: Optional[int]) -> Optional[int]:
+        """The team to edit: the given one (if the user captains/manages it) or their first"""
+        team_ids = await permissions.team_ids(interaction.user.id, 'captain', 'manager')
+        if team is None:
+            return team_ids[0] if team_ids else None
+        return team if team in team_ids else None
+    
+    @app_commands.command(name="schedule", description="View upcoming scheduled matches")
+    @app_commands.describe(team="Only show this team's matches", page="Page number")
+    @app_commands.autocomplete(team=team_autocomplete)
+    async def schedule_view(self, interaction: discord.Interaction, team: Optional[int] = None, page: app_commands.Range[int, 1] = 1):
+        """Upcoming matches, earliest first"""
+        await interaction.response.defer()
+        
+        entries = await db.get_scheduled_matches(
+            start=datetime.utcnow() - timedelta(hours=3), team_id=team,
+            offset=(page - 1) * MATCHES_PER_PAGE, limit=MATCHES_PER_PAGE
+        )
+        embed = discord.Embed(
+            title="📅 Match Schedule",
+            description="\n".join(format_scheduled(entry) for entry in entries) or "No upcoming matches.",
+            color=discord.Color.blue(),
+            timestamp=datetime.utcnow()
+        )
+        embed.set_footer(text=f"Page {page} · Times shown in your local time zone")
+        await interaction.followup.send(embed=embed)
+    
+    @app_commands.command(name="schedule-availability", description="Add a weekly time window (UTC) when your team can play")
+    @app_commands.describe(
+        days="Which days the window applies to",
+        start="Start time in UTC (HH:MM)",
+        end="End time in UTC (HH:MM, 24:00 for midnight)",
+        team="Team (defaults to your team)"
+    )
+    @app_commands.choices(days=[app_commands.Choice(name=name.replace("-", " ").title(), value=name) for name in DAY_CHOICES])
+    @app_commands.autocomplete(team=team_autocomplete)
+    @captain_or_manager_of_team()
+    async def schedule_availability(
+        self,
+        interaction: discord.Interaction,
+        days: app_commands.Choice[str],
+        start: str,
+        end: str,
+        team: Optional[int] = None
+    ):
+        """Add windows to the team's weekly availability"""
+        await interaction.response.defer(ephemeral=True)
+        
+        team_id = await self._managed_team(interaction, team)
+        if team_id is None:
+            await interaction.followup.send("❌ You can only set availability for a team you captain or manage.", ephemeral=True)
+            return
+        start_minute, end_minute = _parse_minute(start), _parse_minute(end)
+        if start_minute is None or end_minute is None or end_minute <= start_minute:
+            await interaction.followup.send(
+                "❌ Use HH:MM times in UTC with the end after the start (e.g. `18:00` - `22:00`).",
+                ephemeral=True
+            )
+            return
+        
+        windows: List[Tuple[int, int, int]] = [
+            (row['weekday'], row['start_minute'], row['end_minute'])
+            for row in await db.get_team_availability([team_id])
+        ]
+        windows += [(weekday, start_minute, end_minute) for weekday in DAY_CHOICES[days.value]]
+        await db.set_team_availability(team_id, windows)
+        
+        summary = "\n".join(
+            f"{DAY_NAMES[weekday]}: {_minute_text(window_start)}-{_minute_text(window_end)} UTC"
+            for weekday, window_start, window_end in sorted(set(windows))
+        )
+        await interaction.followup.send(f"✅ Availability updated:\n{summary}", ephemeral=True)
+    
+    @app_commands.command(name="schedule-availability-clear", description="Clear your team's availability (falls back to region prime time)")
+    @app_commands.describe(team="Team (defaults to your team)")
+    @app_commands.autocomplete(team=team_autocomplete)
+    @captain_or_manager_of_team()
+    async def schedule_availability_clear(self, interaction: discord.Interaction, team: Optional[int] = None):
+        await interaction.response.defer(ephemeral=True)
+        
+        team_id = await self._managed_team(interaction, team)
+        if team_id is None:
+            await interaction.followup.send("❌ You can only clear availability for a team you captain or manage.", ephemeral=True)
+            return
+        await db.set_team_availability(team_id, [])
+        await interaction.followup.send("✅ Availability cleared - your region's prime time is used instead.", ephemeral=True)
+    
+    @app_commands.command(name="schedule-staff-slot", description="[STAFF] Offer a time slot to cast or run matches")
+    @app_commands.describe(role="Caster or match staff", start="Start (YYYY-MM-DD HH:MM, UTC)", end="End (YYYY-MM-DD HH:MM, UTC)")
+    @app_commands.choices(role=[app_commands.Choice(name=role.title(), value=role) for role in STAFF_ROLES])
+    @has_roles('STAFF_ROLE_ID', 'ADMINISTRATOR_ROLE_ID', 'BOTS_ROLE_ID', message="❌ Only staff can offer schedule slots.")
+    async def schedule_staff_slot(self, interaction: discord.Interaction, role: app_commands.Choice[str], start: str, end: str):
+        await interaction.response.defer(ephemeral=True)
+        
+        starts_at, ends_at = _parse_time(start), _parse_time(end)
+        if not starts_at or not ends_at or ends_at <= starts_at:
+            await interaction.followup.send(
+                "❌ Use `YYYY-MM-DD HH:MM` (UTC) with the end after the start.", ephemeral=True
+            )
+            return
+        slot = await db.add_staff_slot(interaction.user.id, role.value, starts_at, ends_at)
+        await interaction.followup.send(
+            f"✅ Slot `#{slot['id']}` added: {role.name} from {start} to {end} UTC.\n"
+            "It is used the next time matches are scheduled.",
+            ephemeral=True
+        )
+    
+    @app_commands.command(name="schedule-generate", description="[ADMIN] Schedule every playable match that has no time yet")
+    @app_commands.describe(days="How many days ahead to schedule (defaults to SCHEDULE_HORIZON_DAYS)")
+    @admin_or_bots("❌ Only administrators and bot managers can generate the schedule.")
+    async def schedule_generate(self, interaction: discord.Interaction, days: Optional[app_commands.Range[int, 1, 60]] = None):
+        await interaction.response.defer(ephemeral=True)
+        
+        summary = await generate_schedule(days)
+        print(
+            f"📅 Schedule generated: {summary['scheduled']} scheduled, {summary['unscheduled']} unscheduled "
+            f"in {summary['compute_seconds'] * 1000:.0f}ms"
+        )
+        
+        description = (
+            f"**Scheduled:** `{summary['scheduled']}`\n"
+            f"**No slot found:** `{summary['unscheduled']}`\n"
+            f"**Time:** `{summary['compute_seconds'] * 1000:.0f}ms`"
+        )
+        if summary['first']:
+            description += f"\n**From** {summary['first']:%Y-%m-%d %H:%M} **to** {summary['last']:%Y-%m-%d %H:%M} UTC"
+        if summary['unscheduled']:
+            description += "\n\n⚠️ Matches without a slot need more availability overlap, staff slots or days."
+        embed = discord.Embed(
+            title="📅 Schedule Generated",
+            description=description,
+            color=discord.Color.green(),
+            timestamp=datetime.utcnow()
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="schedule-move", description="[ADMIN] Move a scheduled match to another time")
+    @app_commands.describe(schedule_id="Schedule number shown in /schedule", when="New start (YYYY-MM-DD HH:MM, UTC)")
+    @admin_or_bots("❌ Only administrators and bot managers can move matches.")
+    async def schedule_move(self, interaction: discord.Interaction, schedule_id: int, when: str):
+        """Move one match and re-place only the matches it collides with"""
+        await interaction.response.defer(ephemeral=True)
+        
+        entry = await db.get_scheduled_match(schedule_id)
+        if not entry:
+            await interaction.followup.send(f"❌ Schedule entry `#{schedule_id}` not found.", ephemeral=True)
+            return
+        starts_at = _parse_time(when)
+        result = await move_scheduled_match(entry, starts_at) if starts_at else None
+        if result is None:
+            await interaction.followup.send(
+                "❌ Use a future `YYYY-MM-DD HH:MM` (UTC) that starts a schedule slot.", ephemeral=True
+            )
+            return
+        
+        message = f"✅ `#{schedule_id}` moved to {when} UTC."
+        if result['moved']:
+            message += f"\n🔁 {len(result['moved'])} colliding match(es) were rescheduled."
+        if result['unscheduled']:
+            message += f"\n⚠️ {len(result['unscheduled'])} colliding match(es) found no new slot."
+        if not result['caster_discord_id'] and not result['staff_discord_id']:
+            message += "\nℹ️ No caster/staff assigned at that time."
+        print(f"📅 Schedule #{schedule_id} moved to {when} ({len(result['moved'])} rescheduled)")
+        await interaction.followup.send(message, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Schedule(bot))
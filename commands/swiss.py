@@ -0,0 +1,302 @@
+"""
+Swiss stage commands
+"""
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+from datetime import datetime
+import math
+import time
+from typing import List, Optional
+from database.db import db
+from commands.check_in import check_in_window_autocomplete
+from utils.brackets import seed_teams
+from utils.config import REGION_ROLE_KEYS
+from utils.permissions import admin_or_bots
+from utils.ratings import rate_match
+from utils.swiss import org_groups, pair_round
+
+
+# Rows shown per page of standings / pairings
+STANDINGS_PER_PAGE = 20
+MATCHES_PER_PAGE = 16
+
+
+def _team(match: dict, side: str) -> str:
+    name = match[f'{side}_name'] or f"Team #{match[f'{side}_id']}"
+    if match['winner_id'] is not None and match['winner_id'] == match[f'{side}_id']:
+        return f"**{name}**"
+    return name
+
+
+def format_swiss_match(match: dict) -> str:
+    if match['status'] == 'bye':
+        return f"➖ `#{match['id']}` {_team(match, 'team1')} - *BYE*"
+    icon = '✅' if match['status'] == 'completed' else '⚔️'
+    return f"{icon} `#{match['id']}` {_team(match, 'team1')} vs {_team(match, 'team2')}"
+
+
+async def stage_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[int]]:
+    stages = await db.get_swiss_stages()
+    current = current.lower()
+    return [
+        app_commands.Choice(name=f"{s['name']} (#{s['id']}, round {s['current_round']}/{s['total_rounds']})"[:100], value=s['id'])
+        for s in stages
+        if current in s['name'].lower() or current == str(s['id'])
+    ][:25]
+
+
+async def swiss_winner_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[int]]:
+    """The two teams of the match picked in the match_id option"""
+    match_id = interaction.namespace.match_id
+    if not match_id:
+        return []
+    match = await db.get_swiss_match(match_id)
+    if not match or match['team2_id'] is None:
+        return []
+    return [
+        app_commands.Choice(name=(match[f'{side}_name'] or f"Team #{match[f'{side}_id']}")[:100], value=match[f'{side}_id'])
+        for side in ('team1', 'team2')
+        if match[f'{side}_id'] is not None
+    ]
+
+
+async def _resolve_stage(stage_id: Optional[int]) -> Optional[dict]:
+    """The requested stage, or the latest active one"""
+    if stage_id is not None:
+        return await db.get_swiss_stage(stage_id)
+    latest = await db.get_swiss_stages(limit=1)
+    return latest[0] if latest else None
+
+
+class Swiss(commands.Cog):
+    """Swiss stage commands"""
+    
+    def __init__(self, bot):
+        self.bot = bot
+    
+    @app_commands.command(name="swiss-create", description="[ADMIN] Create a Swiss stage from registered teams")
+    @app_commands.describe(
+        name="Stage name",
+        rounds="Number of rounds (defaults to enough rounds to find a single undefeated team)",
+        region="Only include teams from this region",
+        check_in="Only include teams that checked in to this check-in"
+    )
+    @app_commands.choices(region=[app_commands.Choice(name=region, value=region) for region in REGION_ROLE_KEYS])
+    @app_commands.autocomplete(check_in=check_in_window_autocomplete)
+    @admin_or_bots("❌ Only administrators and bot managers can create Swiss stages.")
+    async def swiss_create(
+        self,
+        interaction: discord.Interaction,
+        name: str,
+        rounds: Optional[app_commands.Range[int, 1, 20]] = None,
+        region: Optional[app_commands.Choice[str]] = None,
+        check_in: Optional[int] = None
+    ):
+        """Seed teams by rating and team_stats record and store the stage"""
+        await interaction.response.defer(ephemeral=True)
+        
+        region_value = region.value if region else None
+        teams = await db.get_team_seeding(region_value)
+        if check_in is not None:
+            checked_in = set(await db.get_check_in_team_ids(check_in))
+            teams = [team for team in teams if team['id'] in checked_in]
+        if len(teams) < 2:
+            await interaction.followup.send("❌ A Swiss stage needs at least 2 registered teams.", ephemeral=True)
+            return
+        
+        seeds = seed_teams(teams)
+        total_rounds = rounds or math.ceil(math.log2(len(seeds)))
+        stage = await db.create_swiss_stage(name, region_value, total_rounds, interaction.user.id, seeds)
+        print(f"🇨🇭 Swiss stage '{name}' created: {len(seeds)} teams, {total_rounds} rounds")
+        
+        embed = discord.Embed(
+            title="✅ Swiss Stage Created",
+            description=(
+                f"**{name}** (#{stage['id']})\n"
+                f"{len(seeds)} teams · {total_rounds} rounds\n\n"
+                "Use `/swiss-pair` to pair each round, `/swiss-result` to report results "
+                "and `/swiss-standings` to view the table."
+            ),
+            color=discord.Color.green(),
+            timestamp=datetime.utcnow()
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="swiss-pair", description="[ADMIN] Pair the next round of a Swiss stage")
+    @app_commands.describe(stage="Swiss stage (defaults to the latest active one)")
+    @app_commands.autocomplete(stage=stage_autocomplete)
+    @admin_or_bots("❌ Only administrators and bot managers can pair Swiss rounds.")
+    async def swiss_pair(self, interaction: discord.Interaction, stage: Optional[int] = None):
+        """Pair by current standings without rematches or same-organisation games"""
+        await interaction.response.defer(ephemeral=True)
+        
+        stage_data = await _resolve_stage(stage)
+        if not stage_data:
+            await interaction.followup.send("❌ No Swiss stage found.", ephemeral=True)
+            return
+        if stage_data['status'] != 'active' or stage_data['current_round'] >= stage_data['total_rounds']:
+            await interaction.followup.send(f"❌ **{stage_data['name']}** has no rounds left to pair.", ephemeral=True)
+            return
+        
+        standings = await db.get_swiss_standings(stage_data['id'])
+        if len(standings) < 2:
+            await interaction.followup.send("❌ Fewer than 2 teams are left in this stage.", ephemeral=True)
+            return
+        played = {frozenset(pair) for pair in await db.get_swiss_opponents(stage_data['id'])}
+        orgs = org_groups(await db.get_swiss_staff(stage_data['id']))
+        had_bye = {row['team_id'] for row in standings if row['byes']}
+        
+        started = time.perf_counter()
+        pairs, bye, forced = pair_round([row['team_id'] for row in standings], played, orgs, had_bye)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        
+        round_number = stage_data['current_round'] + 1
+        stored = await db.create_swiss_round(stage_data['id'], round_number, pairs, bye)
+        if stored is None:
+            await interaction.followup.send(
+                "❌ This round can't be paired yet - previous results are still pending, "
+                "or the round was paired by someone else.",
+                ephemeral=True
+            )
+            return
+        print(
+            f"🇨🇭 Swiss stage #{stage_data['id']} round {round_number}: "
+            f"{len(pairs)} pairs in {elapsed_ms:.1f}ms ({forced} forced)"
+        )
+        
+        matches = await db.get_swiss_round_matches(stage_data['id'], round_number, limit=MATCHES_PER_PAGE)
+        description = (
+            f"**{stage_data['name']}** - Round {round_number}/{stage_data['total_rounds']}\n"
+            f"{len(pairs)} match(es){' + 1 bye' if bye else ''} · paired in {elapsed_ms:.0f}ms\n\n"
+            + "\n".join(format_swiss_match(match) for match in matches)
+        )
+        if stored > len(matches):
+            description += f"\n*...and {stored - len(matches)} more - see `/swiss-matches`*"
+        if forced:
+            description += f"\n\n⚠️ {forced} pairing(s) had no legal opponent left and repeat a matchup or organisation."
+        
+        embed = discord.Embed(
+            title="🇨🇭 Round Paired",
+            description=description,
+            color=discord.Color.blue(),
+            timestamp=datetime.utcnow()
+        )
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="swiss-standings", description="View the standings of a Swiss stage")
+    @app_commands.describe(stage="Swiss stage (defaults to the latest active one)", page="Page number")
+    @app_commands.autocomplete(stage=stage_autocomplete)
+    async def swiss_standings(
+        self,
+        interaction: discord.Interaction,
+        stage: Optional[int] = None,
+        page: app_commands.Range[int, 1] = 1
+    ):
+        """Wins, then Buchholz, then Sonneborn-Berger, then seed"""
+        await interaction.response.defer()
+        
+        stage_data = await _resolve_stage(stage)
+        if not stage_data:
+            await interaction.followup.send("❌ No Swiss stage found.", ephemeral=True)
+            return
+        
+        standings = await db.get_swiss_standings(stage_data['id'])
+        page_count = max(1, -(-len(standings) // STANDINGS_PER_PAGE))
+        page = min(page, page_count)
+        start = (page - 1) * STANDINGS_PER_PAGE
+        
+        lines = [
+            f"`{rank:>4}.` **{row['team_name']}** [{row['team_tag']}] "
+            f"{row['wins']}-{row['losses']} · Bu {row['buchholz']} · SB {row['sonneborn_berger']}"
+            for rank, row in enumerate(standings[start:start + STANDINGS_PER_PAGE], start=start + 1)
+        ]
+        status = "🏁 Completed" if stage_data['status'] == 'completed' else "🟢 In progress"
+        embed = discord.Embed(
+            title=f"🇨🇭 {stage_data['name']} - Standings",
+            description=(
+                f"Round {stage_data['current_round']}/{stage_data['total_rounds']} · "
+                f"{stage_data['team_count']} teams · {status}\n\n"
+                + ("\n".join(lines) or "No teams in this stage.")
+            ),
+            color=discord.Color.gold(),
+            timestamp=datetime.utcnow()
+        )
+        embed.set_footer(text=f"Page {page}/{page_count} · Bu = Buchholz, SB = Sonneborn-Berger")
+        await interaction.followup.send(embed=embed)
+    
+    @app_commands.command(name="swiss-matches", description="View the pairings of a Swiss round")
+    @app_commands.describe(
+        stage="Swiss stage (defaults to the latest active one)",
+        round_number="Round (defaults to the current round)",
+        page="Page number"
+    )
+    @app_commands.rename(round_number="round")
+    @app_commands.autocomplete(stage=stage_autocomplete)
+    async def swiss_matches(
+        self,
+        interaction: discord.Interaction,
+        stage: Optional[int] = None,
+        round_number: Optional[app_commands.Range[int, 1]] = None,
+        page: app_commands.Range[int, 1] = 1
+    ):
+        """One page of a round's pairings"""
+        await interaction.response.defer()
+        
+        stage_data = await _resolve_stage(stage)
+        if not stage_data or stage_data['current_round'] == 0:
+            await interaction.followup.send("❌ No paired Swiss round found.", ephemeral=True)
+            return
+        
+        round_number = min(round_number or stage_data['current_round'], stage_data['current_round'])
+        matches = await db.get_swiss_round_matches(
+            stage_data['id'], round_number, offset=(page - 1) * MATCHES_PER_PAGE, limit=MATCHES_PER_PAGE
+        )
+        embed = discord.Embed(
+            title=f"🇨🇭 {stage_data['name']} - Round {round_number}",
+            description="\n".join(format_swiss_match(match) for match in matches) or "No matches on this page.",
+            color=discord.Color.blue(),
+            timestamp=datetime.utcnow()
+        )
+        embed.set_footer(text=f"Page {page} · Report results with /swiss-result")
+        await interaction.followup.send(embed=embed)
+    
+    @app_commands.command(name="swiss-result", description="[ADMIN] Report the winner of a Swiss match")
+    @app_commands.describe(match_id="Match number shown in /swiss-matches", winner="Winning team")
+    @app_commands.autocomplete(winner=swiss_winner_autocomplete)
+    @admin_or_bots("❌ Only administrators and bot managers can report results.")
+    async def swiss_result(self, interaction: discord.Interaction, match_id: int, winner: int):
+        """Record a Swiss match result"""
+        await interaction.response.defer(ephemeral=True)
+        
+        match = await db.get_swiss_match(match_id)
+        if not match:
+            await interaction.followup.send(f"❌ Match `#{match_id}` not found.", ephemeral=True)
+            return
+        if match['status'] != 'pending':
+            await interaction.followup.send(
+                f"❌ Match `#{match_id}` already has a result (status: {match['status']}).",
+                ephemeral=True
+            )
+            return
+        if winner not in (match['team1_id'], match['team2_id']):
+            await interaction.followup.send("❌ The winner must be one of the two teams in the match.", ephemeral=True)
+            return
+        
+        if not await db.record_swiss_result(match_id, winner):
+            await interaction.followup.send("❌ The match was updated by someone else. Please check `/swiss-matches`.", ephemeral=True)
+            return
+        
+        try:
+            await rate_match(match['team1_id'], match['team2_id'], winner)
+        except Exception as e:
+            print(f"❌ Error updating ratings for Swiss match #{match_id}: {e}")
+        
+        winner_name = match['team1_name'] if winner == match['team1_id'] else match['team2_name']
+        print(f"🇨🇭 Swiss match #{match_id} won by team {winner}")
+        await interaction.followup.send(f"✅ **{winner_name}** wins match `#{match_id}`.", ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Swiss(bot))
@@ -1,10 +1,14 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import os
 import re
+from database.backend import RosterLimitError
 from database.db import db
+from utils.config import config
+from utils.member_cache import get_or_fetch_member
 from utils.checks import commands_channel_only
+from utils.permissions import captain_of_team, captain_or_manager_of_team
+from utils.registration_capacity import registration_capacity
 
 
 class TeamManagementCog(commands.Cog):
@@ -21,6 +25,7 @@ class TeamManagementCog(commands.Cog):
         player4="Fourth player to invite (optional)",
         player5="Fifth player to invite (optional)"
     )
+    @captain_or_manager_of_team("❌ You must be a team captain or manager to invite players.")
     async def invite_player(
         self, 
         interaction: discord.Interaction, 
@@ -33,25 +38,6 @@ class TeamManagementCog(commands.Cog):
         """Invite one or more players to join your team"""
         await interaction.response.defer(ephemeral=True)
         
-        # Check if user has Captain or Manager role
-        captain_role_id = os.getenv('CAPTAIN_ROLE_ID')
-        manager_role_id = os.getenv('MANAGER_ROLE_ID')
-        
-        user_role_ids = [role.id for role in interaction.user.roles]
-        has_permission = False
-        
-        if captain_role_id and int(captain_role_id) in user_role_ids:
-            has_permission = True
-        if manager_role_id and int(manager_role_id) in user_role_ids:
-            has_permission = True
-        
-        if not has_permission:
-            await interaction.followup.send(
-                "❌ You need the Captain or Manager role to use this command.",
-                ephemeral=True
-            )
-            return
-        
         # Check if user is a captain or manager of any team
         manager_teams = await db.get_user_teams_by_role(interaction.user.id, 'manager')
         captain_teams = await db.get_user_teams_by_role(interaction.user.id, 'captain')
@@ -331,29 +317,11 @@ class TeamManagementCog(commands.Cog):
     
     @app_commands.command(name="kick", description="Kick a player from your team")
     @app_commands.describe(player="The player to kick from your team")
+    @captain_or_manager_of_team("❌ You must be a team captain or manager to kick players!")
     async def kick_player(self, interaction: discord.Interaction, player: discord.Member):
         """Kick a player from your team"""
         await interaction.response.defer(ephemeral=True)
         
-        # Check if user has Captain or Manager role
-        captain_role_id = os.getenv('CAPTAIN_ROLE_ID')
-        manager_role_id = os.getenv('MANAGER_ROLE_ID')
-        
-        user_role_ids = [role.id for role in interaction.user.roles]
-        has_permission = False
-        
-        if captain_role_id and int(captain_role_id) in user_role_ids:
-            has_permission = True
-        if manager_role_id and int(manager_role_id) in user_role_ids:
-            has_permission = True
-        
-        if not has_permission:
-            await interaction.followup.send(
-                "❌ You need the Captain or Manager role to use this command.",
-                ephemeral=True
-            )
-            return
-        
         # Check if user is a captain or manager
         manager_teams = await db.get_user_teams_by_role(interaction.user.id, 'manager')
         captain_teams = await db.get_user_teams_by_role(interaction.user.id, 'captain')
@@ -464,9 +432,9 @@ class TeamManagementCog(commands.Cog):
                     # Only remove the role if they don't have it in another team
                     if not other_teams:
                         role_env_key = 'CAPTAIN_ROLE_ID' if player_role == 'captain' else 'MANAGER_ROLE_ID'
-                        position_role_id = os.getenv(role_env_key)
+                        position_role_id = config.get_id(role_env_key)
                         if position_role_id:
-                            position_role = interaction.guild.get_role(int(position_role_id))
+                            position_role = interaction.guild.get_role(position_role_id)
                             if position_role and position_role in player.roles:
                                 await player.remove_roles(position_role)
                                 print(f"✓ Removed {player_role} role from {player.name}")
@@ -509,12 +477,12 @@ class TeamManagementCog(commands.Cog):
     
     async def log_kick(self, interaction: discord.Interaction, player: discord.Member, team: dict):
         """Log kick to bot logs channel"""
-        bot_logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+        bot_logs_channel_id = config.bot_logs_channel_id
         if not bot_logs_channel_id:
             return
         
         try:
-            channel = interaction.client.get_channel(int(bot_logs_channel_id))
+            channel = interaction.client.get_channel(bot_logs_channel_id)
             if not channel:
                 return
             
@@ -538,29 +506,11 @@ class TeamManagementCog(commands.Cog):
             print(f"Error logging kick: {e}")
     
     @app_commands.command(name="disband", description="Disband your team")
+    @captain_or_manager_of_team("❌ You must be a team captain or manager to disband teams!")
     async def disband_team(self, interaction: discord.Interaction):
         """Disband a team (captain or manager only)"""
         await interaction.response.defer(ephemeral=True)
         
-        # Check if user has Captain or Manager role
-        captain_role_id = os.getenv('CAPTAIN_ROLE_ID')
-        manager_role_id = os.getenv('MANAGER_ROLE_ID')
-        
-        user_role_ids = [role.id for role in interaction.user.roles]
-        has_permission = False
-        
-        if captain_role_id and int(captain_role_id) in user_role_ids:
-            has_permission = True
-        if manager_role_id and int(manager_role_id) in user_role_ids:
-            has_permission = True
-        
-        if not has_permission:
-            await interaction.followup.send(
-                "❌ You need the Captain or Manager role to use this command.",
-                ephemeral=True
-            )
-            return
-        
         # Check if user is a captain or manager
         manager_teams = await db.get_user_teams_by_role(interaction.user.id, 'manager')
         captain_teams = await db.get_user_teams_by_role(interaction.user.id, 'captain')
@@ -628,23 +578,11 @@ class TeamManagementCog(commands.Cog):
         )
     
     @app_commands.command(name="transfer-captainship", description="Transfer team captainship to another member (/transfer-captainship)")
+    @captain_of_team("❌ You must be a team captain to transfer captainship!")
     async def transfer_captainship(self, interaction: discord.Interaction):
         """Transfer captainship to another team member"""
         await interaction.response.defer(ephemeral=True)
         
-        # Check if user has Captain role
-        captain_role_id = os.getenv('CAPTAIN_ROLE_ID')
-        
-        user_role_ids = [role.id for role in interaction.user.roles]
-        has_captain_role = captain_role_id and int(captain_role_id) in user_role_ids
-        
-        if not has_captain_role:
-            await interaction.followup.send(
-                "❌ You need the Captain role to use this command.",
-                ephemeral=True
-            )
-            return
-        
         # Check if user is a captain
         captain_teams = await db.get_user_teams_by_role(interaction.user.id, 'captain')
         
@@ -825,12 +763,23 @@ class TeamInviteResponseView(discord.ui.View):
             # Determine role: first invited player becomes captain, others are regular players
             player_role = 'captain' if (is_first_player and not has_captain) else 'player'
             
-            # Add player to team
-            await db.add_team_member(
-                team_id=self.team_id,
-                discord_id=interaction.user.id,
-                role=player_role
-            )
+            # Add player to team (the database enforces the roster limits; if another
+            # first player took the captaincy meanwhile, join as a regular player)
+            try:
+                await db.add_team_member(
+                    team_id=self.team_id,
+                    discord_id=interaction.user.id,
+                    role=player_role
+                )
+            except RosterLimitError as e:
+                if e.role != 'captain':
+                    raise
+                player_role = 'player'
+                await db.add_team_member(
+                    team_id=self.team_id,
+                    discord_id=interaction.user.id,
+                    role=player_role
+                )
             
             # If this player is becoming captain, update the teams table
             if player_role == 'captain':
@@ -841,7 +790,7 @@ class TeamInviteResponseView(discord.ui.View):
                 try:
                     role = self.guild.get_role(team['role_id'])
                     if role:
-                        member = self.guild.get_member(interaction.user.id)
+                        member = await get_or_fetch_member(self.guild, interaction.user.id)
                         if member:
                             await member.add_roles(role)
                             print(f"✓ Assigned role {role.name} to {member.name}")
@@ -851,11 +800,11 @@ class TeamInviteResponseView(discord.ui.View):
             # Assign captain role if they became captain
             if player_role == 'captain':
                 try:
-                    captain_role_id = os.getenv('CAPTAIN_ROLE_ID')
+                    captain_role_id = config.captain_role_id
                     if captain_role_id:
-                        captain_role = self.guild.get_role(int(captain_role_id))
+                        captain_role = self.guild.get_role(captain_role_id)
                         if captain_role:
-                            member = self.guild.get_member(interaction.user.id)
+                            member = await get_or_fetch_member(self.guild, interaction.user.id)
                             if member:
                                 await member.add_roles(captain_role)
                                 print(f"✓ Assigned Captain role to {member.name}")
@@ -882,7 +831,7 @@ class TeamInviteResponseView(discord.ui.View):
             
             # Notify the inviter
             try:
-                inviter = self.guild.get_member(self.inviter_id)
+                inviter = await get_or_fetch_member(self.guild, self.inviter_id)
                 if inviter:
                     notify_message = f"{interaction.user.mention} has accepted your invite!\n"
                     
@@ -910,6 +859,11 @@ class TeamInviteResponseView(discord.ui.View):
             
             print(f"✓ {interaction.user.name} accepted invite to team {self.team_name}")
             
+        except RosterLimitError:
+            await interaction.followup.send(
+                f"❌ **{self.team_name}** is full - the roster has no open player slots.",
+                ephemeral=True
+            )
         except Exception as e:
             print(f"Error accepting team invite: {e}")
             await interaction.followup.send(
@@ -932,7 +886,7 @@ class TeamInviteResponseView(discord.ui.View):
         
         # Notify the inviter
         try:
-            inviter = self.guild.get_member(self.inviter_id)
+            inviter = await get_or_fetch_member(self.guild, self.inviter_id)
             if inviter:
                 notify_embed = discord.Embed(
                     title="Team Invite Declined",
@@ -954,12 +908,12 @@ class TeamInviteResponseView(discord.ui.View):
     
     async def log_team_join(self, interaction: discord.Interaction):
         """Log team join to bot logs channel"""
-        bot_logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+        bot_logs_channel_id = config.bot_logs_channel_id
         if not bot_logs_channel_id:
             return
         
         try:
-            channel = interaction.client.get_channel(int(bot_logs_channel_id))
+            channel = interaction.client.get_channel(bot_logs_channel_id)
             if not channel:
                 return
             
@@ -1079,7 +1033,7 @@ class TeamLeaveConfirmView(discord.ui.View):
             if team and team.get('role_id'):
                 try:
                     role = interaction.guild.get_role(team['role_id'])
-                    member = interaction.guild.get_member(interaction.user.id)
+                    member = await get_or_fetch_member(interaction.guild, interaction.user.id)
                     if role and member and role in member.roles:
                         await member.remove_roles(role)
                         print(f"✓ Removed team role {role.name} from {member.name}")
@@ -1089,7 +1043,7 @@ class TeamLeaveConfirmView(discord.ui.View):
             # Remove captain or manager role if applicable
             if self.user_role in ['captain', 'manager']:
                 try:
-                    member = interaction.guild.get_member(interaction.user.id)
+                    member = await get_or_fetch_member(interaction.guild, interaction.user.id)
                     if member:
                         # Check if user has this role in any other team
                         other_teams = await db.get_user_teams_by_role(interaction.user.id, self.user_role)
@@ -1097,9 +1051,9 @@ class TeamLeaveConfirmView(discord.ui.View):
                         # Only remove the role if they don't have it in another team
                         if not other_teams:
                             role_env_key = 'CAPTAIN_ROLE_ID' if self.user_role == 'captain' else 'MANAGER_ROLE_ID'
-                            position_role_id = os.getenv(role_env_key)
+                            position_role_id = config.get_id(role_env_key)
                             if position_role_id:
-                                position_role = interaction.guild.get_role(int(position_role_id))
+                                position_role = interaction.guild.get_role(position_role_id)
                                 if position_role and position_role in member.roles:
                                     await member.remove_roles(position_role)
                                     print(f"✓ Removed {self.user_role} role from {member.name}")
@@ -1119,7 +1073,7 @@ class TeamLeaveConfirmView(discord.ui.View):
                     continue  # Don't notify if they're leaving their own team as captain/manager
                 
                 try:
-                    leader = self.guild.get_member(leader_id)
+                    leader = await get_or_fetch_member(self.guild, leader_id)
                     if leader:
                         notify_embed = discord.Embed(
                             title="Team Member Left",
@@ -1165,12 +1119,12 @@ class TeamLeaveConfirmView(discord.ui.View):
     
     async def log_leave(self, interaction: discord.Interaction):
         """Log team leave to bot logs channel"""
-        bot_logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+        bot_logs_channel_id = config.bot_logs_channel_id
         if not bot_logs_channel_id:
             return
         
         try:
-            channel = interaction.client.get_channel(int(bot_logs_channel_id))
+            channel = interaction.client.get_channel(bot_logs_channel_id)
             if not channel:
                 return
             
@@ -1337,8 +1291,9 @@ class TeamDisbandConfirmView(discord.ui.View):
             team_members = await db.get_team_members(self.team_id)
             team = await db.get_team_by_id(self.team_id)
             
-            # Delete team (this should cascade delete team_members)
+            # Delete team (this should cascade delete team_members); the slot may go to a waitlisted team
             await db.delete_team(self.team_id)
+            await registration_capacity.update()
             
             # Notify all members
             notified_count = 0
@@ -1347,7 +1302,7 @@ class TeamDisbandConfirmView(discord.ui.View):
                     continue  # Skip the disbander
                 
                 try:
-                    user = self.guild.get_member(member['discord_id'])
+                    user = await get_or_fetch_member(self.guild, member['discord_id'])
                     if user:
                         disband_embed = discord.Embed(
                             title="Team Disbanded",
@@ -1410,12 +1365,12 @@ class TeamDisbandConfirmView(discord.ui.View):
     
     async def log_disband(self, interaction: discord.Interaction, team: dict, member_count: int):
         """Log team disband to bot logs channel"""
-        bot_logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+        bot_logs_channel_id = config.bot_logs_channel_id
         if not bot_logs_channel_id:
             return
         
         try:
-            channel = interaction.client.get_channel(int(bot_logs_channel_id))
+            channel = interaction.client.get_channel(bot_logs_channel_id)
             if not channel:
                 return
             
@@ -1521,12 +1476,13 @@ class TransferCaptainshipMemberSelect(discord.ui.Select):
         
         options = []
         for member in members:
-            # Get member object from guild
+            # Get member object from guild (may be uncached with a lazy member cache - use the IGN then)
             guild_member = guild.get_member(member['discord_id'])
-            if guild_member:
+            label = guild_member.name if guild_member else member.get('ign')
+            if label:
                 options.append(
                     discord.SelectOption(
-                        label=guild_member.name,
+                        label=label,
                         value=str(member['discord_id']),
                         description=f"Role: {member['role'].title()}"
                     )
@@ -1547,7 +1503,7 @@ class TransferCaptainshipMemberSelect(discord.ui.Select):
         await interaction.response.defer()
         
         new_captain_id = int(self.values[0])
-        new_captain = self.guild.get_member(new_captain_id)
+        new_captain = await get_or_fetch_member(self.guild, new_captain_id)
         
         if not new_captain:
             await interaction.followup.send("❌ Selected member not found!", ephemeral=True)
@@ -1563,22 +1519,23 @@ class TransferCaptainshipMemberSelect(discord.ui.Select):
             # Update team captain in database
             await db.update_team(self.team_id, captain_discord_id=new_captain_id)
             
-            # Update team_members - change old captain role to manager
-            await db.remove_team_member(self.team_id, self.current_captain_id)
-            await db.add_team_member(self.team_id, self.current_captain_id, 'manager')
-            
-            # Update new captain role in team_members
-            await db.remove_team_member(self.team_id, new_captain_id)
-            await db.add_team_member(self.team_id, new_captain_id, 'captain')
+            # Swap roles in one statement - old captain becomes a manager (or a
+            # player when the team already has its maximum of managers)
+            old_captain_role = 'manager'
+            try:
+                await db.set_team_roles(self.team_id, {self.current_captain_id: old_captain_role, new_captain_id: 'captain'})
+            except RosterLimitError:
+                old_captain_role = 'player'
+                await db.set_team_roles(self.team_id, {self.current_captain_id: old_captain_role, new_captain_id: 'captain'})
             
             # Update Discord roles - transfer captain role
             try:
-                old_captain_member = self.guild.get_member(self.current_captain_id)
-                captain_role_id = os.getenv('CAPTAIN_ROLE_ID')
-                manager_role_id = os.getenv('MANAGER_ROLE_ID')
+                old_captain_member = await get_or_fetch_member(self.guild, self.current_captain_id)
+                captain_role_id = config.captain_role_id
+                manager_role_id = config.manager_role_id
                 
                 if captain_role_id:
-                    captain_role = self.guild.get_role(int(captain_role_id))
+                    captain_role = self.guild.get_role(captain_role_id)
                     
                     # Remove captain role from old captain
                     if captain_role and old_captain_member and captain_role in old_captain_member.roles:
@@ -1591,15 +1548,15 @@ class TransferCaptainshipMemberSelect(discord.ui.Select):
                         print(f"✓ Assigned Captain role to {new_captain.name}")
                 
                 # Assign manager role to old captain
-                if manager_role_id and old_captain_member:
-                    manager_role = self.guild.get_role(int(manager_role_id))
+                if manager_role_id and old_captain_member and old_captain_role == 'manager':
+                    manager_role = self.guild.get_role(manager_role_id)
                     if manager_role:
                         await old_captain_member.add_roles(manager_role)
                         print(f"✓ Assigned Manager role to {old_captain_member.name}")
                 
                 # Remove manager role from new captain (if they had it)
                 if manager_role_id and new_captain:
-                    manager_role = self.guild.get_role(int(manager_role_id))
+                    manager_role = self.guild.get_role(manager_role_id)
                     if manager_role and manager_role in new_captain.roles:
                         await new_captain.remove_roles(manager_role)
                         print(f"✓ Removed Manager role from {new_captain.name}")
@@ -1613,7 +1570,7 @@ class TransferCaptainshipMemberSelect(discord.ui.Select):
                 description=(
                     f"You have successfully transferred captainship of **{self.team_name}**.\n\n"
                     f"**New Captain:** {new_captain.mention}\n"
-                    f"**Your New Role:** Manager"
+                    f"**Your New Role:** {old_captain_role.title()}"
                 ),
                 color=discord.Color.green()
             )
@@ -1653,12 +1610,12 @@ class TransferCaptainshipMemberSelect(discord.ui.Select):
     
     async def log_transfer(self, interaction: discord.Interaction, team: dict, new_captain: discord.Member):
         """Log captainship transfer to bot logs channel"""
-        bot_logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+        bot_logs_channel_id = config.bot_logs_channel_id
         if not bot_logs_channel_id:
             return
         
         try:
-            channel = interaction.client.get_channel(int(bot_logs_channel_id))
+            channel = interaction.client.get_channel(bot_logs_channel_id)
             if not channel:
                 return
             
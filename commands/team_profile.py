@@ -6,6 +6,8 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from database.db import db
+from utils.cards import card_renderer
+import io
 import os
 
 
@@ -182,7 +184,13 @@ class TeamProfile(commands.Cog):
             )
             
             # Team Stats Section
+            rating = await db.get_rating_rank('team', profile['id'])
+            if rating:
+                rating_text = f"`{round(rating['rating'])}` (#{rating['rank']} of {rating['total']})"
+            else:
+                rating_text = "`-`"
             stats_text = (
+                f"**Rating:** {rating_text}\n"
                 f"**Wins:** `{profile['wins']}`\n"
                 f"**Losses:** `{profile['losses']}`\n"
                 f"**Total Matches:** `{profile['matches_played']}`\n"
@@ -198,7 +206,29 @@ class TeamProfile(commands.Cog):
             # Footer
             embed.set_footer(text=f"Team created on {profile['created_at'].strftime('%b %d, %Y')}")
             
-            await interaction.followup.send(embed=embed, ephemeral=True)
+            # Image card (rendered off the event loop, cached until the stats, roster or logo change)
+            card = await card_renderer.render(
+                'team',
+                {
+                    'team_name': profile['team_name'],
+                    'team_tag': profile['team_tag'],
+                    'region': profile['region'],
+                    'rating': round(rating['rating']) if rating else "-",
+                    'wins': profile['wins'],
+                    'losses': profile['losses'],
+                    'matches_played': profile['matches_played'],
+                    'winrate': winrate,
+                    'roster': [(player['ign'], player['is_captain']) for player in roster_list]
+                },
+                profile['logo_url']
+            )
+            if card:
+                embed.set_image(url="attachment://team.png")
+                await interaction.followup.send(
+                    embed=embed, file=discord.File(io.BytesIO(card), filename="team.png"), ephemeral=True
+                )
+            else:
+                await interaction.followup.send(embed=embed, ephemeral=True)
             
         except Exception as e:
             print(f"Error in team-profile command: {e}")
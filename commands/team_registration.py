@@ -5,11 +5,77 @@ import asyncio
 import aiohttp
 import datetime
 from pathlib import Path
+from typing import Optional
+from database.backend import ALL_REGIONS, RegistrationFullError
 from database.db import db
+from utils.config import config
+from utils.member_cache import get_or_fetch_member
+from utils.registration_capacity import registration_capacity
 from utils.thread_manager import add_staff_to_thread
 from commands.registration import inactivity_warning_task, cancel_inactivity_warning, _active_threads
 
 
+
+async def create_team_or_waitlist(
+    interaction: discord.Interaction,
+    team_role: discord.Role,
+    discord_id: int,
+    user_role: str,
+    team_name: str,
+    team_tag: str,
+    region: str,
+    logo_url: Optional[str]
+) -> Optional[dict]:
+    """
+    Create the team in the database. When team registration is full the new
+    team role is deleted, the registration joins the waitlist (promoted
+    automatically when a slot opens) and None is returned after the thread closes.
+    """
+    try:
+        return await db.create_team(
+            team_name=team_name,
+            team_tag=team_tag,
+            region=region,
+            captain_discord_id=discord_id if user_role == 'captain' else None,
+            logo_url=logo_url,
+            role_id=team_role.id
+        )
+    except RegistrationFullError as e:
+        full = "all regions" if e.region == ALL_REGIONS else e.region
+    
+    try:
+        await team_role.delete(reason=f"Team registration full - {team_name} waitlisted")
+    except discord.HTTPException as e:
+        print(f"✗ Failed to delete role of waitlisted team {team_name}: {e}")
+    
+    entry = await db.get_waitlist_entry(discord_id)
+    if entry is None:
+        entry = await db.add_to_waitlist(discord_id, user_role, team_name, team_tag, region, logo_url)
+        print(f"⏳ Team registration full ({full}): {team_name} waitlisted at #{entry['position']} in {region}")
+        description = (
+            f"Team registration is full for {full}.\n\n"
+            f"**{team_name}** [{team_tag}] is **#{entry['position']}** on the {region} waitlist. When a slot opens up "
+            "the team is registered automatically and you'll get a DM.\n\n"
+            "Use `/waitlist` to check your place or `/waitlist-leave` to leave the waitlist."
+        )
+    else:
+        description = (
+            f"Team registration is full for {full}, and **{entry['team_name']}** is already on the waitlist "
+            f"for you (**#{entry['position']}** in {entry['region']}). Use `/waitlist-leave` first to waitlist a different team."
+        )
+    await interaction.channel.send(
+        embed=discord.Embed(title="⏳ Registration Full", description=description, color=discord.Color.orange())
+    )
+    
+    await asyncio.sleep(10)
+    if isinstance(interaction.channel, discord.Thread):
+        _active_threads.pop(interaction.channel.id, None)
+        for key in list(_active_threads):
+            if isinstance(key, str) and key.startswith(f"temp_{discord_id}_"):
+                del _active_threads[key]
+        await interaction.channel.delete()
+    return None
+
 class TeamRoleSelectView(discord.ui.View):
     """View to select role (Manager or Captain)"""
     
@@ -50,7 +116,7 @@ class TeamRoleSelectView(discord.ui.View):
         player = await db.get_player_by_discord_id(interaction.user.id)
         if not player:
             # Get registration channel ID from env
-            registration_channel_id = os.getenv('REGISTRATION_CHANNEL_ID')
+            registration_channel_id = config.registration_channel_id
             registration_mention = f"<#{registration_channel_id}>" if registration_channel_id else "the player registration channel"
             
             embed = discord.Embed(
@@ -426,12 +492,12 @@ class LogoConfirmationView(discord.ui.View):
                             f.write(logo_data)
                         
                         # Upload to permanent Discord storage channel
-                        logo_storage_channel_id = os.getenv('LOGO_STORAGE_CHANNEL_ID')
+                        logo_storage_channel_id = config.logo_storage_channel_id
                         if not logo_storage_channel_id:
-                            logo_storage_channel_id = os.getenv('BOT_LOGS_CHANNEL_ID')
+                            logo_storage_channel_id = config.bot_logs_channel_id
                         
                         if logo_storage_channel_id:
-                            storage_channel = interaction.guild.get_channel(int(logo_storage_channel_id))
+                            storage_channel = interaction.guild.get_channel(logo_storage_channel_id)
                             if storage_channel:
                                 # Upload the saved file to get a permanent URL
                                 logo_file = discord.File(filename, filename=f"{self.team_name.replace(' ', '_')}.png")
@@ -471,17 +537,14 @@ class LogoConfirmationView(discord.ui.View):
             self.stop()
             return
         
-        captain_id = interaction.user.id if self.user_role == 'captain' else None
-        
-        # Create team in database
-        team = await db.create_team(
-            team_name=self.team_name,
-            team_tag=self.team_tag,
-            region=self.region,
-            captain_discord_id=captain_id,
-            logo_url=logo_url,
-            role_id=team_role.id
+        # Create team in database (or waitlist it when registration is full)
+        team = await create_team_or_waitlist(
+            interaction, team_role, interaction.user.id, self.user_role,
+            self.team_name, self.team_tag, self.region, logo_url
         )
+        if team is None:
+            self.stop()
+            return
         
         await db.add_team_member(
             team_id=team['id'],
@@ -491,14 +554,14 @@ class LogoConfirmationView(discord.ui.View):
         
         # Assign roles
         try:
-            member = interaction.guild.get_member(self.user_id)
+            member = await get_or_fetch_member(interaction.guild, self.user_id)
             if member:
                 await member.add_roles(team_role)
                 
                 role_env_key = 'CAPTAIN_ROLE_ID' if self.user_role == 'captain' else 'MANAGER_ROLE_ID'
-                position_role_id = os.getenv(role_env_key)
+                position_role_id = config.get_id(role_env_key)
                 if position_role_id:
-                    position_role = interaction.guild.get_role(int(position_role_id))
+                    position_role = interaction.guild.get_role(position_role_id)
                     if position_role:
                         await member.add_roles(position_role)
         except Exception as e:
@@ -524,9 +587,9 @@ class LogoConfirmationView(discord.ui.View):
         await interaction.channel.send(embed=success_embed)
         
         # Log to channel
-        log_channel_id = os.getenv('TEAM_REGISTRATION_LOG_CHANNEL_ID')
+        log_channel_id = config.team_registration_log_channel_id
         if log_channel_id:
-            log_channel = interaction.guild.get_channel(int(log_channel_id))
+            log_channel = interaction.guild.get_channel(log_channel_id)
             if log_channel:
                 log_embed = discord.Embed(
                     title="New Team Registered",
@@ -554,7 +617,7 @@ class LogoConfirmationView(discord.ui.View):
             if thread_id in _active_threads:
                 del _active_threads[thread_id]
             # Also clean up any temp placeholders for this user
-            for key in list(_active_threads.keys()):
+            for key in list(_active_threads):
                 if isinstance(key, str) and key.startswith(f"temp_{self.user_id}_"):
                     del _active_threads[key]
             await interaction.channel.delete()
@@ -688,7 +751,7 @@ class TeamLogoUploadView(discord.ui.View):
                 # Clean up from active threads
                 if thread.id in _active_threads:
                     del _active_threads[thread.id]
-                for key in list(_active_threads.keys()):
+                for key in list(_active_threads):
                     if isinstance(key, str) and key.startswith(f"temp_{self.user_id}_"):
                         del _active_threads[key]
                 return
@@ -710,16 +773,12 @@ class TeamLogoUploadView(discord.ui.View):
             )
             return
         
-        captain_id = interaction.user.id if self.user_role == 'captain' else None
-        
-        team = await db.create_team(
-            team_name=self.team_name,
-            team_tag=self.team_tag,
-            region=self.region,
-            captain_discord_id=captain_id,
-            logo_url=None,
-            role_id=team_role.id
+        team = await create_team_or_waitlist(
+            interaction, team_role, interaction.user.id, self.user_role,
+            self.team_name, self.team_tag, self.region, None
         )
+        if team is None:
+            return
         
         await db.add_team_member(
             team_id=team['id'],
@@ -729,14 +788,14 @@ class TeamLogoUploadView(discord.ui.View):
         
         # Assign roles
         try:
-            member = interaction.guild.get_member(interaction.user.id)
+            member = await get_or_fetch_member(interaction.guild, interaction.user.id)
             if member:
                 await member.add_roles(team_role)
                 
                 role_env_key = 'CAPTAIN_ROLE_ID' if self.user_role == 'captain' else 'MANAGER_ROLE_ID'
-                position_role_id = os.getenv(role_env_key)
+                position_role_id = config.get_id(role_env_key)
                 if position_role_id:
-                    position_role = interaction.guild.get_role(int(position_role_id))
+                    position_role = interaction.guild.get_role(position_role_id)
                     if position_role:
                         await member.add_roles(position_role)
         except Exception as e:
@@ -794,19 +853,15 @@ class TeamLogoUploadView(discord.ui.View):
             )
             return
         
-        # Create team in database without logo
+        # Create team in database without logo (or waitlist it when registration is full)
         # For managers, captain_discord_id will be None (set later when captain joins)
         # For captains, captain_discord_id is the current user
-        captain_id = interaction.user.id if self.user_role == 'captain' else None
-        
-        team = await db.create_team(
-            team_name=self.team_name,
-            team_tag=self.team_tag,
-            region=self.region,
-            captain_discord_id=captain_id,
-            logo_url=None,  # No logo
-            role_id=team_role.id  # Store the role ID
+        team = await create_team_or_waitlist(
+            interaction, team_role, interaction.user.id, self.user_role,
+            self.team_name, self.team_tag, self.region, None
         )
+        if team is None:
+            return
         
         # Add user as team member with their selected role
         await db.add_team_member(
@@ -817,7 +872,7 @@ class TeamLogoUploadView(discord.ui.View):
         
         # Assign the team role and captain/manager role to the user
         try:
-            member = interaction.guild.get_member(interaction.user.id)
+            member = await get_or_fetch_member(interaction.guild, interaction.user.id)
             if member:
                 # Assign team role
                 await member.add_roles(team_role)
@@ -825,9 +880,9 @@ class TeamLogoUploadView(discord.ui.View):
                 
                 # Assign captain or manager role
                 role_env_key = 'CAPTAIN_ROLE_ID' if self.user_role == 'captain' else 'MANAGER_ROLE_ID'
-                position_role_id = os.getenv(role_env_key)
+                position_role_id = config.get_id(role_env_key)
                 if position_role_id:
-                    position_role = interaction.guild.get_role(int(position_role_id))
+                    position_role = interaction.guild.get_role(position_role_id)
                     if position_role:
                         await member.add_roles(position_role)
                         print(f"✓ Assigned {self.user_role} role to {member.name}")
@@ -865,19 +920,19 @@ class TeamLogoUploadView(discord.ui.View):
             if thread_id in _active_threads:
                 del _active_threads[thread_id]
             # Also clean up any temp placeholders for this user
-            for key in list(_active_threads.keys()):
+            for key in list(_active_threads):
                 if isinstance(key, str) and key.startswith(f"temp_{self.user_id}_"):
                     del _active_threads[key]
             await interaction.channel.delete()
     
     async def log_team_registration_no_logo(self, interaction: discord.Interaction, team: dict, role_text: str):
         """Log team registration to bot logs channel without logo"""
-        bot_logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+        bot_logs_channel_id = config.bot_logs_channel_id
         if not bot_logs_channel_id:
             return
         
         try:
-            channel = interaction.client.get_channel(int(bot_logs_channel_id))
+            channel = interaction.client.get_channel(bot_logs_channel_id)
             if not channel:
                 return
             
@@ -995,19 +1050,16 @@ class TeamLogoModal(discord.ui.Modal, title="Upload Team Logo"):
                 )
                 return
             
-            # Create team in database
+            # Create team in database (or waitlist it when registration is full)
             # For managers, captain_discord_id will be None (set later when captain joins)
             # For captains, captain_discord_id is the current user
-            captain_id = interaction.user.id if self.user_role == 'captain' else None
-            
-            team = await db.create_team(
-                team_name=self.team_name,
-                team_tag=self.team_tag,
-                region=self.region,
-                captain_discord_id=captain_id,
-                logo_url=local_logo_path,  # Store local path instead of Discord URL
-                role_id=team_role.id  # Store the role ID
+            # Store local path instead of Discord URL
+            team = await create_team_or_waitlist(
+                interaction, team_role, interaction.user.id, self.user_role,
+                self.team_name, self.team_tag, self.region, local_logo_path
             )
+            if team is None:
+                return
             
             # Add user as team member with their selected role
             await db.add_team_member(
@@ -1018,7 +1070,7 @@ class TeamLogoModal(discord.ui.Modal, title="Upload Team Logo"):
             
             # Assign the team role and captain/manager role to the user
             try:
-                member = interaction.guild.get_member(interaction.user.id)
+                member = await get_or_fetch_member(interaction.guild, interaction.user.id)
                 if member:
                     # Assign team role
                     await member.add_roles(team_role)
@@ -1026,9 +1078,9 @@ class TeamLogoModal(discord.ui.Modal, title="Upload Team Logo"):
                     
                     # Assign captain or manager role
                     role_env_key = 'CAPTAIN_ROLE_ID' if self.user_role == 'captain' else 'MANAGER_ROLE_ID'
-                    position_role_id = os.getenv(role_env_key)
+                    position_role_id = config.get_id(role_env_key)
                     if position_role_id:
-                        position_role = interaction.guild.get_role(int(position_role_id))
+                        position_role = interaction.guild.get_role(position_role_id)
                         if position_role:
                             await member.add_roles(position_role)
                             print(f"✓ Assigned {self.user_role} role to {member.name}")
@@ -1079,12 +1131,12 @@ class TeamLogoModal(discord.ui.Modal, title="Upload Team Logo"):
     
     async def log_team_registration(self, interaction: discord.Interaction, team: dict, logo_path: Path):
         """Log team registration to bot logs channel"""
-        bot_logs_channel_id = os.getenv("BOT_LOGS_CHANNEL_ID")
+        bot_logs_channel_id = config.bot_logs_channel_id
         if not bot_logs_channel_id:
             return
         
         try:
-            channel = interaction.client.get_channel(int(bot_logs_channel_id))
+            channel = interaction.client.get_channel(bot_logs_channel_id)
             if not channel:
                 return
             
@@ -1133,7 +1185,7 @@ class TeamRegistrationButtons(discord.ui.View):
     async def register_team(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Handle team registration button click"""
         # Check if user already has an active team registration thread (including temp placeholders)
-        for thread_id, thread_data in list(_active_threads.items()):
+        for thread_id, thread_data in _active_threads.items(interaction.guild.id):
             if thread_data['target_user_id'] == interaction.user.id:
                 # Check if it's a real thread or temp placeholder
                 if str(thread_id).startswith('temp_'):
@@ -1160,10 +1212,10 @@ class TeamRegistrationButtons(discord.ui.View):
         
         # Add placeholder to prevent duplicate thread creation during rapid clicks
         temp_id = f"temp_{interaction.user.id}_{interaction.id}"
-        _active_threads[temp_id] = {
+        _active_threads.put(interaction.guild.id, temp_id, {
             'task': None,
             'target_user_id': interaction.user.id
-        }
+        })
         
         # Respond immediately to prevent timeout
         await interaction.response.defer(ephemeral=True)
@@ -1199,6 +1251,12 @@ class TeamRegistrationButtons(discord.ui.View):
                 ),
                 color=discord.Color.blue()
             )
+            if registration_capacity.is_full('team'):
+                welcome_embed.add_field(
+                    name="⏳ Registration is full",
+                    value="You can still register: your team joins the waitlist and is registered when a slot opens up.",
+                    inline=False
+                )
             
             role_view = TeamRoleSelectView(interaction.user.id)
             
@@ -1212,10 +1270,10 @@ class TeamRegistrationButtons(discord.ui.View):
             if temp_id in _active_threads:
                 del _active_threads[temp_id]
             
-            _active_threads[thread.id] = {
+            _active_threads.put(thread.guild.id, thread.id, {
                 'task': task,
                 'target_user_id': interaction.user.id
-            }
+            })
             print(f"✓ Started inactivity monitoring for team thread {thread.id}")
             
         except Exception as e:
@@ -1295,6 +1353,9 @@ class TeamRegistrationCog(commands.Cog):
             inline=False
         )
         
+        # Live registered/cap counters (kept current by registration_capacity)
+        registration_capacity.apply(embed, 'team')
+        
         return embed
     
     async def send_team_registration_message(self, channel_id: int):
@@ -1319,11 +1380,12 @@ class TeamRegistrationCog(commands.Cog):
             if os.path.exists(logo_path):
                 file = discord.File(logo_path, filename="LOGO.jpeg")
                 embed.set_thumbnail(url="attachment://LOGO.jpeg")
-                await channel.send(file=file, embed=embed, view=view)
+                message = await channel.send(file=file, embed=embed, view=view)
                 print(f"✅ Team registration message sent to channel: {channel.name}")
             else:
                 print(f"⚠️  Logo not found at {logo_path}, sending without logo")
-                await channel.send(embed=embed, view=view)
+                message = await channel.send(embed=embed, view=view)
+            registration_capacity.track_panel('team', message, embed)
             
         except Exception as e:
             print(f"❌ Error sending team registration message: {e}")
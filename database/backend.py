@@ -0,0 +1,387 @@
+"""
+Database backend interface
+
+Both the PostgreSQL Database and the in-memory MemoryDatabase implement these
+methods with the same signatures and semantics, so cogs can use either through
+the global `db`.
+"""
+
+from datetime import datetime
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, List, Optional, Protocol, Tuple
+
+
+# Default roster limits (seeded into roster_limits by migrations/016_roster_limits.sql).
+# 'player' covers the whole playing roster: players and the captain.
+DEFAULT_ROSTER_LIMITS = {'player': 5, 'captain': 1, 'manager': 2, 'coach': 1}
+
+
+class RosterLimitError(Exception):
+    """A member insert or role change would put a team over a roster limit"""
+    
+    def __init__(self, team_id: int, role: str):
+        super().__init__(f"team {team_id} is over its {role} limit")
+        self.team_id = team_id
+        self.role = role
+
+
+# player_stats counters a bulk import can change (db.import_player_stats)
+PLAYER_STAT_COLUMNS = ('kills', 'deaths', 'assists', 'matches_played', 'wins', 'losses', 'mvps', 'points')
+
+# Tables a data export can dump (db.export_tables): columns in file order and the sort key
+EXPORT_TABLES = {
+    'players': (
+        ('discord_id', 'ign', 'player_id', 'region', 'agent', 'tournament_notifications', 'registered_at', 'updated_at'),
+        ('discord_id',)
+    ),
+    'teams': (
+        ('id', 'team_name', 'team_tag', 'region', 'captain_discord_id', 'logo_url', 'role_id', 'created_at'),
+        ('id',)
+    ),
+    'team_members': (('team_id', 'discord_id', 'role', 'joined_at'), ('team_id', 'discord_id')),
+    'player_stats': (('discord_id', *PLAYER_STAT_COLUMNS, 'updated_at'), ('discord_id',)),
+    'team_stats': (('team_id', 'wins', 'losses', 'matches_played', 'updated_at'), ('team_id',)),
+    'banned_players': (('discord_id', 'banned_by', 'reason', 'banned_at'), ('discord_id',)),
+}
+
+# Matches in a player's form window (player_form, the trigger argument in migrations/019_match_player_stats.sql)
+FORM_WINDOW = 10
+
+# registration_caps region holding the overall cap and count of a kind (migrations/017_registration_caps.sql)
+ALL_REGIONS = 'ALL'
+
+# Waitlist entries tried per freed team slot (entries whose team can't be created, e.g. name/tag taken, are cancelled)
+WAITLIST_PROMOTION_ATTEMPTS = 5
+
+
+class RegistrationFullError(Exception):
+    """A team or player insert found no free slot under the registration caps"""
+    
+    def __init__(self, kind: str, region: str):
+        super().__init__(f"{kind} registration is full ({region})")
+        self.kind = kind
+        self.region = region
+
+
+class DatabaseBackend(Protocol):
+    """Operations the cogs rely on"""
+    
+    async def connect(self): ...
+    
+    async def close(self): ...
+    
+    # Player operations
+    
+    async def get_player_by_discord_id(self, discord_id: int) -> Optional[Dict]: ...
+    
+    async def get_player_by_ign(self, ign: str) -> Optional[Dict]: ...
+    
+    async def create_player(
+        self,
+        discord_id: int,
+        ign: str,
+        player_id: str,
+        region: str,
+        agent: str = None,
+        tournament_notifications: bool = True
+    ) -> Dict: ...
+    
+    async def update_player(self, discord_id: int, **kwargs) -> Optional[Dict]: ...
+    
+    async def delete_player(self, discord_id: int) -> bool: ...
+    
+    async def get_all_players(self, region: Optional[str] = None) -> List[Dict]: ...
+    
+    async def get_players_with_notifications(self) -> List[Dict]: ...
+    
+    # Player stats operations
+    
+    async def get_player_stats(self, discord_id: int) -> Optional[Dict]: ...
+    
+    async def create_player_stats(self, discord_id: int) -> Dict: ...
+    
+    async def update_player_stats(self, discord_id: int, **kwargs) -> Optional[Dict]: ...
+    
+    async def import_player_stats(
+        self,
+        rows: AsyncIterable[Tuple],
+        mode: str,
+        dry_run: bool,
+        on_error: Callable[[int, Optional[int], Optional[str], str], None],
+        on_change: Callable[[Dict], None]
+    ) -> Dict: ...
+    
+    async def get_leaderboard(self, stat: str = "kills", region: Optional[str] = None, limit: int = 10) -> List[Dict]: ...
+    
+    async def record_match_stats(
+        self,
+        rows: List[Dict],
+        played_at: Optional[datetime] = None,
+        source: Optional[str] = None,
+        match_id: Optional[int] = None
+    ) -> int: ...
+    
+    async def get_player_count(self, region: Optional[str] = None) -> int: ...
+    
+    # Team operations
+    
+    async def get_team_by_name(self, team_name: str) -> Optional[Dict]: ...
+    
+    async def get_team_by_tag(self, team_tag: str) -> Optional[Dict]: ...
+    
+    async def get_team_by_captain(self, captain_discord_id: int) -> Optional[Dict]: ...
+    
+    async def get_team_by_id(self, team_id: int) -> Optional[Dict]: ...
+    
+    async def get_all_teams(self) -> List[Dict]: ...
+    
+    async def create_team(
+        self,
+        team_name: str,
+        team_tag: str,
+        region: str,
+        captain_discord_id: int,
+        logo_url: Optional[str] = None,
+        role_id: Optional[int] = None
+    ) -> Dict: ...
+    
+    async def update_team(self, team_id: int, **kwargs) -> Optional[Dict]: ...
+    
+    async def get_team_members(self, team_id: int) -> List[Dict]: ...
+    
+    async def add_team_member(self, team_id: int, discord_id: int, role: str = 'player') -> Dict: ...
+    
+    async def set_team_roles(self, team_id: int, roles: Dict[int, str]): ...
+    
+    async def remove_team_member(self, team_id: int, discord_id: int) -> bool: ...
+    
+    async def get_roster_limits(self) -> Dict[str, int]: ...
+    
+    async def get_teams_with_open_slots(self, role: str, exclude_discord_id: Optional[int] = None) -> List[Dict]: ...
+    
+    async def get_teams_with_role(self, role: str, team_id: Optional[int] = None, limit: int = 25) -> List[Dict]: ...
+    
+    async def get_user_teams_by_role(self, discord_id: int, role: str) -> List[Dict]: ...
+    
+    async def delete_team(self, team_id: int) -> bool: ...
+    
+    # Membership cache
+    
+    async def get_member_team_roles(self, discord_id: int) -> Dict[int, str]: ...
+    
+    def forget_memberships(self, discord_id: Optional[int] = None): ...
+    
+    def forget_team_memberships(self, team_id: int): ...
+    
+    # Change feed
+    
+    @property
+    def change_feed_connected(self) -> bool: ...
+    
+    def subscribe(self, table: str, callback: Callable[[Dict], None]): ...
+    
+    # Ban operations
+    
+    async def ban_player(self, discord_id: int, banned_by: int, reason: str = None) -> bool: ...
+    
+    async def unban_player(self, discord_id: int) -> bool: ...
+    
+    async def is_player_banned(self, discord_id: int) -> Optional[Dict]: ...
+    
+    async def get_all_banned_players(self) -> List[Dict]: ...
+    
+    # Profiles
+    
+    async def get_player_profile(self, discord_id: int) -> Optional[Dict]: ...
+    
+    async def get_team_profile(self, team_id: int) -> Optional[Dict]: ...
+    
+    # Bracket operations
+    
+    async def get_team_seeding(self, region: Optional[str] = None) -> List[Dict]: ...
+    
+    async def create_bracket(
+        self,
+        name: str,
+        fmt: str,
+        region: Optional[str],
+        created_by: int,
+        team_count: int,
+        matches: Dict[tuple, Dict],
+        rounds: List[Dict]
+    ) -> Dict: ...
+    
+    async def get_bracket(self, bracket_id: int) -> Optional[Dict]: ...
+    
+    async def get_brackets(self, limit: int = 25) -> List[Dict]: ...
+    
+    async def get_bracket_rounds(self, bracket_id: int) -> List[Dict]: ...
+    
+    async def get_bracket_round_matches(
+        self,
+        bracket_id: int,
+        section: str,
+        round_number: int,
+        offset: int = 0,
+        limit: int = 16
+    ) -> List[Dict]: ...
+    
+    async def get_bracket_match(self, match_id: int) -> Optional[Dict]: ...
+    
+    async def record_bracket_result(self, match_id: int, winner_id: int) -> Optional[Dict]: ...
+    
+    # Swiss operations
+    
+    async def create_swiss_stage(
+        self,
+        name: str,
+        region: Optional[str],
+        total_rounds: int,
+        created_by: int,
+        team_ids: List[int]
+    ) -> Dict: ...
+    
+    async def get_swiss_stage(self, stage_id: int) -> Optional[Dict]: ...
+    
+    async def get_swiss_stages(self, limit: int = 25) -> List[Dict]: ...
+    
+    async def get_swiss_standings(self, stage_id: int) -> List[Dict]: ...
+    
+    async def get_swiss_opponents(self, stage_id: int) -> List[Tuple[int, int]]: ...
+    
+    async def get_swiss_staff(self, stage_id: int) -> List[Dict]: ...
+    
+    async def create_swiss_round(
+        self,
+        stage_id: int,
+        round_number: int,
+        pairs: List[Tuple[int, int]],
+        bye_team_id: Optional[int] = None
+    ) -> Optional[int]: ...
+    
+    async def get_swiss_round_matches(
+        self,
+        stage_id: int,
+        round_number: int,
+        offset: int = 0,
+        limit: int = 16
+    ) -> List[Dict]: ...
+    
+    async def get_swiss_match(self, match_id: int) -> Optional[Dict]: ...
+    
+    async def record_swiss_result(self, match_id: int, winner_id: int) -> Optional[Dict]: ...
+    
+    # Rating operations
+    
+    async def get_rating_history(self) -> List[Tuple[float, int, int, int]]: ...
+    
+    async def get_rating_rosters(self, team_ids: Optional[List[int]] = None) -> List[Tuple[int, int]]: ...
+    
+    async def get_ratings(self, entity_type: str, entity_ids: List[int]) -> Dict[int, Dict]: ...
+    
+    async def save_ratings(
+        self,
+        entity_type: str,
+        rows: List[Tuple[int, float, float, float, int]],
+        replace: bool = False
+    ): ...
+    
+    async def get_rating_rank(self, entity_type: str, entity_id: int) -> Optional[Dict]: ...
+    
+    async def get_team_rating_leaderboard(self, region: Optional[str] = None, limit: int = 10) -> List[Dict]: ...
+    
+    # Schedule operations
+    
+    async def get_team_availability(self, team_ids: Optional[List[int]] = None) -> List[Dict]: ...
+    
+    async def set_team_availability(self, team_id: int, windows: List[Tuple[int, int, int]]): ...
+    
+    async def add_staff_slot(self, discord_id: int, role: str, starts_at: datetime, ends_at: datetime) -> Dict: ...
+    
+    async def delete_staff_slot(self, slot_id: int, discord_id: Optional[int] = None) -> bool: ...
+    
+    async def get_staff_slots(self, start: datetime, end: datetime, discord_id: Optional[int] = None) -> List[Dict]: ...
+    
+    async def get_unscheduled_matches(self) -> List[Dict]: ...
+    
+    async def get_scheduled_matches(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        team_id: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Dict]: ...
+    
+    async def get_scheduled_match(self, schedule_id: int) -> Optional[Dict]: ...
+    
+    async def save_schedule(self, rows: List[Dict]) -> int: ...
+    
+    # Check-in operations
+    
+    async def create_check_in_window(
+        self,
+        name: str,
+        region: Optional[str],
+        closes_at: datetime,
+        opened_by: int
+    ) -> Dict: ...
+    
+    async def set_check_in_message(self, window_id: int, channel_id: int, message_id: int): ...
+    
+    async def get_check_in_window(self, window_id: int) -> Optional[Dict]: ...
+    
+    async def get_check_in_windows(self, status: Optional[str] = None, limit: int = 25) -> List[Dict]: ...
+    
+    async def get_check_in_eligibility(self, region: Optional[str] = None) -> List[Dict]: ...
+    
+    async def add_check_ins(self, rows: List[Tuple[int, int, int, datetime]]) -> int: ...
+    
+    async def get_check_in_team_ids(self, window_id: int) -> List[int]: ...
+    
+    async def close_check_in_window(self, window_id: int) -> Optional[List[Dict]]: ...
+    
+    # Registration capacity
+    
+    async def get_registration_capacity(self) -> List[Dict]: ...
+    
+    async def set_registration_cap(self, kind: str, region: str, capacity: Optional[int]) -> Dict: ...
+    
+    async def add_to_waitlist(
+        self,
+        discord_id: int,
+        role: str,
+        team_name: str,
+        team_tag: str,
+        region: str,
+        logo_url: Optional[str] = None
+    ) -> Dict: ...
+    
+    async def get_waitlist_entry(self, discord_id: int) -> Optional[Dict]: ...
+    
+    async def leave_waitlist(self, discord_id: int) -> bool: ...
+    
+    async def get_waitlist_counts(self) -> Dict[str, int]: ...
+    
+    async def get_waitlist_promotions(self) -> List[Dict]: ...
+    
+    async def mark_waitlist_notified(self, entry_id: int): ...
+    
+    # Export
+    
+    def export_tables(self, tables: List[str], batch_size: int = 5000) -> AsyncIterator[Tuple[str, List[Tuple]]]: ...
+    
+    # Role reconciliation
+    
+    async def get_role_assignments(self) -> List[Dict]: ...
+    
+    # Team provisioning
+    
+    async def get_provisioned_resources(self) -> List[Dict]: ...
+    
+    async def add_provisioned_resource(self, kind: str, key: int, discord_id: int): ...
+    
+    async def remove_provisioned_resource(self, kind: str, key: int): ...
+    
+    async def apply_provisioned_resources(self) -> int: ...
+    
+    async def clear_provisioned_resources(self, kinds: List[str]) -> int: ...
@@ -2,11 +2,24 @@
 Database service module for PostgreSQL operations
 """
 
+import asyncio
 import asyncpg
+import json
 import os
-from typing import Optional, Dict, List
+from collections import Counter
+from typing import AsyncIterable, AsyncIterator, Callable, Optional, Dict, List, Tuple
 from datetime import datetime
 
+from database.backend import (
+    ALL_REGIONS, EXPORT_TABLES, PLAYER_STAT_COLUMNS, WAITLIST_PROMOTION_ATTEMPTS, DatabaseBackend, RegistrationFullError,
+    RosterLimitError
+)
+
+
+# NOTIFY channel the change feed triggers publish on (migrations/010_change_feed_notify.sql)
+CHANGE_CHANNEL = "data_changes"
+CHANGE_FEED_MAX_BACKOFF = 60
+
 
 class Database:
     """PostgreSQL database handler"""
@@ -14,6 +27,17 @@ class Database:
     def __init__(self):
         self.pool: Optional[asyncpg.Pool] = None
         self.database_url = os.getenv("DATABASE_URL")
+        # discord_id -> {team_id: role}; filled on first lookup, dropped on team_members writes
+        self._memberships: Dict[int, Dict[int, str]] = {}
+        self._memberships_version = 0
+        # Set when other bot processes write too: memberships are then only cached while the change feed is up
+        self.multi_process = False
+        # Change feed: a dedicated LISTEN connection and table -> callbacks
+        self._listener: Optional[asyncpg.Connection] = None
+        self._subscribers: Dict[str, List[Callable[[Dict], None]]] = {}
+        self._feed_task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.subscribe('team_members', self._on_membership_change)
     
     async def connect(self):
         """Connect to PostgreSQL database"""
@@ -28,9 +52,18 @@ class Database:
         except Exception as e:
             print(f"✗ Database connection failed: {e}")
             raise
+        
+        self._closing = False
+        if not await self._start_change_feed():
+            self._feed_task = asyncio.create_task(self._reconnect_change_feed())
     
     async def close(self):
         """Close database connection"""
+        self._closing = True
+        if self._feed_task:
+            self._feed_task.cancel()
+        if self._listener and not self._listener.is_closed():
+            await self._listener.close()
         if self.pool:
             await self.pool.close()
             print("✓ Database connection closed")
@@ -64,16 +97,25 @@ class Database:
         agent: str = None,
         tournament_notifications: bool = True
     ) -> Dict:
-        """Create a new player"""
+        """
+        Create a new player. The insert claims a registration slot
+        (migrations/017_registration_caps.sql); raises RegistrationFullError
+        when the player cap of the region or of all regions is reached.
+        """
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """
-                INSERT INTO players (discord_id, ign, player_id, region, agent, tournament_notifications)
-                VALUES ($1, $2, $3, $4, $5, $6)
-                RETURNING *
-                """,
-                discord_id, ign, player_id, region, agent, tournament_notifications
-            )
+            try:
+                row = await conn.fetchrow(
+                    """
+                    INSERT INTO players (discord_id, ign, player_id, region, agent, tournament_notifications)
+                    VALUES ($1, $2, $3, $4, $5, $6)
+                    RETURNING *
+                    """,
+                    discord_id, ign, player_id, region, agent, tournament_notifications
+                )
+            except asyncpg.CheckViolationError as e:
+                if e.constraint_name != 'registration_cap':
+                    raise
+                raise RegistrationFullError('player', e.detail) from e
             return dict(row)
     
     async def update_player(
@@ -181,6 +223,132 @@ class Database:
             )
             return dict(row) if row else None
     
+    async def import_player_stats(
+        self,
+        rows: AsyncIterable[Tuple],
+        mode: str,
+        dry_run: bool,
+        on_error: Callable[[int, Optional[int], Optional[str], str], None],
+        on_change: Callable[[Dict], None]
+    ) -> Dict:
+        """
+        Bulk-apply (line_no, discord_id, ign, *PLAYER_STAT_COLUMNS) rows (None
+        stats are left alone). The rows are COPYed into a temp table as they
+        arrive, matched against players by discord_id or LOWER(ign), folded to
+        one row per player - summed in 'add' mode, last line wins in 'set' mode -
+        and merged into player_stats in one statement. Unmatched rows go to
+        on_error(line_no, discord_id, ign, reason) and every changed player to
+        on_change({discord_id, ign, <stat>_old, <stat>_new...}), both streamed
+        from cursors. A dry run does everything but the merge and rolls back.
+        Returns {'staged', 'rejected', 'players', 'totals': {stat: delta}}.
+        """
+        columns = ", ".join(f"{stat} INTEGER" for stat in PLAYER_STAT_COLUMNS)
+        if mode == 'set':
+            new = {stat: f"COALESCE(m.{stat}, ps.{stat}, 0)" for stat in PLAYER_STAT_COLUMNS}
+            fold = (
+                f"SELECT DISTINCT ON (discord_id) discord_id, {', '.join(PLAYER_STAT_COLUMNS)} "
+                "FROM stats_import ORDER BY discord_id, line_no DESC"
+            )
+        else:
+            new = {stat: f"COALESCE(ps.{stat}, 0) + COALESCE(m.{stat}, 0)" for stat in PLAYER_STAT_COLUMNS}
+            fold = (
+                f"SELECT discord_id, {', '.join(f'SUM({stat})::int AS {stat}' for stat in PLAYER_STAT_COLUMNS)} "
+                "FROM stats_import GROUP BY discord_id"
+            )
+        old_row = ", ".join(f"COALESCE(ps.{stat}, 0)" for stat in PLAYER_STAT_COLUMNS)
+        new_row = ", ".join(new.values())
+        totals = {stat: 0 for stat in PLAYER_STAT_COLUMNS}
+        rejected = changed = 0
+        
+        async with self.pool.acquire() as conn:
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                await conn.execute(
+                    f"CREATE TEMP TABLE stats_import (line_no INTEGER, discord_id BIGINT, ign TEXT, {columns}) ON COMMIT DROP"
+                )
+                await conn.copy_records_to_table(
+                    'stats_import', records=rows, columns=['line_no', 'discord_id', 'ign', *PLAYER_STAT_COLUMNS]
+                )
+                staged = await conn.fetchval("SELECT COUNT(*) FROM stats_import")
+                
+                # IGN-only rows: resolve through the LOWER(ign) index (migrations/018)
+                await conn.execute(
+                    """
+                    UPDATE stats_import s SET discord_id = p.discord_id
+                    FROM players p
+                    WHERE s.discord_id IS NULL AND LOWER(p.ign) = LOWER(s.ign)
+                    """
+                )
+                async for row in conn.cursor(
+                    """
+                    SELECT s.line_no, s.discord_id, s.ign,
+                        CASE
+                            WHEN s.discord_id IS NULL THEN 'unknown IGN'
+                            WHEN p.discord_id IS NULL THEN 'unknown discord_id'
+                            ELSE 'IGN belongs to another player'
+                        END AS reason
+                    FROM stats_import s
+                    LEFT JOIN players p ON p.discord_id = s.discord_id
+                    WHERE p.discord_id IS NULL OR (s.ign IS NOT NULL AND LOWER(p.ign) <> LOWER(s.ign))
+                    ORDER BY s.line_no
+                    """
+                ):
+                    rejected += 1
+                    on_error(row['line_no'], row['discord_id'], row['ign'], row['reason'])
+                await conn.execute(
+                    """
+                    DELETE FROM stats_import s
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM players p
+                        WHERE p.discord_id = s.discord_id AND (s.ign IS NULL OR LOWER(p.ign) = LOWER(s.ign))
+                    )
+                    """
+                )
+                await conn.execute(f"CREATE TEMP TABLE stats_merge ON COMMIT DROP AS {fold}")
+                
+                async for row in conn.cursor(
+                    f"""
+                    SELECT m.discord_id, p.ign,
+                        {', '.join(f"COALESCE(ps.{stat}, 0) AS {stat}_old, {new[stat]} AS {stat}_new" for stat in PLAYER_STAT_COLUMNS)}
+                    FROM stats_merge m
+                    JOIN players p ON p.discord_id = m.discord_id
+                    LEFT JOIN player_stats ps ON ps.discord_id = m.discord_id
+                    WHERE ({old_row}) IS DISTINCT FROM ({new_row})
+                    ORDER BY m.discord_id
+                    """
+                ):
+                    changed += 1
+                    for stat in PLAYER_STAT_COLUMNS:
+                        totals[stat] += row[f"{stat}_new"] - row[f"{stat}_old"]
+                    on_change(dict(row))
+                
+                if not dry_run:
+                    await conn.execute(
+                        f"""
+                        WITH updated AS (
+                            UPDATE player_stats ps
+                            SET {', '.join(f"{stat} = {new[stat]}" for stat in PLAYER_STAT_COLUMNS)},
+                                updated_at = CURRENT_TIMESTAMP
+                            FROM stats_merge m
+                            WHERE ps.discord_id = m.discord_id AND ({old_row}) IS DISTINCT FROM ({new_row})
+                            RETURNING ps.discord_id
+                        )
+                        INSERT INTO player_stats (discord_id, {', '.join(PLAYER_STAT_COLUMNS)})
+                        SELECT m.discord_id, {', '.join(f"COALESCE(m.{stat}, 0)" for stat in PLAYER_STAT_COLUMNS)}
+                        FROM stats_merge m
+                        WHERE NOT EXISTS (SELECT 1 FROM player_stats ps WHERE ps.discord_id = m.discord_id)
+                        """
+                    )
+            except BaseException:
+                await transaction.rollback()
+                raise
+            if dry_run:
+                await transaction.rollback()
+            else:
+                await transaction.commit()
+        return {'staged': staged, 'rejected': rejected, 'players': changed, 'totals': totals}
+    
     async def get_leaderboard(
         self,
         stat: str = "kills",
@@ -188,7 +356,7 @@ class Database:
         limit: int = 10
     ) -> List[Dict]:
         """Get leaderboard sorted by a stat"""
-        valid_stats = ["kills", "deaths", "assists", "wins", "mvps", "matches_played"]
+        valid_stats = ["kills", "deaths", "assists", "wins", "mvps", "matches_played", "points"]
         if stat not in valid_stats:
             stat = "kills"
         
@@ -220,17 +388,80 @@ class Database:
     
     # Utility operations
     
-    async def get_player_count(self, region: Optional[str] = None) -> int:
-        """Get total number of registered players"""
+    async def record_match_stats(
+        self,
+        rows: List[Dict],
+        played_at: Optional[datetime] = None,
+        source: Optional[str] = None,
+        match_id: Optional[int] = None
+    ) -> int:
+        """
+        Record one match's player lines ({discord_id, team_id, kills, deaths,
+        assists, won, mvp}) in match_player_stats and add them to the lifetime
+        player_stats totals. The player_form trigger updates each player's
+        rolling window (migrations/019_match_player_stats.sql). A player may
+        have one line per match - the row trigger would push the same old
+        match out of the window for each - so duplicates raise ValueError.
+        """
+        counts = Counter(row['discord_id'] for row in rows)
+        duplicates = sorted(discord_id for discord_id, count in counts.items() if count > 1)
+        if duplicates:
+            raise ValueError(f"More than one line for player(s) {', '.join(map(str, duplicates))} in one match")
+        columns = (
+            [row['discord_id'] for row in rows],
+            [row.get('team_id') for row in rows],
+            [row.get('kills', 0) for row in rows],
+            [row.get('deaths', 0) for row in rows],
+            [row.get('assists', 0) for row in rows],
+            [bool(row['won']) for row in rows],
+            [bool(row.get('mvp')) for row in rows],
+        )
+        lines = """
+            unnest($1::bigint[], $2::int[], $3::int[], $4::int[], $5::int[], $6::bool[], $7::bool[])
+                AS r(discord_id, team_id, kills, deaths, assists, won, mvp)
+        """
         async with self.pool.acquire() as conn:
-            if region:
-                count = await conn.fetchval(
-                    "SELECT COUNT(*) FROM players WHERE region = $1",
-                    region
+            async with conn.transaction():
+                await conn.execute("SELECT ensure_match_stats_partition(COALESCE($1::timestamp, LOCALTIMESTAMP))", played_at)
+                result = await conn.execute(
+                    f"""
+                    INSERT INTO match_player_stats
+                        (discord_id, played_at, source, match_id, team_id, kills, deaths, assists, won, mvp)
+                    SELECT r.discord_id, COALESCE($8::timestamp, LOCALTIMESTAMP), $9, $10,
+                           r.team_id, r.kills, r.deaths, r.assists, r.won, r.mvp
+                    FROM {lines}
+                    """,
+                    *columns, played_at, source, match_id
                 )
-            else:
-                count = await conn.fetchval("SELECT COUNT(*) FROM players")
-            return count
+                await conn.execute(
+                    f"""
+                    INSERT INTO player_stats (discord_id, kills, deaths, assists, matches_played, wins, losses, mvps)
+                    SELECT r.discord_id, SUM(r.kills), SUM(r.deaths), SUM(r.assists), COUNT(*),
+                           COUNT(*) FILTER (WHERE r.won), COUNT(*) FILTER (WHERE NOT r.won), COUNT(*) FILTER (WHERE r.mvp)
+                    FROM {lines}
+                    GROUP BY r.discord_id
+                    ON CONFLICT (discord_id) DO UPDATE SET
+                        kills = player_stats.kills + EXCLUDED.kills,
+                        deaths = player_stats.deaths + EXCLUDED.deaths,
+                        assists = player_stats.assists + EXCLUDED.assists,
+                        matches_played = player_stats.matches_played + EXCLUDED.matches_played,
+                        wins = player_stats.wins + EXCLUDED.wins,
+                        losses = player_stats.losses + EXCLUDED.losses,
+                        mvps = player_stats.mvps + EXCLUDED.mvps,
+                        updated_at = CURRENT_TIMESTAMP
+                    """,
+                    *columns
+                )
+        return int(result.split()[-1])
+    
+    async def get_player_count(self, region: Optional[str] = None) -> int:
+        """Get total number of registered players (read from the registration counters)"""
+        async with self.pool.acquire() as conn:
+            count = await conn.fetchval(
+                "SELECT registered FROM registration_caps WHERE kind = 'player' AND region = $1",
+                region or ALL_REGIONS
+            )
+            return count or 0
     
     # Team operations
     
@@ -287,16 +518,26 @@ class Database:
         logo_url: Optional[str] = None,
         role_id: Optional[int] = None
     ) -> Dict:
-        """Create a new team"""
+        """
+        Create a new team. The insert claims a registration slot; raises
+        RegistrationFullError when the team cap of the region or of all
+        regions is reached (the team can go on the waitlist instead).
+        """
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """
-                INSERT INTO teams (team_name, team_tag, region, captain_discord_id, logo_url, role_id)
-                VALUES ($1, $2, $3, $4, $5, $6)
-                RETURNING *
-                """,
-                team_name, team_tag, region, captain_discord_id, logo_url, role_id
-            )
+            try:
+                row = await conn.fetchrow(
+                    """
+                    INSERT INTO teams (team_name, team_tag, region, captain_discord_id, logo_url, role_id)
+                    VALUES ($1, $2, $3, $4, $5, $6)
+                    RETURNING *
+                    """,
+                    team_name, team_tag, region, captain_discord_id, logo_url, role_id
+                )
+            except asyncpg.CheckViolationError as e:
+                if e.constraint_name != 'registration_cap':
+                    raise
+                raise RegistrationFullError('team', e.detail) from e
+            self._publish({'table': 'teams', 'op': 'INSERT', 'id': row['id'], 'row': dict(row)})
             return dict(row)
     
     async def update_team(self, team_id: int, **kwargs) -> Optional[Dict]:
@@ -317,6 +558,8 @@ class Database:
                 """,
                 *values
             )
+            if row:
+                self._publish({'table': 'teams', 'op': 'UPDATE', 'id': team_id, 'row': dict(row)})
             return dict(row) if row else None
     
     async def get_team_members(self, team_id: int) -> List[Dict]:
@@ -346,18 +589,55 @@ class Database:
         discord_id: int,
         role: str = 'player'
     ) -> Dict:
-        """Add a member to a team"""
+        """
+        Add a member to a team. The roster limits are checked by the database
+        in the same statement (migrations/016 and 021); raises
+        RosterLimitError when the team has no room for `role`.
+        """
         async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """
-                INSERT INTO team_members (team_id, discord_id, role)
-                VALUES ($1, $2, $3)
-                RETURNING *
-                """,
-                team_id, discord_id, role
-            )
+            try:
+                row = await conn.fetchrow(
+                    """
+                    INSERT INTO team_members (team_id, discord_id, role)
+                    VALUES ($1, $2, $3)
+                    RETURNING *
+                    """,
+                    team_id, discord_id, role
+                )
+            except asyncpg.CheckViolationError as e:
+                if e.constraint_name != 'team_roster_limit':
+                    raise
+                raise RosterLimitError(team_id, e.detail) from e
+            self.forget_memberships(discord_id)
             return dict(row)
     
+    async def set_team_roles(self, team_id: int, roles: Dict[int, str]):
+        """
+        Give users roles on a team in one statement, adding those who aren't
+        members yet. Limits are checked on the final roster once every row of
+        the statement is written (a statement-level trigger, migrations/021),
+        so swapping the captain works whichever order `roles` lists the two
+        members in. Raises
+        RosterLimitError (and changes nothing) if the result is over a limit.
+        """
+        discord_ids = list(roles)
+        async with self.pool.acquire() as conn:
+            try:
+                await conn.execute(
+                    """
+                    INSERT INTO team_members (team_id, discord_id, role)
+                    SELECT $1, * FROM unnest($2::bigint[], $3::text[])
+                    ON CONFLICT (team_id, discord_id) DO UPDATE SET role = EXCLUDED.role
+                    """,
+                    team_id, discord_ids, [roles[discord_id] for discord_id in discord_ids]
+                )
+            except asyncpg.CheckViolationError as e:
+                if e.constraint_name != 'team_roster_limit':
+                    raise
+                raise RosterLimitError(team_id, e.detail) from e
+            for discord_id in discord_ids:
+                self.forget_memberships(discord_id)
+    
     async def remove_team_member(self, team_id: int, discord_id: int) -> bool:
         """Remove a member from a team"""
         async with self.pool.acquire() as conn:
@@ -365,8 +645,70 @@ class Database:
                 "DELETE FROM team_members WHERE team_id = $1 AND discord_id = $2",
                 team_id, discord_id
             )
+            self.forget_memberships(discord_id)
             return result == "DELETE 1"
     
+    async def get_roster_limits(self) -> Dict[str, int]:
+        """{role: max members} ('player' counts the captain too)"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("SELECT role, max_members FROM roster_limits")
+            return {row['role']: row['max_members'] for row in rows}
+    
+    async def get_teams_with_open_slots(self, role: str, exclude_discord_id: Optional[int] = None) -> List[Dict]:
+        """
+        Teams with room for another `role` (newest first) with their number of
+        open_slots, from the roster counters instead of every team's roster.
+        Teams `exclude_discord_id` already belongs to are left out.
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT * FROM (
+                    SELECT t.*, l.max_members - CASE l.role
+                        WHEN 'player' THEN COALESCE(c.captains, 0) + COALESCE(c.players, 0)
+                        WHEN 'captain' THEN COALESCE(c.captains, 0)
+                        WHEN 'manager' THEN COALESCE(c.managers, 0)
+                        ELSE COALESCE(c.coaches, 0)
+                    END as open_slots
+                    FROM teams t
+                    JOIN roster_limits l ON l.role = $1
+                    LEFT JOIN team_roster_counts c ON c.team_id = t.id
+                    WHERE $2::bigint IS NULL OR NOT EXISTS (
+                        SELECT 1 FROM team_members tm WHERE tm.team_id = t.id AND tm.discord_id = $2::bigint
+                    )
+                ) teams
+                WHERE open_slots > 0
+                ORDER BY created_at DESC
+                """,
+                role, exclude_discord_id
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_teams_with_role(self, role: str, team_id: Optional[int] = None, limit: int = 25) -> List[Dict]:
+        """
+        Up to `limit` teams (newest first, or just `team_id`) with at least
+        one member in exactly `role`, from the roster counters in one query.
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT t.*
+                FROM teams t
+                JOIN team_roster_counts c ON c.team_id = t.id
+                WHERE CASE $1
+                        WHEN 'captain' THEN c.captains
+                        WHEN 'player' THEN c.players
+                        WHEN 'manager' THEN c.managers
+                        ELSE c.coaches
+                    END > 0
+                  AND ($2::int IS NULL OR t.id = $2::int)
+                ORDER BY t.id DESC
+                LIMIT $3
+                """,
+                role, team_id, limit
+            )
+            return [dict(row) for row in rows]
+    
     async def get_user_teams_by_role(self, discord_id: int, role: str) -> List[Dict]:
         """Get all teams where user has a specific role"""
         async with self.pool.acquire() as conn:
@@ -382,14 +724,217 @@ class Database:
             return [dict(row) for row in rows]
     
     async def delete_team(self, team_id: int) -> bool:
-        """Delete a team (this will cascade delete team_members due to foreign key constraint)"""
+        """
+        Delete a team (this will cascade delete team_members due to foreign key constraint).
+        The freed registration slot goes to the oldest waitlisted team that fits
+        under the caps, in the same transaction; the bot picks the new team up
+        from get_waitlist_promotions.
+        """
         async with self.pool.acquire() as conn:
-            result = await conn.execute(
-                "DELETE FROM teams WHERE id = $1",
-                team_id
-            )
+            async with conn.transaction():
+                result = await conn.execute(
+                    "DELETE FROM teams WHERE id = $1",
+                    team_id
+                )
+                promoted = await self._promote_waitlist(conn) if result == "DELETE 1" else None
+            self.forget_team_memberships(team_id)
+            self._publish({'table': 'teams', 'op': 'DELETE', 'id': team_id})
+            if promoted:
+                self._publish_promotion(promoted)
             return result == "DELETE 1"
     
+    def _publish_promotion(self, promoted: Dict):
+        self.forget_memberships(promoted['discord_id'])
+        self._publish({'table': 'teams', 'op': 'INSERT', 'id': promoted['team']['id'], 'row': promoted['team']})
+    
+    async def _promote_waitlist(self, conn) -> Optional[Dict]:
+        """
+        Create the team of the oldest waiting entry in a region with room (one
+        index seek per region), skipping entries another transaction holds.
+        Returns {'team', 'discord_id'} or None when nobody fits. Runs in the
+        caller's transaction (a team delete, a cap change): an entry whose
+        team can't be created is cancelled rather than failing the caller.
+        """
+        for _ in range(WAITLIST_PROMOTION_ATTEMPTS):
+            entry = await conn.fetchrow(
+                """
+                SELECT w.*
+                FROM registration_caps c
+                CROSS JOIN LATERAL (
+                    SELECT * FROM registration_waitlist w
+                    WHERE w.status = 'waiting' AND w.region = c.region
+                    ORDER BY w.id
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                ) w
+                WHERE c.kind = 'team' AND c.region <> $1
+                  AND (c.capacity IS NULL OR c.registered < c.capacity)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM registration_caps a
+                      WHERE a.kind = 'team' AND a.region = $1 AND a.registered >= a.capacity
+                  )
+                ORDER BY w.id
+                LIMIT 1
+                """,
+                ALL_REGIONS
+            )
+            if entry is None:
+                return None
+            
+            taken = await conn.fetchval(
+                """
+                SELECT EXISTS (
+                    SELECT 1 FROM teams WHERE LOWER(team_name) = LOWER($1) OR LOWER(team_tag) = LOWER($2)
+                )
+                """,
+                entry['team_name'], entry['team_tag']
+            )
+            if taken:
+                await conn.execute("UPDATE registration_waitlist SET status = 'cancelled' WHERE id = $1", entry['id'])
+                continue
+            
+            try:
+                async with conn.transaction():
+                    team = await conn.fetchrow(
+                        """
+                        INSERT INTO teams (team_name, team_tag, region, captain_discord_id, logo_url)
+                        VALUES ($1, $2, $3, $4, $5)
+                        RETURNING *
+                        """,
+                        entry['team_name'], entry['team_tag'], entry['region'],
+                        entry['discord_id'] if entry['role'] == 'captain' else None, entry['logo_url']
+                    )
+                    await conn.execute(
+                        "INSERT INTO team_members (team_id, discord_id, role) VALUES ($1, $2, $3)",
+                        team['id'], entry['discord_id'], entry['role']
+                    )
+            except asyncpg.IntegrityConstraintViolationError as e:
+                if isinstance(e, asyncpg.CheckViolationError) and e.constraint_name == 'registration_cap':
+                    # A registration took the slot first; the entry keeps its place
+                    return None
+                # The name or tag was registered after the check above, or the
+                # roster is refused - only the savepoint is rolled back
+                print(f"⚠️  Waitlist entry {entry['id']} ({entry['team_name']}) can't be promoted: {e}")
+                await conn.execute("UPDATE registration_waitlist SET status = 'cancelled' WHERE id = $1", entry['id'])
+                continue
+            await conn.execute(
+                """
+                UPDATE registration_waitlist SET status = 'promoted', team_id = $2, promoted_at = CURRENT_TIMESTAMP
+                WHERE id = $1
+                """,
+                entry['id'], team['id']
+            )
+            return {'team': dict(team), 'discord_id': entry['discord_id']}
+        return None
+    
+    # Membership cache
+    
+    async def get_member_team_roles(self, discord_id: int) -> Dict[int, str]:
+        """Get {team_id: role} for every team a user belongs to (cached)"""
+        cached = self._memberships.get(discord_id)
+        if cached is not None:
+            return cached
+        
+        version = self._memberships_version
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT team_id, role FROM team_members WHERE discord_id = $1",
+                discord_id
+            )
+        roles = {row['team_id']: row['role'] for row in rows}
+        # Don't cache a result that a concurrent write may already have made stale
+        if (self.change_feed_connected or not self.multi_process) and version == self._memberships_version:
+            self._memberships[discord_id] = roles
+        return roles
+    
+    def forget_memberships(self, discord_id: Optional[int] = None):
+        """Drop cached memberships for a user (or everyone) after team_members changes"""
+        self._memberships_version += 1
+        if discord_id is None:
+            self._memberships.clear()
+        else:
+            self._memberships.pop(discord_id, None)
+    
+    def forget_team_memberships(self, team_id: int):
+        """Drop cached memberships of everyone on a team"""
+        self._memberships_version += 1
+        for discord_id in [user for user, roles in self._memberships.items() if team_id in roles]:
+            del self._memberships[discord_id]
+    
+    def _on_membership_change(self, change: Dict):
+        if change['op'] == 'RESET' or change.get('discord_id') is None:
+            self.forget_memberships()
+        else:
+            self.forget_memberships(change['discord_id'])
+    
+    # Change feed
+    
+    @property
+    def change_feed_connected(self) -> bool:
+        return self._listener is not None and not self._listener.is_closed()
+    
+    def subscribe(self, table: str, callback: Callable[[Dict], None]):
+        """
+        Call `callback(change)` for every row change to `table`, from any process.
+        
+        `change` has 'table', 'op' (INSERT/UPDATE/DELETE) and the row's 'id',
+        'discord_id' and 'team_id'. op 'RESET' means changes may have been missed
+        (the feed connection dropped) and everything cached from the table is suspect.
+        Team writes made through this object are also published right away with
+        the new 'row', before their NOTIFY comes back.
+        """
+        self._subscribers.setdefault(table, []).append(callback)
+    
+    def _publish(self, change: Dict):
+        for callback in self._subscribers.get(change['table'], ()):
+            try:
+                callback(change)
+            except Exception as e:
+                print(f"✗ Change feed subscriber failed for {change['table']}: {e}")
+    
+    def _publish_reset(self):
+        for table in list(self._subscribers):
+            self._publish({'table': table, 'op': 'RESET'})
+    
+    def _on_notification(self, connection, pid: int, channel: str, payload: str):
+        try:
+            change = json.loads(payload)
+        except ValueError:
+            print(f"✗ Malformed change feed payload: {payload[:100]}")
+            return
+        self._publish(change)
+    
+    def _on_listener_lost(self, connection):
+        self._listener = None
+        if self._closing:
+            return
+        print("⚠️  Change feed connection lost, reconnecting")
+        self._publish_reset()
+        self._feed_task = asyncio.create_task(self._reconnect_change_feed())
+    
+    async def _start_change_feed(self) -> bool:
+        """Open the LISTEN connection (outside the pool so it is never handed out)"""
+        try:
+            conn = await asyncpg.connect(self.database_url)
+            await conn.add_listener(CHANGE_CHANNEL, self._on_notification)
+        except Exception as e:
+            print(f"⚠️  Change feed unavailable: {e}")
+            return False
+        conn.add_termination_listener(self._on_listener_lost)
+        self._listener = conn
+        print("✓ Change feed listening")
+        return True
+    
+    async def _reconnect_change_feed(self):
+        backoff = 1
+        while not self._closing:
+            await asyncio.sleep(backoff)
+            if await self._start_change_feed():
+                # Anything written while we weren't listening was missed
+                self._publish_reset()
+                return
+            backoff = min(backoff * 2, CHANGE_FEED_MAX_BACKOFF)
+    
     # Ban operations
     
     async def ban_player(self, discord_id: int, banned_by: int, reason: str = None) -> bool:
@@ -435,7 +980,7 @@ class Database:
             return [dict(row) for row in rows]
     
     async def get_player_profile(self, discord_id: int) -> Optional[Dict]:
-        """Get player profile with stats (joins players and player_stats)"""
+        """Get player profile with stats and form (joins players, player_stats and player_form)"""
         async with self.pool.acquire() as conn:
             row = await conn.fetchrow(
                 """
@@ -452,9 +997,16 @@ class Database:
                     COALESCE(ps.wins, 0) as wins,
                     COALESCE(ps.losses, 0) as losses,
                     COALESCE(ps.mvps, 0) as mvps,
-                    COALESCE(ps.points, 0) as points
+                    COALESCE(ps.points, 0) as points,
+                    COALESCE(pf.matches, 0) as form_matches,
+                    COALESCE(pf.kills, 0) as form_kills,
+                    COALESCE(pf.deaths, 0) as form_deaths,
+                    COALESCE(pf.assists, 0) as form_assists,
+                    COALESCE(pf.wins, 0) as form_wins,
+                    COALESCE(pf.mvps, 0) as form_mvps
                 FROM players p
                 LEFT JOIN player_stats ps ON p.discord_id = ps.discord_id
+                LEFT JOIN player_form pf ON p.discord_id = pf.discord_id
                 WHERE p.discord_id = $1
                 """,
                 discord_id
@@ -531,7 +1083,1134 @@ class Database:
                     team['coach'] = member_dict
             
             return team
+    
+    # Bracket operations
+    
+    async def get_team_seeding(self, region: Optional[str] = None) -> List[Dict]:
+        """id, region, wins, matches_played and rating of every team (in a region) for seeding"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT t.id, t.region, COALESCE(ts.wins, 0) as wins, COALESCE(ts.matches_played, 0) as matches_played,
+                       COALESCE(r.rating, 1500) as rating
+                FROM teams t
+                LEFT JOIN team_stats ts ON t.id = ts.team_id
+                LEFT JOIN ratings r ON r.entity_type = 'team' AND r.entity_id = t.id
+                WHERE $1::text IS NULL OR t.region = $1::text
+                """,
+                region
+            )
+            return [dict(row) for row in rows]
+    
+    async def create_bracket(
+        self,
+        name: str,
+        fmt: str,
+        region: Optional[str],
+        created_by: int,
+        team_count: int,
+        matches: Dict[tuple, Dict],
+        rounds: List[Dict]
+    ) -> Dict:
+        """Store a planned bracket (utils.brackets.plan_bracket) in three bulk statements"""
+        keys = list(matches)
+        rows = [matches[key] for key in keys]
+        
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                bracket = await conn.fetchrow(
+                    """
+                    INSERT INTO brackets (name, format, region, team_count, created_by)
+                    VALUES ($1, $2, $3, $4, $5)
+                    RETURNING *
+                    """,
+                    name, fmt, region, team_count, created_by
+                )
+                
+                inserted = await conn.fetch(
+                    """
+                    INSERT INTO bracket_matches (
+                        bracket_id, section, round, position, team1_id, team2_id, team1_seed, team2_seed,
+                        team1_bye, team2_bye, winner_id, status
+                    )
+                    SELECT $1, * FROM unnest(
+                        $2::text[], $3::int[], $4::int[], $5::int[], $6::int[], $7::int[], $8::int[],
+                        $9::bool[], $10::bool[], $11::int[], $12::text[]
+                    )
+                    RETURNING id, section, round, position
+                    """,
+                    bracket['id'],
+                    [m['section'] for m in rows], [m['round'] for m in rows], [m['position'] for m in rows],
+                    [m['team1_id'] for m in rows], [m['team2_id'] for m in rows],
+                    [m['team1_seed'] for m in rows], [m['team2_seed'] for m in rows],
+                    [m['team1_bye'] for m in rows], [m['team2_bye'] for m in rows],
+                    [m['winner_id'] for m in rows], [m['status'] for m in rows]
+                )
+                ids = {(row['section'], row['round'], row['position']): row['id'] for row in inserted}
+                
+                linked = [m for m in rows if m['next_match_id'] is not None or m['loser_next_match_id'] is not None]
+                await conn.execute(
+                    """
+                    UPDATE bracket_matches m
+                    SET next_match_id = v.next_match_id, next_slot = v.next_slot,
+                        loser_next_match_id = v.loser_next_match_id, loser_next_slot = v.loser_next_slot
+                    FROM unnest($1::int[], $2::int[], $3::smallint[], $4::int[], $5::smallint[])
+                        AS v(id, next_match_id, next_slot, loser_next_match_id, loser_next_slot)
+                    WHERE m.id = v.id
+                    """,
+                    [ids[(m['section'], m['round'], m['position'])] for m in linked],
+                    [ids.get(m['next_match_id']) for m in linked],
+                    [m['next_slot'] for m in linked],
+                    [ids.get(m['loser_next_match_id']) for m in linked],
+                    [m['loser_next_slot'] for m in linked]
+                )
+                
+                await conn.executemany(
+                    """
+                    INSERT INTO bracket_rounds (bracket_id, section, round, name, match_count)
+                    VALUES ($1, $2, $3, $4, $5)
+                    """,
+                    [(bracket['id'], r['section'], r['round'], r['name'], r['match_count']) for r in rounds]
+                )
+            return dict(bracket)
+    
+    async def get_bracket(self, bracket_id: int) -> Optional[Dict]:
+        """Get bracket by ID"""
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow("SELECT * FROM brackets WHERE id = $1", bracket_id)
+            return dict(row) if row else None
+    
+    async def get_brackets(self, limit: int = 25) -> List[Dict]:
+        """Most recent brackets, active ones first"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT * FROM brackets ORDER BY status = 'active' DESC, created_at DESC LIMIT $1",
+                limit
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_bracket_rounds(self, bracket_id: int) -> List[Dict]:
+        """Rounds of a bracket in play order (upper, lower, grand final)"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT * FROM bracket_rounds
+                WHERE bracket_id = $1
+                ORDER BY
+                    CASE section WHEN 'winners' THEN 1 WHEN 'losers' THEN 2 ELSE 3 END,
+                    round
+                """,
+                bracket_id
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_bracket_round_matches(
+        self,
+        bracket_id: int,
+        section: str,
+        round_number: int,
+        offset: int = 0,
+        limit: int = 16
+    ) -> List[Dict]:
+        """One page of a round's matches with team names"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT m.*, t1.team_name as team1_name, t1.team_tag as team1_tag,
+                       t2.team_name as team2_name, t2.team_tag as team2_tag
+                FROM bracket_matches m
+                LEFT JOIN teams t1 ON m.team1_id = t1.id
+                LEFT JOIN teams t2 ON m.team2_id = t2.id
+                WHERE m.bracket_id = $1 AND m.section = $2 AND m.round = $3
+                ORDER BY m.position
+                OFFSET $4 LIMIT $5
+                """,
+                bracket_id, section, round_number, offset, limit
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_bracket_match(self, match_id: int) -> Optional[Dict]:
+        """Get a bracket match with team names"""
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT m.*, t1.team_name as team1_name, t1.team_tag as team1_tag,
+                       t2.team_name as team2_name, t2.team_tag as team2_tag
+                FROM bracket_matches m
+                LEFT JOIN teams t1 ON m.team1_id = t1.id
+                LEFT JOIN teams t2 ON m.team2_id = t2.id
+                WHERE m.id = $1
+                """,
+                match_id
+            )
+            return dict(row) if row else None
+    
+    async def record_bracket_result(self, match_id: int, winner_id: int) -> Optional[Dict]:
+        """
+        Record the winner of a ready match and move both teams on.
+        Returns the completed match, or None if the match isn't ready or the
+        team isn't playing in it.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                match = await conn.fetchrow(
+                    "SELECT * FROM bracket_matches WHERE id = $1 FOR UPDATE",
+                    match_id
+                )
+                if not match or match['status'] != 'ready' or winner_id not in (match['team1_id'], match['team2_id']):
+                    return None
+                loser_id = match['team2_id'] if winner_id == match['team1_id'] else match['team1_id']
+                
+                row = await conn.fetchrow(
+                    """
+                    UPDATE bracket_matches
+                    SET winner_id = $2, loser_id = $3, status = 'completed', completed_at = NOW()
+                    WHERE id = $1
+                    RETURNING *
+                    """,
+                    match_id, winner_id, loser_id
+                )
+                
+                if match['next_match_id'] is None:
+                    await conn.execute(
+                        "UPDATE brackets SET status = 'completed', champion_team_id = $2 WHERE id = $1",
+                        match['bracket_id'], winner_id
+                    )
+                else:
+                    await self._fill_bracket_slot(conn, match['next_match_id'], match['next_slot'], winner_id)
+                if match['loser_next_match_id'] is not None:
+                    await self._fill_bracket_slot(conn, match['loser_next_match_id'], match['loser_next_slot'], loser_id)
+                return dict(row)
+    
+    async def _fill_bracket_slot(self, conn, match_id: int, slot: int, team_id: Optional[int]):
+        """SQL version of utils.brackets.fill_slot: place a team (None = bye) and follow byes"""
+        pending = [(match_id, slot, team_id)]
+        while pending:
+            match_id, slot, team_id = pending.pop()
+            if match_id is None:
+                continue
+            side, other = ('team1', 'team2') if slot == 1 else ('team2', 'team1')
+            row = await conn.fetchrow(
+                f"UPDATE bracket_matches SET {side}_id = $2, {side}_bye = $3 WHERE id = $1 RETURNING *",
+                match_id, team_id, team_id is None
+            )
+            
+            other_team = row[f'{other}_id']
+            if other_team is None and not row[f'{other}_bye']:
+                continue
+            if team_id is not None and other_team is not None:
+                await conn.execute("UPDATE bracket_matches SET status = 'ready' WHERE id = $1", match_id)
+                continue
+            
+            winner = team_id if team_id is not None else other_team
+            await conn.execute(
+                "UPDATE bracket_matches SET status = 'bye', winner_id = $2 WHERE id = $1",
+                match_id, winner
+            )
+            pending.append((row['next_match_id'], row['next_slot'], winner))
+            if row['loser_next_match_id'] is not None:
+                pending.append((row['loser_next_match_id'], row['loser_next_slot'], None))
+    
+    # Swiss operations
+    
+    async def create_swiss_stage(
+        self,
+        name: str,
+        region: Optional[str],
+        total_rounds: int,
+        created_by: int,
+        team_ids: List[int]
+    ) -> Dict:
+        """Create a Swiss stage with teams given in seed order"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                stage = await conn.fetchrow(
+                    """
+                    INSERT INTO swiss_stages (name, region, team_count, total_rounds, created_by)
+                    VALUES ($1, $2, $3, $4, $5)
+                    RETURNING *
+                    """,
+                    name, region, len(team_ids), total_rounds, created_by
+                )
+                await conn.execute(
+                    """
+                    INSERT INTO swiss_teams (stage_id, team_id, seed)
+                    SELECT $1, team_id, seed FROM unnest($2::int[]) WITH ORDINALITY AS t(team_id, seed)
+                    """,
+                    stage['id'], team_ids
+                )
+            return dict(stage)
+    
+    async def get_swiss_stage(self, stage_id: int) -> Optional[Dict]:
+        """Get Swiss stage by ID"""
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow("SELECT * FROM swiss_stages WHERE id = $1", stage_id)
+            return dict(row) if row else None
+    
+    async def get_swiss_stages(self, limit: int = 25) -> List[Dict]:
+        """Most recent Swiss stages, active ones first"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT * FROM swiss_stages ORDER BY status = 'active' DESC, created_at DESC LIMIT $1",
+                limit
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_swiss_standings(self, stage_id: int) -> List[Dict]:
+        """
+        Standings of a stage, best first: wins (byes count as wins), then
+        Buchholz (sum of opponents' wins), then Sonneborn-Berger (sum of beaten
+        opponents' wins), then seed.
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                WITH results AS (
+                    SELECT team1_id AS team_id, team2_id AS opponent_id, status, winner_id = team1_id AS won
+                    FROM swiss_matches
+                    WHERE stage_id = $1 AND status <> 'pending'
+                    UNION ALL
+                    SELECT team2_id, team1_id, status, winner_id = team2_id
+                    FROM swiss_matches
+                    WHERE stage_id = $1 AND status = 'completed'
+                ),
+                scores AS (
+                    SELECT st.team_id, st.seed,
+                           COUNT(r.team_id) FILTER (WHERE r.won) as wins,
+                           COUNT(r.team_id) FILTER (WHERE r.status = 'completed' AND NOT r.won) as losses,
+                           COUNT(r.team_id) FILTER (WHERE r.status = 'bye') as byes
+                    FROM swiss_teams st
+                    LEFT JOIN results r ON r.team_id = st.team_id
+                    WHERE st.stage_id = $1
+                    GROUP BY st.team_id, st.seed
+                ),
+                tiebreaks AS (
+                    SELECT r.team_id,
+                           SUM(o.wins) as buchholz,
+                           SUM(o.wins) FILTER (WHERE r.won) as sonneborn_berger
+                    FROM results r
+                    JOIN scores o ON o.team_id = r.opponent_id
+                    GROUP BY r.team_id
+                )
+                SELECT s.team_id, t.team_name, t.team_tag, s.seed, s.wins, s.losses, s.byes,
+                       COALESCE(tb.buchholz, 0) as buchholz,
+                       COALESCE(tb.sonneborn_berger, 0) as sonneborn_berger
+                FROM scores s
+                JOIN teams t ON t.id = s.team_id
+                LEFT JOIN tiebreaks tb ON tb.team_id = s.team_id
+                ORDER BY s.wins DESC, buchholz DESC, sonneborn_berger DESC, s.seed
+                """,
+                stage_id
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_swiss_opponents(self, stage_id: int) -> List[Tuple[int, int]]:
+        """Every pair of teams that already played each other in a stage"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT team1_id, team2_id FROM swiss_matches
+                WHERE stage_id = $1 AND team1_id IS NOT NULL AND team2_id IS NOT NULL
+                """,
+                stage_id
+            )
+            return [(row['team1_id'], row['team2_id']) for row in rows]
+    
+    async def get_swiss_staff(self, stage_id: int) -> List[Dict]:
+        """(team_id, discord_id) of every captain and manager of the stage's teams"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT tm.team_id, tm.discord_id
+                FROM swiss_teams st
+                JOIN team_members tm ON tm.team_id = st.team_id
+                WHERE st.stage_id = $1 AND tm.role IN ('captain', 'manager')
+                """,
+                stage_id
+            )
+            return [dict(row) for row in rows]
+    
+    async def create_swiss_round(
+        self,
+        stage_id: int,
+        round_number: int,
+        pairs: List[Tuple[int, int]],
+        bye_team_id: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Store a round's pairings (plus a bye) and advance the stage.
+        Returns the number of rows stored, or None if the stage isn't ready
+        for this round (finished, another round already paired, or results of
+        the previous round still pending).
+        """
+        team1 = [a for a, _ in pairs]
+        team2 = [b for _, b in pairs]
+        winners: List[Optional[int]] = [None] * len(pairs)
+        statuses = ['pending'] * len(pairs)
+        if bye_team_id is not None:
+            team1.append(bye_team_id)
+            team2.append(None)
+            winners.append(bye_team_id)
+            statuses.append('bye')
+        
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                stage = await conn.fetchrow("SELECT * FROM swiss_stages WHERE id = $1 FOR UPDATE", stage_id)
+                if (
+                    not stage or stage['status'] != 'active'
+                    or stage['current_round'] != round_number - 1 or round_number > stage['total_rounds']
+                ):
+                    return None
+                pending = await conn.fetchval(
+                    "SELECT EXISTS(SELECT 1 FROM swiss_matches WHERE stage_id = $1 AND status = 'pending')",
+                    stage_id
+                )
+                if pending:
+                    return None
+                
+                await conn.execute(
+                    """
+                    INSERT INTO swiss_matches (stage_id, round, table_number, team1_id, team2_id, winner_id, status)
+                    SELECT $1, $2, table_number, team1_id, team2_id, winner_id, status
+                    FROM unnest($3::int[], $4::int[], $5::int[], $6::text[])
+                        WITH ORDINALITY AS v(team1_id, team2_id, winner_id, status, table_number)
+                    """,
+                    stage_id, round_number, team1, team2, winners, statuses
+                )
+                await conn.execute(
+                    "UPDATE swiss_stages SET current_round = $2 WHERE id = $1",
+                    stage_id, round_number
+                )
+            return len(team1)
+    
+    async def get_swiss_round_matches(
+        self,
+        stage_id: int,
+        round_number: int,
+        offset: int = 0,
+        limit: int = 16
+    ) -> List[Dict]:
+        """One page of a Swiss round's matches with team names"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT m.*, t1.team_name as team1_name, t1.team_tag as team1_tag,
+                       t2.team_name as team2_name, t2.team_tag as team2_tag
+                FROM swiss_matches m
+                LEFT JOIN teams t1 ON m.team1_id = t1.id
+                LEFT JOIN teams t2 ON m.team2_id = t2.id
+                WHERE m.stage_id = $1 AND m.round = $2
+                ORDER BY m.table_number
+                OFFSET $3 LIMIT $4
+                """,
+                stage_id, round_number, offset, limit
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_swiss_match(self, match_id: int) -> Optional[Dict]:
+        """Get a Swiss match with team names"""
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT m.*, t1.team_name as team1_name, t1.team_tag as team1_tag,
+                       t2.team_name as team2_name, t2.team_tag as team2_tag
+                FROM swiss_matches m
+                LEFT JOIN teams t1 ON m.team1_id = t1.id
+                LEFT JOIN teams t2 ON m.team2_id = t2.id
+                WHERE m.id = $1
+                """,
+                match_id
+            )
+            return dict(row) if row else None
+    
+    async def record_swiss_result(self, match_id: int, winner_id: int) -> Optional[Dict]:
+        """
+        Record the winner of a pending Swiss match; the stage completes with the
+        last result of its final round. Returns the completed match, or None if
+        it isn't pending or the team isn't playing in it.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                row = await conn.fetchrow(
+                    """
+                    UPDATE swiss_matches
+                    SET winner_id = $2, status = 'completed', completed_at = NOW()
+                    WHERE id = $1 AND status = 'pending' AND $2 IN (team1_id, team2_id)
+                    RETURNING *
+                    """,
+                    match_id, winner_id
+                )
+                if not row:
+                    return None
+                await conn.execute(
+                    """
+                    UPDATE swiss_stages s SET status = 'completed'
+                    WHERE s.id = $1 AND s.current_round = s.total_rounds
+                      AND NOT EXISTS (SELECT 1 FROM swiss_matches WHERE stage_id = $1 AND status = 'pending')
+                    """,
+                    row['stage_id']
+                )
+                return dict(row)
+    
+    # Rating operations
+    
+    async def get_rating_history(self) -> List[Tuple[float, int, int, int]]:
+        """(completed_at epoch seconds, team1_id, team2_id, winner_id) of every decided bracket/Swiss match, oldest first"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT EXTRACT(EPOCH FROM completed_at)::float8, team1_id, team2_id, winner_id
+                FROM (
+                    SELECT completed_at, team1_id, team2_id, winner_id, 1 as source, id
+                    FROM bracket_matches
+                    WHERE status = 'completed' AND team1_id IS NOT NULL AND team2_id IS NOT NULL AND winner_id IS NOT NULL
+                    UNION ALL
+                    SELECT completed_at, team1_id, team2_id, winner_id, 2, id
+                    FROM swiss_matches
+                    WHERE status = 'completed' AND team1_id IS NOT NULL AND team2_id IS NOT NULL AND winner_id IS NOT NULL
+                ) m
+                ORDER BY completed_at, source, id
+                """
+            )
+            return [tuple(row) for row in rows]
+    
+    async def get_rating_rosters(self, team_ids: Optional[List[int]] = None) -> List[Tuple[int, int]]:
+        """(team_id, discord_id) of the captains and players of every team (or the given teams)"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT team_id, discord_id FROM team_members
+                WHERE role IN ('captain', 'player') AND ($1::int[] IS NULL OR team_id = ANY($1::int[]))
+                """,
+                team_ids
+            )
+            return [tuple(row) for row in rows]
+    
+    async def get_ratings(self, entity_type: str, entity_ids: List[int]) -> Dict[int, Dict]:
+        """Stored ratings by entity ID ('team' or 'player')"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT * FROM ratings WHERE entity_type = $1 AND entity_id = ANY($2::bigint[])",
+                entity_type, entity_ids
+            )
+            return {row['entity_id']: dict(row) for row in rows}
+    
+    async def save_ratings(
+        self,
+        entity_type: str,
+        rows: List[Tuple[int, float, float, float, int]],
+        replace: bool = False
+    ):
+        """
+        Upsert (entity_id, rating, rd, volatility, games) rows in bulk; player
+        ratings are also written to player_stats.points. With replace=True
+        every other rating of the type is dropped (full recompute).
+        """
+        columns = [list(column) for column in zip(*rows)] or [[], [], [], [], []]
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                if replace:
+                    await conn.execute("DELETE FROM ratings WHERE entity_type = $1", entity_type)
+                await conn.execute(
+                    """
+                    INSERT INTO ratings (entity_type, entity_id, rating, rd, volatility, games, updated_at)
+                    SELECT $1, v.*, NOW()
+                    FROM unnest($2::bigint[], $3::float8[], $4::float8[], $5::float8[], $6::int[]) AS v
+                    ON CONFLICT (entity_type, entity_id) DO UPDATE
+                    SET rating = EXCLUDED.rating, rd = EXCLUDED.rd, volatility = EXCLUDED.volatility,
+                        games = EXCLUDED.games, updated_at = EXCLUDED.updated_at
+                    """,
+                    entity_type, *columns
+                )
+                
+                if entity_type == 'player':
+                    if replace:
+                        await conn.execute("UPDATE player_stats SET points = 0 WHERE points <> 0")
+                    await conn.execute(
+                        """
+                        UPDATE player_stats ps
+                        SET points = ROUND(v.rating)::int, updated_at = NOW()
+                        FROM unnest($1::bigint[], $2::float8[]) AS v(discord_id, rating)
+                        WHERE ps.discord_id = v.discord_id
+                        """,
+                        columns[0], columns[1]
+                    )
+    
+    async def get_rating_rank(self, entity_type: str, entity_id: int) -> Optional[Dict]:
+        """Stored rating plus its rank (1 = best) and the number of rated entities"""
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT r.*,
+                       (SELECT COUNT(*) FROM ratings o WHERE o.entity_type = r.entity_type AND o.rating > r.rating) + 1 as rank,
+                       (SELECT COUNT(*) FROM ratings o WHERE o.entity_type = r.entity_type) as total
+                FROM ratings r
+                WHERE r.entity_type = $1 AND r.entity_id = $2
+                """,
+                entity_type, entity_id
+            )
+            return dict(row) if row else None
+    
+    async def get_team_rating_leaderboard(self, region: Optional[str] = None, limit: int = 10) -> List[Dict]:
+        """Highest rated teams (in a region)"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT t.*, r.rating, r.rd, r.games
+                FROM ratings r
+                JOIN teams t ON t.id = r.entity_id
+                WHERE r.entity_type = 'team' AND ($1::text IS NULL OR t.region = $1::text)
+                ORDER BY r.rating DESC
+                LIMIT $2
+                """,
+                region, limit
+            )
+            return [dict(row) for row in rows]
+    
+    # Schedule operations
+    
+    async def get_team_availability(self, team_ids: Optional[List[int]] = None) -> List[Dict]:
+        """Weekly availability windows (UTC) of every team, or of the given teams"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT * FROM team_availability
+                WHERE $1::int[] IS NULL OR team_id = ANY($1::int[])
+                ORDER BY team_id, weekday, start_minute
+                """,
+                team_ids
+            )
+            return [dict(row) for row in rows]
+    
+    async def set_team_availability(self, team_id: int, windows: List[Tuple[int, int, int]]):
+        """Replace a team's (weekday, start_minute, end_minute) windows"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("DELETE FROM team_availability WHERE team_id = $1", team_id)
+                await conn.executemany(
+                    """
+                    INSERT INTO team_availability (team_id, weekday, start_minute, end_minute)
+                    VALUES ($1, $2, $3, $4)
+                    ON CONFLICT (team_id, weekday, start_minute) DO UPDATE SET end_minute = EXCLUDED.end_minute
+                    """,
+                    [(team_id, weekday, start, end) for weekday, start, end in windows]
+                )
+    
+    async def add_staff_slot(self, discord_id: int, role: str, starts_at: datetime, ends_at: datetime) -> Dict:
+        """Add a caster/staff availability slot"""
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                INSERT INTO staff_slots (discord_id, role, starts_at, ends_at)
+                VALUES ($1, $2, $3, $4)
+                RETURNING *
+                """,
+                discord_id, role, starts_at, ends_at
+            )
+            return dict(row)
+    
+    async def delete_staff_slot(self, slot_id: int, discord_id: Optional[int] = None) -> bool:
+        """Delete a staff slot (only the owner's when discord_id is given)"""
+        async with self.pool.acquire() as conn:
+            result = await conn.execute(
+                "DELETE FROM staff_slots WHERE id = $1 AND ($2::bigint IS NULL OR discord_id = $2::bigint)",
+                slot_id, discord_id
+            )
+            return result == "DELETE 1"
+    
+    async def get_staff_slots(self, start: datetime, end: datetime, discord_id: Optional[int] = None) -> List[Dict]:
+        """Staff slots overlapping [start, end), optionally of one person"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT * FROM staff_slots
+                WHERE ends_at > $1 AND starts_at < $2 AND ($3::bigint IS NULL OR discord_id = $3::bigint)
+                ORDER BY starts_at, id
+                """,
+                start, end, discord_id
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_unscheduled_matches(self) -> List[Dict]:
+        """(source, match_id, team1_id, team2_id) of playable bracket/Swiss matches without a time slot"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT 'bracket' as source, m.id as match_id, m.team1_id, m.team2_id
+                FROM bracket_matches m
+                WHERE m.status = 'ready' AND NOT EXISTS (
+                    SELECT 1 FROM scheduled_matches s
+                    WHERE s.source = 'bracket' AND s.match_id = m.id AND s.status = 'scheduled'
+                )
+                UNION ALL
+                SELECT 'swiss', m.id, m.team1_id, m.team2_id
+                FROM swiss_matches m
+                WHERE m.status = 'pending' AND m.team1_id IS NOT NULL AND m.team2_id IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM scheduled_matches s
+                    WHERE s.source = 'swiss' AND s.match_id = m.id AND s.status = 'scheduled'
+                )
+                """
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_scheduled_matches(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        team_id: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Scheduled matches starting in [start, end) with team names, earliest first"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT s.*, t1.team_name as team1_name, t1.team_tag as team1_tag,
+                       t2.team_name as team2_name, t2.team_tag as team2_tag
+                FROM scheduled_matches s
+                LEFT JOIN teams t1 ON s.team1_id = t1.id
+                LEFT JOIN teams t2 ON s.team2_id = t2.id
+                WHERE s.status = 'scheduled'
+                  AND ($1::timestamp IS NULL OR s.starts_at >= $1::timestamp)
+                  AND ($2::timestamp IS NULL OR s.starts_at < $2::timestamp)
+                  AND ($3::int IS NULL OR $3::int IN (s.team1_id, s.team2_id))
+                ORDER BY s.starts_at, s.id
+                OFFSET $4 LIMIT $5
+                """,
+                start, end, team_id, offset, limit
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_scheduled_match(self, schedule_id: int) -> Optional[Dict]:
+        """Get a schedule entry with team names"""
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT s.*, t1.team_name as team1_name, t1.team_tag as team1_tag,
+                       t2.team_name as team2_name, t2.team_tag as team2_tag
+                FROM scheduled_matches s
+                LEFT JOIN teams t1 ON s.team1_id = t1.id
+                LEFT JOIN teams t2 ON s.team2_id = t2.id
+                WHERE s.id = $1
+                """,
+                schedule_id
+            )
+            return dict(row) if row else None
+    
+    async def save_schedule(self, rows: List[Dict]) -> int:
+        """
+        Upsert schedule entries (source, match_id, team1_id, team2_id,
+        starts_at, ends_at, caster_discord_id, staff_discord_id, status) in
+        one statement. Returns the number of rows written.
+        """
+        if not rows:
+            return 0
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO scheduled_matches (
+                    source, match_id, team1_id, team2_id, starts_at, ends_at,
+                    caster_discord_id, staff_discord_id, status, updated_at
+                )
+                SELECT v.*, NOW() FROM unnest(
+                    $1::text[], $2::int[], $3::int[], $4::int[], $5::timestamp[], $6::timestamp[],
+                    $7::bigint[], $8::bigint[], $9::text[]
+                ) AS v
+                ON CONFLICT (source, match_id) DO UPDATE
+                SET starts_at = EXCLUDED.starts_at, ends_at = EXCLUDED.ends_at,
+                    caster_discord_id = EXCLUDED.caster_discord_id, staff_discord_id = EXCLUDED.staff_discord_id,
+                    status = EXCLUDED.status, updated_at = EXCLUDED.updated_at
+                """,
+                *(
+                    [row[column] for row in rows]
+                    for column in (
+                        'source', 'match_id', 'team1_id', 'team2_id', 'starts_at', 'ends_at',
+                        'caster_discord_id', 'staff_discord_id', 'status'
+                    )
+                )
+            )
+            return len(rows)
+
+    
+    # Check-in operations
+    
+    async def create_check_in_window(
+        self,
+        name: str,
+        region: Optional[str],
+        closes_at: datetime,
+        opened_by: int
+    ) -> Dict:
+        """Open a check-in window (the message is attached once it's posted)"""
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                INSERT INTO check_in_windows (name, region, closes_at, opened_by)
+                VALUES ($1, $2, $3, $4)
+                RETURNING *
+                """,
+                name, region, closes_at, opened_by
+            )
+            return dict(row)
+    
+    async def set_check_in_message(self, window_id: int, channel_id: int, message_id: int):
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                "UPDATE check_in_windows SET channel_id = $2, message_id = $3 WHERE id = $1",
+                window_id, channel_id, message_id
+            )
+    
+    async def get_check_in_window(self, window_id: int) -> Optional[Dict]:
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow("SELECT * FROM check_in_windows WHERE id = $1", window_id)
+            return dict(row) if row else None
+    
+    async def get_check_in_windows(self, status: Optional[str] = None, limit: int = 25) -> List[Dict]:
+        """Check-in windows (with the given status), newest first"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT * FROM check_in_windows
+                WHERE $1::text IS NULL OR status = $1::text
+                ORDER BY id DESC
+                LIMIT $2
+                """,
+                status, limit
+            )
+            return [dict(row) for row in rows]
+    
+    async def get_check_in_eligibility(self, region: Optional[str] = None) -> List[Dict]:
+        """(team_id, region, discord_id) of every captain and manager (of teams in a region)"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT tm.team_id, t.region, tm.discord_id
+                FROM team_members tm
+                JOIN teams t ON t.id = tm.team_id
+                WHERE tm.role IN ('captain', 'manager') AND ($1::text IS NULL OR t.region = $1::text)
+                """,
+                region
+            )
+            return [dict(row) for row in rows]
+    
+    async def add_check_ins(self, rows: List[Tuple[int, int, int, datetime]]) -> int:
+        """
+        Store (window_id, team_id, discord_id, checked_in_at) check-ins in one
+        statement (a team checked in twice keeps its first row, deleted teams
+        are skipped). Returns the number of rows written.
+        """
+        if not rows:
+            return 0
+        async with self.pool.acquire() as conn:
+            result = await conn.execute(
+                """
+                INSERT INTO check_ins (window_id, team_id, discord_id, checked_in_at)
+                SELECT v.* FROM unnest($1::int[], $2::int[], $3::bigint[], $4::timestamp[])
+                    AS v(window_id, team_id, discord_id, checked_in_at)
+                JOIN teams t ON t.id = v.team_id
+                ON CONFLICT (window_id, team_id) DO NOTHING
+                """,
+                *([row[i] for row in rows] for i in range(4))
+            )
+            return int(result.split()[-1])
+    
+    async def get_check_in_team_ids(self, window_id: int) -> List[int]:
+        """Teams checked in to a window, in check-in order"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT team_id FROM check_ins WHERE window_id = $1 ORDER BY checked_in_at, team_id",
+                window_id
+            )
+            return [row['team_id'] for row in rows]
+    
+    async def close_check_in_window(self, window_id: int) -> Optional[List[Dict]]:
+        """
+        Close an open window and return its checked-in field (id, team_name,
+        team_tag, region, checked_in_at in check-in order) in one query.
+        Returns None if the window wasn't open.
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                WITH closed AS (
+                    UPDATE check_in_windows SET status = 'closed', closed_at = NOW()
+                    WHERE id = $1 AND status = 'open'
+                    RETURNING id
+                )
+                SELECT t.id, t.team_name, t.team_tag, t.region, c.checked_in_at
+                FROM closed
+                LEFT JOIN check_ins c ON c.window_id = closed.id
+                LEFT JOIN teams t ON t.id = c.team_id
+                ORDER BY c.checked_in_at, t.id
+                """,
+                window_id
+            )
+            if not rows:
+                return None
+            return [dict(row) for row in rows if row['id'] is not None]
+    
+    # Registration capacity
+    
+    async def get_registration_capacity(self) -> List[Dict]:
+        """Every (kind, region) counter with its cap (None = no cap); 'ALL' rows hold the totals"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("SELECT * FROM registration_caps ORDER BY kind, region")
+            return [dict(row) for row in rows]
+    
+    async def set_registration_cap(self, kind: str, region: str, capacity: Optional[int]) -> Dict:
+        """
+        Set (or with None, remove) the cap of a kind in a region or in
+        ALL_REGIONS. Raising a team cap promotes as many waitlisted teams as
+        now fit, in the same transaction; the row has their number as 'promoted'.
+        """
+        promotions = []
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                row = await conn.fetchrow(
+                    """
+                    INSERT INTO registration_caps (kind, region, capacity) VALUES ($1, $2, $3)
+                    ON CONFLICT (kind, region) DO UPDATE SET capacity = EXCLUDED.capacity
+                    RETURNING *
+                    """,
+                    kind, region, capacity
+                )
+                while kind == 'team':
+                    promoted = await self._promote_waitlist(conn)
+                    if promoted is None:
+                        break
+                    promotions.append(promoted)
+                if promotions:
+                    row = await conn.fetchrow(
+                        "SELECT * FROM registration_caps WHERE kind = $1 AND region = $2", kind, region
+                    )
+        for promoted in promotions:
+            self._publish_promotion(promoted)
+        return dict(row, promoted=len(promotions))
+    
+    async def add_to_waitlist(
+        self,
+        discord_id: int,
+        role: str,
+        team_name: str,
+        team_tag: str,
+        region: str,
+        logo_url: Optional[str] = None
+    ) -> Dict:
+        """Queue a team registration for the next free slot; the entry has its 'position' in its region's queue"""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # Promotion walks the regions that have a counter row
+                await conn.execute(
+                    "INSERT INTO registration_caps (kind, region) VALUES ('team', $1) ON CONFLICT (kind, region) DO NOTHING",
+                    region
+                )
+                row = await conn.fetchrow(
+                    """
+                    INSERT INTO registration_waitlist (discord_id, role, team_name, team_tag, region, logo_url)
+                    VALUES ($1, $2, $3, $4, $5, $6)
+                    RETURNING *
+                    """,
+                    discord_id, role, team_name, team_tag, region, logo_url
+                )
+                position = await conn.fetchval(
+                    "SELECT COUNT(*) FROM registration_waitlist WHERE status = 'waiting' AND region = $1 AND id <= $2",
+                    region, row['id']
+                )
+            return dict(row, position=position)
+    
+    async def get_waitlist_entry(self, discord_id: int) -> Optional[Dict]:
+        """
+        A user's waiting entry with its 'position': the waiting entries of its
+        region up to and including it, as promotion goes region by region
+        """
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT w.*, (
+                    SELECT COUNT(*) FROM registration_waitlist o
+                    WHERE o.status = 'waiting' AND o.region = w.region AND o.id <= w.id
+                ) AS position
+                FROM registration_waitlist w
+                WHERE w.discord_id = $1 AND w.status = 'waiting'
+                """,
+                discord_id
+            )
+            return dict(row) if row else None
+    
+    async def leave_waitlist(self, discord_id: int) -> bool:
+        async with self.pool.acquire() as conn:
+            result = await conn.execute(
+                """
+                UPDATE registration_waitlist SET status = 'cancelled', notified = TRUE
+                WHERE discord_id = $1 AND status = 'waiting'
+                """,
+                discord_id
+            )
+            return result != "UPDATE 0"
+    
+    async def get_waitlist_counts(self) -> Dict[str, int]:
+        """{region: waiting entries}"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT region, COUNT(*) AS waiting FROM registration_waitlist WHERE status = 'waiting' GROUP BY region"
+            )
+            return {row['region']: row['waiting'] for row in rows}
+    
+    async def get_waitlist_promotions(self) -> List[Dict]:
+        """Promoted and cancelled entries the user hasn't been told about yet, oldest first"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT * FROM registration_waitlist WHERE status <> 'waiting' AND NOT notified ORDER BY id"
+            )
+            return [dict(row) for row in rows]
+    
+    async def mark_waitlist_notified(self, entry_id: int):
+        async with self.pool.acquire() as conn:
+            await conn.execute("UPDATE registration_waitlist SET notified = TRUE WHERE id = $1", entry_id)
+    
+    # Export
+    
+    async def export_tables(self, tables: List[str], batch_size: int = 5000) -> AsyncIterator[Tuple[str, List[Tuple]]]:
+        """
+        Stream whole tables (EXPORT_TABLES) as (table, rows) batches through a
+        server-side cursor, so only one batch is in memory at a time. All
+        tables are read in one REPEATABLE READ snapshot, so team_members and
+        the stats match the exported players and teams.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction(isolation='repeatable_read', readonly=True):
+                for table in tables:
+                    columns, order = EXPORT_TABLES[table]
+                    cursor = await conn.cursor(
+                        f"SELECT {', '.join(columns)} FROM {table} ORDER BY {', '.join(order)}"
+                    )
+                    while True:
+                        rows = await cursor.fetch(batch_size)
+                        if not rows:
+                            break
+                        yield table, [tuple(row) for row in rows]
+    
+    # Role reconciliation
+    
+    async def get_role_assignments(self) -> List[Dict]:
+        """
+        Everything the Discord roles are derived from, in one query: a row per
+        player (discord_id, region) and a row per team membership (discord_id,
+        team_id, team_role, team_role_id). Teams without members give a row
+        with a NULL discord_id, so their role is still known to the reconciler.
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT discord_id, region, NULL::integer AS team_id, NULL::text AS team_role, NULL::bigint AS team_role_id
+                FROM players
+                UNION ALL
+                SELECT tm.discord_id, NULL, t.id, tm.role, t.role_id
+                FROM teams t
+                LEFT JOIN team_members tm ON tm.team_id = t.id
+                """
+            )
+            return [dict(row) for row in rows]
+    
+    # Team provisioning
+    
+    async def get_provisioned_resources(self) -> List[Dict]:
+        """Every Discord object created by team provisioning (kind, key, discord_id)"""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("SELECT kind, key, discord_id FROM provisioned_resources ORDER BY kind, key")
+            return [dict(row) for row in rows]
+    
+    async def add_provisioned_resource(self, kind: str, key: int, discord_id: int):
+        """Checkpoint a created role/channel/category (key: team id, or category slot)"""
+        async with self.pool.acquire() as conn:
+            await conn.execute(
+                """
+                INSERT INTO provisioned_resources (kind, key, discord_id) VALUES ($1, $2, $3)
+                ON CONFLICT (kind, key) DO UPDATE SET discord_id = EXCLUDED.discord_id, created_at = CURRENT_TIMESTAMP
+                """,
+                kind, key, discord_id
+            )
+    
+    async def remove_provisioned_resource(self, kind: str, key: int):
+        async with self.pool.acquire() as conn:
+            await conn.execute("DELETE FROM provisioned_resources WHERE kind = $1 AND key = $2", kind, key)
+    
+    async def apply_provisioned_resources(self) -> int:
+        """
+        Write the provisioned role and channel IDs to their teams in one
+        UPDATE (teams already pointing at them are left alone). Returns the
+        number of teams changed.
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                UPDATE teams t
+                SET role_id = COALESCE(r.role_id, t.role_id),
+                    text_channel_id = COALESCE(r.text_channel_id, t.text_channel_id),
+                    voice_channel_id = COALESCE(r.voice_channel_id, t.voice_channel_id)
+                FROM (
+                    SELECT key AS team_id,
+                        MAX(discord_id) FILTER (WHERE kind = 'role') AS role_id,
+                        MAX(discord_id) FILTER (WHERE kind = 'text') AS text_channel_id,
+                        MAX(discord_id) FILTER (WHERE kind = 'voice') AS voice_channel_id
+                    FROM provisioned_resources
+                    WHERE kind IN ('role', 'text', 'voice')
+                    GROUP BY key
+                ) r
+                WHERE t.id = r.team_id
+                  AND (t.role_id IS DISTINCT FROM COALESCE(r.role_id, t.role_id)
+                    OR t.text_channel_id IS DISTINCT FROM COALESCE(r.text_channel_id, t.text_channel_id)
+                    OR t.voice_channel_id IS DISTINCT FROM COALESCE(r.voice_channel_id, t.voice_channel_id))
+                RETURNING t.*
+                """
+            )
+        for row in rows:
+            self._publish({'table': 'teams', 'op': 'UPDATE', 'id': row['id'], 'row': dict(row)})
+        return len(rows)
+    
+    async def clear_provisioned_resources(self, kinds: List[str]) -> int:
+        """
+        Unset, in one UPDATE, the team columns pointing at provisioned objects
+        of the given kinds (before a teardown deletes them). Returns the
+        number of teams changed.
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                UPDATE teams t
+                SET role_id = CASE WHEN t.role_id = r.role_id THEN NULL ELSE t.role_id END,
+                    text_channel_id = CASE WHEN t.text_channel_id = r.text_channel_id THEN NULL ELSE t.text_channel_id END,
+                    voice_channel_id = CASE WHEN t.voice_channel_id = r.voice_channel_id THEN NULL ELSE t.voice_channel_id END
+                FROM (
+                    SELECT key AS team_id,
+                        MAX(discord_id) FILTER (WHERE kind = 'role') AS role_id,
+                        MAX(discord_id) FILTER (WHERE kind = 'text') AS text_channel_id,
+                        MAX(discord_id) FILTER (WHERE kind = 'voice') AS voice_channel_id
+                    FROM provisioned_resources
+                    WHERE kind = ANY($1::text[])
+                    GROUP BY key
+                ) r
+                WHERE t.id = r.team_id
+                  AND (t.role_id = r.role_id OR t.text_channel_id = r.text_channel_id OR t.voice_channel_id = r.voice_channel_id)
+                RETURNING t.*
+                """,
+                kinds
+            )
+        for row in rows:
+            self._publish({'table': 'teams', 'op': 'UPDATE', 'id': row['id'], 'row': dict(row)})
+        return len(rows)
+
+
+def create_database() -> DatabaseBackend:
+    """Pick the backend from DATABASE_BACKEND (postgres by default, or memory)"""
+    backend = os.getenv("DATABASE_BACKEND", "postgres").lower()
+    if backend == "memory":
+        from database.memory import MemoryDatabase
+        return MemoryDatabase()
+    if backend != "postgres":
+        print(f"❌ Unknown DATABASE_BACKEND '{backend}', using postgres")
+    return Database()
 
 
 # Global database instance
-db = Database()
+db: DatabaseBackend = create_database()
@@ -0,0 +1,1722 @@
+"""
+In-memory database backend
+
+Drop-in replacement for the PostgreSQL Database with the same method signatures
+and semantics: case-insensitive name/IGN/tag lookups, the same result ordering,
+unique and foreign key constraints, and cascade deletes. Tables are dicts keyed
+by primary key plus secondary indexes for every lookup the cogs perform.
+
+Used for cog-level benchmarks and load simulations that should measure Python
+overhead without database latency. Select it with DATABASE_BACKEND=memory.
+Raw SQL through `db.pool` (some admin commands) is not available here.
+"""
+
+import itertools
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from asyncpg import ForeignKeyViolationError, UndefinedColumnError, UniqueViolationError
+
+from database.backend import (
+    ALL_REGIONS, DEFAULT_ROSTER_LIMITS, EXPORT_TABLES, FORM_WINDOW, PLAYER_STAT_COLUMNS, WAITLIST_PROMOTION_ATTEMPTS, RegistrationFullError,
+    RosterLimitError
+)
+
+
+PLAYER_COLUMNS = {
+    'id', 'discord_id', 'ign', 'player_id', 'region', 'agent',
+    'tournament_notifications', 'registered_at', 'updated_at'
+}
+PLAYER_STATS_COLUMNS = {
+    'id', 'discord_id', 'kills', 'deaths', 'assists', 'matches_played',
+    'wins', 'losses', 'mvps', 'points', 'updated_at'
+}
+TEAM_COLUMNS = {
+    'id', 'team_name', 'team_tag', 'region', 'captain_discord_id', 'logo_url', 'role_id',
+    'text_channel_id', 'voice_channel_id', 'created_at'
+}
+
+# ORDER BY CASE tm.role ... used by get_team_members / get_team_profile (unknown roles sort last)
+MEMBER_ROLE_ORDER = {'captain': 1, 'player': 2, 'manager': 3, 'coach': 4}
+PROFILE_ROLE_ORDER = {'captain': 1, 'manager': 2, 'player': 3, 'coach': 4}
+
+VALID_LEADERBOARD_STATS = ["kills", "deaths", "assists", "wins", "mvps", "matches_played", "points"]
+
+
+def _check_columns(table: str, columns: set, kwargs: Dict):
+    for key in kwargs:
+        if key not in columns:
+            raise UndefinedColumnError(f'column "{key}" of relation "{table}" does not exist')
+
+
+class MemoryDatabase:
+    """Dict/index-backed implementation of the Database interface"""
+    
+    def __init__(self):
+        self.pool = None  # No raw SQL access
+        self._subscribers: Dict[str, List[Callable[[Dict], None]]] = {}
+        self.reset()
+    
+    def reset(self):
+        """Drop all rows (sequences restart)"""
+        for table in list(self._subscribers):
+            self._publish({'table': table, 'op': 'RESET'})
+        self.players: Dict[int, Dict] = {}              # discord_id -> row
+        self.players_by_ign: Dict[str, List[int]] = {}  # lower(ign) -> discord_ids
+        self.player_stats: Dict[int, Dict] = {}         # discord_id -> row
+        self.match_player_stats: Dict[int, List[Dict]] = {}  # discord_id -> rows by (played_at, id)
+        self.player_form: Dict[int, Dict] = {}          # discord_id -> last FORM_WINDOW matches totals
+        self.teams: Dict[int, Dict] = {}                # id -> row
+        self.teams_by_name: Dict[str, List[int]] = {}   # lower(team_name) -> ids
+        self.teams_by_tag: Dict[str, List[int]] = {}    # lower(team_tag) -> ids
+        self.teams_by_captain: Dict[int, set] = {}      # captain_discord_id -> ids
+        self.team_members: Dict[tuple, Dict] = {}       # (team_id, discord_id) -> row
+        self.members_by_team: Dict[int, Dict[int, Dict]] = {}
+        self.members_by_user: Dict[int, Dict[int, Dict]] = {}
+        self.team_stats: Dict[int, Dict] = {}           # team_id -> row
+        self.banned_players: Dict[int, Dict] = {}       # discord_id -> row
+        self.brackets: Dict[int, Dict] = {}             # id -> row
+        self.bracket_rounds: Dict[int, List[Dict]] = {} # bracket_id -> rounds in play order
+        self.bracket_matches: Dict[int, Dict] = {}      # id -> row
+        self.round_matches: Dict[tuple, List[int]] = {} # (bracket_id, section, round) -> ids by position
+        self.swiss_stages: Dict[int, Dict] = {}         # id -> row
+        self.swiss_teams: Dict[int, Dict[int, int]] = {}  # stage_id -> {team_id: seed}
+        self.swiss_matches: Dict[int, Dict] = {}        # id -> row
+        self.swiss_round_matches: Dict[tuple, List[int]] = {}  # (stage_id, round) -> ids by table
+        self.ratings: Dict[tuple, Dict] = {}            # (entity_type, entity_id) -> row
+        self.team_availability: Dict[int, Dict[tuple, tuple]] = {}  # team_id -> {(weekday, start): window}
+        self.staff_slots: Dict[int, Dict] = {}          # id -> row
+        self.scheduled_matches: Dict[int, Dict] = {}    # id -> row
+        self.scheduled_by_match: Dict[tuple, int] = {}  # (source, match_id) -> id
+        self.check_in_windows: Dict[int, Dict] = {}     # id -> row
+        self.roster_limits: Dict[str, int] = dict(DEFAULT_ROSTER_LIMITS)
+        self.check_ins: Dict[int, Dict[int, Dict]] = {}  # window_id -> {team_id: row}
+        self.registration_caps: Dict[tuple, Dict] = {}  # (kind, region) -> counter row
+        self.waitlist: Dict[int, Dict] = {}             # id -> row
+        self.waitlist_queues: Dict[str, deque] = {}     # region -> ids in queue order (left entries skipped lazily)
+        self.provisioned_resources: Dict[tuple, Dict] = {}  # (kind, key) -> row
+        self._ids = {
+            table: itertools.count(1)
+            for table in (
+                'players', 'player_stats', 'match_player_stats', 'teams', 'team_members', 'team_stats', 'banned_players',
+                'brackets', 'bracket_matches', 'swiss_stages', 'swiss_matches',
+                'staff_slots', 'scheduled_matches', 'check_in_windows', 'registration_waitlist'
+            )
+        }
+    
+    async def connect(self):
+        print("✓ Using in-memory database backend")
+    
+    async def close(self):
+        pass
+    
+    # Index helpers
+    
+    @staticmethod
+    def _index_add(index: Dict, key, value):
+        if key is None:
+            return
+        index.setdefault(key, []).append(value)
+    
+    @staticmethod
+    def _index_remove(index: Dict, key, value):
+        values = index.get(key)
+        if values and value in values:
+            values.remove(value)
+            if not values:
+                del index[key]
+    
+    # Player operations
+    
+    async def get_player_by_discord_id(self, discord_id: int) -> Optional[Dict]:
+        """Get player by Discord ID"""
+        row = self.players.get(discord_id)
+        return dict(row) if row else None
+    
+    async def get_player_by_ign(self, ign: str) -> Optional[Dict]:
+        """Get player by IGN (case insensitive)"""
+        ids = self.players_by_ign.get(ign.lower())
+        return dict(self.players[ids[0]]) if ids else None
+    
+    async def create_player(
+        self,
+        discord_id: int,
+        ign: str,
+        player_id: str,
+        region: str,
+        agent: str = None,
+        tournament_notifications: bool = True
+    ) -> Dict:
+        """
+        Create a new player. The insert claims a registration slot
+        (migrations/017_registration_caps.sql); raises RegistrationFullError
+        when the player cap of the region or of all regions is reached.
+        """
+        if discord_id in self.players:
+            raise UniqueViolationError('duplicate key value violates unique constraint "players_discord_id_key"')
+        if any(self.players[other]['ign'] == ign for other in self.players_by_ign.get(ign.lower(), [])):
+            raise UniqueViolationError('duplicate key value violates unique constraint "players_ign_key"')
+        self._claim_slot('player', region)
+        
+        now = datetime.now()
+        row = {
+            'id': next(self._ids['players']),
+            'discord_id': discord_id,
+            'ign': ign,
+            'player_id': player_id,
+            'region': region,
+            'agent': agent,
+            'tournament_notifications': tournament_notifications,
+            'registered_at': now,
+            'updated_at': now
+        }
+        self.players[discord_id] = row
+        self._index_add(self.players_by_ign, ign.lower(), discord_id)
+        return dict(row)
+    
+    async def update_player(
+        self,
+        discord_id: int,
+        **kwargs
+    ) -> Optional[Dict]:
+        """Update player information"""
+        if not kwargs:
+            return None
+        _check_columns('players', PLAYER_COLUMNS, kwargs)
+        
+        row = self.players.get(discord_id)
+        if not row:
+            return None
+        
+        new_ign = kwargs.get('ign', row['ign'])
+        new_id = kwargs.get('discord_id', discord_id)
+        if new_ign != row['ign'] and any(
+            self.players[other]['ign'] == new_ign for other in self.players_by_ign.get(new_ign.lower(), [])
+        ):
+            raise UniqueViolationError('duplicate key value violates unique constraint "players_ign_key"')
+        if new_id != discord_id:
+            if new_id in self.players:
+                raise UniqueViolationError('duplicate key value violates unique constraint "players_discord_id_key"')
+            if discord_id in self.player_stats:
+                raise ForeignKeyViolationError('update or delete on table "players" violates foreign key constraint on table "player_stats"')
+        
+        self._index_remove(self.players_by_ign, row['ign'].lower(), discord_id)
+        if new_id != discord_id:
+            del self.players[discord_id]
+            self.players[new_id] = row
+        self._index_add(self.players_by_ign, new_ign.lower(), new_id)
+        if 'region' in kwargs:
+            self._move_slot('player', row['region'], kwargs['region'])
+        
+        row.update(kwargs)
+        row['updated_at'] = datetime.now()
+        return dict(row)
+    
+    async def delete_player(self, discord_id: int) -> bool:
+        """Delete a player"""
+        row = self.players.pop(discord_id, None)
+        if not row:
+            return False
+        self._index_remove(self.players_by_ign, row['ign'].lower(), discord_id)
+        self._release_slot('player', row['region'])
+        # player_stats, match_player_stats and player_form reference players ON DELETE CASCADE
+        self.player_stats.pop(discord_id, None)
+        self.match_player_stats.pop(discord_id, None)
+        self.player_form.pop(discord_id, None)
+        return True
+    
+    async def get_all_players(self, region: Optional[str] = None) -> List[Dict]:
+        """Get all players, optionally filtered by region"""
+        rows = [r for r in self.players.values() if not region or r['region'] == region]
+        rows.sort(key=lambda r: r['registered_at'], reverse=True)
+        return [dict(r) for r in rows]
+    
+    async def get_players_with_notifications(self) -> List[Dict]:
+        """Get all players who consented to tournament notifications"""
+        rows = [r for r in self.players.values() if r['tournament_notifications'] is True]
+        rows.sort(key=lambda r: r['registered_at'], reverse=True)
+        return [dict(r) for r in rows]
+    
+    # Player stats operations
+    
+    async def get_player_stats(self, discord_id: int) -> Optional[Dict]:
+        """Get player statistics"""
+        row = self.player_stats.get(discord_id)
+        return dict(row) if row else None
+    
+    async def create_player_stats(self, discord_id: int) -> Dict:
+        """Create initial stats for a player"""
+        if discord_id not in self.players:
+            raise ForeignKeyViolationError('insert or update on table "player_stats" violates foreign key constraint')
+        if discord_id in self.player_stats:
+            raise UniqueViolationError('duplicate key value violates unique constraint "player_stats_discord_id_key"')
+        
+        row = {
+            'id': next(self._ids['player_stats']),
+            'discord_id': discord_id,
+            'kills': 0,
+            'deaths': 0,
+            'assists': 0,
+            'matches_played': 0,
+            'wins': 0,
+            'losses': 0,
+            'mvps': 0,
+            'points': 0,
+            'updated_at': datetime.now()
+        }
+        self.player_stats[discord_id] = row
+        return dict(row)
+    
+    async def update_player_stats(
+        self,
+        discord_id: int,
+        **kwargs
+    ) -> Optional[Dict]:
+        """Update player statistics"""
+        if not kwargs:
+            return None
+        _check_columns('player_stats', PLAYER_STATS_COLUMNS, kwargs)
+        
+        row = self.player_stats.get(discord_id)
+        if not row:
+            return None
+        row.update(kwargs)
+        row['updated_at'] = datetime.now()
+        return dict(row)
+    
+    async def import_player_stats(
+        self,
+        rows: AsyncIterable[Tuple],
+        mode: str,
+        dry_run: bool,
+        on_error: Callable[[int, Optional[int], Optional[str], str], None],
+        on_change: Callable[[Dict], None]
+    ) -> Dict:
+        """Bulk-apply (line_no, discord_id, ign, *stats) rows - see Database.import_player_stats"""
+        staged = [row async for row in rows]
+        # Everything below runs without awaiting, so it is applied atomically
+        by_ign = {player['ign'].lower(): discord_id for discord_id, player in self.players.items() if player['ign']}
+        merge: Dict[int, List[Optional[int]]] = {}
+        rejected = 0
+        for line_no, discord_id, ign, *stats in sorted(staged, key=lambda row: row[0]):
+            player_id = discord_id if discord_id is not None else by_ign.get(ign.lower())
+            player = self.players.get(player_id)
+            if player is None or (ign is not None and (player['ign'] or '').lower() != ign.lower()):
+                reason = (
+                    'unknown IGN' if player_id is None
+                    else 'unknown discord_id' if player is None
+                    else 'IGN belongs to another player'
+                )
+                rejected += 1
+                on_error(line_no, player_id, ign, reason)
+                continue
+            folded = merge.setdefault(player_id, [None] * len(PLAYER_STAT_COLUMNS))
+            for index, value in enumerate(stats):
+                if mode == 'set':
+                    folded[index] = value
+                elif value is not None:
+                    folded[index] = (folded[index] or 0) + value
+        
+        totals = {stat: 0 for stat in PLAYER_STAT_COLUMNS}
+        changed = 0
+        now = datetime.now()
+        for discord_id in sorted(merge):
+            current = self.player_stats.get(discord_id, {})
+            old = [current.get(stat) or 0 for stat in PLAYER_STAT_COLUMNS]
+            if mode == 'set':
+                new = [old[i] if value is None else value for i, value in enumerate(merge[discord_id])]
+            else:
+                new = [old[i] + (value or 0) for i, value in enumerate(merge[discord_id])]
+            if new == old:
+                continue
+            changed += 1
+            change = {'discord_id': discord_id, 'ign': self.players[discord_id]['ign']}
+            for stat, old_value, new_value in zip(PLAYER_STAT_COLUMNS, old, new):
+                totals[stat] += new_value - old_value
+                change[f"{stat}_old"] = old_value
+                change[f"{stat}_new"] = new_value
+            on_change(change)
+            if dry_run:
+                continue
+            if discord_id in self.player_stats:
+                self.player_stats[discord_id].update(zip(PLAYER_STAT_COLUMNS, new), updated_at=now)
+            else:
+                self.player_stats[discord_id] = {
+                    'id': next(self._ids['player_stats']),
+                    'discord_id': discord_id,
+                    **dict(zip(PLAYER_STAT_COLUMNS, new)),
+                    'updated_at': now
+                }
+        return {'staged': len(staged), 'rejected': rejected, 'players': changed, 'totals': totals}
+    
+    async def get_leaderboard(
+        self,
+        stat: str = "kills",
+        region: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Dict]:
+        """Get leaderboard sorted by a stat"""
+        if stat not in VALID_LEADERBOARD_STATS:
+            stat = "kills"
+        
+        rows = []
+        for discord_id, stats in self.player_stats.items():
+            player = self.players.get(discord_id)
+            if player and (not region or player['region'] == region):
+                # SELECT p.*, ps.* - stats columns win on name clashes, as with dict(record)
+                rows.append({**player, **stats})
+        # DESC puts NULLs first in PostgreSQL
+        rows.sort(key=lambda r: (r[stat] is not None, r[stat] or 0), reverse=True)
+        return rows[:limit]
+    
+    # Utility operations
+    
+    async def record_match_stats(
+        self,
+        rows: List[Dict],
+        played_at: Optional[datetime] = None,
+        source: Optional[str] = None,
+        match_id: Optional[int] = None
+    ) -> int:
+        """Record one match's player lines - see Database.record_match_stats"""
+        counts = Counter(line['discord_id'] for line in rows)
+        duplicates = sorted(discord_id for discord_id, count in counts.items() if count > 1)
+        if duplicates:
+            raise ValueError(f"More than one line for player(s) {', '.join(map(str, duplicates))} in one match")
+        for line in rows:
+            if line['discord_id'] not in self.players:
+                raise ForeignKeyViolationError('insert or update on table "match_player_stats" violates foreign key constraint')
+        
+        played_at = played_at or datetime.now()
+        for line in rows:
+            discord_id = line['discord_id']
+            row = {
+                'id': next(self._ids['match_player_stats']),
+                'discord_id': discord_id,
+                'played_at': played_at,
+                'source': source,
+                'match_id': match_id,
+                'team_id': line.get('team_id'),
+                'kills': line.get('kills', 0),
+                'deaths': line.get('deaths', 0),
+                'assists': line.get('assists', 0),
+                'won': bool(line['won']),
+                'mvp': bool(line.get('mvp'))
+            }
+            self._add_to_form(row)
+            
+            stats = self.player_stats.get(discord_id)
+            if stats is None:
+                stats = self.player_stats[discord_id] = {
+                    'id': next(self._ids['player_stats']), 'discord_id': discord_id,
+                    **{stat: 0 for stat in PLAYER_STAT_COLUMNS}
+                }
+            stats['kills'] += row['kills']
+            stats['deaths'] += row['deaths']
+            stats['assists'] += row['assists']
+            stats['matches_played'] += 1
+            stats['wins' if row['won'] else 'losses'] += 1
+            stats['mvps'] += row['mvp']
+            stats['updated_at'] = datetime.now()
+        return len(rows)
+    
+    def _add_to_form(self, row: Dict):
+        """Insert a history row and update player_form incrementally (the migrations/019 trigger)"""
+        key = lambda match: (match['played_at'], match['id'])
+        history = self.match_player_stats.setdefault(row['discord_id'], [])
+        history.append(row)
+        newer = 0
+        if len(history) > 1 and key(history[-2]) > key(row):
+            history.sort(key=key)
+            newer = len(history) - 1 - history.index(row)
+        if newer >= FORM_WINDOW:
+            return
+        
+        form = self.player_form.setdefault(row['discord_id'], {
+            'discord_id': row['discord_id'], 'matches': 0, 'kills': 0, 'deaths': 0, 'assists': 0,
+            'wins': 0, 'mvps': 0, 'last_played_at': None
+        })
+        dropped = history[-FORM_WINDOW - 1] if len(history) > FORM_WINDOW else None
+        for match, sign in ((row, 1), (dropped, -1)):
+            if match is None:
+                continue
+            form['matches'] += sign
+            form['kills'] += sign * match['kills']
+            form['deaths'] += sign * match['deaths']
+            form['assists'] += sign * match['assists']
+            form['wins'] += sign * match['won']
+            form['mvps'] += sign * match['mvp']
+        form['last_played_at'] = history[-1]['played_at']
+        form['updated_at'] = datetime.now()
+    
+    async def get_player_count(self, region: Optional[str] = None) -> int:
+        """Get total number of registered players (read from the registration counters)"""
+        row = self.registration_caps.get(('player', region or ALL_REGIONS))
+        return row['registered'] if row else 0
+    
+    # Team operations
+    
+    def _first_team(self, ids: Optional[List[int]]) -> Optional[Dict]:
+        return dict(self.teams[min(ids)]) if ids else None
+    
+    async def get_team_by_name(self, team_name: str) -> Optional[Dict]:
+        """Get team by name (case insensitive)"""
+        return self._first_team(self.teams_by_name.get(team_name.lower()))
+    
+    async def get_team_by_tag(self, team_tag: str) -> Optional[Dict]:
+        """Get team by tag (case insensitive)"""
+        return self._first_team(self.teams_by_tag.get(team_tag.lower()))
+    
+    async def get_team_by_captain(self, captain_discord_id: int) -> Optional[Dict]:
+        """Get team by captain Discord ID"""
+        ids = self.teams_by_captain.get(captain_discord_id)
+        return dict(self.teams[min(ids)]) if ids else None
+    
+    async def get_team_by_id(self, team_id: int) -> Optional[Dict]:
+        """Get team by team ID"""
+        row = self.teams.get(team_id)
+        return dict(row) if row else None
+    
+    async def get_all_teams(self) -> List[Dict]:
+        """Get all teams"""
+        rows = sorted(self.teams.values(), key=lambda r: r['created_at'], reverse=True)
+        return [dict(r) for r in rows]
+    
+    async def create_team(
+        self,
+        team_name: str,
+        team_tag: str,
+        region: str,
+        captain_discord_id: int,
+        logo_url: Optional[str] = None,
+        role_id: Optional[int] = None
+    ) -> Dict:
+        """
+        Create a new team. The insert claims a registration slot; raises
+        RegistrationFullError when the team cap of the region or of all
+        regions is reached (the team can go on the waitlist instead).
+        """
+        if team_tag is not None and any(self.teams[t]['team_tag'] == team_tag for t in self.teams_by_tag.get(team_tag.lower(), [])):
+            raise UniqueViolationError('duplicate key value violates unique constraint "teams_team_tag_key"')
+        self._claim_slot('team', region)
+        
+        row = {
+            'id': next(self._ids['teams']),
+            'team_name': team_name,
+            'team_tag': team_tag,
+            'region': region,
+            'captain_discord_id': captain_discord_id,
+            'logo_url': logo_url,
+            'role_id': role_id,
+            'text_channel_id': None,
+            'voice_channel_id': None,
+            'created_at': datetime.now()
+        }
+        self.teams[row['id']] = row
+        self._index_team(row)
+        self._publish({'table': 'teams', 'op': 'INSERT', 'id': row['id'], 'row': dict(row)})
+        return dict(row)
+    
+    def _index_team(self, row: Dict):
+        self._index_add(self.teams_by_name, row['team_name'].lower(), row['id'])
+        if row['team_tag'] is not None:
+            self._index_add(self.teams_by_tag, row['team_tag'].lower(), row['id'])
+        if row['captain_discord_id'] is not None:
+            self.teams_by_captain.setdefault(row['captain_discord_id'], set()).add(row['id'])
+    
+    def _unindex_team(self, row: Dict):
+        self._index_remove(self.teams_by_name, row['team_name'].lower(), row['id'])
+        if row['team_tag'] is not None:
+            self._index_remove(self.teams_by_tag, row['team_tag'].lower(), row['id'])
+        captained = self.teams_by_captain.get(row['captain_discord_id'])
+        if captained is not None:
+            captained.discard(row['id'])
+            if not captained:
+                del self.teams_by_captain[row['captain_discord_id']]
+    
+    async def update_team(self, team_id: int, **kwargs) -> Optional[Dict]:
+        """Update team information"""
+        if not kwargs:
+            return None
+        _check_columns('teams', TEAM_COLUMNS - {'id'}, kwargs)
+        
+        row = self.teams.get(team_id)
+        if not row:
+            return None
+        
+        new_tag = kwargs.get('team_tag', row['team_tag'])
+        if new_tag != row['team_tag'] and new_tag is not None:
+            if any(self.teams[t]['team_tag'] == new_tag for t in self.teams_by_tag.get(new_tag.lower(), [])):
+                raise UniqueViolationError('duplicate key value violates unique constraint "teams_team_tag_key"')
+        
+        self._unindex_team(row)
+        if 'region' in kwargs:
+            self._move_slot('team', row['region'], kwargs['region'])
+        row.update(kwargs)
+        self._index_team(row)
+        self._publish({'table': 'teams', 'op': 'UPDATE', 'id': team_id, 'row': dict(row)})
+        return dict(row)
+    
+    def _member_with_player(self, member: Dict) -> Dict:
+        # tm.* plus the LEFT JOINed player columns
+        player = self.players.get(member['discord_id'])
+        row = dict(member)
+        row['ign'] = player['ign'] if player else None
+        row['player_id'] = player['player_id'] if player else None
+        return row
+    
+    async def get_team_members(self, team_id: int) -> List[Dict]:
+        """Get all members of a team"""
+        members = self.members_by_team.get(team_id, {}).values()
+        ordered = sorted(members, key=lambda m: (MEMBER_ROLE_ORDER.get(m['role'], 5), m['id']))
+        return [self._member_with_player(m) for m in ordered]
+    
+    async def add_team_member(
+        self,
+        team_id: int,
+        discord_id: int,
+        role: str = 'player'
+    ) -> Dict:
+        """
+        Add a member to a team. The roster limits are checked by the database
+        in the same statement (migrations/016 and 021); raises
+        RosterLimitError when the team has no room for `role`.
+        """
+        if team_id not in self.teams:
+            raise ForeignKeyViolationError('insert or update on table "team_members" violates foreign key constraint')
+        if (team_id, discord_id) in self.team_members:
+            raise UniqueViolationError('duplicate key value violates unique constraint "unique_team_member"')
+        self._check_roster(team_id, {discord_id: role})
+        return self._insert_member(team_id, discord_id, role)
+    
+    def _insert_member(self, team_id: int, discord_id: int, role: str) -> Dict:
+        row = {
+            'id': next(self._ids['team_members']),
+            'team_id': team_id,
+            'discord_id': discord_id,
+            'role': role,
+            'joined_at': datetime.now()
+        }
+        self.team_members[(team_id, discord_id)] = row
+        self.members_by_team.setdefault(team_id, {})[discord_id] = row
+        self.members_by_user.setdefault(discord_id, {})[team_id] = row
+        return dict(row)
+    
+    def _role_counts(self, team_id: int, roles: Optional[Dict[int, str]] = None) -> Dict[str, int]:
+        """Members per limited role ('player' includes the captain), after giving users `roles`"""
+        roles = roles or {}
+        members = self.members_by_team.get(team_id, {})
+        counts = {'captain': 0, 'player': 0, 'manager': 0, 'coach': 0}
+        for discord_id, member in members.items():
+            role = roles.get(discord_id, member['role'])
+            counts[role] = counts.get(role, 0) + 1
+        for discord_id, role in roles.items():
+            if discord_id not in members:
+                counts[role] = counts.get(role, 0) + 1
+        counts['player'] += counts['captain']
+        return counts
+    
+    def _check_roster(self, team_id: int, roles: Dict[int, str]):
+        counts = self._role_counts(team_id, roles)
+        for role, limit in self.roster_limits.items():
+            if counts.get(role, 0) > limit:
+                raise RosterLimitError(team_id, role)
+    
+    async def set_team_roles(self, team_id: int, roles: Dict[int, str]):
+        """
+        Give users roles on a team in one statement, adding those who aren't
+        members yet. Limits are checked on the final roster once every row of
+        the statement is written (a statement-level trigger, migrations/021),
+        so swapping the captain works whichever order `roles` lists the two
+        members in. Raises
+        RosterLimitError (and changes nothing) if the result is over a limit.
+        """
+        if team_id not in self.teams:
+            raise ForeignKeyViolationError('insert or update on table "team_members" violates foreign key constraint')
+        self._check_roster(team_id, roles)
+        for discord_id, role in roles.items():
+            member = self.team_members.get((team_id, discord_id))
+            if member is None:
+                self._insert_member(team_id, discord_id, role)
+            else:
+                member['role'] = role
+    
+    async def get_roster_limits(self) -> Dict[str, int]:
+        """{role: max members} ('player' counts the captain too)"""
+        return dict(self.roster_limits)
+    
+    async def get_teams_with_open_slots(self, role: str, exclude_discord_id: Optional[int] = None) -> List[Dict]:
+        """
+        Teams with room for another `role` (newest first) with their number of
+        open_slots, from the roster counters instead of every team's roster.
+        Teams `exclude_discord_id` already belongs to are left out.
+        """
+        limit = self.roster_limits.get(role)
+        if limit is None:
+            return []
+        member_of = self.members_by_user.get(exclude_discord_id, {})
+        result = []
+        for team in await self.get_all_teams():
+            if team['id'] in member_of:
+                continue
+            open_slots = limit - self._role_counts(team['id'])[role]
+            if open_slots > 0:
+                result.append(dict(team, open_slots=open_slots))
+        return result
+    
+    async def get_teams_with_role(self, role: str, team_id: Optional[int] = None, limit: int = 25) -> List[Dict]:
+        """Up to `limit` teams (newest first, or just `team_id`) with at least one member in exactly `role`"""
+        candidates = [team_id] if team_id is not None else sorted(self.members_by_team, reverse=True)
+        result = []
+        for candidate in candidates:
+            if candidate not in self.teams:
+                continue
+            if any(member['role'] == role for member in self.members_by_team.get(candidate, {}).values()):
+                result.append(dict(self.teams[candidate]))
+                if len(result) == limit:
+                    break
+        return result
+    
+    def _drop_member(self, team_id: int, discord_id: int) -> bool:
+        if self.team_members.pop((team_id, discord_id), None) is None:
+            return False
+        team_members = self.members_by_team.get(team_id)
+        if team_members is not None:
+            team_members.pop(discord_id, None)
+            if not team_members:
+                del self.members_by_team[team_id]
+        user_teams = self.members_by_user.get(discord_id)
+        if user_teams is not None:
+            user_teams.pop(team_id, None)
+            if not user_teams:
+                del self.members_by_user[discord_id]
+        return True
+    
+    async def remove_team_member(self, team_id: int, discord_id: int) -> bool:
+        """Remove a member from a team"""
+        return self._drop_member(team_id, discord_id)
+    
+    async def get_user_teams_by_role(self, discord_id: int, role: str) -> List[Dict]:
+        """Get all teams where user has a specific role"""
+        result = []
+        for team_id, member in sorted(self.members_by_user.get(discord_id, {}).items()):
+            if member['role'] == role:
+                row = dict(self.teams[team_id])
+                row['role'] = member['role']
+                result.append(row)
+        return result
+    
+    async def delete_team(self, team_id: int) -> bool:
+        """
+        Delete a team (this will cascade delete team_members due to foreign key constraint).
+        The freed registration slot goes to the oldest waitlisted team that fits
+        under the caps, in the same transaction; the bot picks the new team up
+        from get_waitlist_promotions.
+        """
+        row = self.teams.pop(team_id, None)
+        if not row:
+            return False
+        self._unindex_team(row)
+        self._release_slot('team', row['region'])
+        for discord_id in list(self.members_by_team.get(team_id, {})):
+            self._drop_member(team_id, discord_id)
+        self.team_stats.pop(team_id, None)
+        # ON DELETE SET NULL on bracket references
+        for bracket in self.brackets.values():
+            if bracket['champion_team_id'] == team_id:
+                bracket['champion_team_id'] = None
+        for match in self.bracket_matches.values():
+            for column in ('team1_id', 'team2_id', 'winner_id', 'loser_id'):
+                if match[column] == team_id:
+                    match[column] = None
+        for teams in self.swiss_teams.values():
+            teams.pop(team_id, None)
+        self.team_availability.pop(team_id, None)
+        for schedule_id, entry in list(self.scheduled_matches.items()):
+            if team_id in (entry['team1_id'], entry['team2_id']):
+                del self.scheduled_by_match[(entry['source'], entry['match_id'])]
+                del self.scheduled_matches[schedule_id]
+        for check_ins in self.check_ins.values():
+            check_ins.pop(team_id, None)
+        for match in self.swiss_matches.values():
+            for column in ('team1_id', 'team2_id', 'winner_id'):
+                if match[column] == team_id:
+                    match[column] = None
+        for entry in self.waitlist.values():
+            if entry['team_id'] == team_id:
+                entry['team_id'] = None
+        self._publish({'table': 'teams', 'op': 'DELETE', 'id': team_id})
+        await self._promote_waitlist()
+        return True
+    
+    async def _promote_waitlist(self) -> Optional[Dict]:
+        """Create the team of the oldest waiting entry in a region with room; returns the team"""
+        if self._cap_full(self._cap_row('team', ALL_REGIONS)):
+            return None
+        for _ in range(WAITLIST_PROMOTION_ATTEMPTS):
+            heads = [
+                self._waitlist_head(region)
+                for (kind, region), row in self.registration_caps.items()
+                if kind == 'team' and region != ALL_REGIONS and not self._cap_full(row)
+            ]
+            heads = [entry for entry in heads if entry is not None]
+            if not heads:
+                return None
+            entry = min(heads, key=lambda e: e['id'])
+            
+            taken = self.teams_by_name.get(entry['team_name'].lower()) or (
+                entry['team_tag'] is not None and self.teams_by_tag.get(entry['team_tag'].lower())
+            )
+            if taken:
+                entry['status'] = 'cancelled'
+                continue
+            
+            team = await self.create_team(
+                entry['team_name'], entry['team_tag'], entry['region'],
+                entry['discord_id'] if entry['role'] == 'captain' else None, entry['logo_url']
+            )
+            self._insert_member(team['id'], entry['discord_id'], entry['role'])
+            entry.update(status='promoted', team_id=team['id'], promoted_at=datetime.now())
+            return team
+        return None
+    
+    # Membership cache
+    
+    async def get_member_team_roles(self, discord_id: int) -> Dict[int, str]:
+        """Get {team_id: role} for every team a user belongs to"""
+        return {team_id: member['role'] for team_id, member in self.members_by_user.get(discord_id, {}).items()}
+    
+    def forget_memberships(self, discord_id: Optional[int] = None):
+        """Nothing to forget - memberships are read straight from the indexes"""
+    
+    def forget_team_memberships(self, team_id: int):
+        """Nothing to forget - memberships are read straight from the indexes"""
+    
+    # Change feed
+    
+    @property
+    def change_feed_connected(self) -> bool:
+        return False
+    
+    def subscribe(self, table: str, callback: Callable[[Dict], None]):
+        """Call `callback(change)` for team writes made here (nothing else writes to these tables)"""
+        self._subscribers.setdefault(table, []).append(callback)
+    
+    def _publish(self, change: Dict):
+        for callback in self._subscribers.get(change['table'], ()):
+            try:
+                callback(change)
+            except Exception as e:
+                print(f"✗ Change feed subscriber failed for {change['table']}: {e}")
+    
+    # Ban operations
+    
+    async def ban_player(self, discord_id: int, banned_by: int, reason: str = None) -> bool:
+        """Ban a player from registering"""
+        existing = self.banned_players.get(discord_id)
+        row = {
+            'id': existing['id'] if existing else next(self._ids['banned_players']),
+            'discord_id': discord_id,
+            'banned_by': banned_by,
+            'reason': reason,
+            'banned_at': datetime.now(timezone.utc)
+        }
+        self.banned_players[discord_id] = row
+        return True
+    
+    async def unban_player(self, discord_id: int) -> bool:
+        """Unban a player"""
+        return self.banned_players.pop(discord_id, None) is not None
+    
+    async def is_player_banned(self, discord_id: int) -> Optional[Dict]:
+        """Check if a player is banned"""
+        row = self.banned_players.get(discord_id)
+        return dict(row) if row else None
+    
+    async def get_all_banned_players(self) -> List[Dict]:
+        """Get all banned players"""
+        rows = sorted(self.banned_players.values(), key=lambda r: r['banned_at'], reverse=True)
+        return [dict(r) for r in rows]
+    
+    async def get_player_profile(self, discord_id: int) -> Optional[Dict]:
+        """Get player profile with stats and form (joins players, player_stats and player_form)"""
+        player = self.players.get(discord_id)
+        if not player:
+            return None
+        stats = self.player_stats.get(discord_id, {})
+        profile = {key: player[key] for key in ('discord_id', 'ign', 'player_id', 'region', 'registered_at')}
+        for key in ('kills', 'deaths', 'assists', 'matches_played', 'wins', 'losses', 'mvps', 'points'):
+            profile[key] = stats.get(key) or 0
+        form = self.player_form.get(discord_id, {})
+        for key in ('matches', 'kills', 'deaths', 'assists', 'wins', 'mvps'):
+            profile[f'form_{key}'] = form.get(key) or 0
+        return profile
+    
+    async def get_team_profile(self, team_id: int) -> Optional[Dict]:
+        """Get team profile with members and stats"""
+        row = self.teams.get(team_id)
+        if not row:
+            return None
+        
+        stats = self.team_stats.get(team_id, {})
+        team = {key: row[key] for key in ('id', 'team_name', 'team_tag', 'captain_discord_id', 'region', 'logo_url', 'created_at')}
+        for key in ('wins', 'losses', 'matches_played'):
+            team[key] = stats.get(key) or 0
+        
+        members = sorted(
+            self.members_by_team.get(team_id, {}).values(),
+            key=lambda m: (PROFILE_ROLE_ORDER.get(m['role'], 5), m['id'])
+        )
+        
+        # Organize members by role
+        team['captain'] = None
+        team['managers'] = []
+        team['players'] = []
+        team['coach'] = None
+        
+        for member in members:
+            player = self.players.get(member['discord_id'])
+            member_dict = {
+                'discord_id': member['discord_id'],
+                'role': member['role'],
+                'joined_at': member['joined_at'],
+                'ign': player['ign'] if player else None,
+                'player_id': player['player_id'] if player else None
+            }
+            if member_dict['role'] == 'captain':
+                team['captain'] = member_dict
+            elif member_dict['role'] == 'manager':
+                team['managers'].append(member_dict)
+            elif member_dict['role'] == 'player':
+                team['players'].append(member_dict)
+            elif member_dict['role'] == 'coach':
+                team['coach'] = member_dict
+        
+        return team
+    
+    # Bracket operations
+    
+    async def get_team_seeding(self, region: Optional[str] = None) -> List[Dict]:
+        """id, region, wins, matches_played and rating of every team (in a region) for seeding"""
+        result = []
+        for team in self.teams.values():
+            if region is not None and team['region'] != region:
+                continue
+            stats = self.team_stats.get(team['id']) or {}
+            result.append({
+                'id': team['id'],
+                'region': team['region'],
+                'wins': stats.get('wins') or 0,
+                'matches_played': stats.get('matches_played') or 0,
+                'rating': self.ratings.get(('team', team['id']), {}).get('rating', 1500)
+            })
+        return result
+    
+    async def create_bracket(
+        self,
+        name: str,
+        fmt: str,
+        region: Optional[str],
+        created_by: int,
+        team_count: int,
+        matches: Dict[tuple, Dict],
+        rounds: List[Dict]
+    ) -> Dict:
+        """Store a planned bracket (utils.brackets.plan_bracket)"""
+        bracket = {
+            'id': next(self._ids['brackets']),
+            'name': name,
+            'format': fmt,
+            'region': region,
+            'team_count': team_count,
+            'status': 'active',
+            'champion_team_id': None,
+            'created_by': created_by,
+            'created_at': datetime.now()
+        }
+        self.brackets[bracket['id']] = bracket
+        
+        ids = {key: next(self._ids['bracket_matches']) for key in matches}
+        for key, planned in matches.items():
+            row = dict(planned, id=ids[key], bracket_id=bracket['id'], completed_at=None)
+            row['next_match_id'] = ids.get(planned['next_match_id'])
+            row['loser_next_match_id'] = ids.get(planned['loser_next_match_id'])
+            self.bracket_matches[row['id']] = row
+        
+        section_order = {'winners': 1, 'losers': 2, 'grand_final': 3}
+        ordered = sorted(rounds, key=lambda r: (section_order[r['section']], r['round']))
+        self.bracket_rounds[bracket['id']] = [dict(r, bracket_id=bracket['id']) for r in ordered]
+        for key in sorted(matches, key=lambda key: key[2]):
+            section, round_number, _ = key
+            self.round_matches.setdefault((bracket['id'], section, round_number), []).append(ids[key])
+        return dict(bracket)
+    
+    async def get_bracket(self, bracket_id: int) -> Optional[Dict]:
+        """Get bracket by ID"""
+        row = self.brackets.get(bracket_id)
+        return dict(row) if row else None
+    
+    async def get_brackets(self, limit: int = 25) -> List[Dict]:
+        """Most recent brackets, active ones first"""
+        rows = sorted(
+            self.brackets.values(),
+            key=lambda b: (b['status'] == 'active', b['created_at'], b['id']),
+            reverse=True
+        )
+        return [dict(row) for row in rows[:limit]]
+    
+    async def get_bracket_rounds(self, bracket_id: int) -> List[Dict]:
+        """Rounds of a bracket in play order (upper, lower, grand final)"""
+        return [dict(r) for r in self.bracket_rounds.get(bracket_id, [])]
+    
+    def _match_with_teams(self, match: Dict) -> Dict:
+        row = dict(match)
+        for side in ('team1', 'team2'):
+            team = self.teams.get(match[f'{side}_id'])
+            row[f'{side}_name'] = team['team_name'] if team else None
+            row[f'{side}_tag'] = team['team_tag'] if team else None
+        return row
+    
+    async def get_bracket_round_matches(
+        self,
+        bracket_id: int,
+        section: str,
+        round_number: int,
+        offset: int = 0,
+        limit: int = 16
+    ) -> List[Dict]:
+        """One page of a round's matches with team names"""
+        ids = self.round_matches.get((bracket_id, section, round_number), [])
+        return [self._match_with_teams(self.bracket_matches[i]) for i in ids[offset:offset + limit]]
+    
+    async def get_bracket_match(self, match_id: int) -> Optional[Dict]:
+        """Get a bracket match with team names"""
+        match = self.bracket_matches.get(match_id)
+        return self._match_with_teams(match) if match else None
+    
+    async def record_bracket_result(self, match_id: int, winner_id: int) -> Optional[Dict]:
+        """
+        Record the winner of a ready match and move both teams on.
+        Returns the completed match, or None if the match isn't ready or the
+        team isn't playing in it.
+        """
+        from utils.brackets import fill_slot
+        
+        match = self.bracket_matches.get(match_id)
+        if not match or match['status'] != 'ready' or winner_id not in (match['team1_id'], match['team2_id']):
+            return None
+        loser_id = match['team2_id'] if winner_id == match['team1_id'] else match['team1_id']
+        match.update(winner_id=winner_id, loser_id=loser_id, status='completed', completed_at=datetime.now())
+        
+        if match['next_match_id'] is None:
+            self.brackets[match['bracket_id']].update(status='completed', champion_team_id=winner_id)
+        else:
+            fill_slot(self.bracket_matches, match['next_match_id'], match['next_slot'], winner_id)
+        if match['loser_next_match_id'] is not None:
+            fill_slot(self.bracket_matches, match['loser_next_match_id'], match['loser_next_slot'], loser_id)
+        return dict(match)
+    
+    # Swiss operations
+    
+    async def create_swiss_stage(
+        self,
+        name: str,
+        region: Optional[str],
+        total_rounds: int,
+        created_by: int,
+        team_ids: List[int]
+    ) -> Dict:
+        """Create a Swiss stage with teams given in seed order"""
+        for team_id in team_ids:
+            if team_id not in self.teams:
+                raise ForeignKeyViolationError('insert or update on table "swiss_teams" violates foreign key constraint')
+        stage = {
+            'id': next(self._ids['swiss_stages']),
+            'name': name,
+            'region': region,
+            'team_count': len(team_ids),
+            'total_rounds': total_rounds,
+            'current_round': 0,
+            'status': 'active',
+            'created_by': created_by,
+            'created_at': datetime.now()
+        }
+        self.swiss_stages[stage['id']] = stage
+        self.swiss_teams[stage['id']] = {team_id: seed for seed, team_id in enumerate(team_ids, start=1)}
+        return dict(stage)
+    
+    async def get_swiss_stage(self, stage_id: int) -> Optional[Dict]:
+        """Get Swiss stage by ID"""
+        row = self.swiss_stages.get(stage_id)
+        return dict(row) if row else None
+    
+    async def get_swiss_stages(self, limit: int = 25) -> List[Dict]:
+        """Most recent Swiss stages, active ones first"""
+        rows = sorted(
+            self.swiss_stages.values(),
+            key=lambda s: (s['status'] == 'active', s['created_at'], s['id']),
+            reverse=True
+        )
+        return [dict(row) for row in rows[:limit]]
+    
+    def _swiss_stage_matches(self, stage_id: int) -> List[Dict]:
+        return [
+            self.swiss_matches[match_id]
+            for (match_stage, _), ids in self.swiss_round_matches.items() if match_stage == stage_id
+            for match_id in ids
+        ]
+    
+    async def get_swiss_standings(self, stage_id: int) -> List[Dict]:
+        """
+        Standings of a stage, best first: wins (byes count as wins), then
+        Buchholz (sum of opponents' wins), then Sonneborn-Berger (sum of beaten
+        opponents' wins), then seed.
+        """
+        seeds = self.swiss_teams.get(stage_id, {})
+        results = []  # (team_id, opponent_id, status, won) like the SQL CTE
+        for match in self._swiss_stage_matches(stage_id):
+            if match['status'] == 'pending':
+                continue
+            results.append((match['team1_id'], match['team2_id'], match['status'], match['winner_id'] == match['team1_id']))
+            if match['status'] == 'completed':
+                results.append((match['team2_id'], match['team1_id'], match['status'], match['winner_id'] == match['team2_id']))
+        
+        rows = {
+            team_id: {'team_id': team_id, 'seed': seed, 'wins': 0, 'losses': 0, 'byes': 0, 'buchholz': 0, 'sonneborn_berger': 0}
+            for team_id, seed in seeds.items()
+        }
+        for team_id, _, status, won in results:
+            row = rows.get(team_id)
+            if row is None:
+                continue
+            row['wins'] += won
+            row['losses'] += status == 'completed' and not won
+            row['byes'] += status == 'bye'
+        for team_id, opponent_id, _, won in results:
+            if team_id in rows and opponent_id in rows:
+                rows[team_id]['buchholz'] += rows[opponent_id]['wins']
+                if won:
+                    rows[team_id]['sonneborn_berger'] += rows[opponent_id]['wins']
+        
+        standings = []
+        for row in rows.values():
+            team = self.teams[row['team_id']]
+            standings.append(dict(row, team_name=team['team_name'], team_tag=team['team_tag']))
+        standings.sort(key=lambda r: (-r['wins'], -r['buchholz'], -r['sonneborn_berger'], r['seed']))
+        return standings
+    
+    async def get_swiss_opponents(self, stage_id: int) -> List[tuple]:
+        """Every pair of teams that already played each other in a stage"""
+        return [
+            (match['team1_id'], match['team2_id'])
+            for match in self._swiss_stage_matches(stage_id)
+            if match['team1_id'] is not None and match['team2_id'] is not None
+        ]
+    
+    async def get_swiss_staff(self, stage_id: int) -> List[Dict]:
+        """(team_id, discord_id) of every captain and manager of the stage's teams"""
+        return [
+            {'team_id': team_id, 'discord_id': discord_id}
+            for team_id in self.swiss_teams.get(stage_id, {})
+            for discord_id, member in self.members_by_team.get(team_id, {}).items()
+            if member['role'] in ('captain', 'manager')
+        ]
+    
+    async def create_swiss_round(
+        self,
+        stage_id: int,
+        round_number: int,
+        pairs: List[tuple],
+        bye_team_id: Optional[int] = None
+    ) -> Optional[int]:
+        """
+        Store a round's pairings (plus a bye) and advance the stage.
+        Returns the number of rows stored, or None if the stage isn't ready
+        for this round (finished, another round already paired, or results of
+        the previous round still pending).
+        """
+        stage = self.swiss_stages.get(stage_id)
+        if (
+            not stage or stage['status'] != 'active'
+            or stage['current_round'] != round_number - 1 or round_number > stage['total_rounds']
+        ):
+            return None
+        if any(match['status'] == 'pending' for match in self._swiss_stage_matches(stage_id)):
+            return None
+        
+        rows = [(a, b, None, 'pending') for a, b in pairs]
+        if bye_team_id is not None:
+            rows.append((bye_team_id, None, bye_team_id, 'bye'))
+        ids = []
+        for table_number, (team1_id, team2_id, winner_id, status) in enumerate(rows, start=1):
+            match = {
+                'id': next(self._ids['swiss_matches']),
+                'stage_id': stage_id,
+                'round': round_number,
+                'table_number': table_number,
+                'team1_id': team1_id,
+                'team2_id': team2_id,
+                'winner_id': winner_id,
+                'status': status,
+                'completed_at': None
+            }
+            self.swiss_matches[match['id']] = match
+            ids.append(match['id'])
+        self.swiss_round_matches[(stage_id, round_number)] = ids
+        stage['current_round'] = round_number
+        return len(rows)
+    
+    async def get_swiss_round_matches(
+        self,
+        stage_id: int,
+        round_number: int,
+        offset: int = 0,
+        limit: int = 16
+    ) -> List[Dict]:
+        """One page of a Swiss round's matches with team names"""
+        ids = self.swiss_round_matches.get((stage_id, round_number), [])
+        return [self._match_with_teams(self.swiss_matches[i]) for i in ids[offset:offset + limit]]
+    
+    async def get_swiss_match(self, match_id: int) -> Optional[Dict]:
+        """Get a Swiss match with team names"""
+        match = self.swiss_matches.get(match_id)
+        return self._match_with_teams(match) if match else None
+    
+    async def record_swiss_result(self, match_id: int, winner_id: int) -> Optional[Dict]:
+        """
+        Record the winner of a pending Swiss match; the stage completes with the
+        last result of its final round. Returns the completed match, or None if
+        it isn't pending or the team isn't playing in it.
+        """
+        match = self.swiss_matches.get(match_id)
+        if not match or match['status'] != 'pending' or winner_id not in (match['team1_id'], match['team2_id']):
+            return None
+        match.update(winner_id=winner_id, status='completed', completed_at=datetime.now())
+        
+        stage = self.swiss_stages[match['stage_id']]
+        if stage['current_round'] == stage['total_rounds'] and not any(
+            m['status'] == 'pending' for m in self._swiss_stage_matches(stage['id'])
+        ):
+            stage['status'] = 'completed'
+        return dict(match)
+    
+    # Rating operations
+    
+    async def get_rating_history(self) -> List[tuple]:
+        """(completed_at epoch seconds, team1_id, team2_id, winner_id) of every decided bracket/Swiss match, oldest first"""
+        history = []
+        for source, matches in ((1, self.bracket_matches), (2, self.swiss_matches)):
+            for match in matches.values():
+                if (
+                    match['status'] == 'completed' and match['team1_id'] is not None
+                    and match['team2_id'] is not None and match['winner_id'] is not None
+                ):
+                    history.append((match['completed_at'], source, match['id'], match))
+        history.sort(key=lambda entry: entry[:3])
+        return [
+            (completed_at.timestamp(), match['team1_id'], match['team2_id'], match['winner_id'])
+            for completed_at, _, _, match in history
+        ]
+    
+    async def get_rating_rosters(self, team_ids: Optional[List[int]] = None) -> List[tuple]:
+        """(team_id, discord_id) of the captains and players of every team (or the given teams)"""
+        teams = self.members_by_team if team_ids is None else {
+            team_id: self.members_by_team.get(team_id, {}) for team_id in team_ids
+        }
+        return [
+            (team_id, discord_id)
+            for team_id, members in teams.items()
+            for discord_id, member in members.items()
+            if member['role'] in ('captain', 'player')
+        ]
+    
+    async def get_ratings(self, entity_type: str, entity_ids: List[int]) -> Dict[int, Dict]:
+        """Stored ratings by entity ID ('team' or 'player')"""
+        return {
+            entity_id: dict(self.ratings[(entity_type, entity_id)])
+            for entity_id in entity_ids
+            if (entity_type, entity_id) in self.ratings
+        }
+    
+    async def save_ratings(self, entity_type: str, rows: List[tuple], replace: bool = False):
+        """
+        Upsert (entity_id, rating, rd, volatility, games) rows in bulk; player
+        ratings are also written to player_stats.points. With replace=True
+        every other rating of the type is dropped (full recompute).
+        """
+        if replace:
+            for key in [key for key in self.ratings if key[0] == entity_type]:
+                del self.ratings[key]
+            if entity_type == 'player':
+                for stats in self.player_stats.values():
+                    stats['points'] = 0
+        now = datetime.now()
+        for entity_id, rating, rd, volatility, games in rows:
+            self.ratings[(entity_type, entity_id)] = {
+                'entity_type': entity_type,
+                'entity_id': entity_id,
+                'rating': rating,
+                'rd': rd,
+                'volatility': volatility,
+                'games': games,
+                'updated_at': now
+            }
+            if entity_type == 'player' and entity_id in self.player_stats:
+                self.player_stats[entity_id].update(points=round(rating), updated_at=now)
+    
+    async def get_rating_rank(self, entity_type: str, entity_id: int) -> Optional[Dict]:
+        """Stored rating plus its rank (1 = best) and the number of rated entities"""
+        row = self.ratings.get((entity_type, entity_id))
+        if not row:
+            return None
+        ratings = [r['rating'] for (kind, _), r in self.ratings.items() if kind == entity_type]
+        return dict(row, rank=sum(rating > row['rating'] for rating in ratings) + 1, total=len(ratings))
+    
+    async def get_team_rating_leaderboard(self, region: Optional[str] = None, limit: int = 10) -> List[Dict]:
+        """Highest rated teams (in a region)"""
+        rows = []
+        for (kind, team_id), rating in self.ratings.items():
+            team = self.teams.get(team_id) if kind == 'team' else None
+            if team and (region is None or team['region'] == region):
+                rows.append({**team, 'rating': rating['rating'], 'rd': rating['rd'], 'games': rating['games']})
+        rows.sort(key=lambda r: r['rating'], reverse=True)
+        return rows[:limit]
+    
+    # Schedule operations
+    
+    async def get_team_availability(self, team_ids: Optional[List[int]] = None) -> List[Dict]:
+        """Weekly availability windows (UTC) of every team, or of the given teams"""
+        teams = sorted(self.team_availability) if team_ids is None else sorted(set(team_ids))
+        return [
+            {'team_id': team_id, 'weekday': weekday, 'start_minute': start, 'end_minute': end}
+            for team_id in teams
+            for weekday, start, end in sorted(self.team_availability.get(team_id, {}).values())
+        ]
+    
+    async def set_team_availability(self, team_id: int, windows: List[tuple]):
+        """Replace a team's (weekday, start_minute, end_minute) windows"""
+        if team_id not in self.teams:
+            raise ForeignKeyViolationError('insert or update on table "team_availability" violates foreign key constraint')
+        # Keyed like the primary key (weekday, start_minute)
+        self.team_availability[team_id] = {(weekday, start): (weekday, start, end) for weekday, start, end in windows}
+        if not self.team_availability[team_id]:
+            del self.team_availability[team_id]
+    
+    async def add_staff_slot(self, discord_id: int, role: str, starts_at: datetime, ends_at: datetime) -> Dict:
+        """Add a caster/staff availability slot"""
+        row = {
+            'id': next(self._ids['staff_slots']),
+            'discord_id': discord_id,
+            'role': role,
+            'starts_at': starts_at,
+            'ends_at': ends_at
+        }
+        self.staff_slots[row['id']] = row
+        return dict(row)
+    
+    async def delete_staff_slot(self, slot_id: int, discord_id: Optional[int] = None) -> bool:
+        """Delete a staff slot (only the owner's when discord_id is given)"""
+        row = self.staff_slots.get(slot_id)
+        if not row or (discord_id is not None and row['discord_id'] != discord_id):
+            return False
+        del self.staff_slots[slot_id]
+        return True
+    
+    async def get_staff_slots(self, start: datetime, end: datetime, discord_id: Optional[int] = None) -> List[Dict]:
+        """Staff slots overlapping [start, end), optionally of one person"""
+        rows = [
+            dict(row) for row in self.staff_slots.values()
+            if row['ends_at'] > start and row['starts_at'] < end
+            and (discord_id is None or row['discord_id'] == discord_id)
+        ]
+        rows.sort(key=lambda r: (r['starts_at'], r['id']))
+        return rows
+    
+    async def get_unscheduled_matches(self) -> List[Dict]:
+        """(source, match_id, team1_id, team2_id) of playable bracket/Swiss matches without a time slot"""
+        rows = []
+        for source, matches, playable in (('bracket', self.bracket_matches, 'ready'), ('swiss', self.swiss_matches, 'pending')):
+            for match in matches.values():
+                if match['status'] != playable or match['team1_id'] is None or match['team2_id'] is None:
+                    continue
+                entry = self.scheduled_by_match.get((source, match['id']))
+                if entry is None or self.scheduled_matches[entry]['status'] != 'scheduled':
+                    rows.append({
+                        'source': source, 'match_id': match['id'],
+                        'team1_id': match['team1_id'], 'team2_id': match['team2_id']
+                    })
+        return rows
+    
+    def _scheduled_with_teams(self, entry: Dict) -> Dict:
+        row = dict(entry)
+        for side in ('team1', 'team2'):
+            team = self.teams.get(entry[f'{side}_id'])
+            row[f'{side}_name'] = team['team_name'] if team else None
+            row[f'{side}_tag'] = team['team_tag'] if team else None
+        return row
+    
+    async def get_scheduled_matches(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        team_id: Optional[int] = None,
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """Scheduled matches starting in [start, end) with team names, earliest first"""
+        rows = [
+            entry for entry in self.scheduled_matches.values()
+            if entry['status'] == 'scheduled'
+            and (start is None or entry['starts_at'] >= start)
+            and (end is None or entry['starts_at'] < end)
+            and (team_id is None or team_id in (entry['team1_id'], entry['team2_id']))
+        ]
+        rows.sort(key=lambda r: (r['starts_at'], r['id']))
+        rows = rows[offset:] if limit is None else rows[offset:offset + limit]
+        return [self._scheduled_with_teams(entry) for entry in rows]
+    
+    async def get_scheduled_match(self, schedule_id: int) -> Optional[Dict]:
+        """Get a schedule entry with team names"""
+        entry = self.scheduled_matches.get(schedule_id)
+        return self._scheduled_with_teams(entry) if entry else None
+    
+    async def save_schedule(self, rows: List[Dict]) -> int:
+        """
+        Upsert schedule entries (source, match_id, team1_id, team2_id,
+        starts_at, ends_at, caster_discord_id, staff_discord_id, status) in
+        one statement. Returns the number of rows written.
+        """
+        now = datetime.now()
+        for row in rows:
+            key = (row['source'], row['match_id'])
+            schedule_id = self.scheduled_by_match.get(key)
+            if schedule_id is None:
+                schedule_id = next(self._ids['scheduled_matches'])
+                self.scheduled_by_match[key] = schedule_id
+                self.scheduled_matches[schedule_id] = dict(row, id=schedule_id, updated_at=now)
+            else:
+                entry = self.scheduled_matches[schedule_id]
+                entry.update(
+                    starts_at=row['starts_at'], ends_at=row['ends_at'],
+                    caster_discord_id=row['caster_discord_id'], staff_discord_id=row['staff_discord_id'],
+                    status=row['status'], updated_at=now
+                )
+        return len(rows)
+    
+    # Check-in operations
+    
+    async def create_check_in_window(
+        self,
+        name: str,
+        region: Optional[str],
+        closes_at: datetime,
+        opened_by: int
+    ) -> Dict:
+        """Open a check-in window (the message is attached once it's posted)"""
+        row = {
+            'id': next(self._ids['check_in_windows']),
+            'name': name,
+            'region': region,
+            'channel_id': None,
+            'message_id': None,
+            'status': 'open',
+            'opened_by': opened_by,
+            'opened_at': datetime.now(),
+            'closes_at': closes_at,
+            'closed_at': None
+        }
+        self.check_in_windows[row['id']] = row
+        self.check_ins[row['id']] = {}
+        return dict(row)
+    
+    async def set_check_in_message(self, window_id: int, channel_id: int, message_id: int):
+        window = self.check_in_windows.get(window_id)
+        if window:
+            window.update(channel_id=channel_id, message_id=message_id)
+    
+    async def get_check_in_window(self, window_id: int) -> Optional[Dict]:
+        window = self.check_in_windows.get(window_id)
+        return dict(window) if window else None
+    
+    async def get_check_in_windows(self, status: Optional[str] = None, limit: int = 25) -> List[Dict]:
+        """Check-in windows (with the given status), newest first"""
+        windows = [
+            dict(window) for window in self.check_in_windows.values()
+            if status is None or window['status'] == status
+        ]
+        windows.sort(key=lambda w: w['id'], reverse=True)
+        return windows[:limit]
+    
+    async def get_check_in_eligibility(self, region: Optional[str] = None) -> List[Dict]:
+        """(team_id, region, discord_id) of every captain and manager (of teams in a region)"""
+        return [
+            {'team_id': team_id, 'region': self.teams[team_id]['region'], 'discord_id': discord_id}
+            for (team_id, discord_id), member in self.team_members.items()
+            if member['role'] in ('captain', 'manager')
+            and (region is None or self.teams[team_id]['region'] == region)
+        ]
+    
+    async def add_check_ins(self, rows: List[tuple]) -> int:
+        """
+        Store (window_id, team_id, discord_id, checked_in_at) check-ins in one
+        statement (a team checked in twice keeps its first row, deleted teams
+        are skipped). Returns the number of rows written.
+        """
+        written = 0
+        for window_id, team_id, discord_id, checked_in_at in rows:
+            if window_id not in self.check_in_windows:
+                raise ForeignKeyViolationError('insert or update on table "check_ins" violates foreign key constraint')
+            if team_id not in self.teams:
+                continue
+            check_ins = self.check_ins[window_id]
+            if team_id not in check_ins:
+                check_ins[team_id] = {
+                    'window_id': window_id, 'team_id': team_id,
+                    'discord_id': discord_id, 'checked_in_at': checked_in_at
+                }
+                written += 1
+        return written
+    
+    async def get_check_in_team_ids(self, window_id: int) -> List[int]:
+        """Teams checked in to a window, in check-in order"""
+        rows = sorted(self.check_ins.get(window_id, {}).values(), key=lambda r: (r['checked_in_at'], r['team_id']))
+        return [row['team_id'] for row in rows]
+    
+    async def close_check_in_window(self, window_id: int) -> Optional[List[Dict]]:
+        """
+        Close an open window and return its checked-in field (id, team_name,
+        team_tag, region, checked_in_at in check-in order) in one query.
+        Returns None if the window wasn't open.
+        """
+        window = self.check_in_windows.get(window_id)
+        if not window or window['status'] != 'open':
+            return None
+        window.update(status='closed', closed_at=datetime.now())
+        field = []
+        for team_id in await self.get_check_in_team_ids(window_id):
+            team = self.teams[team_id]
+            field.append({
+                'id': team_id, 'team_name': team['team_name'], 'team_tag': team['team_tag'],
+                'region': team['region'], 'checked_in_at': self.check_ins[window_id][team_id]['checked_in_at']
+            })
+        return field
+    
+    # Registration capacity
+    
+    def _cap_row(self, kind: str, region: Optional[str]) -> Dict:
+        key = (kind, region or '')
+        row = self.registration_caps.get(key)
+        if row is None:
+            row = self.registration_caps[key] = {'kind': kind, 'region': key[1], 'capacity': None, 'registered': 0}
+        return row
+    
+    @staticmethod
+    def _cap_full(row: Dict) -> bool:
+        return row['capacity'] is not None and row['registered'] >= row['capacity']
+    
+    def _claim_slot(self, kind: str, region: Optional[str]):
+        rows = (self._cap_row(kind, ALL_REGIONS), self._cap_row(kind, region))
+        for row in rows:
+            if self._cap_full(row):
+                raise RegistrationFullError(kind, row['region'])
+        for row in rows:
+            row['registered'] += 1
+    
+    def _release_slot(self, kind: str, region: Optional[str]):
+        self._cap_row(kind, ALL_REGIONS)['registered'] -= 1
+        self._cap_row(kind, region)['registered'] -= 1
+    
+    def _move_slot(self, kind: str, old_region: Optional[str], new_region: Optional[str]):
+        if (old_region or '') != (new_region or ''):
+            self._cap_row(kind, old_region)['registered'] -= 1
+            self._cap_row(kind, new_region)['registered'] += 1
+    
+    def _waitlist_head(self, region: str) -> Optional[Dict]:
+        queue = self.waitlist_queues.get(region)
+        while queue and self.waitlist[queue[0]]['status'] != 'waiting':
+            queue.popleft()
+        return self.waitlist[queue[0]] if queue else None
+    
+    def _waitlist_position(self, entry: Dict) -> int:
+        """Waiting entries of the entry's region up to and including it (promotion goes region by region)"""
+        return sum(
+            1 for entry_id in self.waitlist_queues.get(entry['region'], ())
+            if entry_id <= entry['id'] and self.waitlist[entry_id]['status'] == 'waiting'
+        )
+    
+    async def get_registration_capacity(self) -> List[Dict]:
+        """Every (kind, region) counter with its cap (None = no cap); 'ALL' rows hold the totals"""
+        return [dict(self.registration_caps[key]) for key in sorted(self.registration_caps)]
+    
+    async def set_registration_cap(self, kind: str, region: str, capacity: Optional[int]) -> Dict:
+        """
+        Set (or with None, remove) the cap of a kind in a region or in
+        ALL_REGIONS. Raising a team cap promotes as many waitlisted teams as
+        now fit, in the same transaction; the row has their number as 'promoted'.
+        """
+        row = self._cap_row(kind, region)
+        row['capacity'] = capacity
+        promoted = 0
+        while kind == 'team' and await self._promote_waitlist() is not None:
+            promoted += 1
+        return dict(row, promoted=promoted)
+    
+    async def add_to_waitlist(
+        self,
+        discord_id: int,
+        role: str,
+        team_name: str,
+        team_tag: str,
+        region: str,
+        logo_url: Optional[str] = None
+    ) -> Dict:
+        """Queue a team registration for the next free slot; the entry has its 'position' in its region's queue"""
+        if any(e['discord_id'] == discord_id and e['status'] == 'waiting' for e in self.waitlist.values()):
+            raise UniqueViolationError('duplicate key value violates unique constraint "idx_registration_waitlist_user"')
+        self._cap_row('team', region)
+        row = {
+            'id': next(self._ids['registration_waitlist']),
+            'discord_id': discord_id,
+            'role': role,
+            'team_name': team_name,
+            'team_tag': team_tag,
+            'region': region,
+            'logo_url': logo_url,
+            'status': 'waiting',
+            'team_id': None,
+            'notified': False,
+            'created_at': datetime.now(),
+            'promoted_at': None
+        }
+        self.waitlist[row['id']] = row
+        self.waitlist_queues.setdefault(region, deque()).append(row['id'])
+        return dict(row, position=self._waitlist_position(row))
+    
+    async def get_waitlist_entry(self, discord_id: int) -> Optional[Dict]:
+        """A user's waiting entry with its 'position' in its region's queue"""
+        for entry in self.waitlist.values():
+            if entry['discord_id'] == discord_id and entry['status'] == 'waiting':
+                return dict(entry, position=self._waitlist_position(entry))
+        return None
+    
+    async def leave_waitlist(self, discord_id: int) -> bool:
+        for entry in self.waitlist.values():
+            if entry['discord_id'] == discord_id and entry['status'] == 'waiting':
+                entry.update(status='cancelled', notified=True)
+                return True
+        return False
+    
+    async def get_waitlist_counts(self) -> Dict[str, int]:
+        """{region: waiting entries}"""
+        counts: Dict[str, int] = {}
+        for entry in self.waitlist.values():
+            if entry['status'] == 'waiting':
+                counts[entry['region']] = counts.get(entry['region'], 0) + 1
+        return counts
+    
+    async def get_waitlist_promotions(self) -> List[Dict]:
+        """Promoted and cancelled entries the user hasn't been told about yet, oldest first"""
+        return [dict(e) for e in self.waitlist.values() if e['status'] != 'waiting' and not e['notified']]
+    
+    async def mark_waitlist_notified(self, entry_id: int):
+        entry = self.waitlist.get(entry_id)
+        if entry is not None:
+            entry['notified'] = True
+    
+    # Export
+    
+    async def export_tables(self, tables: List[str], batch_size: int = 5000) -> AsyncIterator[Tuple[str, List[Tuple]]]:
+        """Whole tables as (table, rows) batches - see Database.export_tables"""
+        # Copy every table before the first yield: one consistent snapshot
+        sources = {
+            'players': self.players, 'teams': self.teams, 'team_members': self.team_members,
+            'player_stats': self.player_stats, 'team_stats': self.team_stats, 'banned_players': self.banned_players,
+        }
+        snapshot = []
+        for table in tables:
+            columns, order = EXPORT_TABLES[table]
+            rows = sorted(sources[table].values(), key=lambda row: tuple(row[key] for key in order))
+            snapshot.append((table, [tuple(row.get(column) for column in columns) for row in rows]))
+        for table, rows in snapshot:
+            for start in range(0, len(rows), batch_size):
+                yield table, rows[start:start + batch_size]
+    
+    # Role reconciliation
+    
+    async def get_role_assignments(self) -> List[Dict]:
+        """Player and team membership rows the Discord roles are derived from"""
+        rows = [
+            {'discord_id': discord_id, 'region': player['region'], 'team_id': None, 'team_role': None, 'team_role_id': None}
+            for discord_id, player in self.players.items()
+        ]
+        for team_id, team in self.teams.items():
+            members = self.members_by_team.get(team_id, {})
+            rows.extend(
+                {'discord_id': discord_id, 'region': None, 'team_id': team_id, 'team_role': member['role'], 'team_role_id': team['role_id']}
+                for discord_id, member in members.items()
+            )
+            if not members:
+                rows.append({'discord_id': None, 'region': None, 'team_id': team_id, 'team_role': None, 'team_role_id': team['role_id']})
+        return rows
+    
+    # Team provisioning
+    
+    async def get_provisioned_resources(self) -> List[Dict]:
+        """Every Discord object created by team provisioning (kind, key, discord_id)"""
+        return [
+            {'kind': row['kind'], 'key': row['key'], 'discord_id': row['discord_id']}
+            for _, row in sorted(self.provisioned_resources.items())
+        ]
+    
+    async def add_provisioned_resource(self, kind: str, key: int, discord_id: int):
+        """Checkpoint a created role/channel/category (key: team id, or category slot)"""
+        self.provisioned_resources[(kind, key)] = {
+            'kind': kind, 'key': key, 'discord_id': discord_id, 'created_at': datetime.now()
+        }
+    
+    async def remove_provisioned_resource(self, kind: str, key: int):
+        self.provisioned_resources.pop((kind, key), None)
+    
+    def _provisioned_by_team(self, kinds) -> Dict[int, Dict[str, int]]:
+        by_team: Dict[int, Dict[str, int]] = {}
+        for (kind, key), row in self.provisioned_resources.items():
+            if kind in kinds:
+                by_team.setdefault(key, {})[kind] = row['discord_id']
+        return by_team
+    
+    async def apply_provisioned_resources(self) -> int:
+        """Write the provisioned role and channel IDs to their teams; returns the teams changed"""
+        changed = 0
+        for team_id, provisioned in self._provisioned_by_team(('role', 'text', 'voice')).items():
+            row = self.teams.get(team_id)
+            if row is None:
+                continue
+            updates = {
+                column: provisioned[kind]
+                for kind, column in (('role', 'role_id'), ('text', 'text_channel_id'), ('voice', 'voice_channel_id'))
+                if kind in provisioned and row[column] != provisioned[kind]
+            }
+            if updates:
+                row.update(updates)
+                self._publish({'table': 'teams', 'op': 'UPDATE', 'id': team_id, 'row': dict(row)})
+                changed += 1
+        return changed
+    
+    async def clear_provisioned_resources(self, kinds: List[str]) -> int:
+        """Unset the team columns pointing at provisioned objects of the given kinds"""
+        changed = 0
+        for team_id, provisioned in self._provisioned_by_team(kinds).items():
+            row = self.teams.get(team_id)
+            if row is None:
+                continue
+            updates = {
+                column: None
+                for kind, column in (('role', 'role_id'), ('text', 'text_channel_id'), ('voice', 'voice_channel_id'))
+                if kind in provisioned and row[column] == provisioned[kind]
+            }
+            if updates:
+                row.update(updates)
+                self._publish({'table': 'teams', 'op': 'UPDATE', 'id': team_id, 'row': dict(row)})
+                changed += 1
+        return changed
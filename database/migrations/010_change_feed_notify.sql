@@ -0,0 +1,43 @@
+-- Change feed: NOTIFY every row change on the tables the bot caches
+-- Each bot process LISTENs on 'data_changes' and drops its cached copies,
+-- so writes from other processes and maintenance scripts are picked up.
+-- Payload: {"table": ..., "op": "INSERT|UPDATE|DELETE", "id": ..., "discord_id": ..., "team_id": ...}
+-- (only key columns, to stay far below the 8000 byte NOTIFY limit)
+
+CREATE OR REPLACE FUNCTION notify_data_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed JSONB;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed = to_jsonb(OLD);
+    ELSE
+        changed = to_jsonb(NEW);
+    END IF;
+
+    PERFORM pg_notify('data_changes', json_build_object(
+        'table', TG_TABLE_NAME,
+        'op', TG_OP,
+        'id', changed->'id',
+        'discord_id', changed->'discord_id',
+        'team_id', changed->'team_id'
+    )::text);
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+DROP TRIGGER IF EXISTS notify_players_change ON players;
+CREATE TRIGGER notify_players_change AFTER INSERT OR UPDATE OR DELETE ON players
+    FOR EACH ROW EXECUTE FUNCTION notify_data_change();
+
+DROP TRIGGER IF EXISTS notify_teams_change ON teams;
+CREATE TRIGGER notify_teams_change AFTER INSERT OR UPDATE OR DELETE ON teams
+    FOR EACH ROW EXECUTE FUNCTION notify_data_change();
+
+DROP TRIGGER IF EXISTS notify_team_members_change ON team_members;
+CREATE TRIGGER notify_team_members_change AFTER INSERT OR UPDATE OR DELETE ON team_members
+    FOR EACH ROW EXECUTE FUNCTION notify_data_change();
+
+DROP TRIGGER IF EXISTS notify_banned_players_change ON banned_players;
+CREATE TRIGGER notify_banned_players_change AFTER INSERT OR UPDATE OR DELETE ON banned_players
+    FOR EACH ROW EXECUTE FUNCTION notify_data_change();
@@ -0,0 +1,51 @@
+-- Brackets: single/double elimination brackets, their rounds and matches
+-- Matches point at the match their winner/loser moves on to, so a result only
+-- updates a handful of rows, and rounds are read one page at a time.
+
+CREATE TABLE IF NOT EXISTS brackets (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    format VARCHAR(10) NOT NULL CHECK (format IN ('single', 'double')),
+    region VARCHAR(20),
+    team_count INTEGER NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'active' CHECK (status IN ('active', 'completed')),
+    champion_team_id INTEGER REFERENCES teams(id) ON DELETE SET NULL,
+    created_by BIGINT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS bracket_rounds (
+    bracket_id INTEGER NOT NULL REFERENCES brackets(id) ON DELETE CASCADE,
+    section VARCHAR(20) NOT NULL,
+    round INTEGER NOT NULL,
+    name VARCHAR(50) NOT NULL,
+    match_count INTEGER NOT NULL,
+    PRIMARY KEY (bracket_id, section, round)
+);
+
+CREATE TABLE IF NOT EXISTS bracket_matches (
+    id SERIAL PRIMARY KEY,
+    bracket_id INTEGER NOT NULL REFERENCES brackets(id) ON DELETE CASCADE,
+    section VARCHAR(20) NOT NULL CHECK (section IN ('winners', 'losers', 'grand_final')),
+    round INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    team1_id INTEGER REFERENCES teams(id) ON DELETE SET NULL,
+    team2_id INTEGER REFERENCES teams(id) ON DELETE SET NULL,
+    team1_seed INTEGER,
+    team2_seed INTEGER,
+    team1_bye BOOLEAN NOT NULL DEFAULT FALSE,
+    team2_bye BOOLEAN NOT NULL DEFAULT FALSE,
+    winner_id INTEGER REFERENCES teams(id) ON DELETE SET NULL,
+    loser_id INTEGER REFERENCES teams(id) ON DELETE SET NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'ready', 'completed', 'bye')),
+    next_match_id INTEGER REFERENCES bracket_matches(id) ON DELETE SET NULL,
+    next_slot SMALLINT CHECK (next_slot IN (1, 2)),
+    loser_next_match_id INTEGER REFERENCES bracket_matches(id) ON DELETE SET NULL,
+    loser_next_slot SMALLINT CHECK (loser_next_slot IN (1, 2)),
+    completed_at TIMESTAMP,
+    CONSTRAINT unique_bracket_match UNIQUE (bracket_id, section, round, position)
+);
+
+-- One round page at a time: WHERE bracket_id = $1 AND section = $2 AND round = $3 ORDER BY position
+-- is served by the unique constraint's index.
+CREATE INDEX IF NOT EXISTS idx_brackets_status ON brackets(status, created_at DESC);
@@ -0,0 +1,40 @@
+-- Swiss stages: participating teams (seeded from team_stats) and one row per
+-- pairing. Standings and tiebreakers are computed from swiss_matches in a
+-- single query, so there are no per-team score columns to keep in sync.
+
+CREATE TABLE IF NOT EXISTS swiss_stages (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    region VARCHAR(20),
+    team_count INTEGER NOT NULL,
+    total_rounds INTEGER NOT NULL CHECK (total_rounds > 0),
+    current_round INTEGER NOT NULL DEFAULT 0,
+    status VARCHAR(20) NOT NULL DEFAULT 'active' CHECK (status IN ('active', 'completed')),
+    created_by BIGINT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS swiss_teams (
+    stage_id INTEGER NOT NULL REFERENCES swiss_stages(id) ON DELETE CASCADE,
+    team_id INTEGER NOT NULL REFERENCES teams(id) ON DELETE CASCADE,
+    seed INTEGER NOT NULL,
+    PRIMARY KEY (stage_id, team_id)
+);
+
+-- A bye is a row with team2_id NULL and status 'bye' (counts as a win)
+CREATE TABLE IF NOT EXISTS swiss_matches (
+    id SERIAL PRIMARY KEY,
+    stage_id INTEGER NOT NULL REFERENCES swiss_stages(id) ON DELETE CASCADE,
+    round INTEGER NOT NULL,
+    table_number INTEGER NOT NULL,
+    team1_id INTEGER REFERENCES teams(id) ON DELETE SET NULL,
+    team2_id INTEGER REFERENCES teams(id) ON DELETE SET NULL,
+    winner_id INTEGER REFERENCES teams(id) ON DELETE SET NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'completed', 'bye')),
+    completed_at TIMESTAMP,
+    CONSTRAINT unique_swiss_table UNIQUE (stage_id, round, table_number)
+);
+
+-- Standings/opponent lookups scan one stage's matches
+CREATE INDEX IF NOT EXISTS idx_swiss_matches_stage_status ON swiss_matches(stage_id, status);
+CREATE INDEX IF NOT EXISTS idx_swiss_stages_status ON swiss_stages(status, created_at DESC);
@@ -0,0 +1,17 @@
+-- Ratings: Glicko-2/Elo ratings of teams and players (utils/ratings.py)
+-- entity_id is teams.id for teams and the Discord ID for players. Rows are
+-- replaced in bulk by a full recompute and upserted after each result.
+
+CREATE TABLE IF NOT EXISTS ratings (
+    entity_type VARCHAR(10) NOT NULL CHECK (entity_type IN ('team', 'player')),
+    entity_id BIGINT NOT NULL,
+    rating DOUBLE PRECISION NOT NULL DEFAULT 1500,
+    rd DOUBLE PRECISION NOT NULL DEFAULT 350,
+    volatility DOUBLE PRECISION NOT NULL DEFAULT 0.06,
+    games INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (entity_type, entity_id)
+);
+
+-- Leaderboards and rank lookups (COUNT of higher ratings)
+CREATE INDEX IF NOT EXISTS idx_ratings_rank ON ratings(entity_type, rating DESC);
@@ -0,0 +1,40 @@
+-- Match schedule: weekly team availability, caster/staff slots and the time
+-- slot (plus crew) given to every bracket/Swiss match (utils/scheduler.py)
+
+CREATE TABLE IF NOT EXISTS team_availability (
+    team_id INTEGER NOT NULL REFERENCES teams(id) ON DELETE CASCADE,
+    weekday SMALLINT NOT NULL CHECK (weekday BETWEEN 0 AND 6),
+    start_minute SMALLINT NOT NULL CHECK (start_minute BETWEEN 0 AND 1440),
+    end_minute SMALLINT NOT NULL CHECK (end_minute BETWEEN 0 AND 1440),
+    PRIMARY KEY (team_id, weekday, start_minute),
+    CHECK (end_minute > start_minute)
+);
+
+CREATE TABLE IF NOT EXISTS staff_slots (
+    id SERIAL PRIMARY KEY,
+    discord_id BIGINT NOT NULL,
+    role VARCHAR(10) NOT NULL CHECK (role IN ('caster', 'staff')),
+    starts_at TIMESTAMP NOT NULL,
+    ends_at TIMESTAMP NOT NULL,
+    CHECK (ends_at > starts_at)
+);
+
+CREATE TABLE IF NOT EXISTS scheduled_matches (
+    id SERIAL PRIMARY KEY,
+    source VARCHAR(10) NOT NULL CHECK (source IN ('bracket', 'swiss')),
+    match_id INTEGER NOT NULL,
+    team1_id INTEGER REFERENCES teams(id) ON DELETE CASCADE,
+    team2_id INTEGER REFERENCES teams(id) ON DELETE CASCADE,
+    starts_at TIMESTAMP,
+    ends_at TIMESTAMP,
+    caster_discord_id BIGINT,
+    staff_discord_id BIGINT,
+    status VARCHAR(20) NOT NULL DEFAULT 'scheduled' CHECK (status IN ('scheduled', 'unscheduled')),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT unique_scheduled_match UNIQUE (source, match_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_staff_slots_time ON staff_slots(ends_at, starts_at);
+CREATE INDEX IF NOT EXISTS idx_scheduled_matches_time ON scheduled_matches(starts_at) WHERE status = 'scheduled';
+CREATE INDEX IF NOT EXISTS idx_scheduled_matches_team1 ON scheduled_matches(team1_id);
+CREATE INDEX IF NOT EXISTS idx_scheduled_matches_team2 ON scheduled_matches(team2_id);
@@ -0,0 +1,26 @@
+-- Check-in windows: one persistent message with a button per window. Clicks
+-- are acknowledged from memory and written here in batches, so a team's
+-- check-in is one row and the checked-in field is a single join at close.
+
+CREATE TABLE IF NOT EXISTS check_in_windows (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    region VARCHAR(20),
+    channel_id BIGINT,
+    message_id BIGINT UNIQUE,
+    status VARCHAR(20) NOT NULL DEFAULT 'open' CHECK (status IN ('open', 'closed')),
+    opened_by BIGINT,
+    opened_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    closes_at TIMESTAMP NOT NULL,
+    closed_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS check_ins (
+    window_id INTEGER NOT NULL REFERENCES check_in_windows(id) ON DELETE CASCADE,
+    team_id INTEGER NOT NULL REFERENCES teams(id) ON DELETE CASCADE,
+    discord_id BIGINT NOT NULL,
+    checked_in_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (window_id, team_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_check_in_windows_status ON check_in_windows(status);
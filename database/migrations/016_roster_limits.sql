@@ -0,0 +1,105 @@
+-- Roster limits enforced by the database instead of read-then-write checks
+-- in the cogs. team_roster_counts holds per-team counts per role, kept
+-- current by a row trigger on team_members; the counter UPDATE locks the
+-- team's row, so concurrent joins to one team queue up instead of both
+-- passing a stale check. A constraint trigger compares the counts with
+-- roster_limits at the end of each statement (so swapping the captain in one
+-- statement is fine) and raises check_violation "team_roster_limit".
+-- Teams already over a limit keep their members but can't add or re-role
+-- members until they are back under it.
+
+CREATE TABLE IF NOT EXISTS roster_limits (
+    role VARCHAR(20) PRIMARY KEY,
+    max_members INTEGER NOT NULL CHECK (max_members >= 0)
+);
+
+-- 'player' covers the whole playing roster (players and the captain)
+INSERT INTO roster_limits (role, max_members) VALUES
+    ('player', 5),
+    ('captain', 1),
+    ('manager', 2),
+    ('coach', 1)
+ON CONFLICT (role) DO NOTHING;
+
+CREATE TABLE IF NOT EXISTS team_roster_counts (
+    team_id INTEGER PRIMARY KEY REFERENCES teams(id) ON DELETE CASCADE,
+    captains INTEGER NOT NULL DEFAULT 0,
+    players INTEGER NOT NULL DEFAULT 0,
+    managers INTEGER NOT NULL DEFAULT 0,
+    coaches INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO team_roster_counts (team_id, captains, players, managers, coaches)
+SELECT team_id,
+       COUNT(*) FILTER (WHERE role = 'captain'),
+       COUNT(*) FILTER (WHERE role = 'player'),
+       COUNT(*) FILTER (WHERE role = 'manager'),
+       COUNT(*) FILTER (WHERE role = 'coach')
+FROM team_members
+GROUP BY team_id
+ON CONFLICT (team_id) DO UPDATE
+SET captains = EXCLUDED.captains, players = EXCLUDED.players,
+    managers = EXCLUDED.managers, coaches = EXCLUDED.coaches;
+
+CREATE OR REPLACE FUNCTION count_team_role(p_team_id INTEGER, p_role TEXT, p_delta INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    IF p_delta > 0 THEN
+        INSERT INTO team_roster_counts (team_id) VALUES (p_team_id) ON CONFLICT (team_id) DO NOTHING;
+    END IF;
+    UPDATE team_roster_counts SET
+        captains = captains + CASE WHEN p_role = 'captain' THEN p_delta ELSE 0 END,
+        players = players + CASE WHEN p_role = 'player' THEN p_delta ELSE 0 END,
+        managers = managers + CASE WHEN p_role = 'manager' THEN p_delta ELSE 0 END,
+        coaches = coaches + CASE WHEN p_role = 'coach' THEN p_delta ELSE 0 END
+    WHERE team_id = p_team_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION count_team_members()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM count_team_role(OLD.team_id, OLD.role, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM count_team_role(NEW.team_id, NEW.role, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS count_team_members ON team_members;
+CREATE TRIGGER count_team_members AFTER INSERT OR UPDATE OF team_id, role OR DELETE ON team_members
+    FOR EACH ROW EXECUTE FUNCTION count_team_members();
+
+CREATE OR REPLACE FUNCTION check_team_roster_limit()
+RETURNS TRIGGER AS $$
+DECLARE
+    counts team_roster_counts%ROWTYPE;
+    over_role TEXT;
+    role_limit INTEGER;
+BEGIN
+    SELECT * INTO counts FROM team_roster_counts WHERE team_id = NEW.team_id;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+    SELECT l.role, l.max_members INTO over_role, role_limit
+    FROM roster_limits l
+    WHERE (l.role = 'captain' AND counts.captains > l.max_members)
+       OR (l.role = 'player' AND counts.captains + counts.players > l.max_members)
+       OR (l.role = 'manager' AND counts.managers > l.max_members)
+       OR (l.role = 'coach' AND counts.coaches > l.max_members)
+    LIMIT 1;
+    IF over_role IS NOT NULL THEN
+        RAISE EXCEPTION 'team % is over its % limit (%)', NEW.team_id, over_role, role_limit
+            USING ERRCODE = 'check_violation', CONSTRAINT = 'team_roster_limit', DETAIL = over_role;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS team_roster_limit ON team_members;
+CREATE CONSTRAINT TRIGGER team_roster_limit AFTER INSERT OR UPDATE OF team_id, role ON team_members
+    DEFERRABLE INITIALLY IMMEDIATE
+    FOR EACH ROW EXECUTE FUNCTION check_team_roster_limit();
@@ -0,0 +1,116 @@
+-- Capacity-limited registration ("first 512 teams"). registration_caps holds
+-- one counter row per (kind, region) plus an 'ALL' row per kind for the
+-- overall cap; capacity NULL means no cap. A BEFORE INSERT trigger on teams
+-- and players claims a slot by bumping the region and ALL counters in one
+-- UPDATE that only matches rows with room left - the counter rows are locked
+-- by the UPDATE, so two registrations can't both take the last slot, and
+-- nothing ever counts the tables. A full cap raises check_violation
+-- "registration_cap" with the full region as DETAIL.
+-- Teams that find registration full can join registration_waitlist; when a
+-- team is deleted (or a team cap raised) the oldest waiting entry that fits
+-- a free slot is turned into a team in the same transaction (see
+-- db.delete_team and db.set_registration_cap); entries whose name or tag was
+-- taken meanwhile are cancelled. The bot finishes promoted teams (Discord
+-- role, DM) from the rows not yet notified.
+
+CREATE TABLE IF NOT EXISTS registration_caps (
+    kind VARCHAR(10) NOT NULL CHECK (kind IN ('team', 'player')),
+    region VARCHAR(20) NOT NULL,
+    capacity INTEGER CHECK (capacity >= 0),
+    registered INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, region)
+);
+
+INSERT INTO registration_caps (kind, region, registered)
+SELECT 'team', COALESCE(region, ''), COUNT(*) FROM teams GROUP BY COALESCE(region, '')
+UNION ALL
+SELECT 'team', 'ALL', COUNT(*) FROM teams
+UNION ALL
+SELECT 'player', region, COUNT(*) FROM players GROUP BY region
+UNION ALL
+SELECT 'player', 'ALL', COUNT(*) FROM players
+ON CONFLICT (kind, region) DO UPDATE SET registered = EXCLUDED.registered;
+
+CREATE OR REPLACE FUNCTION claim_registration_slot()
+RETURNS TRIGGER AS $$
+DECLARE
+    slot_kind TEXT := TG_ARGV[0];
+    slot_region TEXT := COALESCE(NEW.region, '');
+    claimed INTEGER;
+    full_region TEXT;
+BEGIN
+    INSERT INTO registration_caps (kind, region) VALUES (slot_kind, slot_region), (slot_kind, 'ALL')
+    ON CONFLICT (kind, region) DO NOTHING;
+    UPDATE registration_caps SET registered = registered + 1
+    WHERE kind = slot_kind AND region IN (slot_region, 'ALL')
+      AND (capacity IS NULL OR registered < capacity);
+    GET DIAGNOSTICS claimed = ROW_COUNT;
+    IF claimed < 2 THEN
+        SELECT region INTO full_region FROM registration_caps
+        WHERE kind = slot_kind AND region IN (slot_region, 'ALL') AND registered >= capacity
+        ORDER BY region = 'ALL' DESC
+        LIMIT 1;
+        RAISE EXCEPTION '% registration is full (%)', slot_kind, full_region
+            USING ERRCODE = 'check_violation', CONSTRAINT = 'registration_cap', DETAIL = full_region;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Deletes free the slot; a region change moves it (admin edits aren't capped)
+CREATE OR REPLACE FUNCTION release_registration_slot()
+RETURNS TRIGGER AS $$
+DECLARE
+    slot_kind TEXT := TG_ARGV[0];
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF COALESCE(NEW.region, '') = COALESCE(OLD.region, '') THEN
+            RETURN NULL;
+        END IF;
+        INSERT INTO registration_caps (kind, region, registered) VALUES (slot_kind, COALESCE(NEW.region, ''), 1)
+        ON CONFLICT (kind, region) DO UPDATE SET registered = registration_caps.registered + 1;
+    ELSE
+        UPDATE registration_caps SET registered = registered - 1 WHERE kind = slot_kind AND region = 'ALL';
+    END IF;
+    UPDATE registration_caps SET registered = registered - 1
+    WHERE kind = slot_kind AND region = COALESCE(OLD.region, '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS claim_team_slot ON teams;
+CREATE TRIGGER claim_team_slot BEFORE INSERT ON teams
+    FOR EACH ROW EXECUTE FUNCTION claim_registration_slot('team');
+
+DROP TRIGGER IF EXISTS release_team_slot ON teams;
+CREATE TRIGGER release_team_slot AFTER UPDATE OF region OR DELETE ON teams
+    FOR EACH ROW EXECUTE FUNCTION release_registration_slot('team');
+
+DROP TRIGGER IF EXISTS claim_player_slot ON players;
+CREATE TRIGGER claim_player_slot BEFORE INSERT ON players
+    FOR EACH ROW EXECUTE FUNCTION claim_registration_slot('player');
+
+DROP TRIGGER IF EXISTS release_player_slot ON players;
+CREATE TRIGGER release_player_slot AFTER UPDATE OF region OR DELETE ON players
+    FOR EACH ROW EXECUTE FUNCTION release_registration_slot('player');
+
+-- Queue order is id; promotion reads the head of one region's queue through
+-- idx_registration_waitlist_queue (an index seek, not a scan of the queue)
+CREATE TABLE IF NOT EXISTS registration_waitlist (
+    id BIGSERIAL PRIMARY KEY,
+    discord_id BIGINT NOT NULL,
+    role VARCHAR(20) NOT NULL DEFAULT 'captain' CHECK (role IN ('captain', 'manager')),
+    team_name VARCHAR(100) NOT NULL,
+    team_tag VARCHAR(20),
+    region VARCHAR(20) NOT NULL,
+    logo_url TEXT,
+    status VARCHAR(20) NOT NULL DEFAULT 'waiting' CHECK (status IN ('waiting', 'promoted', 'cancelled')),
+    team_id INTEGER REFERENCES teams(id) ON DELETE SET NULL,
+    notified BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    promoted_at TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_registration_waitlist_queue ON registration_waitlist(region, id) WHERE status = 'waiting';
+CREATE UNIQUE INDEX IF NOT EXISTS idx_registration_waitlist_user ON registration_waitlist(discord_id) WHERE status = 'waiting';
+CREATE INDEX IF NOT EXISTS idx_registration_waitlist_unnotified ON registration_waitlist(id) WHERE status <> 'waiting' AND NOT notified;
@@ -0,0 +1,3 @@
+-- Case-insensitive IGN lookups (the admin stats import matches rows without a
+-- discord_id on LOWER(ign))
+CREATE INDEX IF NOT EXISTS idx_players_ign_lower ON players (LOWER(ign));
@@ -0,0 +1,142 @@
+-- Per-match player stats history, range-partitioned by month on played_at.
+-- Partitions are created on demand by ensure_match_stats_partition (the bot
+-- calls it once per month it writes to); old months can be detached or
+-- dropped without touching the rest. idx_match_player_stats_recent gives a
+-- player's most recent matches with an index seek in every partition.
+-- player_form holds each player's totals over their last N matches (the
+-- trigger argument, FORM_WINDOW in database/backend.py). It is kept current
+-- incrementally: an inserted match is added and the match it pushes out of
+-- the window subtracted, so /profile reads one row. Updates and deletes of
+-- history rows rebuild the player's row from their last N matches.
+
+CREATE TABLE IF NOT EXISTS match_player_stats (
+    id BIGSERIAL,
+    discord_id BIGINT NOT NULL REFERENCES players(discord_id) ON DELETE CASCADE,
+    played_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    source VARCHAR(10) CHECK (source IN ('bracket', 'swiss')),
+    match_id INTEGER,
+    team_id INTEGER,
+    kills INTEGER NOT NULL DEFAULT 0,
+    deaths INTEGER NOT NULL DEFAULT 0,
+    assists INTEGER NOT NULL DEFAULT 0,
+    won BOOLEAN NOT NULL,
+    mvp BOOLEAN NOT NULL DEFAULT FALSE,
+    PRIMARY KEY (id, played_at)
+) PARTITION BY RANGE (played_at);
+
+CREATE INDEX IF NOT EXISTS idx_match_player_stats_recent
+    ON match_player_stats(discord_id, played_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_match_player_stats_match
+    ON match_player_stats(source, match_id) WHERE match_id IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION ensure_match_stats_partition(month_of TIMESTAMP)
+RETURNS VOID AS $$
+DECLARE
+    month_start TIMESTAMP := date_trunc('month', month_of);
+    partition_name TEXT := 'match_player_stats_' || to_char(month_start, 'YYYY_MM');
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN;
+    END IF;
+    -- Two processes creating the same month wait for each other instead of failing
+    PERFORM pg_advisory_xact_lock(hashtext('match_player_stats_partitions'));
+    EXECUTE format(
+        'CREATE TABLE IF NOT EXISTS %I PARTITION OF match_player_stats FOR VALUES FROM (%L) TO (%L)',
+        partition_name, month_start, month_start + INTERVAL '1 month'
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_match_stats_partition(CURRENT_TIMESTAMP::timestamp);
+SELECT ensure_match_stats_partition((CURRENT_TIMESTAMP + INTERVAL '1 month')::timestamp);
+
+CREATE TABLE IF NOT EXISTS player_form (
+    discord_id BIGINT PRIMARY KEY REFERENCES players(discord_id) ON DELETE CASCADE,
+    matches INTEGER NOT NULL DEFAULT 0,
+    kills INTEGER NOT NULL DEFAULT 0,
+    deaths INTEGER NOT NULL DEFAULT 0,
+    assists INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    mvps INTEGER NOT NULL DEFAULT 0,
+    last_played_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION rebuild_player_form(player BIGINT, form_window INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    -- The player may be gone (history rows deleted by the cascade)
+    IF NOT EXISTS (SELECT 1 FROM players WHERE discord_id = player) THEN
+        RETURN;
+    END IF;
+    INSERT INTO player_form (discord_id, matches, kills, deaths, assists, wins, mvps, last_played_at, updated_at)
+    SELECT player, COUNT(*), COALESCE(SUM(kills), 0), COALESCE(SUM(deaths), 0), COALESCE(SUM(assists), 0),
+           COUNT(*) FILTER (WHERE won), COUNT(*) FILTER (WHERE mvp), MAX(played_at), CURRENT_TIMESTAMP
+    FROM (
+        SELECT kills, deaths, assists, won, mvp, played_at FROM match_player_stats
+        WHERE discord_id = player
+        ORDER BY played_at DESC, id DESC
+        LIMIT form_window
+    ) recent
+    ON CONFLICT (discord_id) DO UPDATE SET
+        matches = EXCLUDED.matches, kills = EXCLUDED.kills, deaths = EXCLUDED.deaths,
+        assists = EXCLUDED.assists, wins = EXCLUDED.wins, mvps = EXCLUDED.mvps,
+        last_played_at = EXCLUDED.last_played_at, updated_at = EXCLUDED.updated_at;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION update_player_form()
+RETURNS TRIGGER AS $$
+DECLARE
+    form_window INTEGER := TG_ARGV[0]::integer;
+    newer INTEGER;
+    dropped RECORD;
+BEGIN
+    IF TG_OP <> 'INSERT' THEN
+        IF TG_OP = 'UPDATE' THEN
+            PERFORM rebuild_player_form(NEW.discord_id, form_window);
+        END IF;
+        IF TG_OP = 'DELETE' OR OLD.discord_id <> NEW.discord_id THEN
+            PERFORM rebuild_player_form(OLD.discord_id, form_window);
+        END IF;
+        RETURN NULL;
+    END IF;
+
+    -- Results for one player are applied one at a time
+    INSERT INTO player_form (discord_id) VALUES (NEW.discord_id) ON CONFLICT (discord_id) DO NOTHING;
+    PERFORM 1 FROM player_form WHERE discord_id = NEW.discord_id FOR UPDATE;
+
+    -- A late report of an older match may not make the window at all
+    SELECT COUNT(*) INTO newer FROM (
+        SELECT 1 FROM match_player_stats
+        WHERE discord_id = NEW.discord_id AND (played_at, id) > (NEW.played_at, NEW.id)
+        LIMIT form_window
+    ) later;
+    IF newer >= form_window THEN
+        RETURN NULL;
+    END IF;
+
+    UPDATE player_form SET
+        matches = matches + 1, kills = kills + NEW.kills, deaths = deaths + NEW.deaths,
+        assists = assists + NEW.assists, wins = wins + NEW.won::int, mvps = mvps + NEW.mvp::int,
+        last_played_at = GREATEST(last_played_at, NEW.played_at), updated_at = CURRENT_TIMESTAMP
+    WHERE discord_id = NEW.discord_id;
+
+    -- The match that just left the window (only once the window is full)
+    SELECT kills, deaths, assists, won, mvp INTO dropped FROM match_player_stats
+    WHERE discord_id = NEW.discord_id
+    ORDER BY played_at DESC, id DESC
+    OFFSET form_window LIMIT 1;
+    IF FOUND THEN
+        UPDATE player_form SET
+            matches = matches - 1, kills = kills - dropped.kills, deaths = deaths - dropped.deaths,
+            assists = assists - dropped.assists, wins = wins - dropped.won::int, mvps = mvps - dropped.mvp::int
+        WHERE discord_id = NEW.discord_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS update_player_form ON match_player_stats;
+CREATE TRIGGER update_player_form AFTER INSERT OR UPDATE OR DELETE ON match_player_stats
+    FOR EACH ROW EXECUTE FUNCTION update_player_form('10');
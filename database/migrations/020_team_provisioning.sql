@@ -0,0 +1,20 @@
+-- Team provisioning: a role plus private text and voice channels per team,
+-- created in bulk by /admin-provision-teams (utils/team_provisioning.py).
+-- Every Discord object is recorded in provisioned_resources as soon as it
+-- exists - the checkpoint a re-run resumes from instead of creating it
+-- again. The team columns are filled from it in one UPDATE at the end of a
+-- run, and /admin-teardown-teams deletes exactly what is listed here (roles
+-- created at registration are not). Rows are keyed by team id, or by slot
+-- number for the categories holding the channels, and outlive deleted teams
+-- so their channels can still be torn down.
+
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS text_channel_id BIGINT;
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS voice_channel_id BIGINT;
+
+CREATE TABLE IF NOT EXISTS provisioned_resources (
+    kind VARCHAR(10) NOT NULL CHECK (kind IN ('role', 'text', 'voice', 'category')),
+    key INTEGER NOT NULL,
+    discord_id BIGINT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (kind, key)
+);
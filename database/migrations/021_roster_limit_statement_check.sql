@@ -0,0 +1,51 @@
+-- Check roster limits once per statement instead of once per row.
+-- The team_roster_limit constraint trigger from 016 ran after each row's
+-- counter update, before the later rows of the same statement were counted,
+-- so a set_team_roles call listing the new captain before the old one saw two
+-- captains and failed. Statement-level triggers run after every row trigger
+-- of the statement, so they see the final roster: the teams the statement
+-- touched are recounted from team_members and compared with roster_limits.
+-- (Transition tables need one trigger per event and no column list.)
+
+DROP TRIGGER IF EXISTS team_roster_limit ON team_members;
+DROP FUNCTION IF EXISTS check_team_roster_limit();
+
+CREATE OR REPLACE FUNCTION check_team_roster_limits()
+RETURNS TRIGGER AS $$
+DECLARE
+    over_limit RECORD;
+BEGIN
+    SELECT c.team_id, l.role, l.max_members INTO over_limit
+    FROM (
+        SELECT tm.team_id,
+               COUNT(*) FILTER (WHERE tm.role = 'captain') AS captains,
+               COUNT(*) FILTER (WHERE tm.role = 'player') AS players,
+               COUNT(*) FILTER (WHERE tm.role = 'manager') AS managers,
+               COUNT(*) FILTER (WHERE tm.role = 'coach') AS coaches
+        FROM team_members tm
+        WHERE tm.team_id IN (SELECT DISTINCT team_id FROM changed_members)
+        GROUP BY tm.team_id
+    ) c
+    JOIN roster_limits l
+      ON (l.role = 'captain' AND c.captains > l.max_members)
+      OR (l.role = 'player' AND c.captains + c.players > l.max_members)
+      OR (l.role = 'manager' AND c.managers > l.max_members)
+      OR (l.role = 'coach' AND c.coaches > l.max_members)
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE EXCEPTION 'team % is over its % limit (%)', over_limit.team_id, over_limit.role, over_limit.max_members
+            USING ERRCODE = 'check_violation', CONSTRAINT = 'team_roster_limit', DETAIL = over_limit.role;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS team_roster_limit_insert ON team_members;
+CREATE TRIGGER team_roster_limit_insert AFTER INSERT ON team_members
+    REFERENCING NEW TABLE AS changed_members
+    FOR EACH STATEMENT EXECUTE FUNCTION check_team_roster_limits();
+
+DROP TRIGGER IF EXISTS team_roster_limit_update ON team_members;
+CREATE TRIGGER team_roster_limit_update AFTER UPDATE ON team_members
+    REFERENCING NEW TABLE AS changed_members
+    FOR EACH STATEMENT EXECUTE FUNCTION check_team_roster_limits();
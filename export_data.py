@@ -0,0 +1,58 @@
+"""
+Tournament Data Export
+
+Streams players, teams, team_members, stats and bans from the database into
+compressed files (the same export as /admin-export, without the Discord
+upload limit unless --part-mb is given).
+
+Usage:
+    python export_data.py                                  # gzipped CSV of every table into exports/
+    python export_data.py --format parquet --out backups/  # Parquet (needs pyarrow)
+    python export_data.py --tables players,teams --format ndjson --part-mb 10
+"""
+
+import argparse
+import asyncio
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables FIRST so DATABASE_URL is set when the db module loads
+load_dotenv()
+
+from database.backend import EXPORT_TABLES
+from database.db import db
+from utils.data_export import BATCH_SIZE, FORMATS, ExportError, export
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Export tournament data to compressed files")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--tables", default=",".join(EXPORT_TABLES), help="Comma-separated tables to export")
+    parser.add_argument("--out", default="exports", help="Output directory")
+    parser.add_argument("--part-mb", type=float, help="Split tables into parts of at most this many MB")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows fetched from the cursor at a time")
+    args = parser.parse_args()
+    
+    tables = [table.strip() for table in args.tables.split(",") if table.strip()]
+    part_bytes = int(args.part_mb * 1024 * 1024) if args.part_mb else None
+    
+    await db.connect()
+    try:
+        result = await export(tables, args.format, args.out, part_bytes=part_bytes, batch_size=args.batch_size)
+    except ExportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        await db.close()
+    
+    for table, info in result['tables'].items():
+        print(f"  {table:15} {info['rows']:>10,} rows  {info['bytes'] / 1024:>10,.0f} KB  {len(info['files'])} file(s)")
+    print(
+        f"\n✅ Exported {result['rows']:,} rows ({result['bytes'] / (1024 * 1024):.1f} MB) to {args.out}/ "
+        f"in {result['seconds']:.1f}s ({result['rows_per_second']:,.0f} rows/s)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
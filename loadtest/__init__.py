@@ -0,0 +1,3 @@
+"""
+Offline load-test harness - run with `python -m loadtest`
+"""
@@ -0,0 +1,117 @@
+"""
+Offline load test
+
+Replays N concurrent users through registration, team creation, invites,
+captain swaps and disbands against a local PostgreSQL database, with Discord
+replaced by fakes.
+Use a disposable database: the run creates and removes its own players/teams.
+With --backend memory the in-memory database is used instead, which isolates
+the cogs' own Python overhead (combine with --latency-ms 0).
+
+Usage:
+    python -m loadtest --users 500 --concurrency 100
+    python -m loadtest --users 200 --latency-ms 120 --json results.json
+    python -m loadtest --users 5000 --backend memory --latency-ms 0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables FIRST so DATABASE_URL is set when the db module loads
+load_dotenv()
+
+
+def print_report(test):
+    from loadtest.scenarios import percentile
+    
+    stats = test.stats
+    print()
+    print(f"Load test: {test.users_count} users, concurrency {test.concurrency}, "
+          f"simulated API latency {test.http.latency * 1000:.0f}ms")
+    print()
+    print(f"{'Phase':<16}{'journeys':>10}{'failed':>8}{'seconds':>10}{'per sec':>10}")
+    for phase in stats.phases:
+        print(f"{phase['phase']:<16}{phase['journeys']:>10}{phase['failed']:>8}"
+              f"{phase['seconds']:>10.2f}{phase['per_second']:>10.1f}")
+    
+    print()
+    print(f"{'Step':<20}{'n':>6}{'err':>5}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'ack p99':>9}{'>3s':>5}")
+    for name, samples in stats.step_latency.items():
+        acks = stats.ack_latency.get(name, [])
+        print(f"{name:<20}{len(samples):>6}{stats.step_errors.get(name, 0):>5}"
+              f"{percentile(samples, 50) * 1000:>9.1f}{percentile(samples, 99) * 1000:>9.1f}"
+              f"{max(samples) * 1000:>9.1f}{percentile(acks, 99) * 1000:>9.1f}"
+              f"{stats.late_acks.get(name, 0):>5}")
+    
+    pool = stats.to_dict()['pool']
+    print()
+    print(f"Pool: {pool['acquires']} acquires, wait p50 {pool['wait_p50_ms']:.1f}ms "
+          f"p99 {pool['wait_p99_ms']:.1f}ms max {pool['wait_max_ms']:.1f}ms, "
+          f"peak {pool['peak_in_use']} connections in use")
+    
+    total_requests = sum(test.http.requests.values())
+    top_routes = ", ".join(f"{route} {count}" for route, count in test.http.requests.most_common(5))
+    print(f"Discord API: {total_requests} requests ({top_routes})")
+    
+    if stats.errors:
+        print()
+        print("First errors:")
+        for error in stats.errors:
+            print(f"  {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the tournament bot")
+    parser.add_argument("--users", type=int, default=100, help="Number of simulated users")
+    parser.add_argument("--concurrency", type=int, default=50, help="Journeys in flight at once")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Simulated Discord API latency")
+    parser.add_argument("--sleep-scale", type=float, default=0.0,
+                        help="Multiplier for the cogs' short UX sleeps (1 = real time)")
+    parser.add_argument("--backend", choices=["postgres", "memory"], help="Override DATABASE_BACKEND")
+    parser.add_argument("--database-url", help="Override DATABASE_URL")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for regions/agents")
+    parser.add_argument("--keep-data", action="store_true", help="Leave test players/teams in the database")
+    parser.add_argument("--verbose", action="store_true", help="Show the cogs' own log output")
+    parser.add_argument("--json", help="Also write the summary to this JSON file")
+    args = parser.parse_args()
+    
+    # The backend is chosen when database.db is first imported
+    if args.backend:
+        os.environ["DATABASE_BACKEND"] = args.backend
+    from database.db import db
+    from database.memory import MemoryDatabase
+    from loadtest.scenarios import run_load_test
+    
+    if args.database_url:
+        db.database_url = args.database_url
+    if not isinstance(db, MemoryDatabase) and not db.database_url:
+        print("❌ DATABASE_URL not found in environment variables!")
+        sys.exit(1)
+    
+    test = asyncio.run(run_load_test(
+        users=args.users,
+        concurrency=args.concurrency,
+        latency=args.latency_ms / 1000,
+        sleep_scale=args.sleep_scale,
+        keep_data=args.keep_data,
+        verbose=args.verbose,
+        seed=args.seed
+    ))
+    print_report(test)
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(test.stats.to_dict(), f, indent=2)
+        print(f"\n✓ Summary written to {args.json}")
+    
+    if any(phase['failed'] for phase in test.stats.phases):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
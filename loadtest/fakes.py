@@ -0,0 +1,400 @@
+"""
+Fake Discord objects for driving cogs without a gateway connection
+
+Only the attributes and coroutines the cogs actually use are implemented. Every
+call that would hit Discord's REST API goes through FakeHTTP, which simulates
+latency and counts requests per route.
+"""
+
+import asyncio
+import datetime
+import itertools
+import random
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import discord
+
+
+
+# Captured before any sleep patching so simulated latency is always real
+_real_sleep = asyncio.sleep
+
+_snowflakes = itertools.count(1_100_000_000_000_000_000)
+
+
+def next_snowflake() -> int:
+    return next(_snowflakes)
+
+
+class FakeHTTP:
+    """Stubbed REST layer: simulated latency plus per-route request counts"""
+    
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02):
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = Counter()
+    
+    async def request(self, route: str):
+        self.requests[route] += 1
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await _real_sleep(delay)
+
+
+class _NotFoundResponse:
+    """Minimal aiohttp response shape needed to construct discord.NotFound"""
+    status = 404
+    reason = "Not Found"
+
+
+class FakeAsset:
+    def __init__(self, url: str):
+        self.url = url
+
+
+class FakeRole:
+    def __init__(self, guild: 'FakeGuild', role_id: int, name: str):
+        self.guild = guild
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+    
+    @property
+    def members(self) -> List['FakeMember']:
+        return [m for m in self.guild.members.values() if self in m.roles]
+    
+    async def delete(self, reason: Optional[str] = None):
+        await self.guild.http.request("DELETE /roles")
+        self.guild.roles.pop(self.id, None)
+    
+    def __eq__(self, other):
+        return isinstance(other, FakeRole) and other.id == self.id
+    
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeMessage:
+    def __init__(self, channel, content=None, embed=None, embeds=None, view=None, file=None, author=None):
+        self.id = next_snowflake()
+        self.channel = channel
+        self.content = content
+        self.embeds = list(embeds or ([embed] if embed else []))
+        self.view = view
+        self.author = author
+        self.attachments = []
+        self.mentions = []
+        self.http = channel.http
+    
+    async def edit(self, content=None, embed=None, embeds=None, view=None, **kwargs):
+        await self.http.request("PATCH /messages")
+        if embed is not None:
+            self.embeds = [embed]
+        if embeds is not None:
+            self.embeds = list(embeds)
+        if view is not None:
+            self.view = view
+        return self
+    
+    async def delete(self, delay: Optional[float] = None):
+        await self.http.request("DELETE /messages")
+
+
+class _Messageable:
+    """Shared send/history behaviour for fake channels"""
+    
+    def _init_messages(self, http: FakeHTTP):
+        self.http = http
+        self.messages: List[FakeMessage] = []
+    
+    async def send(self, content=None, *, embed=None, embeds=None, view=None, file=None, **kwargs):
+        await self.http.request("POST /messages")
+        message = FakeMessage(self, content=content, embed=embed, embeds=embeds, view=view, file=file)
+        self.messages.append(message)
+        return message
+    
+    def latest_view(self, view_type=None):
+        """Get the newest view sent to this channel, optionally of a given type"""
+        for message in reversed(self.messages):
+            if message.view is not None and (view_type is None or isinstance(message.view, view_type)):
+                return message.view
+        return None
+
+
+class FakeDMChannel(_Messageable):
+    def __init__(self, user: 'FakeMember', http: FakeHTTP):
+        self.id = next_snowflake()
+        self.recipient = user
+        self._init_messages(http)
+
+
+class FakeMember:
+    def __init__(self, guild: 'FakeGuild', user_id: int, name: str, status: discord.Status = discord.Status.online, bot: bool = False):
+        self.guild = guild
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.global_name = name
+        self.bot = bot
+        self.status = status
+        self.roles: List[FakeRole] = []
+        self.mention = f"<@{user_id}>"
+        self.display_avatar = FakeAsset(f"https://cdn.discordapp.com/embed/avatars/{user_id % 5}.png")
+        self.avatar = self.display_avatar
+        self._dm: Optional[FakeDMChannel] = None
+    
+    async def add_roles(self, *roles, reason: Optional[str] = None):
+        await self.guild.http.request("PUT /members/roles")
+        for role in roles:
+            if role not in self.roles:
+                self.roles.append(role)
+    
+    async def remove_roles(self, *roles, reason: Optional[str] = None):
+        await self.guild.http.request("DELETE /members/roles")
+        self.roles = [r for r in self.roles if r not in roles]
+    
+    async def edit(self, *, roles=None, reason: Optional[str] = None, **kwargs):
+        await self.guild.http.request("PATCH /members")
+        if roles is not None:
+            self.roles = list(roles)
+    
+    async def create_dm(self) -> FakeDMChannel:
+        if self._dm is None:
+            await self.guild.http.request("POST /users/@me/channels")
+            self._dm = FakeDMChannel(self, self.guild.http)
+        return self._dm
+    
+    async def send(self, content=None, **kwargs):
+        dm = await self.create_dm()
+        return await dm.send(content, **kwargs)
+    
+    def __eq__(self, other):
+        return getattr(other, 'id', None) == self.id
+    
+    def __hash__(self):
+        return hash(self.id)
+
+
+class FakeThread(discord.Thread):
+    """Private thread that passes isinstance(channel, discord.Thread) checks"""
+    
+    def __init__(self, guild: 'FakeGuild', parent: 'FakeTextChannel', name: str):
+        self.id = next_snowflake()
+        self.name = name
+        self.guild = guild
+        self.parent_id = parent.id
+        self.archived = False
+        self.locked = False
+        self.added_users: List[int] = []
+        self.deleted = False
+        self._init_messages(guild.http)
+    
+    _init_messages = _Messageable._init_messages
+    send = _Messageable.send
+    latest_view = _Messageable.latest_view
+    
+    @property
+    def mention(self) -> str:
+        return f"<#{self.id}>"
+    
+    async def add_user(self, user):
+        await self.http.request("PUT /threads/members")
+        self.added_users.append(user.id)
+    
+    async def delete(self):
+        await self.http.request("DELETE /channels")
+        self.deleted = True
+        self.archived = True
+        self.guild.threads.pop(self.id, None)
+
+
+class FakeTextChannel(_Messageable):
+    def __init__(self, guild: 'FakeGuild', name: str, channel_id: Optional[int] = None):
+        self.id = channel_id or next_snowflake()
+        self.name = name
+        self.guild = guild
+        self.mention = f"<#{self.id}>"
+        self._init_messages(guild.http)
+    
+    async def create_thread(self, *, name: str, type=None, auto_archive_duration: int = 60, **kwargs) -> FakeThread:
+        await self.http.request("POST /threads")
+        thread = FakeThread(self.guild, self, name)
+        self.guild.threads[thread.id] = thread
+        return thread
+    
+    async def purge(self, limit: int = 100, check=None):
+        await self.http.request("POST /messages/bulk-delete")
+        return []
+
+
+class FakeGuild:
+    def __init__(self, http: FakeHTTP, guild_id: Optional[int] = None, name: str = "Load Test Guild"):
+        self.id = guild_id or next_snowflake()
+        self.name = name
+        self.http = http
+        self.roles: Dict[int, FakeRole] = {}
+        self.members: Dict[int, FakeMember] = {}
+        self.channels: Dict[int, FakeTextChannel] = {}
+        self.threads: Dict[int, FakeThread] = {}
+        self.default_role = self.add_role(self.id, "@everyone")
+        self.filesize_limit = 25 * 1024 * 1024
+    
+    def add_role(self, role_id: int, name: str) -> FakeRole:
+        role = FakeRole(self, role_id, name)
+        self.roles[role_id] = role
+        return role
+    
+    def add_member(self, user_id: int, name: str, roles: Optional[List[FakeRole]] = None, **kwargs) -> FakeMember:
+        member = FakeMember(self, user_id, name, **kwargs)
+        member.roles = list(roles or [])
+        self.members[user_id] = member
+        return member
+    
+    def add_channel(self, name: str, channel_id: Optional[int] = None) -> FakeTextChannel:
+        channel = FakeTextChannel(self, name, channel_id)
+        self.channels[channel.id] = channel
+        return channel
+    
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return self.roles.get(role_id)
+    
+    def get_member(self, user_id: int) -> Optional[FakeMember]:
+        return self.members.get(user_id)
+    
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id) or self.threads.get(channel_id)
+    
+    def get_thread(self, thread_id: int) -> Optional[FakeThread]:
+        return self.threads.get(thread_id)
+    
+    async def create_role(self, *, name: str, reason: Optional[str] = None, **kwargs) -> FakeRole:
+        await self.http.request("POST /roles")
+        return self.add_role(next_snowflake(), name)
+    
+    async def fetch_member(self, user_id: int) -> FakeMember:
+        await self.http.request("GET /members")
+        member = self.members.get(user_id)
+        if member is None:
+            raise discord.NotFound(_NotFoundResponse(), "Unknown Member")
+        return member
+
+
+class FakeClient:
+    """Stand-in for the bot as seen through interaction.client"""
+    
+    def __init__(self, guild: FakeGuild):
+        self.guild = guild
+        self.http = guild.http
+        self.user = guild.add_member(next_snowflake(), "LoadTestBot", bot=True)
+    
+    def get_channel(self, channel_id: int):
+        return self.guild.get_channel(channel_id)
+    
+    def get_user(self, user_id: int):
+        return self.guild.get_member(user_id)
+    
+    async def fetch_user(self, user_id: int):
+        await self.http.request("GET /users")
+        return self.guild.get_member(user_id)
+    
+    async def wait_for(self, event: str, *, check=None, timeout: Optional[float] = None):
+        # Nobody types in a load test - behave like the user went quiet
+        raise asyncio.TimeoutError()
+
+
+class FakeResponse:
+    """interaction.response - records when the interaction was first acknowledged"""
+    
+    def __init__(self, interaction: 'FakeInteraction'):
+        self._interaction = interaction
+        self._done = False
+        self.modal = None
+    
+    def is_done(self) -> bool:
+        return self._done
+    
+    async def _ack(self, route: str):
+        if self._done:
+            raise discord.InteractionResponded(self._interaction)
+        self._done = True
+        await self._interaction.http.request(route)
+        self._interaction.acknowledged_at = time.perf_counter()
+    
+    async def defer(self, *, ephemeral: bool = False, thinking: bool = False):
+        await self._ack("POST /interactions/callback (defer)")
+    
+    async def send_message(self, content=None, *, embed=None, embeds=None, view=None, ephemeral: bool = False, **kwargs):
+        await self._ack("POST /interactions/callback (message)")
+        message = FakeMessage(self._interaction.channel, content=content, embed=embed, embeds=embeds, view=view)
+        self._interaction.sent.append(message)
+    
+    async def edit_message(self, *, content=None, embed=None, embeds=None, view=None, **kwargs):
+        await self._ack("POST /interactions/callback (update)")
+        if self._interaction.message:
+            self._interaction.message.view = view
+    
+    async def send_modal(self, modal):
+        await self._ack("POST /interactions/callback (modal)")
+        self.modal = modal
+    
+    async def autocomplete(self, choices):
+        await self._ack("POST /interactions/callback (autocomplete)")
+        self._interaction.choices = list(choices)
+
+
+class FakeFollowup:
+    """interaction.followup webhook"""
+    
+    def __init__(self, interaction: 'FakeInteraction'):
+        self._interaction = interaction
+    
+    async def send(self, content=None, *, embed=None, embeds=None, view=None, ephemeral: bool = False, file=None, **kwargs):
+        await self._interaction.http.request("POST /webhooks (followup)")
+        message = FakeMessage(self._interaction.channel, content=content, embed=embed, embeds=embeds, view=view, file=file)
+        self._interaction.sent.append(message)
+        return message
+
+
+class FakeInteraction:
+    """Duck-typed discord.Interaction for component, modal and command handlers"""
+    
+    def __init__(self, client: FakeClient, user: FakeMember, channel, message: Optional[FakeMessage] = None, data: Optional[Dict] = None):
+        self.id = next_snowflake()
+        self.client = client
+        self.http = client.http
+        self.user = user
+        self.guild = client.guild
+        self.guild_id = client.guild.id
+        self.channel = channel
+        self.channel_id = channel.id
+        self.message = message
+        self.data = data or {}
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.started_at = time.perf_counter()
+        self.acknowledged_at: Optional[float] = None
+        self.sent: List[FakeMessage] = []
+        self.choices = []
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+    
+    @property
+    def ack_latency(self) -> Optional[float]:
+        """Seconds from creation to the first response (Discord allows 3s)"""
+        if self.acknowledged_at is None:
+            return None
+        return self.acknowledged_at - self.started_at
+    
+    async def edit_original_response(self, *, content=None, embed=None, embeds=None, view=None, **kwargs):
+        await self.http.request("PATCH /webhooks/@original")
+    
+    async def original_response(self):
+        return self.message
+    
+    def latest_view(self, view_type=None):
+        """Get the newest view this interaction sent (response or followup)"""
+        for message in reversed(self.sent):
+            if message.view is not None and (view_type is None or isinstance(message.view, view_type)):
+                return message.view
+        return None
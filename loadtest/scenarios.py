@@ -0,0 +1,451 @@
+"""
+Load-test journeys that replay real user flows through the cogs
+
+Each journey drives the same view/modal/command callbacks Discord would invoke,
+against the real database layer, with fakes standing in for the gateway and REST
+API. Every step records its handler latency and how long it took to acknowledge
+the interaction (Discord gives us 3 seconds).
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from database.db import db
+from utils.config import config
+from commands.registration import (
+    RegistrationButtons, RegionSelectView, AgentSelectView, ConsentView
+)
+from commands.team_registration import (
+    TeamRegistrationButtons, TeamRoleSelectView, TeamRegionSelectView, TeamLogoUploadView
+)
+from commands.team_management import (
+    TeamManagementCog, TeamInviteResponseView, TeamDisbandConfirmView
+)
+from loadtest.fakes import (
+    FakeHTTP, FakeGuild, FakeClient, FakeInteraction, FakeMember, _real_sleep
+)
+
+
+# Synthetic Discord IDs live far above real snowflakes so cleanup can't touch real users
+USER_ID_BASE = 900_000_000_000_000_000
+TEAM_NAME_PREFIX = "LoadTest "
+ACK_DEADLINE = 3.0
+
+REGIONS = ['NA', 'EU', 'AP', 'India', 'BR', 'LATAM', 'KR', 'CN']
+AGENTS = ['Sage', 'Phoenix', 'Reyna', 'Jett', 'Omen']
+
+# Role and channel settings the flows read; the harness points them at fake objects
+ROLE_ENV_KEYS = [
+    'ADMINISTRATOR_ROLE_ID', 'BOT_ACCESS_ROLE_ID', 'STAFF_ROLE_ID',
+    'CAPTAIN_ROLE_ID', 'MANAGER_ROLE_ID',
+    'AMERICAS_ROLE_ID', 'EMEA_ROLE_ID', 'INDIA_ROLE_ID', 'APAC_ROLE_ID', 'CN_ROLE_ID'
+]
+CHANNEL_ENV_KEYS = ['BOT_LOGS_CHANNEL_ID', 'TEAM_REGISTRATION_LOG_CHANNEL_ID']
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile (0-100) of a list of samples"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class JourneyFailed(Exception):
+    """A step did not produce the view or modal the next step needs"""
+
+
+class LoadTestStats:
+    """Latency samples and failure counts collected during a run"""
+    
+    def __init__(self):
+        self.step_latency: Dict[str, List[float]] = defaultdict(list)
+        self.ack_latency: Dict[str, List[float]] = defaultdict(list)
+        self.late_acks: Dict[str, int] = defaultdict(int)
+        self.step_errors: Dict[str, int] = defaultdict(int)
+        self.phases: List[Dict] = []
+        self.pool_waits: List[float] = []
+        self.pool_in_use = 0
+        self.pool_peak_in_use = 0
+        self.errors: List[str] = []
+    
+    def record_step(self, name: str, seconds: float, ack: Optional[float]):
+        self.step_latency[name].append(seconds)
+        if ack is not None:
+            self.ack_latency[name].append(ack)
+            if ack > ACK_DEADLINE:
+                self.late_acks[name] += 1
+    
+    def record_error(self, step: str, error: str):
+        self.step_errors[step] += 1
+        if len(self.errors) < 20:
+            self.errors.append(f"{step}: {error}")
+    
+    def to_dict(self) -> Dict:
+        """Summarise the run as plain data (for --json output)"""
+        steps = {}
+        for name, samples in self.step_latency.items():
+            acks = self.ack_latency.get(name, [])
+            steps[name] = {
+                'count': len(samples),
+                'errors': self.step_errors.get(name, 0),
+                'p50_ms': percentile(samples, 50) * 1000,
+                'p99_ms': percentile(samples, 99) * 1000,
+                'max_ms': max(samples) * 1000,
+                'ack_p99_ms': percentile(acks, 99) * 1000,
+                'late_acks': self.late_acks.get(name, 0)
+            }
+        return {
+            'phases': self.phases,
+            'steps': steps,
+            'pool': {
+                'acquires': len(self.pool_waits),
+                'wait_p50_ms': percentile(self.pool_waits, 50) * 1000,
+                'wait_p99_ms': percentile(self.pool_waits, 99) * 1000,
+                'wait_max_ms': max(self.pool_waits, default=0.0) * 1000,
+                'peak_in_use': self.pool_peak_in_use
+            }
+        }
+
+
+class _TimedAcquire:
+    """Wraps pool.acquire() to measure how long callers wait for a connection"""
+    
+    def __init__(self, ctx, stats: LoadTestStats):
+        self._ctx = ctx
+        self._stats = stats
+    
+    async def __aenter__(self):
+        started = time.perf_counter()
+        conn = await self._ctx.__aenter__()
+        self._stats.pool_waits.append(time.perf_counter() - started)
+        self._stats.pool_in_use += 1
+        self._stats.pool_peak_in_use = max(self._stats.pool_peak_in_use, self._stats.pool_in_use)
+        return conn
+    
+    async def __aexit__(self, *exc):
+        self._stats.pool_in_use -= 1
+        return await self._ctx.__aexit__(*exc)
+
+
+class TimedPool:
+    """asyncpg pool proxy that records acquire wait times"""
+    
+    def __init__(self, pool, stats: LoadTestStats):
+        self._pool = pool
+        self._stats = stats
+    
+    def acquire(self):
+        return _TimedAcquire(self._pool.acquire(), self._stats)
+    
+    async def execute(self, *args, **kwargs):
+        async with self.acquire() as conn:
+            return await conn.execute(*args, **kwargs)
+    
+    async def fetch(self, *args, **kwargs):
+        async with self.acquire() as conn:
+            return await conn.fetch(*args, **kwargs)
+    
+    async def fetchrow(self, *args, **kwargs):
+        async with self.acquire() as conn:
+            return await conn.fetchrow(*args, **kwargs)
+    
+    async def fetchval(self, *args, **kwargs):
+        async with self.acquire() as conn:
+            return await conn.fetchval(*args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+@contextlib.contextmanager
+def scaled_sleeps(scale: float, max_delay: float = 10.0):
+    """Scale the short UX pauses in the cogs (thread close delays, staff add pacing)
+    
+    Long sleeps such as the 5 minute inactivity warning are left alone so they
+    don't fire in the middle of a run.
+    """
+    async def sleep(delay, result=None):
+        if delay <= max_delay:
+            delay *= scale
+        return await _real_sleep(delay, result)
+    
+    asyncio.sleep = sleep
+    try:
+        yield
+    finally:
+        asyncio.sleep = _real_sleep
+
+
+class LoadTest:
+    """Fake guild plus the journeys that run against it"""
+    
+    def __init__(self, users: int, concurrency: int, http: FakeHTTP, team_size: int = 5, seed: int = 0):
+        self.users_count = users
+        self.concurrency = concurrency
+        self.team_size = team_size
+        self.random = random.Random(seed)
+        self.stats = LoadTestStats()
+        
+        self.http = http
+        self.guild = FakeGuild(http)
+        self.client = FakeClient(self.guild)
+        self._setup_guild()
+        
+        # One instance of each persistent view, exactly like the bot registers them
+        self.registration_buttons = RegistrationButtons(None)
+        self.team_buttons = TeamRegistrationButtons()
+        self.team_cog = TeamManagementCog(self.client)
+        
+        self.users = [
+            self.guild.add_member(USER_ID_BASE + i, f"loadtest_{i}")
+            for i in range(users)
+        ]
+        self.regions = {member.id: self.random.choice(REGIONS) for member in self.users}
+    
+    def _setup_guild(self):
+        """Create the configured roles and channels and point the settings at them"""
+        for key in ROLE_ENV_KEYS:
+            role = self.guild.add_role(self.guild.id + len(self.guild.roles), key.replace('_ROLE_ID', '').lower())
+            os.environ[key] = str(role.id)
+        for key in CHANNEL_ENV_KEYS:
+            channel = self.guild.add_channel(key.replace('_CHANNEL_ID', '').lower())
+            os.environ[key] = str(channel.id)
+        # Settings are parsed once, so re-read them now that they point at the fakes
+        config.load()
+        
+        self.registration_channel = self.guild.add_channel("registration")
+        self.team_channel = self.guild.add_channel("team-registration")
+        self.commands_channel = self.guild.add_channel("commands")
+        
+        # A few staff so add_staff_to_thread does its usual work
+        admin_role = config.get_role(self.guild, 'ADMINISTRATOR_ROLE_ID')
+        access_role = config.get_role(self.guild, 'BOT_ACCESS_ROLE_ID')
+        self.guild.add_member(USER_ID_BASE - 1, "loadtest_admin", roles=[admin_role])
+        self.guild.add_member(USER_ID_BASE - 2, "loadtest_headmod", roles=[access_role])
+    
+    # Helpers
+    
+    def interaction(self, user: FakeMember, channel, message=None) -> FakeInteraction:
+        return FakeInteraction(self.client, user, channel, message=message)
+    
+    def thread_for(self, member: FakeMember):
+        """Get the newest open thread the member was added to"""
+        for thread in reversed(list(self.guild.threads.values())):
+            if thread.added_users and thread.added_users[0] == member.id and not thread.deleted:
+                return thread
+        raise JourneyFailed(f"no thread created for {member.name}")
+    
+    async def step(self, name: str, interaction: FakeInteraction, handler, *args):
+        """Run one handler and record its latency"""
+        started = time.perf_counter()
+        try:
+            await handler(*args)
+        except Exception as e:
+            self.stats.record_error(name, repr(e))
+            raise JourneyFailed(f"{name} raised {e!r}") from e
+        finally:
+            self.stats.record_step(name, time.perf_counter() - started, interaction.ack_latency)
+    
+    @staticmethod
+    async def invoke(command, cog, interaction: FakeInteraction, *args):
+        """Run an app command's checks, then its callback, as the command tree would"""
+        for check in command.checks:
+            if not await check(interaction):
+                raise JourneyFailed(f"/{command.name} check {check.__qualname__} failed")
+        await command.callback(cog, interaction, *args)
+    
+    @staticmethod
+    def expect(view, step: str):
+        if view is None:
+            raise JourneyFailed(f"{step} did not produce the next view")
+        return view
+    
+    # Journeys
+    
+    async def register_player(self, member: FakeMember):
+        """Register button → Fill Form → RegistrationModal → RegionSelect → AgentSelect → ConsentView"""
+        itx = self.interaction(member, self.registration_channel)
+        await self.step("register", itx, self.registration_buttons.register.callback, itx)
+        thread = self.thread_for(member)
+        
+        form_view = self.expect(thread.latest_view(), "register")
+        itx = self.interaction(member, thread)
+        await self.step("fill_form", itx, form_view.children[0].callback, itx)
+        modal = self.expect(itx.response.modal, "fill_form")
+        
+        index = member.id - USER_ID_BASE
+        itx = self.interaction(member, thread)
+        modal.ign._refresh_state(itx, {'value': f"lt_{index}"})
+        modal.player_id._refresh_state(itx, {'value': str(10_000_000 + index)})
+        await self.step("registration_modal", itx, modal.on_submit, itx)
+        
+        region_view = self.expect(itx.latest_view(RegionSelectView), "registration_modal")
+        itx = self.interaction(member, thread)
+        region_view.children[0]._refresh_state(itx, {'values': [self.regions[member.id]]})
+        await self.step("region_select", itx, region_view.children[0].callback, itx)
+        
+        agent_view = self.expect(itx.latest_view(AgentSelectView), "region_select")
+        itx = self.interaction(member, thread)
+        agent_view.children[0]._refresh_state(itx, {'values': [self.random.choice(AGENTS)]})
+        await self.step("agent_select", itx, agent_view.children[0].callback, itx)
+        
+        consent_view = self.expect(itx.latest_view(ConsentView), "agent_select")
+        itx = self.interaction(member, thread)
+        await self.step("consent", itx, consent_view.consent_button.callback, itx)
+        if not thread.deleted:
+            raise JourneyFailed("registration thread was not closed")
+    
+    async def create_team(self, captain: FakeMember, index: int):
+        """Register Team → Captain → TeamNameModal → TeamRegionSelect → Skip Logo"""
+        itx = self.interaction(captain, self.team_channel)
+        await self.step("register_team", itx, self.team_buttons.register_team.callback, itx)
+        thread = self.thread_for(captain)
+        
+        role_view = self.expect(thread.latest_view(TeamRoleSelectView), "register_team")
+        itx = self.interaction(captain, thread)
+        await self.step("team_captain_role", itx, role_view.captain_button.callback, itx)
+        modal = self.expect(itx.response.modal, "team_captain_role")
+        
+        itx = self.interaction(captain, thread)
+        modal.team_name._refresh_state(itx, {'value': f"{TEAM_NAME_PREFIX}{index}"})
+        modal.team_tag._refresh_state(itx, {'value': f"L{index:04d}"[-5:]})
+        await self.step("team_name_modal", itx, modal.on_submit, itx)
+        
+        region_view = self.expect(itx.latest_view(TeamRegionSelectView), "team_name_modal")
+        itx = self.interaction(captain, thread)
+        region_view.children[0]._refresh_state(itx, {'values': [self.regions[captain.id]]})
+        await self.step("team_region_select", itx, region_view.children[0].callback, itx)
+        
+        logo_view = self.expect(itx.latest_view(TeamLogoUploadView), "team_region_select")
+        itx = self.interaction(captain, thread)
+        await self.step("team_skip_logo", itx, logo_view.skip_logo_button.callback, itx)
+    
+    async def invite_players(self, captain: FakeMember, players: List[FakeMember]):
+        """/invite from the captain, then every player accepts from their DMs"""
+        itx = self.interaction(captain, self.commands_channel)
+        await self.step("invite", itx, self.invoke, self.team_cog.invite_player, self.team_cog, itx, *players)
+        
+        async def accept(player: FakeMember):
+            dm = player._dm
+            view = self.expect(dm.latest_view(TeamInviteResponseView) if dm else None, "invite")
+            message = next(m for m in reversed(dm.messages) if m.view is view)
+            accept_itx = self.interaction(player, dm, message=message)
+            await self.step("invite_accept", accept_itx, view.accept_button.callback, accept_itx)
+        
+        await asyncio.gather(*(accept(player) for player in players))
+    
+    async def transfer_captaincy(self, captain: FakeMember, players: List[FakeMember]):
+        """Hand the captaincy to a player and back, listing the promotion first as the admin transfer does"""
+        team_id = next(iter(await db.get_member_team_roles(captain.id)))
+        for new_captain, old_captain in ((players[0], captain), (captain, players[0])):
+            started = time.perf_counter()
+            try:
+                await db.set_team_roles(team_id, {new_captain.id: 'captain', old_captain.id: 'player'})
+            except Exception as e:
+                self.stats.record_error("captain_transfer", repr(e))
+                raise JourneyFailed(f"captain_transfer raised {e!r}") from e
+            finally:
+                self.stats.record_step("captain_transfer", time.perf_counter() - started, None)
+    
+    async def disband_team(self, captain: FakeMember):
+        """/disband then confirm"""
+        itx = self.interaction(captain, self.commands_channel)
+        await self.step("disband", itx, self.invoke, self.team_cog.disband_team, self.team_cog, itx)
+        
+        view = self.expect(itx.latest_view(TeamDisbandConfirmView), "disband")
+        itx = self.interaction(captain, self.commands_channel)
+        await self.step("disband_confirm", itx, view.confirm_button.callback, itx)
+    
+    # Running
+    
+    async def run_phase(self, name: str, journeys: List):
+        """Run journey coroutines with bounded concurrency and record throughput"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failures = 0
+        
+        async def run(journey):
+            nonlocal failures
+            async with semaphore:
+                try:
+                    await journey
+                except JourneyFailed as e:
+                    failures += 1
+                    if len(self.stats.errors) < 20:
+                        self.stats.errors.append(f"{name}: {e}")
+        
+        started = time.perf_counter()
+        await asyncio.gather(*(run(journey) for journey in journeys))
+        elapsed = time.perf_counter() - started
+        
+        self.stats.phases.append({
+            'phase': name,
+            'journeys': len(journeys),
+            'failed': failures,
+            'seconds': elapsed,
+            'per_second': len(journeys) / elapsed if elapsed else 0.0
+        })
+    
+    async def run(self):
+        """Registration → team creation → invites → captain swaps → disbands"""
+        await self.run_phase("registration", [self.register_player(m) for m in self.users])
+        
+        teams = [
+            (self.users[i], self.users[i + 1:i + self.team_size])
+            for i in range(0, len(self.users) - self.team_size + 1, self.team_size)
+        ]
+        await self.run_phase("team_creation", [self.create_team(c, i) for i, (c, _) in enumerate(teams)])
+        await self.run_phase("invites", [self.invite_players(c, players) for c, players in teams])
+        await self.run_phase("captain_swaps", [self.transfer_captaincy(c, players) for c, players in teams])
+        await self.run_phase("disbands", [self.disband_team(c) for c, _ in teams])
+
+
+async def cleanup(users: int):
+    """Remove rows created by a previous or current run"""
+    if db.pool is None:
+        # In-memory backend - every process starts empty
+        return
+    await db.pool.execute("DELETE FROM teams WHERE team_name LIKE $1", f"{TEAM_NAME_PREFIX}%")
+    await db.pool.execute(
+        "DELETE FROM players WHERE discord_id >= $1 AND discord_id < $2",
+        USER_ID_BASE, USER_ID_BASE + users
+    )
+
+
+async def run_load_test(
+    users: int,
+    concurrency: int,
+    latency: float,
+    sleep_scale: float = 0.0,
+    keep_data: bool = False,
+    verbose: bool = False,
+    seed: int = 0
+) -> LoadTest:
+    """Connect, run every phase and return the finished LoadTest"""
+    await db.connect()
+    stats_pool = None
+    try:
+        await cleanup(users)
+        test = LoadTest(users, concurrency, FakeHTTP(latency=latency, jitter=latency * 0.4), seed=seed)
+        if db.pool is not None:
+            stats_pool = db.pool = TimedPool(db.pool, test.stats)
+        
+        # The cogs print a line per action - keep the report readable unless asked
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with scaled_sleeps(sleep_scale), output:
+            await test.run()
+        
+        if not keep_data:
+            await cleanup(users)
+        return test
+    finally:
+        if stats_pool is not None:
+            db.pool = stats_pool._pool
+        await db.close()
@@ -1,6 +1,5 @@
 import discord
 from discord.ext import commands
-import os
 import asyncio
 from dotenv import load_dotenv
 
@@ -10,14 +9,34 @@ load_dotenv()
 # Now import modules that depend on environment variables
 from utils import TEST_ROLE_ID
 from database.db import db
-from utils.thread_manager import on_presence_update as handle_presence_update
+from utils.config import config
+from utils import member_cache
+from utils.team_index import team_index
+from utils.shard_state import record_shard_event, set_connected_shard_count, shard_metrics_loop
+from utils.thread_manager import on_presence_update as handle_presence_update, forget_thread, note_activity, poll_waiting_threads
+from utils.loop_monitor import loop_monitor
+from utils.profiler import profiler, profiling_enabled_at_startup
+from utils.cards import card_renderer
 
 # Bot setup
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True  # Required to check member roles
-intents.presences = True  # Required for checking online status
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Required for checking online status - poll mode skips the presence firehose
+intents.presences = config.presence_mode != "poll"
+# Full guild chunking at startup, or on-demand members with pre-warmed role holders
+bot_options = member_cache.bot_member_cache_options(intents)
+if config.sharded:
+    # SHARD_COUNT=auto uses Discord's recommended count; SHARD_IDS runs a subset in this process
+    bot = commands.AutoShardedBot(
+        command_prefix="!", intents=intents,
+        shard_count=config.shard_count, shard_ids=config.shard_ids, **bot_options
+    )
+    # Other processes write team_members too - local caches rely on the change feed
+    if config.shard_ids:
+        db.multi_process = True
+else:
+    bot = commands.Bot(command_prefix="!", intents=intents, **bot_options)
 
 async def load_commands():
     """Load all command modules"""
@@ -31,7 +50,13 @@ async def load_commands():
         "commands.admin",
         "commands.profile",
         "commands.team_profile",
-        "commands.announce"
+        "commands.announce",
+        "commands.brackets",
+        "commands.swiss",
+        "commands.ratings",
+        "commands.schedule",
+        "commands.check_in",
+        "commands.capacity"
     ]
     
     for command in commands_to_load:
@@ -46,6 +71,10 @@ async def setup_hook():
     """Setup hook - runs before bot connects to Discord"""
     print("⚙️  Starting bot setup...")
     
+    # Start watching for event loop stalls as early as possible
+    if loop_monitor:
+        loop_monitor.start()
+    
     # Connect to database first
     try:
         await db.connect()
@@ -57,6 +86,20 @@ async def setup_hook():
     # Load command extensions
     await load_commands()
     
+    # Build the team search index so the first autocomplete doesn't pay for it
+    try:
+        await team_index.load()
+    except Exception as e:
+        print(f"✗ Failed to load team index: {e}")
+    
+    # Without the presences intent, watch Bot Access members for waiting threads
+    if config.presence_mode == "poll":
+        asyncio.create_task(poll_waiting_threads(bot), name="waiting-thread-poller")
+        print("✓ Presence poll mode enabled")
+    
+    # Per-shard latency, guild counts and state sizes
+    asyncio.create_task(shard_metrics_loop(bot), name="shard-metrics")
+    
     # Register persistent views (must be done AFTER loading cogs)
     try:
         from commands.registration import RegistrationButtons
@@ -82,12 +125,22 @@ async def setup_hook():
     except Exception as e:
         print(f"⚠️  Failed to register persistent views: {e}")
     
-    # Sync slash commands
-    try:
-        synced = await bot.tree.sync()
-        print(f"✓ Synced {len(synced)} command(s)")
-    except Exception as e:
-        print(f"✗ Failed to sync commands: {e}")
+    # Register command and view callbacks with the profiler (sampling stays off unless enabled)
+    handler_count = profiler.register_bot(bot)
+    if profiling_enabled_at_startup():
+        profiler.start()
+    else:
+        print(f"✓ Profiler ready ({handler_count} handlers) - enable with /admin-profiling or PROFILING_ENABLED")
+    
+    # Sync slash commands (once per deployment - the process running shard 0 does it)
+    if config.shard_ids and 0 not in config.shard_ids:
+        print("✓ Skipping command sync (done by the shard 0 process)")
+    else:
+        try:
+            synced = await bot.tree.sync()
+            print(f"✓ Synced {len(synced)} command(s)")
+        except Exception as e:
+            print(f"✗ Failed to sync commands: {e}")
     
     print("✅ Bot setup complete!")
 
@@ -96,76 +149,113 @@ async def on_ready():
     """Event triggered when bot successfully connects to Discord"""
     print(f"🟢 Bot is online")
     print(f"Logged in as: {bot.user.name} ({bot.user.id})")
+    if config.sharded:
+        set_connected_shard_count(bot.shard_count)
+        print(f"Shards: {sorted(bot.shards)} of {bot.shard_count}")
     print("=" * 50)
+    member_cache.report("ready", bot)
+    
+    # Cache staff/position/region role holders in the background (lazy policy)
+    asyncio.create_task(member_cache.prewarm(bot))
     
     # Send registration message on startup (if channel ID is configured)
-    registration_channel_id = os.getenv("REGISTRATION_CHANNEL_ID")
+    registration_channel_id = config.registration_channel_id
     if registration_channel_id:
         try:
-            channel_id = int(registration_channel_id)
             registration_cog = bot.get_cog("RegistrationCog")
             if registration_cog:
-                await registration_cog.send_registration_message(channel_id)
-        except ValueError:
-            print("❌ Invalid REGISTRATION_CHANNEL_ID in .env file")
+                await registration_cog.send_registration_message(registration_channel_id)
         except Exception as e:
             print(f"❌ Error sending registration message: {e}")
     else:
         print("⚠️  REGISTRATION_CHANNEL_ID not set - skipping registration message")
     
     # Send team registration message on startup (if channel ID is configured)
-    team_registration_channel_id = os.getenv("TEAM_REGISTRATION_CHANNEL_ID")
+    team_registration_channel_id = config.team_registration_channel_id
     if team_registration_channel_id:
         try:
-            channel_id = int(team_registration_channel_id)
             team_registration_cog = bot.get_cog("TeamRegistrationCog")
             if team_registration_cog:
-                await team_registration_cog.send_team_registration_message(channel_id)
-        except ValueError:
-            print("❌ Invalid TEAM_REGISTRATION_CHANNEL_ID in .env file")
+                await team_registration_cog.send_team_registration_message(team_registration_channel_id)
         except Exception as e:
             print(f"❌ Error sending team registration message: {e}")
     else:
         print("⚠️  TEAM_REGISTRATION_CHANNEL_ID not set - skipping team registration message")
     
     # Send manager registration message on startup (if channel ID is configured)
-    manager_registration_channel_id = os.getenv("MANAGER_REGISTRATION_CHANNEL_ID")
+    manager_registration_channel_id = config.manager_registration_channel_id
     if manager_registration_channel_id:
         try:
-            channel_id = int(manager_registration_channel_id)
             manager_registration_cog = bot.get_cog("ManagerRegistrationCog")
             if manager_registration_cog:
-                await manager_registration_cog.send_manager_registration_message(channel_id)
-        except ValueError:
-            print("❌ Invalid MANAGER_REGISTRATION_CHANNEL_ID in .env file")
+                await manager_registration_cog.send_manager_registration_message(manager_registration_channel_id)
         except Exception as e:
             print(f"❌ Error sending manager registration message: {e}")
     else:
         print("⚠️  MANAGER_REGISTRATION_CHANNEL_ID not set - skipping manager registration message")
     
     # Send coach registration message on startup (if channel ID is configured)
-    coach_registration_channel_id = os.getenv("COACH_REGISTRATION_CHANNEL_ID")
+    coach_registration_channel_id = config.coach_registration_channel_id
     if coach_registration_channel_id:
         try:
-            channel_id = int(coach_registration_channel_id)
             coach_registration_cog = bot.get_cog("CoachRegistrationCog")
             if coach_registration_cog:
-                await coach_registration_cog.send_registration_message(channel_id)
-        except ValueError:
-            print("❌ Invalid COACH_REGISTRATION_CHANNEL_ID in .env file")
+                await coach_registration_cog.send_registration_message(coach_registration_channel_id)
         except Exception as e:
             print(f"❌ Error sending coach registration message: {e}")
     else:
         print("⚠️  COACH_REGISTRATION_CHANNEL_ID not set - skipping coach registration message")
 
+@bot.event
+async def on_shard_connect(shard_id: int):
+    record_shard_event(shard_id, "connect")
+
+@bot.event
+async def on_shard_ready(shard_id: int):
+    record_shard_event(shard_id, "ready")
+    print(f"✓ Shard {shard_id} ready")
+
+@bot.event
+async def on_shard_disconnect(shard_id: int):
+    record_shard_event(shard_id, "disconnect")
+    print(f"⚠️  Shard {shard_id} disconnected")
+
+@bot.event
+async def on_shard_resumed(shard_id: int):
+    record_shard_event(shard_id, "resumed")
+
 @bot.event
 async def on_presence_update(before: discord.Member, after: discord.Member):
     """Handle presence updates - used for adding HeadMods to waiting threads"""
     await handle_presence_update(before, after)
 
+@bot.event
+async def on_raw_thread_delete(payload: discord.RawThreadDeleteEvent):
+    forget_thread(payload.guild_id, payload.thread_id)
+
+@bot.listen('on_message')
+async def track_message_activity(message: discord.Message):
+    if config.presence_mode == "poll" and message.guild:
+        note_activity(message.author)
+
+@bot.listen('on_interaction')
+async def track_interaction_activity(interaction: discord.Interaction):
+    if config.presence_mode == "poll" and interaction.guild:
+        note_activity(interaction.user)
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    """Drop cached config roles so a recreated role is picked up"""
+    config.clear_cache()
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    """Drop cached config channels so a recreated channel is picked up"""
+    config.clear_cache()
+
 # Run the bot
 if __name__ == "__main__":
-    TOKEN = os.getenv("DISCORD_BOT_TOKEN")
+    TOKEN = config.discord_bot_token
     
     if not TOKEN:
         print("ERROR: DISCORD_BOT_TOKEN not found in environment variables!")
@@ -180,5 +270,6 @@ if __name__ == "__main__":
     try:
         bot.run(TOKEN)
     finally:
-        # Close database connection on shutdown
+        # Close database connection and the card render workers on shutdown
         asyncio.run(db.close())
+        card_renderer.close()
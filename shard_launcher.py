@@ -0,0 +1,93 @@
+"""
+Shard Launcher
+
+Runs the bot's shards across several processes that share the same Postgres
+database. Each process gets SHARD_COUNT and its own SHARD_IDS subset; a process
+that exits is restarted with exponential backoff.
+
+Usage:
+    python shard_launcher.py 2                 # SHARD_COUNT from .env, 2 processes
+    python shard_launcher.py 4 --shards 8      # 8 shards over 4 processes
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MAX_BACKOFF_SECONDS = 300
+# A process that stayed up this long is considered healthy again
+HEALTHY_AFTER_SECONDS = 600
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+
+def split_shards(shard_count: int, processes: int):
+    """Round-robin shard IDs over the processes"""
+    return [list(range(i, shard_count, processes)) for i in range(processes)]
+
+
+def start(shard_count: int, shard_ids):
+    env = dict(os.environ, SHARD_COUNT=str(shard_count), SHARD_IDS=",".join(map(str, shard_ids)))
+    print(f"▶️  Starting shards {shard_ids} of {shard_count}")
+    return subprocess.Popen([sys.executable, MAIN], env=env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run bot shards in several processes")
+    parser.add_argument("processes", type=int, help="number of bot processes")
+    parser.add_argument("--shards", type=int, help="total shard count (default: SHARD_COUNT)")
+    args = parser.parse_args()
+    
+    try:
+        shard_count = args.shards or int(os.getenv("SHARD_COUNT", ""))
+    except ValueError:
+        print("ERROR: Set a numeric SHARD_COUNT in .env or pass --shards")
+        sys.exit(1)
+    if not 1 <= args.processes <= shard_count:
+        print(f"ERROR: Need between 1 and {shard_count} processes for {shard_count} shards")
+        sys.exit(1)
+    
+    groups = split_shards(shard_count, args.processes)
+    workers = {}  # index -> [process, started_at, backoff, restart_at]
+    for index, shard_ids in enumerate(groups):
+        workers[index] = [start(shard_count, shard_ids), time.monotonic(), 1, None]
+    
+    try:
+        while True:
+            time.sleep(1)
+            now = time.monotonic()
+            for index, worker in workers.items():
+                process, started_at, backoff, restart_at = worker
+                
+                if restart_at is not None:
+                    if now >= restart_at:
+                        worker[:] = [start(shard_count, groups[index]), now, backoff, None]
+                    continue
+                
+                code = process.poll()
+                if code is None:
+                    continue
+                
+                if now - started_at >= HEALTHY_AFTER_SECONDS:
+                    backoff = 1
+                print(f"⚠️  Shards {groups[index]} exited with code {code}, restarting in {backoff}s")
+                worker[:] = [process, started_at, min(backoff * 2, MAX_BACKOFF_SECONDS), now + backoff]
+    except KeyboardInterrupt:
+        print("Stopping shard processes...")
+        for process, *_ in workers.values():
+            if process.poll() is None:
+                process.terminate()
+        for process, *_ in workers.values():
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,24 @@
 """Utils package for VALORANT Tournament Bot"""
 
-import os
 from discord import app_commands
 import discord
+from .config import config
+from .member_cache import get_or_fetch_member
 
-# Get test role ID from environment
-TEST_ROLE_ID = int(os.getenv("TEST_ROLE_ID", 0))
+# Test role ID from the .env file (0 when unset)
+TEST_ROLE_ID = config.test_role_id or 0
 
 def has_test_role():
     """Decorator to check if user has the test role"""
     async def predicate(interaction: discord.Interaction) -> bool:
-        if not TEST_ROLE_ID:
+        if not config.test_role_id:
             # If no role ID is set, allow all users (fallback)
             return True
         
         # Check if user has the test role
         if interaction.guild:
-            member = interaction.guild.get_member(interaction.user.id)
-            if member and any(role.id == TEST_ROLE_ID for role in member.roles):
+            member = await get_or_fetch_member(interaction.guild, interaction.user.id)
+            if member and permissions.has_any(member, 'TEST_ROLE_ID'):
                 return True
         
         # Send error message if user doesn't have the role
@@ -30,5 +31,6 @@ def has_test_role():
     return app_commands.check(predicate)
 
 from .checks import commands_channel_only
+from .permissions import permissions
 
-__all__ = ['TEST_ROLE_ID', 'has_test_role', 'commands_channel_only']
+__all__ = ['TEST_ROLE_ID', 'config', 'permissions', 'has_test_role', 'commands_channel_only']
@@ -0,0 +1,234 @@
+"""
+Bracket engine
+
+Builds single and double elimination brackets as flat match rows. Every match
+knows where its winner (and, in double elimination, its loser) goes through
+next_match_id/next_slot pointers, so recording a result only touches the
+match itself and the one or two matches it feeds - never the whole bracket.
+
+Byes are resolved while planning: a team facing a bye advances straight away,
+and in double elimination the "loser" of a bye match is a bye in the lower
+bracket, which can decide a lower bracket match as soon as its other team
+arrives. The grand final is a single match (no bracket reset).
+
+This module is pure Python; the database backends persist the planned rows
+and reuse fill_slot() / the same rules when results come in.
+"""
+
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+
+FORMATS = ('single', 'double')
+
+# bracket_matches.section values
+WINNERS = 'winners'
+LOSERS = 'losers'
+GRAND_FINAL = 'grand_final'
+
+# A planned match is identified by (section, round, position) until it has a database ID
+MatchKey = Tuple[str, int, int]
+
+
+def bracket_size(team_count: int) -> int:
+    """Smallest power of two that fits every team"""
+    size = 2
+    while size < team_count:
+        size *= 2
+    return size
+
+
+def seed_order(size: int) -> List[int]:
+    """
+    Seeds in bracket slot order, so seed 1 meets the lowest seed and the top
+    two seeds can only meet in the final (1, 8, 4, 5, 2, 7, 3, 6 for 8).
+    """
+    order = [1, 2]
+    while len(order) < size:
+        count = len(order) * 2
+        order = [seed for top in order for seed in (top, count + 1 - top)]
+    return order
+
+
+def seed_teams(rows: Sequence[Mapping]) -> List[int]:
+    """
+    Team IDs in seed order from get_team_seeding rows (id, region, wins,
+    matches_played, rating).
+    
+    Teams are ranked by rating, then win rate, then wins. Teams with the same
+    record are interleaved by region, so equally strong teams from one region
+    land in different parts of the bracket instead of next to each other.
+    """
+    def record(row) -> Tuple[float, float, int]:
+        played = row['matches_played'] or 0
+        wins = row['wins'] or 0
+        return (row.get('rating') or 0.0, wins / played if played else 0.0, wins)
+    
+    ranked = sorted(rows, key=lambda row: (record(row), -row['id']), reverse=True)
+    
+    seeds: List[int] = []
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j < len(ranked) and record(ranked[j]) == record(ranked[i]):
+            j += 1
+        by_region: Dict[str, List[int]] = {}
+        for row in ranked[i:j]:
+            by_region.setdefault(row['region'] or '', []).append(row['id'])
+        queues = list(by_region.values())
+        while queues:
+            for queue in queues:
+                seeds.append(queue.pop(0))
+            queues = [queue for queue in queues if queue]
+        i = j
+    return seeds
+
+
+def round_name(round_number: int, total_rounds: int) -> str:
+    """Single elimination round name (Round of 16, Quarterfinals, ...)"""
+    remaining = total_rounds - round_number
+    names = {0: "Final", 1: "Semifinals", 2: "Quarterfinals"}
+    return names.get(remaining, f"Round of {2 ** (remaining + 1)}")
+
+
+def _new_match(section: str, round_number: int, position: int) -> Dict:
+    return {
+        'section': section,
+        'round': round_number,
+        'position': position,
+        'team1_id': None,
+        'team2_id': None,
+        'team1_seed': None,
+        'team2_seed': None,
+        'team1_bye': False,
+        'team2_bye': False,
+        'winner_id': None,
+        'loser_id': None,
+        'status': 'pending',
+        'next_match_id': None,
+        'next_slot': None,
+        'loser_next_match_id': None,
+        'loser_next_slot': None,
+    }
+
+
+def fill_slot(matches: Mapping[Hashable, Dict], match_id: Optional[Hashable], slot: int, team_id: Optional[int]) -> List[Hashable]:
+    """
+    Put a team (None for a bye) into a match slot and follow whatever that
+    decides: a match with both teams becomes 'ready', a match with a bye
+    completes as 'bye' and passes its winner (and a bye for its loser) on.
+    Returns the IDs of the matches that changed.
+    """
+    changed = []
+    pending = [(match_id, slot, team_id)]
+    while pending:
+        match_id, slot, team_id = pending.pop()
+        if match_id is None:
+            continue
+        match = matches[match_id]
+        match[f'team{slot}_id'] = team_id
+        match[f'team{slot}_bye'] = team_id is None
+        changed.append(match_id)
+        
+        other = 3 - slot
+        other_team = match[f'team{other}_id']
+        if other_team is None and not match[f'team{other}_bye']:
+            continue  # Still waiting for the other side
+        if team_id is not None and other_team is not None:
+            match['status'] = 'ready'
+            continue
+        
+        # A bye decides the match (both sides may be byes)
+        winner = team_id if team_id is not None else other_team
+        match['status'] = 'bye'
+        match['winner_id'] = winner
+        pending.append((match['next_match_id'], match['next_slot'], winner))
+        if match['loser_next_match_id'] is not None:
+            pending.append((match['loser_next_match_id'], match['loser_next_slot'], None))
+    return changed
+
+
+def _link(matches: Dict[MatchKey, Dict], source: MatchKey, target: MatchKey, slot: int, loser: bool = False):
+    prefix = 'loser_next' if loser else 'next'
+    matches[source][f'{prefix}_match_id'] = target
+    matches[source][f'{prefix}_slot'] = slot
+
+
+def plan_bracket(team_ids: Sequence[int], fmt: str = 'single') -> Tuple[Dict[MatchKey, Dict], List[Dict]]:
+    """
+    Plan a bracket for teams given in seed order.
+    
+    Returns (matches, rounds): matches keyed by (section, round, position) with
+    next/loser_next pointers holding those keys, and one row per round with
+    its display name and match count.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown bracket format '{fmt}'")
+    if len(team_ids) < 2:
+        raise ValueError("A bracket needs at least 2 teams")
+    
+    size = bracket_size(len(team_ids))
+    if fmt == 'double':
+        size = max(size, 4)  # Smallest bracket with a lower bracket
+    winner_rounds = size.bit_length() - 1
+    matches: Dict[MatchKey, Dict] = {}
+    rounds: List[Dict] = []
+    
+    # Upper (or only) bracket
+    for r in range(1, winner_rounds + 1):
+        count = size >> r
+        for p in range(count):
+            matches[(WINNERS, r, p)] = _new_match(WINNERS, r, p)
+            if r > 1:
+                _link(matches, (WINNERS, r - 1, 2 * p), (WINNERS, r, p), 1)
+                _link(matches, (WINNERS, r - 1, 2 * p + 1), (WINNERS, r, p), 2)
+        if fmt == 'single':
+            name = round_name(r, winner_rounds)
+        else:
+            name = "Upper Final" if r == winner_rounds else f"Upper Round {r}"
+        rounds.append({'section': WINNERS, 'round': r, 'name': name, 'match_count': count})
+    
+    if fmt == 'double':
+        loser_rounds = 2 * (winner_rounds - 1)
+        for r in range(1, loser_rounds + 1):
+            if r == 1:
+                count = size // 4
+            elif r % 2 == 0:
+                count = size >> (r // 2 + 1)
+            else:
+                count = size >> ((r - 1) // 2 + 2)
+            for p in range(count):
+                matches[(LOSERS, r, p)] = _new_match(LOSERS, r, p)
+                if r == 1:
+                    # Upper round 1 losers pair up
+                    _link(matches, (WINNERS, 1, 2 * p), (LOSERS, 1, p), 1, loser=True)
+                    _link(matches, (WINNERS, 1, 2 * p + 1), (LOSERS, 1, p), 2, loser=True)
+                elif r % 2 == 0:
+                    # Lower survivors meet the losers dropping from the upper bracket;
+                    # every other round drops them in reverse order to delay rematches
+                    upper_round = r // 2 + 1
+                    dropping = count - 1 - p if upper_round % 2 == 0 else p
+                    _link(matches, (LOSERS, r - 1, p), (LOSERS, r, p), 1)
+                    _link(matches, (WINNERS, upper_round, dropping), (LOSERS, r, p), 2, loser=True)
+                else:
+                    _link(matches, (LOSERS, r - 1, 2 * p), (LOSERS, r, p), 1)
+                    _link(matches, (LOSERS, r - 1, 2 * p + 1), (LOSERS, r, p), 2)
+            name = "Lower Final" if r == loser_rounds else f"Lower Round {r}"
+            rounds.append({'section': LOSERS, 'round': r, 'name': name, 'match_count': count})
+        
+        matches[(GRAND_FINAL, 1, 0)] = _new_match(GRAND_FINAL, 1, 0)
+        _link(matches, (WINNERS, winner_rounds, 0), (GRAND_FINAL, 1, 0), 1)
+        _link(matches, (LOSERS, loser_rounds, 0), (GRAND_FINAL, 1, 0), 2)
+        rounds.append({'section': GRAND_FINAL, 'round': 1, 'name': "Grand Final", 'match_count': 1})
+    
+    # Seed the first round; seeds past the team count are byes
+    order = seed_order(size)
+    for p in range(size // 2):
+        match = matches[(WINNERS, 1, p)]
+        match['team1_seed'], match['team2_seed'] = order[2 * p], order[2 * p + 1]
+    for p in range(size // 2):
+        for slot in (1, 2):
+            seed = order[2 * p + slot - 1]
+            team_id = team_ids[seed - 1] if seed <= len(team_ids) else None
+            fill_slot(matches, (WINNERS, 1, p), slot, team_id)
+    
+    return matches, rounds
@@ -0,0 +1,156 @@
+"""
+Card rendering (runs in the card renderer's worker processes)
+
+Pure Pillow drawing of the profile and team cards: plain data and image bytes
+in, PNG bytes out. Nothing here touches discord, the database or the event
+loop; utils/cards.py does the caching and runs render_card in the pool.
+"""
+
+import io
+import os
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+
+
+WIDTH = 900
+HEIGHT = 460
+BACKGROUND = (24, 26, 33)
+PANEL = (35, 38, 48)
+TEXT = (235, 236, 240)
+MUTED = (150, 155, 170)
+ACCENT = {'player': (88, 101, 242), 'team': (241, 196, 15)}
+
+_fonts: Dict[Tuple[int, bool], ImageFont.ImageFont] = {}
+
+
+def _font(size: int, bold: bool = False) -> ImageFont.ImageFont:
+    cached = _fonts.get((size, bold))
+    if cached is not None:
+        return cached
+    font = None
+    for name in (("DejaVuSans-Bold.ttf", "Arial Bold.ttf") if bold else ("DejaVuSans.ttf", "Arial.ttf")):
+        try:
+            font = ImageFont.truetype(name, size)
+            break
+        except OSError:
+            continue
+    if font is None:
+        try:
+            font = ImageFont.load_default(size=size)
+        except TypeError:
+            # Pillow < 10.1: fixed-size bitmap font
+            font = ImageFont.load_default()
+    _fonts[(size, bold)] = font
+    return font
+
+
+def _open_image(source) -> Optional[Image.Image]:
+    """Image from bytes or a local file path (None when missing or unreadable)"""
+    if source is None:
+        return None
+    try:
+        if isinstance(source, str):
+            if not os.path.exists(source):
+                return None
+            image = Image.open(source)
+        else:
+            image = Image.open(io.BytesIO(source))
+        image.load()
+        return image.convert("RGBA")
+    except Exception:
+        return None
+
+
+def _circle(image: Image.Image, size: int) -> Image.Image:
+    image = ImageOps.fit(image, (size, size))
+    mask = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size - 1, size - 1), fill=255)
+    image.putalpha(mask)
+    return image
+
+
+def _fit(draw: ImageDraw.ImageDraw, text: str, size: int, width: int, bold: bool = False) -> ImageFont.ImageFont:
+    """Largest font (down to 60% of size) that fits text into width"""
+    for step in range(size, int(size * 0.6) - 1, -2):
+        font = _font(step, bold)
+        if draw.textlength(text, font=font) <= width:
+            return font
+    return _font(int(size * 0.6), bold)
+
+
+def _header(card: Image.Image, kind: str, image, title: str, subtitle: str):
+    draw = ImageDraw.Draw(card)
+    draw.rectangle((0, 0, WIDTH, 8), fill=ACCENT[kind])
+    picture = _open_image(image)
+    if picture is not None:
+        picture = _circle(picture, 140)
+        card.paste(picture, (40, 40), picture)
+    else:
+        draw.ellipse((40, 40, 180, 180), fill=PANEL, outline=ACCENT[kind], width=4)
+        initial = (title[:1] or "?").upper()
+        draw.text((110, 110), initial, font=_font(64, True), fill=TEXT, anchor="mm")
+    draw.text((210, 62), title, font=_fit(draw, title, 48, WIDTH - 250, True), fill=TEXT)
+    draw.text((212, 130), subtitle, font=_font(24), fill=MUTED)
+
+
+def _stat_grid(card: Image.Image, stats: List[Tuple[str, str]], top: int, columns: int = 4):
+    draw = ImageDraw.Draw(card)
+    cell_width = (WIDTH - 80 - (columns - 1) * 12) // columns
+    for index, (label, value) in enumerate(stats):
+        row, column = divmod(index, columns)
+        x = 40 + column * (cell_width + 12)
+        y = top + row * 92
+        draw.rounded_rectangle((x, y, x + cell_width, y + 80), radius=12, fill=PANEL)
+        draw.text((x + 16, y + 10), label.upper(), font=_font(16), fill=MUTED)
+        draw.text((x + 16, y + 34), value, font=_fit(draw, value, 32, cell_width - 32, True), fill=TEXT)
+
+
+def _png(card: Image.Image) -> bytes:
+    output = io.BytesIO()
+    card.convert("RGB").save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+def render_player_card(data: Dict, avatar: Optional[bytes]) -> bytes:
+    card = Image.new("RGBA", (WIDTH, HEIGHT), BACKGROUND)
+    _header(card, 'player', avatar, data['ign'], f"{data['region']}  •  Rank {data['rank']}  •  {data['points']} pts")
+    stats = [
+        ("Kills", str(data['kills'])), ("Deaths", str(data['deaths'])),
+        ("KDR", str(data['kdr'])), ("Winrate", f"{data['winrate']}%"),
+        ("Matches", str(data['matches_played'])), ("MVP", str(data['mvps'])),
+    ]
+    if data.get('form'):
+        stats += [("Form KDR", str(data['form']['kdr'])), ("Form", data['form']['record'])]
+    else:
+        stats += [("Assists", str(data['assists'])), ("Wins", str(data['wins']))]
+    _stat_grid(card, stats, 220)
+    return _png(card)
+
+
+def render_team_card(data: Dict, logo) -> bytes:
+    card = Image.new("RGBA", (WIDTH, HEIGHT), BACKGROUND)
+    _header(card, 'team', logo, data['team_name'], f"[{data['team_tag']}]  •  {data['region']}  •  Rating {data['rating']}")
+    _stat_grid(card, [
+        ("Wins", str(data['wins'])), ("Losses", str(data['losses'])),
+        ("Matches", str(data['matches_played'])), ("Winrate", f"{data['winrate']}%"),
+    ], 210)
+    
+    draw = ImageDraw.Draw(card)
+    draw.text((40, 312), "ROSTER", font=_font(16), fill=MUTED)
+    roster = data['roster'][:10]
+    for index, (ign, captain) in enumerate(roster):
+        column, row = divmod(index, 5)
+        x = 40 + column * 420
+        y = 340 + row * 22
+        draw.text((x, y), f"{ign}{'  (C)' if captain else ''}", font=_font(18, captain), fill=TEXT)
+    if not roster:
+        draw.text((40, 340), "No players registered yet", font=_font(18), fill=MUTED)
+    return _png(card)
+
+
+def render_card(kind: str, data: Dict, image) -> bytes:
+    """Worker entry point: PNG bytes of a 'player' or 'team' card"""
+    if kind == 'player':
+        return render_player_card(data, image)
+    return render_team_card(data, image)
@@ -0,0 +1,248 @@
+"""
+Profile and team cards
+
+/profile and /team-profile attach a rendered PNG card to their embed. Cards
+are drawn with Pillow in a pool of worker processes (utils/card_render.py),
+so rendering never runs on the event loop. Every card is keyed by a SHA-256
+of everything drawn on it - the stats, the roster and the avatar/logo URL
+(Discord avatar URLs change with the image) - and cached in an in-memory LRU
+and an on-disk LRU (CARD_CACHE_DIR, evicted by least recent use). A repeat
+call with unchanged inputs serves the cached PNG without fetching the avatar
+or touching the pool; changed stats give a new key, and the stale card ages
+out. Concurrent requests for one key share a single render.
+"""
+
+import asyncio
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+import aiohttp
+
+from utils.config import config
+from utils.metrics import metrics
+
+
+# Bump when the card layout changes so cached cards are re-rendered
+CARD_VERSION = 1
+# Largest avatar/logo downloaded for a card
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+IMAGE_TIMEOUT_SECONDS = 10
+RENDER_TIMEOUT_SECONDS = 30
+
+
+class CardRenderer:
+    """Process pool plus the memory and disk LRU caches of rendered cards"""
+    
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # key -> file size, least recently used first
+        self._disk_bytes = 0
+        self._disk_loaded = False
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._available: Optional[bool] = None
+    
+    @property
+    def available(self) -> bool:
+        """Cards are enabled and Pillow is installed"""
+        if self._available is None:
+            self._available = importlib.util.find_spec("PIL") is not None
+            if not self._available:
+                print("⚠️  Pillow is not installed, profile cards are disabled")
+        return self._available and config.cards_enabled
+    
+    @staticmethod
+    def key(kind: str, data: Dict, image: Optional[str]) -> str:
+        payload = json.dumps(
+            {'version': CARD_VERSION, 'kind': kind, 'data': data, 'image': image},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    async def render(self, kind: str, data: Dict, image_url: Optional[str]) -> Optional[bytes]:
+        """
+        PNG of a 'player' or 'team' card, from the cache when the inputs are
+        unchanged. image_url is the avatar/logo (an http(s) URL or a local
+        file path). None when cards are unavailable or rendering failed - the
+        caller then sends the embed on its own.
+        """
+        if not self.available:
+            return None
+        key = self.key(kind, data, image_url)
+        
+        png = self._memory_get(key)
+        if png is not None:
+            metrics.inc("cards.memory_hits")
+            return png
+        
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._produce(key, kind, data, image_url))
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        try:
+            return await asyncio.shield(pending)
+        except Exception as e:
+            print(f"❌ Failed to render {kind} card: {e}")
+            return None
+    
+    async def _produce(self, key: str, kind: str, data: Dict, image_url: Optional[str]) -> bytes:
+        png = await self._disk_get(key)
+        if png is not None:
+            metrics.inc("cards.disk_hits")
+        else:
+            metrics.inc("cards.renders")
+            image = await self._fetch_image(image_url)
+            # Imported on first render, so a bot without cards never loads Pillow
+            from utils.card_render import render_card
+            loop = asyncio.get_running_loop()
+            try:
+                png = await asyncio.wait_for(
+                    loop.run_in_executor(self._get_pool(), render_card, kind, data, image),
+                    RENDER_TIMEOUT_SECONDS
+                )
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory): start a fresh pool next time
+                self._pool = None
+                raise
+            await self._disk_put(key, png)
+        self._memory_put(key, png)
+        return png
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: workers start clean instead of forking the running bot
+            self._pool = ProcessPoolExecutor(
+                max_workers=max(1, int(config.card_render_workers)),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+    
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    async def _fetch_image(self, url: Optional[str]):
+        """Avatar/logo bytes for the worker (a local path is passed through)"""
+        if not url:
+            return None
+        if not url.startswith(("http://", "https://")):
+            return url
+        try:
+            timeout = aiohttp.ClientTimeout(total=IMAGE_TIMEOUT_SECONDS)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.get(url) as resp:
+                    if resp.status != 200 or (resp.content_length or 0) > MAX_IMAGE_BYTES:
+                        return None
+                    data = await resp.content.read(MAX_IMAGE_BYTES + 1)
+                    return data if len(data) <= MAX_IMAGE_BYTES else None
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+    
+    # Memory LRU
+    
+    def _memory_get(self, key: str) -> Optional[bytes]:
+        png = self._memory.get(key)
+        if png is not None:
+            self._memory.move_to_end(key)
+        return png
+    
+    def _memory_put(self, key: str, png: bytes):
+        if key in self._memory:
+            return
+        self._memory[key] = png
+        self._memory_bytes += len(png)
+        limit = config.card_cache_memory_mb * 1024 * 1024
+        while self._memory_bytes > limit and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+    
+    # Disk LRU (file I/O runs in a thread)
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(config.card_cache_dir, f"{key}.png")
+    
+    async def _load_disk_index(self):
+        if self._disk_loaded:
+            return
+        self._disk_loaded = True
+        
+        def scan():
+            os.makedirs(config.card_cache_dir, exist_ok=True)
+            files = []
+            for entry in os.scandir(config.card_cache_dir):
+                if entry.name.endswith(".png") and entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+            return sorted(files)
+        
+        try:
+            files = await asyncio.to_thread(scan)
+        except OSError as e:
+            print(f"⚠️  Could not read the card cache directory: {e}")
+            return
+        for _, key, size in files:
+            self._disk[key] = size
+            self._disk_bytes += size
+    
+    async def _disk_get(self, key: str) -> Optional[bytes]:
+        await self._load_disk_index()
+        if key not in self._disk:
+            return None
+        self._disk.move_to_end(key)
+        path = self._path(key)
+        
+        def read():
+            with open(path, "rb") as f:
+                data = f.read()
+            # mtime is the recency order when the index is rebuilt after a restart
+            os.utime(path)
+            return data
+        
+        try:
+            return await asyncio.to_thread(read)
+        except OSError:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            return None
+    
+    async def _disk_put(self, key: str, png: bytes):
+        await self._load_disk_index()
+        path = self._path(key)
+        evicted = []
+        self._disk[key] = len(png)
+        self._disk_bytes += len(png)
+        limit = config.card_cache_disk_mb * 1024 * 1024
+        while self._disk_bytes > limit and len(self._disk) > 1:
+            old_key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            evicted.append(self._path(old_key))
+        
+        def write():
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as f:
+                f.write(png)
+            os.replace(temporary, path)
+            for old_path in evicted:
+                try:
+                    os.remove(old_path)
+                except FileNotFoundError:
+                    pass
+        
+        try:
+            await asyncio.to_thread(write)
+        except OSError as e:
+            self._disk_bytes -= self._disk.pop(key, 0)
+            print(f"⚠️  Could not write card cache file: {e}")
+
+
+# Global card renderer
+card_renderer = CardRenderer()
@@ -0,0 +1,275 @@
+"""
+Team check-in
+
+Before an event day thousands of captains press one check-in button within a
+few minutes. Every click is answered from memory: the captains and managers
+of the eligible teams are loaded once when the window opens, accepted
+check-ins are queued, and one flusher task writes the queue with a single
+INSERT every CHECK_IN_FLUSH_MS - a burst costs a few pool connections instead
+of one per click. The check-in message shows live per-region counts (edited
+at most every few seconds) and the window closes itself at closes_at, which
+flushes the queue and reads the checked-in field in one query.
+"""
+
+import asyncio
+import io
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+import discord
+
+from database.db import db
+from utils.config import config
+from utils.metrics import metrics
+from utils.team_index import team_index
+
+
+# Minimum seconds between edits of a check-in message (live counts)
+MESSAGE_REFRESH_SECONDS = 5
+
+CHECKED_IN = 'checked_in'
+ALREADY = 'already'
+NOT_ELIGIBLE = 'not_eligible'
+
+
+class CheckInWindow:
+    """In-memory state of one open window: who may check in which teams, and who did"""
+    
+    def __init__(self, row: Dict, eligibility: List[Dict], checked_in: List[int]):
+        self.id = row['id']
+        self.name = row['name']
+        self.region = row['region']
+        self.closes_at = row['closes_at']
+        self.channel_id = row['channel_id']
+        self.message_id = row['message_id']
+        self.teams_by_user: Dict[int, List[int]] = {}
+        self.team_regions: Dict[int, str] = {}
+        for entry in eligibility:
+            self.add_eligible(entry['discord_id'], entry['team_id'], entry['region'])
+        self.checked_in: Set[int] = {team_id for team_id in checked_in if team_id in self.team_regions}
+        self.counts: Dict[str, int] = {}
+        for team_id in self.checked_in:
+            region = self.team_regions[team_id]
+            self.counts[region] = self.counts.get(region, 0) + 1
+        self.changed = True
+        self.edited_at = 0.0
+    
+    def add_eligible(self, discord_id: int, team_id: int, region: str):
+        teams = self.teams_by_user.setdefault(discord_id, [])
+        if team_id not in teams:
+            teams.append(team_id)
+        self.team_regions[team_id] = region or 'Unknown'
+    
+    def check_in(self, discord_id: int) -> Tuple[str, List[int]]:
+        """Check in every team the user captains or manages (no awaits: safe under a burst)"""
+        teams = self.teams_by_user.get(discord_id)
+        if not teams:
+            return NOT_ELIGIBLE, []
+        new = [team_id for team_id in teams if team_id not in self.checked_in]
+        if not new:
+            return ALREADY, teams
+        for team_id in new:
+            self.checked_in.add(team_id)
+            region = self.team_regions[team_id]
+            self.counts[region] = self.counts.get(region, 0) + 1
+        self.changed = True
+        return CHECKED_IN, new
+    
+    def region_counts(self) -> List[Tuple[str, int, int]]:
+        """(region, checked in, eligible) per region"""
+        eligible: Dict[str, int] = {}
+        for region in self.team_regions.values():
+            eligible[region] = eligible.get(region, 0) + 1
+        return [(region, self.counts.get(region, 0), total) for region, total in sorted(eligible.items())]
+
+
+def check_in_embed(window: CheckInWindow, closed: bool = False) -> discord.Embed:
+    counts = window.region_counts()
+    lines = [f"**{region}:** `{checked}` / {total}" for region, checked, total in counts]
+    closes = discord.utils.format_dt(window.closes_at.replace(tzinfo=discord.utils.utc), 'R')
+    embed = discord.Embed(
+        title=f"{'🔒' if closed else '✅'} Check-in: {window.name}" + (f" ({window.region})" if window.region else ""),
+        description=(
+            ("Check-in is closed." if closed else f"Captains and managers: press **Check In** for your team. Closes {closes}.")
+            + "\n\n" + ("\n".join(lines) or "No eligible teams.")
+        ),
+        color=discord.Color.dark_grey() if closed else discord.Color.green(),
+        timestamp=datetime.utcnow()
+    )
+    embed.set_footer(text=f"{len(window.checked_in)} / {len(window.team_regions)} teams checked in")
+    return embed
+
+
+class CheckInManager:
+    """Open windows, the write queue and the flusher/closer tasks"""
+    
+    def __init__(self):
+        self.bot: Optional[discord.Client] = None
+        self._windows: Dict[int, CheckInWindow] = {}
+        self._by_message: Dict[int, CheckInWindow] = {}
+        self._pending: List[Tuple[int, int, int, datetime]] = []
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._closers: Dict[int, asyncio.Task] = {}
+        db.subscribe('team_members', self._on_member_change)
+    
+    # Windows
+    
+    async def _load(self, row: Dict) -> CheckInWindow:
+        window = CheckInWindow(
+            row,
+            await db.get_check_in_eligibility(row['region']),
+            await db.get_check_in_team_ids(row['id'])
+        )
+        self._windows[window.id] = window
+        if window.message_id:
+            self._by_message[window.message_id] = window
+        self._closers[window.id] = asyncio.create_task(self._close_when_due(window), name=f"check-in-close-{window.id}")
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop(), name="check-in-flusher")
+        return window
+    
+    async def open(self, row: Dict, channel_id: int, message_id: int) -> CheckInWindow:
+        """Start taking clicks for a window whose message has been posted"""
+        await db.set_check_in_message(row['id'], channel_id, message_id)
+        return await self._load(dict(row, channel_id=channel_id, message_id=message_id))
+    
+    async def start(self, bot: discord.Client):
+        """Resume the windows left open by a restart"""
+        self.bot = bot
+        for row in await db.get_check_in_windows('open', limit=100):
+            if row['id'] not in self._windows and row['message_id']:
+                await self._load(row)
+    
+    def get(self, window_id: int) -> Optional[CheckInWindow]:
+        return self._windows.get(window_id)
+    
+    def for_message(self, message_id: int) -> Optional[CheckInWindow]:
+        return self._by_message.get(message_id)
+    
+    def windows(self) -> List[CheckInWindow]:
+        return list(self._windows.values())
+    
+    # Clicks
+    
+    async def check_in(self, window: CheckInWindow, discord_id: int) -> Tuple[str, List[int]]:
+        """
+        Check in the user's teams. Users missing from the eligibility set
+        (joined a team after the window opened) are looked up once.
+        """
+        if discord_id not in window.teams_by_user:
+            memberships = await db.get_member_team_roles(discord_id)
+            for team_id, role in memberships.items():
+                team = team_index.get(team_id)
+                if role in ('captain', 'manager') and team and (window.region is None or team['region'] == window.region):
+                    window.add_eligible(discord_id, team_id, team['region'])
+            window.teams_by_user.setdefault(discord_id, [])
+        
+        status, team_ids = window.check_in(discord_id)
+        if status == CHECKED_IN:
+            now = datetime.utcnow()
+            self._pending.extend((window.id, team_id, discord_id, now) for team_id in team_ids)
+            metrics.inc("check_in.accepted", len(team_ids))
+        return status, team_ids
+    
+    def _on_member_change(self, change: Dict):
+        """Forget a user's eligibility after a roster change (re-checked on their next click)"""
+        if change['op'] == 'RESET':
+            for window in self._windows.values():
+                window.teams_by_user.clear()
+            return
+        for window in self._windows.values():
+            window.teams_by_user.pop(change.get('discord_id'), None)
+    
+    # Writes
+    
+    async def flush(self):
+        """Write every queued check-in in one statement"""
+        async with self._flush_lock:
+            rows, self._pending = self._pending, []
+            if not rows:
+                return
+            started = time.perf_counter()
+            try:
+                await db.add_check_ins(rows)
+            except Exception as e:
+                self._pending[:0] = rows
+                metrics.inc("check_in.flush_errors")
+                print(f"❌ Check-in flush failed ({len(rows)} queued): {e}")
+                return
+            metrics.observe("check_in.flush_rows", len(rows))
+            metrics.observe("check_in.flush_ms", (time.perf_counter() - started) * 1000)
+    
+    async def _flush_loop(self):
+        while self._windows or self._pending:
+            await asyncio.sleep(config.check_in_flush_ms / 1000)
+            await self.flush()
+            for window in list(self._windows.values()):
+                if window.changed and time.monotonic() - window.edited_at >= MESSAGE_REFRESH_SECONDS:
+                    await self._edit_message(window)
+    
+    async def _edit_message(self, window: CheckInWindow, closed: bool = False):
+        if self.bot is None or not window.channel_id or not window.message_id:
+            return
+        window.changed = False
+        window.edited_at = time.monotonic()
+        message = self.bot.get_partial_messageable(window.channel_id).get_partial_message(window.message_id)
+        try:
+            if closed:
+                await message.edit(embed=check_in_embed(window, closed=True), view=None)
+            else:
+                await message.edit(embed=check_in_embed(window))
+        except discord.HTTPException as e:
+            print(f"⚠️  Could not update check-in message for window {window.id}: {e}")
+    
+    # Closing
+    
+    async def _close_when_due(self, window: CheckInWindow):
+        delay = (window.closes_at - datetime.utcnow()).total_seconds()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            await self.close(window.id)
+        except Exception as e:
+            print(f"❌ Failed to close check-in window {window.id}: {e}")
+    
+    async def close(self, window_id: int) -> Optional[List[Dict]]:
+        """
+        Stop taking clicks, write the queue and close the window. Returns the
+        checked-in field (see db.close_check_in_window), or None if the window
+        wasn't open.
+        """
+        window = self._windows.pop(window_id, None)
+        if window is not None:
+            self._by_message.pop(window.message_id, None)
+            closer = self._closers.pop(window_id, None)
+            if closer is not None and closer is not asyncio.current_task():
+                closer.cancel()
+        
+        await self.flush()
+        field = await db.close_check_in_window(window_id)
+        if field is not None and window is not None:
+            print(f"✅ Check-in '{window.name}' closed: {len(field)} teams checked in")
+            await self._edit_message(window, closed=True)
+            await self._post_field(window, field)
+        return field
+    
+    async def _post_field(self, window: CheckInWindow, field: List[Dict]):
+        """Post the checked-in field under the check-in message as a text file"""
+        if self.bot is None or not window.channel_id:
+            return
+        listing = "\n".join(
+            f"{team['id']}\t{team['team_name']}\t[{team['team_tag'] or '-'}]\t{team['region']}" for team in field
+        )
+        try:
+            await self.bot.get_partial_messageable(window.channel_id).send(
+                f"🔒 Check-in **{window.name}** closed - **{len(field)}** teams checked in.",
+                file=discord.File(io.BytesIO(listing.encode()), filename=f"check_in_{window.id}.txt")
+            )
+        except discord.HTTPException as e:
+            print(f"⚠️  Could not post the check-in field for window {window.id}: {e}")
+
+
+# Global check-in manager
+check_ins = CheckInManager()
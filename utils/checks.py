@@ -1,21 +1,21 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import os
+from utils.config import config
 
 
 def commands_channel_only():
     """Decorator to restrict commands to a specific channel"""
     async def predicate(interaction: discord.Interaction) -> bool:
-        commands_channel_id = os.getenv("COMMANDS_CHANNEL_ID")
+        commands_channel_id = config.commands_channel_id
         
         # If not configured, allow everywhere
         if not commands_channel_id:
             return True
         
         # Check if command is used in the designated channel
-        if interaction.channel_id != int(commands_channel_id):
-            commands_channel = interaction.guild.get_channel(int(commands_channel_id))
+        if interaction.channel_id != commands_channel_id:
+            commands_channel = config.get_channel(interaction.guild, 'COMMANDS_CHANNEL_ID')
             channel_mention = commands_channel.mention if commands_channel else f"<#{commands_channel_id}>"
             
             await interaction.response.send_message(
@@ -0,0 +1,269 @@
+"""
+Bot configuration
+
+Every setting in the .env file is parsed and validated once into a typed
+attribute on the global `config` (ROLE_ID keys become `config.captain_role_id`
+and so on), so event handlers and command callbacks never touch os.environ.
+Role and channel objects are resolved lazily and cached per guild. /admin-reload-config
+re-reads the .env file and clears the caches without a restart.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import discord
+from dotenv import load_dotenv
+
+
+ROLE_KEYS = (
+    "TEST_ROLE_ID",
+    "ADMINISTRATOR_ROLE_ID",
+    "BOTS_ROLE_ID",
+    "BOT_ACCESS_ROLE_ID",
+    "STAFF_ROLE_ID",
+    "CAPTAIN_ROLE_ID",
+    "MANAGER_ROLE_ID",
+    "AMERICAS_ROLE_ID",
+    "EMEA_ROLE_ID",
+    "INDIA_ROLE_ID",
+    "APAC_ROLE_ID",
+    "CN_ROLE_ID",
+)
+
+CHANNEL_KEYS = (
+    "REGISTRATION_CHANNEL_ID",
+    "TEAM_REGISTRATION_CHANNEL_ID",
+    "MANAGER_REGISTRATION_CHANNEL_ID",
+    "COACH_REGISTRATION_CHANNEL_ID",
+    "BOT_LOGS_CHANNEL_ID",
+    "LOGO_STORAGE_CHANNEL_ID",
+    "COMMANDS_CHANNEL_ID",
+    "TEAM_REGISTRATION_LOG_CHANNEL_ID",
+)
+
+# Region -> region role keys (India players also get the APAC role)
+REGION_ROLE_KEYS = {
+    'NA': ('AMERICAS_ROLE_ID',),
+    'BR': ('AMERICAS_ROLE_ID',),
+    'LATAM': ('AMERICAS_ROLE_ID',),
+    'EU': ('EMEA_ROLE_ID',),
+    'India': ('INDIA_ROLE_ID', 'APAC_ROLE_ID'),
+    'AP': ('APAC_ROLE_ID',),
+    'KR': ('APAC_ROLE_ID',),
+    'CN': ('CN_ROLE_ID',),
+}
+
+# Settings only read at startup; changing them needs a restart
+RESTART_KEYS = (
+    "DISCORD_BOT_TOKEN",
+    "DATABASE_URL",
+    "DATABASE_BACKEND",
+    "LOOP_MONITOR_ENABLED",
+    "LOOP_MONITOR_INTERVAL_MS",
+    "LOOP_LAG_THRESHOLD_MS",
+    "PROFILING_INTERVAL_MS",
+    "PROFILING_OUTPUT_DIR",
+    "PRESENCE_MODE",
+    "MEMBER_CACHE_POLICY",
+    "CARD_RENDER_WORKERS",
+    "CARD_CACHE_DIR",
+    "SHARD_COUNT",
+    "SHARD_IDS",
+)
+
+
+class BotConfig:
+    """Typed view of the .env settings, loaded once"""
+    
+    def __init__(self):
+        self.errors: List[str] = []
+        self._values: Dict[str, object] = {}
+        self._roles: Dict[Tuple[int, str], discord.Role] = {}
+        self._channels: Dict[str, discord.abc.GuildChannel] = {}
+        self.load()
+    
+    # Parsing
+    
+    def _id(self, key: str) -> Optional[int]:
+        raw = os.getenv(key)
+        if not raw:
+            return None
+        try:
+            return int(raw)
+        except ValueError:
+            self.errors.append(key)
+            print(f"❌ Invalid {key} in .env file")
+            return None
+    
+    def _float(self, key: str, default: float) -> float:
+        raw = os.getenv(key)
+        if not raw:
+            return default
+        try:
+            return float(raw)
+        except ValueError:
+            self.errors.append(key)
+            print(f"❌ Invalid {key} in .env file, using {default:g}")
+            return default
+    
+    def _flag(self, key: str, default: bool) -> bool:
+        raw = os.getenv(key)
+        if not raw:
+            return default
+        return raw.lower() in ("1", "true", "yes")
+    
+    def _choice(self, key: str, choices: Tuple[str, ...]) -> str:
+        """One of `choices` (the first is the default)"""
+        raw = (os.getenv(key) or choices[0]).lower()
+        if raw not in choices:
+            self.errors.append(key)
+            print(f"❌ Invalid {key} '{raw}' in .env file, using {choices[0]}")
+            return choices[0]
+        return raw
+    
+    def _shards(self) -> Tuple[bool, Optional[int], Optional[List[int]]]:
+        """SHARD_COUNT ("auto" or a number) and SHARD_IDS (comma list, needs a numeric count)"""
+        raw_count = (os.getenv("SHARD_COUNT") or "").strip().lower()
+        raw_ids = (os.getenv("SHARD_IDS") or "").strip()
+        if not raw_count:
+            return False, None, None
+        if raw_count == "auto":
+            if raw_ids:
+                self.errors.append("SHARD_IDS")
+                print("❌ SHARD_IDS needs a numeric SHARD_COUNT, ignoring it")
+            return True, None, None
+        
+        try:
+            count = int(raw_count)
+            if count < 1:
+                raise ValueError
+        except ValueError:
+            self.errors.append("SHARD_COUNT")
+            print(f"❌ Invalid SHARD_COUNT '{raw_count}' in .env file, sharding disabled")
+            return False, None, None
+        
+        if not raw_ids:
+            return True, count, None
+        try:
+            ids = sorted({int(part) for part in raw_ids.split(",") if part.strip()})
+            if not ids or ids[0] < 0 or ids[-1] >= count:
+                raise ValueError
+        except ValueError:
+            self.errors.append("SHARD_IDS")
+            print(f"❌ Invalid SHARD_IDS '{raw_ids}' in .env file, running all {count} shards")
+            return True, count, None
+        return True, count, ids
+    
+    def load(self):
+        """Parse the current environment into attributes and drop cached objects"""
+        self.errors = []
+        values = {}
+        
+        for key in ROLE_KEYS + CHANNEL_KEYS:
+            values[key] = self._id(key)
+        
+        values["DISCORD_BOT_TOKEN"] = os.getenv("DISCORD_BOT_TOKEN")
+        values["DATABASE_URL"] = os.getenv("DATABASE_URL")
+        values["DATABASE_BACKEND"] = os.getenv("DATABASE_BACKEND", "postgres").lower()
+        
+        values["LOOP_MONITOR_ENABLED"] = self._flag("LOOP_MONITOR_ENABLED", True)
+        values["LOOP_MONITOR_INTERVAL_MS"] = self._float("LOOP_MONITOR_INTERVAL_MS", 100)
+        values["LOOP_LAG_THRESHOLD_MS"] = self._float("LOOP_LAG_THRESHOLD_MS", 250)
+        
+        values["PROFILING_ENABLED"] = self._flag("PROFILING_ENABLED", False)
+        values["PROFILING_INTERVAL_MS"] = self._float("PROFILING_INTERVAL_MS", 10)
+        values["PROFILING_OUTPUT_DIR"] = os.getenv("PROFILING_OUTPUT_DIR", "profiles")
+        
+        values["PRESENCE_MODE"] = self._choice("PRESENCE_MODE", ("events", "poll"))
+        values["PRESENCE_POLL_INTERVAL_SECONDS"] = self._float("PRESENCE_POLL_INTERVAL_SECONDS", 30)
+        values["PRESENCE_ACTIVITY_WINDOW_MINUTES"] = self._float("PRESENCE_ACTIVITY_WINDOW_MINUTES", 15)
+        values["MEMBER_CACHE_POLICY"] = self._choice("MEMBER_CACHE_POLICY", ("full", "lazy"))
+        
+        values["RATING_SYSTEM"] = self._choice("RATING_SYSTEM", ("glicko2", "elo"))
+        values["RATING_PERIOD_DAYS"] = self._float("RATING_PERIOD_DAYS", 7)
+        
+        values["SCHEDULE_SLOT_MINUTES"] = int(self._float("SCHEDULE_SLOT_MINUTES", 60))
+        values["SCHEDULE_MAX_MATCHES_PER_DAY"] = int(self._float("SCHEDULE_MAX_MATCHES_PER_DAY", 2))
+        values["SCHEDULE_HORIZON_DAYS"] = int(self._float("SCHEDULE_HORIZON_DAYS", 7))
+        
+        values["CHECK_IN_FLUSH_MS"] = self._float("CHECK_IN_FLUSH_MS", 250)
+        
+        values["REGISTRATION_PANEL_REFRESH_SECONDS"] = self._float("REGISTRATION_PANEL_REFRESH_SECONDS", 15)
+        
+        values["CARDS_ENABLED"] = self._flag("CARDS_ENABLED", True)
+        values["CARD_RENDER_WORKERS"] = int(self._float("CARD_RENDER_WORKERS", 2))
+        values["CARD_CACHE_DIR"] = os.getenv("CARD_CACHE_DIR", "card_cache")
+        values["CARD_CACHE_MEMORY_MB"] = self._float("CARD_CACHE_MEMORY_MB", 32)
+        values["CARD_CACHE_DISK_MB"] = self._float("CARD_CACHE_DISK_MB", 256)
+        
+        values["ROLE_RECONCILE_EDITS_PER_SECOND"] = self._float("ROLE_RECONCILE_EDITS_PER_SECOND", 2)
+        values["PROVISION_CONCURRENCY"] = int(self._float("PROVISION_CONCURRENCY", 3))
+        values["PROVISION_REQUESTS_PER_SECOND"] = self._float("PROVISION_REQUESTS_PER_SECOND", 2)
+        
+        sharded, shard_count, shard_ids = self._shards()
+        values["SHARDED"] = sharded
+        values["SHARD_COUNT"] = shard_count
+        values["SHARD_IDS"] = shard_ids
+        
+        self._values = values
+        for key, value in values.items():
+            setattr(self, key.lower(), value)
+        
+        self.clear_cache()
+    
+    def reload(self) -> List[str]:
+        """Re-read the .env file, returning the keys whose values changed"""
+        previous = dict(self._values)
+        load_dotenv(override=True)
+        self.load()
+        return [key for key, value in self._values.items() if previous.get(key) != value]
+    
+    # Lookups
+    
+    def get_id(self, key: str) -> Optional[int]:
+        """ID for a role/channel key chosen at runtime (e.g. CAPTAIN_ROLE_ID vs MANAGER_ROLE_ID)"""
+        return self._values.get(key)
+    
+    def region_role_ids(self, region: str) -> List[int]:
+        """Region role IDs to assign to a player registering in `region`"""
+        return [
+            self._values[key] for key in REGION_ROLE_KEYS.get(region, ())
+            if self._values.get(key)
+        ]
+    
+    def get_role(self, guild: discord.Guild, key: str) -> Optional[discord.Role]:
+        """Cached role for a ROLE_ID key (None when unset or missing from the guild)"""
+        cached = self._roles.get((guild.id, key))
+        if cached is not None:
+            return cached
+        
+        role_id = self._values.get(key)
+        if not role_id:
+            return None
+        role = guild.get_role(role_id)
+        if role is not None:
+            self._roles[(guild.id, key)] = role
+        return role
+    
+    def get_channel(self, client, key: str):
+        """Cached channel for a CHANNEL_ID key; `client` is a bot or a guild"""
+        cached = self._channels.get(key)
+        if cached is not None:
+            return cached
+        
+        channel_id = self._values.get(key)
+        if not channel_id:
+            return None
+        channel = client.get_channel(channel_id)
+        if channel is not None:
+            self._channels[key] = channel
+        return channel
+    
+    def clear_cache(self):
+        """Forget resolved roles/channels (after role/channel deletes or a reload)"""
+        self._roles.clear()
+        self._channels.clear()
+
+
+# Global config instance
+config = BotConfig()
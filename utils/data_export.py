@@ -0,0 +1,189 @@
+"""
+Tournament data export
+
+Dumps players, teams, team_members, the stats tables and bans to compressed
+files for /admin-export and export_data.py. Rows come from db.export_tables
+(a server-side cursor, one snapshot) a batch at a time and are written
+straight to disk - gzipped CSV, gzipped NDJSON or Parquet (zstd, needs
+pyarrow) - so memory stays at one batch whatever the table size. With a part
+size each table is split into numbered parts that start a new file before
+the limit (each part is a complete file with its own header), which keeps
+every part under the Discord upload limit.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from database.backend import EXPORT_TABLES
+from database.db import db
+
+
+FORMATS = ('csv', 'ndjson', 'parquet')
+EXTENSIONS = {'csv': '.csv.gz', 'ndjson': '.ndjson.gz', 'parquet': '.parquet'}
+BATCH_SIZE = 5000
+# Discord's default upload limit for one message (all attachments together)
+DISCORD_UPLOAD_BYTES = 10 * 1024 * 1024
+# Room left in a part for the data the compressor still buffers (and the parquet footer)
+PART_MARGIN = 1024 * 1024
+MIN_PART_BYTES = 2 * PART_MARGIN
+
+
+class ExportError(Exception):
+    """The export can't run with these options"""
+
+
+def _arrow_type(pa, column: str):
+    if column.endswith('_at'):
+        return pa.timestamp('us', tz='UTC') if column == 'banned_at' else pa.timestamp('us')
+    if column == 'tournament_notifications':
+        return pa.bool_()
+    if column in ('ign', 'player_id', 'region', 'agent', 'team_name', 'team_tag', 'logo_url', 'role', 'reason'):
+        return pa.string()
+    return pa.int64()
+
+
+class _PartWriter:
+    """Writes one table to <table>[.partNNN]<ext> files, starting a new part before part_bytes"""
+    
+    def __init__(self, out_dir: str, table: str, fmt: str, part_bytes: Optional[int]):
+        self.out_dir = out_dir
+        self.table = table
+        self.fmt = fmt
+        self.part_bytes = part_bytes
+        self.columns = EXPORT_TABLES[table][0]
+        self.paths: List[str] = []
+        self.rows = 0
+        self._raw = None
+        self._text = None
+        self._writer = None
+        if fmt == 'parquet':
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError:
+                raise ExportError("Parquet export needs pyarrow (`pip install pyarrow`).")
+            self._pa = pyarrow
+            self._pq = pyarrow.parquet
+            self._schema = pyarrow.schema([(column, _arrow_type(pyarrow, column)) for column in self.columns])
+    
+    def _path(self, part: int) -> str:
+        name = self.table if self.part_bytes is None else f"{self.table}.part{part:03d}"
+        return os.path.join(self.out_dir, name + EXTENSIONS[self.fmt])
+    
+    def _open(self):
+        path = self._path(len(self.paths) + 1)
+        self.paths.append(path)
+        if self.fmt == 'parquet':
+            self._writer = self._pq.ParquetWriter(path, self._schema, compression='zstd')
+            return
+        self._raw = open(path, 'wb')
+        self._text = io.TextIOWrapper(
+            gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=6), encoding='utf-8', newline=''
+        )
+        if self.fmt == 'csv':
+            self._writer = csv.writer(self._text)
+            self._writer.writerow(self.columns)
+    
+    def _size(self) -> int:
+        if self.fmt == 'parquet':
+            return os.path.getsize(self.paths[-1])
+        return self._raw.tell()
+    
+    def _close_part(self):
+        if self.fmt == 'parquet':
+            self._writer.close()
+        else:
+            self._text.close()
+            self._raw.close()
+        self._writer = self._text = self._raw = None
+    
+    def write(self, rows: List[Tuple]):
+        if self.paths and self.part_bytes is not None and self._size() >= self.part_bytes - PART_MARGIN:
+            self._close_part()
+        if self._raw is None and self._writer is None:
+            self._open()
+        
+        if self.fmt == 'csv':
+            self._writer.writerows(rows)
+        elif self.fmt == 'ndjson':
+            self._text.writelines(
+                json.dumps(dict(zip(self.columns, row)), default=str, ensure_ascii=False) + "\n" for row in rows
+            )
+        else:
+            self._writer.write_table(self._pa.Table.from_pylist(
+                [dict(zip(self.columns, row)) for row in rows], schema=self._schema
+            ))
+        self.rows += len(rows)
+    
+    def close(self) -> List[str]:
+        if not self.paths:
+            # Empty table: still write a file (with the header / schema)
+            self._open()
+        if self._raw is not None or self._writer is not None:
+            self._close_part()
+        return self.paths
+
+
+async def export(
+    tables: List[str],
+    fmt: str,
+    out_dir: str,
+    part_bytes: Optional[int] = None,
+    batch_size: int = BATCH_SIZE
+) -> Dict:
+    """
+    Export tables to out_dir. Returns {'tables': {table: {'rows', 'files',
+    'bytes'}}, 'rows', 'bytes', 'seconds', 'rows_per_second'}.
+    """
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format '{fmt}' (use {', '.join(FORMATS)}).")
+    unknown = [table for table in tables if table not in EXPORT_TABLES]
+    if unknown:
+        raise ExportError(f"Unknown table(s): {', '.join(unknown)} (use {', '.join(EXPORT_TABLES)}).")
+    if part_bytes is not None and part_bytes < MIN_PART_BYTES:
+        raise ExportError(f"Parts must be at least {MIN_PART_BYTES // (1024 * 1024)}MB.")
+    
+    os.makedirs(out_dir, exist_ok=True)
+    writers = {table: _PartWriter(out_dir, table, fmt, part_bytes) for table in tables}
+    started = time.perf_counter()
+    try:
+        async for table, rows in db.export_tables(tables, batch_size):
+            writers[table].write(rows)
+    finally:
+        files = {table: writer.close() for table, writer in writers.items()}
+    seconds = time.perf_counter() - started
+    
+    summary = {}
+    for table, writer in writers.items():
+        summary[table] = {
+            'rows': writer.rows,
+            'files': files[table],
+            'bytes': sum(os.path.getsize(path) for path in files[table])
+        }
+    total_rows = sum(row['rows'] for row in summary.values())
+    return {
+        'tables': summary,
+        'rows': total_rows,
+        'bytes': sum(row['bytes'] for row in summary.values()),
+        'seconds': seconds,
+        'rows_per_second': total_rows / seconds if seconds else 0.0
+    }
+
+
+def upload_batches(paths: List[str], limit: int = DISCORD_UPLOAD_BYTES) -> List[List[str]]:
+    """Group files into messages of at most 10 attachments and `limit` bytes"""
+    batches: List[List[str]] = []
+    size = 0
+    for path in paths:
+        file_size = os.path.getsize(path)
+        if not batches or len(batches[-1]) == 10 or size + file_size > limit:
+            batches.append([])
+            size = 0
+        batches[-1].append(path)
+        size += file_size
+    return batches
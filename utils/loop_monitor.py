@@ -0,0 +1,154 @@
+"""
+Event loop lag monitor
+
+A heartbeat coroutine measures how late the loop wakes it up. A watchdog thread
+watches that heartbeat and, when it stops beating for longer than the threshold,
+captures the stack of whatever is running on the loop thread at that moment.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+
+from utils.config import config
+from utils.metrics import metrics
+
+
+class LoopLagMonitor:
+    """Measures event loop lag and captures the stack of stalled coroutines"""
+    
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, stack_limit: int = 25):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stalls = deque(maxlen=20)  # Most recent stall reports
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._current_stall: Optional[Dict] = None
+        # Guards _last_beat and _current_stall, shared by the loop and the watchdog thread
+        self._lock = threading.Lock()
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+    
+    def start(self):
+        """Start monitoring the running loop (must be called from the loop thread)"""
+        if self._heartbeat_task:
+            return
+        
+        self.loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        
+        self._heartbeat_task = self.loop.create_task(self._heartbeat(), name="loop-lag-heartbeat")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        print(f"✓ Event loop monitor started (threshold {self.threshold * 1000:.0f}ms)")
+    
+    def stop(self):
+        """Stop the heartbeat and watchdog"""
+        self._stopped.set()
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+    
+    async def _heartbeat(self):
+        """Sleep for a fixed interval and record how late we were woken up"""
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            with self._lock:
+                self._last_beat = now
+                stall = self._current_stall
+                self._current_stall = None
+            
+            metrics.observe("event_loop.lag_ms", lag * 1000)
+            metrics.set_gauge("event_loop.last_lag_ms", lag * 1000)
+            
+            if stall is not None:
+                # The loop is running again - finish the report captured by the watchdog
+                stall['duration_ms'] = lag * 1000
+                self.stalls.append(stall)
+                metrics.inc("event_loop.stalls")
+                metrics.observe("event_loop.stall_ms", lag * 1000)
+                self._log_stall(stall)
+    
+    def _watch(self):
+        """Watchdog thread: capture the loop thread's stack while it is blocked"""
+        poll = self.interval / 2
+        while not self._stopped.wait(poll):
+            with self._lock:
+                if self._current_stall is not None:
+                    continue
+                last_beat = self._last_beat
+            
+            blocked_for = time.monotonic() - last_beat - self.interval
+            if blocked_for < self.threshold:
+                continue
+            # Capture outside the lock so a resuming loop never waits on it, then
+            # keep the report only if no beat landed meanwhile (else the stack is
+            # from after the stall)
+            stall = self._capture(blocked_for)
+            with self._lock:
+                if self._last_beat == last_beat:
+                    self._current_stall = stall
+    
+    def _capture(self, blocked_for: float) -> Dict:
+        """Snapshot the task and stack that are currently holding the loop"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = traceback.format_stack(frame, limit=self.stack_limit) if frame else []
+        
+        task_name = None
+        coro_name = None
+        try:
+            task = asyncio.current_task(self.loop)
+            if task is not None:
+                task_name = task.get_name()
+                coro = task.get_coro()
+                coro_name = getattr(coro, '__qualname__', repr(coro))
+        except RuntimeError:
+            pass
+        
+        return {
+            'detected_at': time.time(),
+            'blocked_ms': blocked_for * 1000,
+            'duration_ms': None,
+            'task': task_name,
+            'coroutine': coro_name,
+            'stack': stack
+        }
+    
+    def _log_stall(self, stall: Dict):
+        print(
+            f"⚠️  Event loop blocked for {stall['duration_ms']:.0f}ms "
+            f"(task: {stall['task'] or 'none'}, coroutine: {stall['coroutine'] or 'n/a'})"
+        )
+        for line in stall['stack'][-8:]:
+            print(line.rstrip())
+    
+    def recent_stalls(self, limit: int = 5) -> List[Dict]:
+        """Get the most recent stall reports, newest first"""
+        return list(self.stalls)[::-1][:limit]
+
+
+def create_loop_monitor() -> Optional[LoopLagMonitor]:
+    """Build the monitor from the bot config (None when disabled)"""
+    if not config.loop_monitor_enabled:
+        return None
+    
+    return LoopLagMonitor(
+        interval=config.loop_monitor_interval_ms / 1000,
+        threshold=config.loop_lag_threshold_ms / 1000
+    )
+
+
+# Global loop monitor instance (None when disabled)
+loop_monitor = create_loop_monitor()
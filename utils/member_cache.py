@@ -0,0 +1,164 @@
+"""
+Member cache policy
+
+MEMBER_CACHE_POLICY=full (default) chunks every guild member at startup, as
+discord.py does with the members intent. MEMBER_CACHE_POLICY=lazy skips
+chunking: members are fetched on demand through the gateway and cached, and
+only holders of the staff, position and region roles are pre-warmed after
+startup. Startup time and RSS are reported so the two can be compared.
+"""
+
+import sys
+import time
+from typing import Dict, List, Optional
+
+import discord
+
+from utils.config import config
+
+
+# Roles whose holders the bot looks up constantly (thread staff, team positions, region roles)
+PREWARM_ROLE_KEYS = (
+    "ADMINISTRATOR_ROLE_ID",
+    "BOT_ACCESS_ROLE_ID",
+    "CAPTAIN_ROLE_ID",
+    "MANAGER_ROLE_ID",
+    "AMERICAS_ROLE_ID",
+    "EMEA_ROLE_ID",
+    "INDIA_ROLE_ID",
+    "APAC_ROLE_ID",
+    "CN_ROLE_ID",
+)
+
+# Gateway member requests accept at most 100 user IDs
+QUERY_BATCH_SIZE = 100
+
+_process_started = time.monotonic()
+_prewarmed = False
+
+
+def is_lazy() -> bool:
+    return config.member_cache_policy == "lazy"
+
+
+def presence_data() -> bool:
+    """Member requests may only ask for presences when the intent is on"""
+    return config.presence_mode != "poll"
+
+
+def bot_member_cache_options(intents: discord.Intents) -> Dict:
+    """Keyword arguments for the Bot constructor under the configured policy"""
+    if is_lazy():
+        return {
+            'chunk_guilds_at_startup': False,
+            'member_cache_flags': discord.MemberCacheFlags.from_intents(intents)
+        }
+    return {'chunk_guilds_at_startup': True}
+
+
+async def get_or_fetch_member(guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+    """Cached member, or fetch and cache it over the gateway when the cache is lazy"""
+    member = guild.get_member(user_id)
+    if member is not None or not is_lazy():
+        return member
+    
+    try:
+        members = await guild.query_members(
+            user_ids=[user_id], limit=1, cache=True, presences=presence_data()
+        )
+    except Exception as e:
+        print(f"✗ Failed to fetch member {user_id}: {e}")
+        return None
+    return members[0] if members else None
+
+
+async def cache_members(guild: discord.Guild, user_ids: List[int]) -> int:
+    """Fetch and cache the given members over the gateway when the cache is lazy; returns how many were fetched"""
+    if not is_lazy():
+        return 0
+    
+    missing = sorted({user_id for user_id in user_ids if guild.get_member(user_id) is None})
+    presences = presence_data()
+    cached = 0
+    for i in range(0, len(missing), QUERY_BATCH_SIZE):
+        members = await guild.query_members(
+            user_ids=missing[i:i + QUERY_BATCH_SIZE], limit=QUERY_BATCH_SIZE, cache=True, presences=presences
+        )
+        cached += len(members)
+    return cached
+
+
+async def search_members(guild: discord.Guild, query: str) -> List[discord.Member]:
+    """Members to match a name search against (gateway prefix search when lazy)"""
+    if not is_lazy():
+        return list(guild.members)
+    
+    try:
+        return await guild.query_members(query=query, limit=100, cache=True)
+    except Exception as e:
+        print(f"✗ Member search failed: {e}")
+        return []
+
+
+async def prewarm_guild(guild: discord.Guild) -> int:
+    """
+    Cache only the holders of PREWARM_ROLE_KEYS.
+    
+    The member list is streamed over REST (1000 per page, nothing kept), then the
+    matching members are requested over the gateway so they are cached together
+    with their presence.
+    """
+    wanted = {config.get_id(key) for key in PREWARM_ROLE_KEYS} - {None}
+    if not wanted:
+        return 0
+    
+    user_ids = []
+    async for member in guild.fetch_members(limit=None):
+        if any(role.id in wanted for role in member.roles):
+            user_ids.append(member.id)
+    return await cache_members(guild, user_ids)
+
+
+async def prewarm(bot: discord.Client):
+    """Pre-warm every guild once (on_ready fires again after reconnects)"""
+    global _prewarmed
+    if _prewarmed or not is_lazy():
+        return
+    _prewarmed = True
+    
+    for guild in bot.guilds:
+        try:
+            cached = await prewarm_guild(guild)
+            print(f"✓ Pre-warmed {cached} role holder(s) in {guild.name}")
+        except Exception as e:
+            print(f"✗ Failed to pre-warm members in {guild.name}: {e}")
+    report("pre-warmed", bot)
+
+
+def rss_mb() -> float:
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    
+    # No /proc (macOS, Windows) - fall back to peak RSS where available
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def report(stage: str, bot: discord.Client):
+    """Print startup time, cached member count and RSS for the active policy"""
+    cached = sum(len(guild.members) for guild in bot.guilds)
+    print(
+        f"📊 Member cache ({config.member_cache_policy}) {stage}: "
+        f"{time.monotonic() - _process_started:.1f}s since start, "
+        f"{cached} members cached, RSS {rss_mb():.0f} MB"
+    )
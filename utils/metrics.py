@@ -0,0 +1,106 @@
+"""
+In-process metrics registry for bot health monitoring
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class Histogram:
+    """Keeps running totals plus a bounded window of recent samples for percentiles"""
+    
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+    
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        self.samples.append(value)
+    
+    def percentile(self, pct: float) -> float:
+        """Get a percentile (0-100) over the recent sample window"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+    
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'avg': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'max': self.max
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms keyed by metric name"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+    
+    def inc(self, name: str, amount: float = 1):
+        """Increment a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def set_gauge(self, name: str, value: float):
+        """Set a gauge to its current value"""
+        with self._lock:
+            self.gauges[name] = value
+    
+    def observe(self, name: str, value: float):
+        """Record a sample in a histogram"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+    
+    def get_histogram(self, name: str) -> Optional[Histogram]:
+        return self.histograms.get(name)
+    
+    def snapshot(self) -> Dict:
+        """Get a point-in-time copy of every metric"""
+        with self._lock:
+            return {
+                'uptime_seconds': time.time() - self.started_at,
+                'counters': dict(self.counters),
+                'gauges': dict(self.gauges),
+                'histograms': {name: h.summary() for name, h in self.histograms.items()}
+            }
+    
+    def format_lines(self, prefix: Optional[str] = None) -> List[str]:
+        """Format the snapshot as human readable lines, optionally filtered by name prefix"""
+        snap = self.snapshot()
+        lines = []
+        for name, value in sorted(snap['counters'].items()):
+            if not prefix or name.startswith(prefix):
+                lines.append(f"{name} = {value:g}")
+        for name, value in sorted(snap['gauges'].items()):
+            if not prefix or name.startswith(prefix):
+                lines.append(f"{name} = {value:.2f}")
+        for name, stats in sorted(snap['histograms'].items()):
+            if not prefix or name.startswith(prefix):
+                lines.append(
+                    f"{name}: n={stats['count']} avg={stats['avg']:.2f} "
+                    f"p50={stats['p50']:.2f} p99={stats['p99']:.2f} max={stats['max']:.2f}"
+                )
+        return lines
+
+
+# Global metrics instance
+metrics = MetricsRegistry()
@@ -0,0 +1,45 @@
+"""
+Pacing for bulk Discord API work
+
+discord.py already waits out exhausted rate limit buckets, but a bulk job
+that keeps a bucket drained starves the interactive commands sharing it.
+A Pacer spaces calls to a target rate instead: a call that comes back
+slowly (held back by discord.py's limiter) or with a 429 halves the rate,
+and every quick call wins a tenth of the target back.
+"""
+
+import asyncio
+import time
+
+from utils.metrics import metrics
+
+
+# A call taking this long was held back by a rate limit
+RATE_LIMITED_SECONDS = 1.0
+MIN_PER_SECOND = 0.2
+
+
+class Pacer:
+    """Spaces calls out to `per_second`, slowing down when Discord rate limits them"""
+    
+    def __init__(self, per_second: float, metric: str):
+        self.max_rate = max(MIN_PER_SECOND, per_second)
+        self.rate = self.max_rate
+        self.metric = metric
+        self._next = 0.0
+    
+    async def wait(self):
+        """Sleep until the next call may start (shared by concurrent workers)"""
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + 1 / self.rate
+        if start > now:
+            await asyncio.sleep(start - now)
+    
+    def done(self, began: float, rate_limited: bool = False):
+        """Record a call that started at `began` (time.monotonic())"""
+        if rate_limited or time.monotonic() - began >= RATE_LIMITED_SECONDS:
+            self.rate = max(MIN_PER_SECOND, self.rate / 2)
+            metrics.inc(self.metric)
+        else:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
@@ -0,0 +1,129 @@
+"""
+Permission checks
+
+Declarative app command checks for staff and team roles. Role IDs come from
+the config and are matched against the roles on the member object itself -
+for a command that is the interaction payload, which Discord sends fresh
+every time, so a revoked role stops working at once even when the member
+isn't cached (MEMBER_CACHE_POLICY=lazy) and no member update ever arrives.
+Team-scoped checks are answered from the database's membership cache.
+
+Usage:
+    @app_commands.command(name="admin-ban-player")
+    @admin_or_bots("❌ Only administrators and bot managers can ban players.")
+    async def admin_ban_player(self, interaction, ...):
+"""
+
+from typing import FrozenSet, List, Tuple
+
+import discord
+from discord import app_commands
+
+from database.db import db
+from utils.config import config
+
+
+DEFAULT_MESSAGE = "❌ You don't have permission to use this command."
+
+
+class PermissionResolver:
+    """Answers role and team permission questions"""
+    
+    @staticmethod
+    def role_ids(member) -> FrozenSet[int]:
+        """
+        Role IDs a guild member has (empty for users outside a guild). Read
+        from the member every time - never cached by member ID, since a
+        member whose roles changed may not get a member update event.
+        """
+        if getattr(member, 'guild', None) is None:
+            return frozenset()
+        return frozenset(role.id for role in member.roles)
+    
+    def has_any(self, member, *keys: str) -> bool:
+        """Whether the member has any of the configured roles (by config key)"""
+        wanted = {config.get_id(key) for key in keys}
+        wanted.discard(None)
+        return bool(wanted) and not self.role_ids(member).isdisjoint(wanted)
+    
+    async def team_ids(self, discord_id: int, *team_roles: str) -> List[int]:
+        """IDs of the teams where the user holds one of `team_roles`"""
+        memberships = await db.get_member_team_roles(discord_id)
+        return [team_id for team_id, role in memberships.items() if role in team_roles]
+    
+    async def team_role(self, discord_id: int, team_id: int):
+        """The user's role on a team ('captain', 'manager', ...) or None"""
+        memberships = await db.get_member_team_roles(discord_id)
+        return memberships.get(team_id)
+
+
+# Global resolver instance
+permissions = PermissionResolver()
+
+
+def has_roles(*keys: str, message: str = DEFAULT_MESSAGE):
+    """Decorator to restrict a command to members with any of the configured roles"""
+    async def predicate(interaction: discord.Interaction) -> bool:
+        if permissions.has_any(interaction.user, *keys):
+            return True
+        
+        await interaction.response.send_message(message, ephemeral=True)
+        return False
+    
+    return app_commands.check(predicate)
+
+
+def admin_only(message: str = DEFAULT_MESSAGE):
+    return has_roles('ADMINISTRATOR_ROLE_ID', message=message)
+
+
+def bots_only(message: str = DEFAULT_MESSAGE):
+    return has_roles('BOTS_ROLE_ID', message=message)
+
+
+def staff_only(message: str = DEFAULT_MESSAGE):
+    return has_roles('STAFF_ROLE_ID', message=message)
+
+
+def admin_or_bots(message: str = DEFAULT_MESSAGE):
+    """Administrators and bot managers - the check every /admin-* command uses"""
+    return has_roles('ADMINISTRATOR_ROLE_ID', 'BOTS_ROLE_ID', message=message)
+
+
+def _team_check(team_roles: Tuple[str, ...], role_keys: Tuple[str, ...], role_message: str, team_message: str):
+    async def predicate(interaction: discord.Interaction) -> bool:
+        if not permissions.has_any(interaction.user, *role_keys):
+            await interaction.response.send_message(role_message, ephemeral=True)
+            return False
+        
+        if not await permissions.team_ids(interaction.user.id, *team_roles):
+            await interaction.response.send_message(team_message, ephemeral=True)
+            return False
+        
+        return True
+    
+    return app_commands.check(predicate)
+
+
+def captain_of_team(message: str = "❌ You must be a team captain to use this command!"):
+    """Decorator requiring the Captain role and captaincy of at least one team"""
+    return _team_check(
+        ('captain',), ('CAPTAIN_ROLE_ID',),
+        "❌ You need the Captain role to use this command.", message
+    )
+
+
+def manager_of_team(message: str = "❌ You must be a team manager to use this command!"):
+    """Decorator requiring the Manager role and managing at least one team"""
+    return _team_check(
+        ('manager',), ('MANAGER_ROLE_ID',),
+        "❌ You need the Manager role to use this command.", message
+    )
+
+
+def captain_or_manager_of_team(message: str = "❌ You must be a team captain or manager to use this command!"):
+    """Decorator requiring the Captain or Manager role and that position on at least one team"""
+    return _team_check(
+        ('captain', 'manager'), ('CAPTAIN_ROLE_ID', 'MANAGER_ROLE_ID'),
+        "❌ You need the Captain or Manager role to use this command.", message
+    )
@@ -0,0 +1,217 @@
+"""
+Opt-in sampling profiler for app commands and UI callbacks
+
+A background thread samples the event loop thread's stack at a fixed interval.
+Samples are attributed to the outermost registered handler on the stack (an app
+command callback, or a View/Modal/Select/Button callback) and aggregated as
+folded stacks, which flamegraph.pl / speedscope / inferno can render directly.
+"""
+
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import discord
+from discord import app_commands
+
+from utils.config import config
+from utils.metrics import metrics
+
+
+UI_CALLBACK_NAMES = ('callback', 'on_submit', 'on_timeout')
+
+
+class HandlerProfiler:
+    """Samples the event loop thread and aggregates stacks per handler"""
+    
+    def __init__(self, interval: float = 0.01, output_dir: str = "profiles", max_depth: int = 64, max_stacks: int = 5000):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.max_depth = max_depth
+        self.max_stacks = max_stacks  # Distinct stacks kept per handler (bounds memory)
+        self.handlers: Dict[object, str] = {}  # code object -> handler label
+        self.samples: Dict[str, Counter] = {}
+        self.handler_seconds: Counter = Counter()  # Wall time between samples, per handler
+        self.total_samples = 0
+        self.started_at: Optional[float] = None
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+    
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    # Handler registration
+    
+    def register_bot(self, bot) -> int:
+        """Register every app command and UI callback so samples can be attributed"""
+        for command in bot.tree.walk_commands():
+            if isinstance(command, app_commands.Command):
+                self.register_function(command.callback)
+        
+        for base in (discord.ui.View, discord.ui.Modal, discord.ui.Item):
+            for cls in self._all_subclasses(base):
+                for name, member in vars(cls).items():
+                    if not inspect.iscoroutinefunction(member):
+                        continue
+                    if name in UI_CALLBACK_NAMES or hasattr(member, '__discord_ui_model_type__'):
+                        self.register_function(member)
+        
+        return len(self.handlers)
+    
+    def register_function(self, func, label: Optional[str] = None):
+        """Register a single coroutine function as a profiled handler"""
+        code = getattr(func, '__code__', None)
+        if code is not None:
+            self.handlers[code] = label or func.__qualname__
+    
+    @staticmethod
+    def _all_subclasses(cls) -> List[type]:
+        found = []
+        pending = [cls]
+        while pending:
+            for sub in pending.pop().__subclasses__():
+                # Only our own classes - library internals are not handlers
+                if not sub.__module__.startswith('discord.'):
+                    found.append(sub)
+                pending.append(sub)
+        return found
+    
+    # Sampling
+    
+    def start(self, loop_thread_id: Optional[int] = None):
+        """Start sampling (defaults to profiling the calling thread's loop)"""
+        if self.running:
+            return
+        
+        self._loop_thread_id = loop_thread_id or threading.get_ident()
+        # A fresh event per run: a sampler still winding down from stop() keeps its own
+        self._stopped = threading.Event()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, args=(self._stopped,), name="handler-profiler", daemon=True)
+        self._thread.start()
+        print(f"✓ Profiler started ({len(self.handlers)} handlers, {self.interval * 1000:.0f}ms interval)")
+    
+    def stop(self):
+        """
+        Stop sampling (collected samples are kept until reset). Called from the
+        event loop, so the sampler is only signalled, not joined - it exits at
+        its next wake-up, at most one interval later.
+        """
+        self._stopped.set()
+        self._thread = None
+        print("✓ Profiler stopped")
+    
+    def reset(self):
+        with self._lock:
+            self.samples.clear()
+            self.handler_seconds.clear()
+            self.total_samples = 0
+    
+    def _run(self, stopped: threading.Event):
+        last = time.perf_counter()
+        while not stopped.wait(self.interval):
+            started = time.perf_counter()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                # Weight by real elapsed time: the sampler can be delayed by the GIL
+                self._record(frame, started - last)
+            last = started
+            metrics.observe("profiler.sample_cost_us", (time.perf_counter() - started) * 1_000_000)
+    
+    def _record(self, frame, elapsed: float):
+        """Fold the stack below the outermost registered handler into one sample"""
+        stack = []
+        handler_index = None
+        depth = 0
+        while frame is not None and depth < 512:
+            if frame.f_code in self.handlers:
+                handler_index = len(stack)
+            stack.append(frame)
+            frame = frame.f_back
+            depth += 1
+        
+        with self._lock:
+            self.total_samples += 1
+            if handler_index is None:
+                return
+            
+            handler_frame = stack[handler_index]
+            label = self.handlers[handler_frame.f_code]
+            # Root (handler) first, leaf last, limited to max_depth frames
+            frames = stack[:handler_index + 1][::-1][:self.max_depth]
+            folded = ";".join(self._frame_name(f) for f in frames)
+            
+            counts = self.samples.setdefault(label, Counter())
+            if folded not in counts and len(counts) >= self.max_stacks:
+                folded = f"{self._frame_name(handler_frame)};[truncated]"
+            counts[folded] += 1
+            self.handler_seconds[label] += elapsed
+    
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        name = getattr(code, 'co_qualname', code.co_name)
+        return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    
+    # Reporting
+    
+    def summary(self, limit: int = 10) -> List[Dict]:
+        """Get handlers ordered by sample count"""
+        with self._lock:
+            rows = [
+                {
+                    'handler': label,
+                    'samples': sum(counts.values()),
+                    'stacks': len(counts),
+                    'ms': self.handler_seconds[label] * 1000
+                }
+                for label, counts in self.samples.items()
+            ]
+        rows.sort(key=lambda row: row['samples'], reverse=True)
+        return rows[:limit]
+    
+    def dump(self) -> List[str]:
+        """Write one folded-stack file per handler plus a combined all.folded; returns the paths"""
+        with self._lock:
+            snapshot = {label: dict(counts) for label, counts in self.samples.items()}
+        
+        os.makedirs(self.output_dir, exist_ok=True)
+        written = []
+        combined = []
+        for label, counts in snapshot.items():
+            safe_label = "".join(c if c.isalnum() or c in "._-" else "_" for c in label)
+            path = os.path.join(self.output_dir, f"{safe_label}.folded")
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in sorted(counts.items(), key=lambda item: -item[1]):
+                    f.write(f"{stack} {count}\n")
+                    combined.append(f"{stack} {count}\n")
+            written.append(path)
+        
+        all_path = os.path.join(self.output_dir, "all.folded")
+        with open(all_path, 'w', encoding='utf-8') as f:
+            f.writelines(combined)
+        written.append(all_path)
+        return written
+
+
+def create_profiler() -> HandlerProfiler:
+    """Build the profiler from the bot config"""
+    return HandlerProfiler(
+        interval=max(config.profiling_interval_ms, 1) / 1000,
+        output_dir=config.profiling_output_dir
+    )
+
+
+def profiling_enabled_at_startup() -> bool:
+    return config.profiling_enabled
+
+
+# Global profiler instance
+profiler = create_profiler()
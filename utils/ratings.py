@@ -0,0 +1,310 @@
+"""
+Rating engine
+
+Glicko-2 (default) or Elo ratings for teams and players, computed from
+completed bracket and Swiss matches. Matches are grouped into rating periods
+(RATING_PERIOD_DAYS) and every period is one vectorized NumPy update over all
+teams and players at once, so a full recompute of a million matches takes
+seconds rather than a Python loop per game.
+
+Matches are recorded per team, so players are rated on their current team's
+results against the opposing team's rating (rosters aren't kept per match).
+After each reported result the two teams and their players get an immediate
+one-match update; /ratings-recompute rebuilds everything from history.
+
+A player's rating is written to player_stats.points, which feeds profiles
+and the points leaderboard. Team ratings feed bracket/Swiss seeding.
+"""
+
+import asyncio
+import time
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from database.db import db
+from utils.config import config
+
+
+DEFAULT_RATING = 1500.0
+DEFAULT_RD = 350.0
+DEFAULT_VOLATILITY = 0.06
+TAU = 0.5                 # Glicko-2 system constant (how fast volatility may change)
+SCALE = 173.7178          # Glicko-2 <-> Glicko scale factor
+CONVERGENCE = 1e-6
+ELO_K = 32.0
+
+# Serializes incremental updates and recomputes (read-modify-write of the same rows)
+_lock = asyncio.Lock()
+
+
+class RatingTable:
+    """Ratings of one entity type (teams or players) as parallel arrays"""
+    
+    def __init__(self, ids: Sequence[int], existing: Optional[Mapping[int, Dict]] = None):
+        self.ids = list(ids)
+        self.index = {entity_id: i for i, entity_id in enumerate(self.ids)}
+        count = len(self.ids)
+        self.rating = np.full(count, DEFAULT_RATING)
+        self.rd = np.full(count, DEFAULT_RD)
+        self.volatility = np.full(count, DEFAULT_VOLATILITY)
+        self.games = np.zeros(count, dtype=np.int64)
+        for entity_id, row in (existing or {}).items():
+            i = self.index.get(entity_id)
+            if i is not None:
+                self.rating[i] = row['rating']
+                self.rd[i] = row['rd']
+                self.volatility[i] = row['volatility']
+                self.games[i] = row['games']
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def rows(self) -> List[Tuple[int, float, float, float, int]]:
+        """(entity_id, rating, rd, volatility, games) for save_ratings"""
+        return list(zip(
+            self.ids, self.rating.tolist(), self.rd.tolist(), self.volatility.tolist(), self.games.tolist()
+        ))
+
+
+# Rating updates
+
+def _g(phi: np.ndarray) -> np.ndarray:
+    return 1.0 / np.sqrt(1.0 + 3.0 * phi ** 2 / np.pi ** 2)
+
+
+def _volatility_f(x, a, phi, v, delta):
+    ex = np.exp(x)
+    return ex * (delta ** 2 - phi ** 2 - v - ex) / (2.0 * (phi ** 2 + v + ex) ** 2) - (x - a) / TAU ** 2
+
+
+def _new_volatility(phi: np.ndarray, sigma: np.ndarray, v: np.ndarray, delta: np.ndarray) -> np.ndarray:
+    """Glicko-2 step 5 (Illinois algorithm), iterated for every entity at once"""
+    a = np.log(sigma ** 2)
+    lower = np.empty_like(a)
+    upper = a.copy()
+    
+    big = delta ** 2 > phi ** 2 + v
+    lower[big] = np.log(delta[big] ** 2 - phi[big] ** 2 - v[big])
+    small = np.flatnonzero(~big)
+    k = np.ones(len(small))
+    while len(small):
+        x = a[small] - k * TAU
+        negative = _volatility_f(x, a[small], phi[small], v[small], delta[small]) < 0
+        lower[small[~negative]] = x[~negative]
+        small, k = small[negative], k[negative] + 1
+    
+    A, B = upper, lower
+    f_a = _volatility_f(A, a, phi, v, delta)
+    f_b = _volatility_f(B, a, phi, v, delta)
+    active = np.flatnonzero(np.abs(B - A) > CONVERGENCE)
+    while len(active):
+        C = A[active] + (A[active] - B[active]) * f_a[active] / (f_b[active] - f_a[active])
+        f_c = _volatility_f(C, a[active], phi[active], v[active], delta[active])
+        swap = f_c * f_b[active] <= 0
+        A[active] = np.where(swap, B[active], A[active])
+        f_a[active] = np.where(swap, f_b[active], f_a[active] / 2)
+        B[active], f_b[active] = C, f_c
+        active = active[np.abs(B[active] - A[active]) > CONVERGENCE]
+    return np.exp(A / 2)
+
+
+def glicko2_period(
+    table: RatingTable,
+    idx: np.ndarray,
+    opponent_rating: np.ndarray,
+    opponent_rd: np.ndarray,
+    score: np.ndarray,
+    idle_periods: int = 0
+):
+    """
+    One Glicko-2 rating period: entity idx[k] played an opponent rated
+    (opponent_rating[k], opponent_rd[k]) and scored score[k] (1 win, 0 loss).
+    Entities without games only gain rating deviation. `idle_periods` empty
+    periods since the previous update widen every deviation first.
+    """
+    count = len(table)
+    mu = (table.rating - DEFAULT_RATING) / SCALE
+    phi = table.rd / SCALE
+    sigma = table.volatility
+    if idle_periods:
+        phi = np.minimum(np.sqrt(phi ** 2 + idle_periods * sigma ** 2), DEFAULT_RD / SCALE)
+    
+    opponent_g = _g(opponent_rd / SCALE)
+    expected = 1.0 / (1.0 + np.exp(-opponent_g * (mu[idx] - (opponent_rating - DEFAULT_RATING) / SCALE)))
+    v_inverse = np.bincount(idx, weights=opponent_g ** 2 * expected * (1 - expected), minlength=count)
+    improvement = np.bincount(idx, weights=opponent_g * (score - expected), minlength=count)
+    
+    new_phi = np.sqrt(phi ** 2 + sigma ** 2)
+    played = np.flatnonzero(np.bincount(idx, minlength=count))
+    if len(played):
+        v = 1.0 / v_inverse[played]
+        new_sigma = _new_volatility(phi[played], sigma[played], v, v * improvement[played])
+        phi_star = np.sqrt(phi[played] ** 2 + new_sigma ** 2)
+        new_phi[played] = 1.0 / np.sqrt(1.0 / phi_star ** 2 + 1.0 / v)
+        mu[played] += new_phi[played] ** 2 * improvement[played]
+        table.volatility[played] = new_sigma
+    
+    table.rating = mu * SCALE + DEFAULT_RATING
+    table.rd = np.minimum(new_phi * SCALE, DEFAULT_RD)
+    table.games += np.bincount(idx, minlength=count)
+
+
+def elo_period(table: RatingTable, idx: np.ndarray, opponent_rating: np.ndarray, score: np.ndarray, k: float = ELO_K):
+    """One batch of Elo updates (every game uses the ratings from the start of the batch)"""
+    expected = 1.0 / (1.0 + 10.0 ** ((opponent_rating - table.rating[idx]) / 400.0))
+    table.rating = table.rating + k * np.bincount(idx, weights=score - expected, minlength=len(table))
+    table.games += np.bincount(idx, minlength=len(table))
+
+
+def _expand(starts: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """Concatenated ranges starts[i]:starts[i]+counts[i]"""
+    ends = np.cumsum(counts)
+    return np.repeat(starts - ends + counts, counts) + np.arange(ends[-1] if len(ends) else 0)
+
+
+class _Rosters:
+    """Team index -> player indices (CSR layout)"""
+    
+    def __init__(self, team_idx: np.ndarray, player_idx: np.ndarray, team_count: int):
+        order = np.argsort(team_idx, kind='stable')
+        self.players = player_idx[order]
+        self.counts = np.bincount(team_idx, minlength=team_count)
+        self.starts = np.concatenate(([0], np.cumsum(self.counts)[:-1])).astype(np.int64)
+    
+    def expand(self, teams: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(players of every team in `teams`, how many players each contributed)"""
+        counts = self.counts[teams]
+        return self.players[_expand(self.starts[teams], counts)], counts
+
+
+def rate_period(
+    teams: RatingTable,
+    players: RatingTable,
+    rosters: _Rosters,
+    team1: np.ndarray,
+    team2: np.ndarray,
+    team1_score: np.ndarray,
+    system: str,
+    idle_periods: int = 0
+):
+    """Rate one period of games (team indices) for teams and their rostered players"""
+    idx = np.concatenate((team1, team2))
+    opponents = np.concatenate((team2, team1))
+    score = np.concatenate((team1_score, 1.0 - team1_score))
+    opponent_rating = teams.rating[opponents]
+    opponent_rd = teams.rd[opponents]
+    
+    # Players play the opposing team's pre-period rating
+    player_idx, counts = rosters.expand(idx)
+    player_opponent_rating = np.repeat(opponent_rating, counts)
+    player_opponent_rd = np.repeat(opponent_rd, counts)
+    player_score = np.repeat(score, counts)
+    
+    if system == 'elo':
+        elo_period(teams, idx, opponent_rating, score)
+        elo_period(players, player_idx, player_opponent_rating, player_score)
+    else:
+        glicko2_period(teams, idx, opponent_rating, opponent_rd, score, idle_periods)
+        glicko2_period(players, player_idx, player_opponent_rating, player_opponent_rd, player_score, idle_periods)
+
+
+def _roster_arrays(
+    roster_rows: Iterable[Tuple[int, int]],
+    teams: RatingTable,
+    players: RatingTable
+) -> _Rosters:
+    team_idx, player_idx = [], []
+    for team_id, discord_id in roster_rows:
+        if team_id in teams.index:
+            team_idx.append(teams.index[team_id])
+            player_idx.append(players.index[discord_id])
+    return _Rosters(np.array(team_idx, dtype=np.int64), np.array(player_idx, dtype=np.int64), len(teams))
+
+
+def recompute(
+    history: Sequence[Tuple[float, int, int, int]],
+    roster_rows: Sequence[Tuple[int, int]],
+    system: str = 'glicko2',
+    period_days: float = 7.0
+) -> Tuple[RatingTable, RatingTable]:
+    """
+    Ratings from scratch. `history` is (completed_at epoch seconds, team1_id,
+    team2_id, winner_id) in completion order; `roster_rows` is (team_id,
+    discord_id) of current players.
+    """
+    if history:
+        times, team1_ids, team2_ids, winner_ids = (np.array(column) for column in zip(*history))
+    else:
+        times = team1_ids = team2_ids = winner_ids = np.zeros(0, dtype=np.int64)
+    roster_team_ids = np.array([team_id for team_id, _ in roster_rows], dtype=np.int64)
+    
+    team_ids, team_index = np.unique(
+        np.concatenate((team1_ids, team2_ids, roster_team_ids)).astype(np.int64), return_inverse=True
+    )
+    teams = RatingTable(team_ids.tolist())
+    players = RatingTable(sorted({discord_id for _, discord_id in roster_rows}))
+    rosters = _roster_arrays(roster_rows, teams, players)
+    
+    team1 = team_index[:len(history)]
+    team2 = team_index[len(history):2 * len(history)]
+    team1_score = (winner_ids == team1_ids).astype(float)
+    
+    periods = np.floor(times.astype(float) / (period_days * 86400)).astype(np.int64)
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(periods)) + 1, [len(history)]))
+    previous = None
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start == end:
+            continue
+        period = int(periods[start])
+        idle = period - previous - 1 if previous is not None else 0
+        rate_period(teams, players, rosters, team1[start:end], team2[start:end], team1_score[start:end], system, idle)
+        previous = period
+    return teams, players
+
+
+# Database glue
+
+async def recompute_ratings() -> Dict[str, float]:
+    """Rebuild every rating from match history and replace the stored ratings"""
+    async with _lock:
+        started = time.perf_counter()
+        history = await db.get_rating_history()
+        roster_rows = await db.get_rating_rosters()
+        loaded = time.perf_counter()
+        
+        teams, players = await asyncio.to_thread(
+            recompute, history, roster_rows, config.rating_system, config.rating_period_days
+        )
+        computed = time.perf_counter()
+        
+        await db.save_ratings('team', teams.rows(), replace=True)
+        await db.save_ratings('player', players.rows(), replace=True)
+        saved = time.perf_counter()
+    
+    return {
+        'matches': len(history),
+        'teams': len(teams),
+        'players': len(players),
+        'load_seconds': loaded - started,
+        'compute_seconds': computed - loaded,
+        'save_seconds': saved - computed,
+    }
+
+
+async def rate_match(team1_id: int, team2_id: int, winner_id: int):
+    """Immediate one-match update for both teams and their current players"""
+    async with _lock:
+        roster_rows = await db.get_rating_rosters([team1_id, team2_id])
+        player_ids = sorted({discord_id for _, discord_id in roster_rows})
+        teams = RatingTable([team1_id, team2_id], await db.get_ratings('team', [team1_id, team2_id]))
+        players = RatingTable(player_ids, await db.get_ratings('player', player_ids))
+        rosters = _roster_arrays(roster_rows, teams, players)
+        
+        rate_period(
+            teams, players, rosters,
+            np.array([0]), np.array([1]), np.array([1.0 if winner_id == team1_id else 0.0]),
+            config.rating_system
+        )
+        await db.save_ratings('team', teams.rows())
+        await db.save_ratings('player', players.rows())
@@ -0,0 +1,215 @@
+"""
+Registration capacity
+
+Caps and live counts are the registration_caps counters kept by the database
+(migrations/017_registration_caps.sql): inserting a team or player claims a
+slot, so the counters are always exact and nothing here counts rows. This
+module keeps the last read of the counters for the registration panels - the
+"registered / cap" lines are rebuilt from that one small table and the panel
+messages are only edited when a counter moved. The same loop finishes teams
+promoted off the waitlist (team role, captain/manager role, DM), whichever
+process freed their slot.
+"""
+
+import asyncio
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+import discord
+
+from database.backend import ALL_REGIONS
+from database.db import db
+from utils.config import config
+from utils.member_cache import get_or_fetch_member
+
+
+CAPACITY_FIELD = "Capacity:"
+
+
+class RegistrationCapacity:
+    """Counter snapshot, the tracked panel messages and the refresh loop"""
+    
+    def __init__(self):
+        self.bot: Optional[discord.Client] = None
+        self._counters: Dict[Tuple[str, str], Dict] = {}
+        self._panels: Dict[str, Tuple[discord.Message, discord.Embed]] = {}  # kind -> (message, embed)
+        self._task: Optional[asyncio.Task] = None
+        self._promotion_lock = asyncio.Lock()
+    
+    # Counters
+    
+    async def refresh(self) -> bool:
+        """Re-read the counters; True when anything changed since the last read"""
+        counters = {(row['kind'], row['region']): row for row in await db.get_registration_capacity()}
+        changed = counters != self._counters
+        self._counters = counters
+        return changed
+    
+    def registered(self, kind: str, region: str = ALL_REGIONS) -> int:
+        row = self._counters.get((kind, region))
+        return row['registered'] if row else 0
+    
+    def is_full(self, kind: str, region: Optional[str] = None) -> bool:
+        """Whether the overall cap (or the region's) was full at the last read"""
+        for key in ((kind, ALL_REGIONS), (kind, region)):
+            row = self._counters.get(key)
+            if row and row['capacity'] is not None and row['registered'] >= row['capacity']:
+                return True
+        return False
+    
+    def lines(self, kind: str) -> List[str]:
+        total = self._counters.get((kind, ALL_REGIONS))
+        if total and total['capacity'] is not None:
+            lines = [f"**All regions:** `{total['registered']}` / {total['capacity']}"]
+        else:
+            lines = [f"**Registered:** `{self.registered(kind)}`"]
+        for (row_kind, region), row in sorted(self._counters.items()):
+            if row_kind == kind and region != ALL_REGIONS and row['capacity'] is not None:
+                lines.append(f"**{region}:** `{row['registered']}` / {row['capacity']}")
+        full_regions = [
+            region for row_kind, region in self._counters
+            if row_kind == kind and region != ALL_REGIONS and self.is_full(kind, region)
+        ]
+        if self.is_full(kind) or full_regions:
+            closed = "new teams join the waitlist" if kind == 'team' else "registration is closed"
+            lines.append(f"⛔ Full: {closed}." if self.is_full(kind) else f"⛔ {', '.join(sorted(full_regions))} full: {closed} there.")
+        return lines
+    
+    def apply(self, embed: discord.Embed, kind: str) -> discord.Embed:
+        """Add or update the capacity field of a registration panel embed"""
+        value = "\n".join(self.lines(kind))
+        for index, field in enumerate(embed.fields):
+            if field.name == CAPACITY_FIELD:
+                embed.set_field_at(index, name=CAPACITY_FIELD, value=value, inline=False)
+                return embed
+        embed.add_field(name=CAPACITY_FIELD, value=value, inline=False)
+        return embed
+    
+    # Panels
+    
+    def track_panel(self, kind: str, message: discord.Message, embed: discord.Embed):
+        """Keep a panel's capacity field current (the last panel sent per kind)"""
+        self._panels[kind] = (message, embed)
+    
+    async def _edit_panels(self):
+        for kind, (message, embed) in list(self._panels.items()):
+            try:
+                await message.edit(embed=self.apply(embed, kind))
+            except discord.NotFound:
+                self._panels.pop(kind, None)
+            except discord.HTTPException as e:
+                print(f"⚠️  Could not update the {kind} registration panel: {e}")
+    
+    # Loop
+    
+    async def start(self, bot: discord.Client):
+        self.bot = bot
+        await self.refresh()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(), name="registration-capacity")
+    
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(config.registration_panel_refresh_seconds)
+            await self.update()
+    
+    async def update(self):
+        """
+        Re-read the counters, edit the panels if they moved and finish
+        promotions (the loop does this; call it after deletes and cap changes
+        to show the freed slot right away)
+        """
+        try:
+            if await self.refresh():
+                await self._edit_panels()
+            await self.finish_promotions()
+        except Exception as e:
+            print(f"❌ Registration capacity refresh failed: {e}")
+    
+    # Waitlist promotions
+    
+    def _guild(self) -> Optional[discord.Guild]:
+        channel = config.get_channel(self.bot, "TEAM_REGISTRATION_CHANNEL_ID")
+        if channel is not None:
+            return channel.guild
+        return self.bot.guilds[0] if self.bot.guilds else None
+    
+    async def finish_promotions(self):
+        """Give promoted teams their Discord role and tell the users about promotions and cancellations"""
+        # One process finishes promotions (like the command sync, the one running shard 0)
+        if self.bot is None or (config.shard_ids and 0 not in config.shard_ids):
+            return
+        async with self._promotion_lock:
+            entries = await db.get_waitlist_promotions()
+            guild = self._guild() if entries else None
+            for entry in entries:
+                if guild is None:
+                    return
+                try:
+                    if entry['status'] == 'promoted' and entry['team_id']:
+                        await self._finish_team(guild, entry)
+                    else:
+                        await self._dm(
+                            guild, entry['discord_id'],
+                            f"❌ Your waitlisted team **{entry['team_name']}** was removed from the waitlist: "
+                            "it could no longer be registered, usually because its name or tag was taken by "
+                            "another team. Register again with a different one."
+                        )
+                except Exception as e:
+                    print(f"❌ Failed to finish waitlist entry {entry['id']}: {e}")
+                await db.mark_waitlist_notified(entry['id'])
+    
+    async def _finish_team(self, guild: discord.Guild, entry: Dict):
+        team = await db.get_team_by_id(entry['team_id'])
+        if team is None:
+            return
+        team_role = await guild.create_role(
+            name=team['team_name'],
+            color=discord.Color.blue(),
+            mentionable=True,
+            reason=f"Team role created for {team['team_name']} (waitlist)"
+        )
+        await db.update_team(team['id'], role_id=team_role.id)
+        
+        member = await get_or_fetch_member(guild, entry['discord_id'])
+        if member:
+            position_role = config.get_role(guild, 'CAPTAIN_ROLE_ID' if entry['role'] == 'captain' else 'MANAGER_ROLE_ID')
+            await member.add_roles(*[role for role in (team_role, position_role) if role])
+        
+        role_text = "team captain" if entry['role'] == 'captain' else "team manager"
+        print(f"✅ Waitlisted team promoted: {team['team_name']} ({team['region']})")
+        await self._dm(
+            guild, entry['discord_id'],
+            f"🎉 A slot opened up! **{team['team_name']}** [{team['team_tag']}] is now registered in "
+            f"{team['region']} and you are its {role_text}."
+        )
+        
+        log_channel = config.get_channel(guild, "TEAM_REGISTRATION_LOG_CHANNEL_ID")
+        if log_channel:
+            log_embed = discord.Embed(
+                title="New Team Registered (Waitlist)",
+                description=(
+                    f"**Team:** {team['team_name']} [{team['team_tag']}]\n"
+                    f"**Region:** {team['region']}\n"
+                    f"**{role_text.title()}:** <@{entry['discord_id']}>\n"
+                    f"**Team ID:** {team['id']}"
+                ),
+                color=discord.Color.blue(),
+                timestamp=datetime.datetime.now()
+            )
+            if team['logo_url']:
+                log_embed.set_thumbnail(url=team['logo_url'])
+            await log_channel.send(embed=log_embed)
+    
+    async def _dm(self, guild: discord.Guild, discord_id: int, message: str):
+        member = await get_or_fetch_member(guild, discord_id)
+        if member is None:
+            return
+        try:
+            await member.send(message)
+        except discord.HTTPException:
+            pass
+
+
+# Global registration capacity tracker
+registration_capacity = RegistrationCapacity()
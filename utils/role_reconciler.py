@@ -0,0 +1,230 @@
+"""
+Bulk Discord role reconciliation
+
+The region, captain, manager and per-team roles are added and removed inline
+by the registration, invite and admin flows, so a failed call or a manual
+edit leaves members out of sync with the database. /admin-reconcile-roles
+rebuilds them in bulk: one query (db.get_role_assignments) gives the roles
+every user should hold, every guild member is diffed against it - only the
+roles the bot manages are touched, anything else a member holds is kept -
+and each out-of-sync member gets a single member.edit(roles=...) with the
+full new role list.
+
+Edits run one at a time, paced (utils/pacing.py) at
+ROLE_RECONCILE_EDITS_PER_SECOND and slowed down when Discord rate limits
+them, so a large run leaves room for the interactive flows sharing the same
+bucket. A dry run only scans and reports.
+"""
+
+import asyncio
+import csv
+import io
+import time
+from collections import Counter, defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+import discord
+
+from database.db import db
+from utils.config import REGION_ROLE_KEYS, config
+from utils.member_cache import is_lazy
+from utils.metrics import metrics
+from utils.pacing import Pacer
+
+
+RECONCILE_REASON = "Role reconciliation"
+# Members scanned between yields to the event loop
+YIELD_EVERY = 1000
+# Seconds between progress callbacks
+PROGRESS_SECONDS = 5
+# Failed members listed in the summary (the report has all of them)
+ERROR_PREVIEW = 5
+
+_reconcile_lock = asyncio.Lock()
+
+
+class ReconcileError(Exception):
+    """The reconciliation can't run (already running, no roles configured)"""
+
+
+class RolePlan:
+    """The roles the bot manages and the ones every user should hold"""
+    
+    def __init__(self, guild: discord.Guild, rows: List[Dict]):
+        captain_id = config.get_id('CAPTAIN_ROLE_ID')
+        manager_id = config.get_id('MANAGER_ROLE_ID')
+        region_ids = {region: config.region_role_ids(region) for region in REGION_ROLE_KEYS}
+        
+        configured: Set[int] = {captain_id, manager_id} - {None}
+        configured.update(role_id for role_ids in region_ids.values() for role_id in role_ids)
+        
+        self.desired: Dict[int, Set[int]] = defaultdict(set)
+        for row in rows:
+            if row['team_role_id']:
+                configured.add(row['team_role_id'])
+            discord_id = row['discord_id']
+            if discord_id is None:
+                continue
+            wanted = self.desired[discord_id]
+            if row['region'] is not None:
+                wanted.update(region_ids.get(row['region'], ()))
+            if row['team_role'] is not None:
+                if row['team_role_id']:
+                    wanted.add(row['team_role_id'])
+                if row['team_role'] == 'captain' and captain_id:
+                    wanted.add(captain_id)
+                elif row['team_role'] == 'manager' and manager_id:
+                    wanted.add(manager_id)
+        
+        # Roles that are gone from the guild or that the bot can't assign are left alone
+        self.managed: Set[int] = set()
+        self.missing: Set[int] = set()
+        self.unassignable: List[discord.Role] = []
+        for role_id in configured:
+            role = guild.get_role(role_id)
+            if role is None:
+                self.missing.add(role_id)
+            elif role.is_assignable():
+                self.managed.add(role_id)
+            else:
+                self.unassignable.append(role)
+    
+    def diff(self, member: discord.Member) -> Optional[Dict]:
+        """{'roles', 'added', 'removed'} for an out-of-sync member, None when in sync"""
+        current = {role.id for role in member.roles if not role.is_default()}
+        wanted = self.desired.get(member.id, set()) & self.managed
+        added = wanted - current
+        removed = (current & self.managed) - wanted
+        if not added and not removed:
+            return None
+        # Keep every role the bot doesn't manage
+        roles = [discord.Object(id=role_id) for role_id in current - removed]
+        roles.extend(discord.Object(id=role_id) for role_id in sorted(added))
+        return {'roles': roles, 'added': added, 'removed': removed}
+
+
+async def _guild_members(guild: discord.Guild):
+    """Every member: the cache when it is full, streamed over REST when lazy"""
+    if is_lazy():
+        async for member in guild.fetch_members(limit=None):
+            yield member
+    else:
+        for member in list(guild.members):
+            yield member
+
+
+async def _apply(member: discord.Member, change: Dict, pacer: Pacer) -> str:
+    """Edit one member's roles, returning the report status"""
+    await pacer.wait()
+    began = time.monotonic()
+    try:
+        await member.edit(roles=change['roles'], reason=RECONCILE_REASON)
+    except discord.NotFound:
+        return 'left the server'
+    except discord.HTTPException as e:
+        pacer.done(began, rate_limited=e.status == 429)
+        return f"failed ({e.status}): {e.text or e}"
+    pacer.done(began)
+    return 'applied'
+
+
+def _role_names(guild: discord.Guild, role_ids: Set[int]) -> str:
+    return ", ".join(sorted(getattr(guild.get_role(role_id), 'name', str(role_id)) for role_id in role_ids))
+
+
+async def reconcile_roles(
+    guild: discord.Guild,
+    dry_run: bool,
+    on_progress: Optional[Callable[[Dict], Awaitable[None]]] = None
+) -> Dict:
+    """
+    Diff every member's managed roles against the database and, unless
+    dry_run, fix them. on_progress is awaited with the running summary every
+    PROGRESS_SECONDS. Returns the summary: counts, per-role additions and
+    removals, the failures and a CSV report of every change.
+    """
+    if _reconcile_lock.locked():
+        raise ReconcileError("A role reconciliation is already running, try again when it finishes.")
+    async with _reconcile_lock:
+        if not guild.me.guild_permissions.manage_roles:
+            raise ReconcileError("The bot needs the Manage Roles permission.")
+        started = time.monotonic()
+        plan = RolePlan(guild, await db.get_role_assignments())
+        if not plan.managed:
+            raise ReconcileError("No team, captain, manager or region roles are set up for the bot to manage.")
+        
+        summary = {
+            'phase': 'scanning', 'dry_run': dry_run, 'scanned': 0, 'out_of_sync': 0,
+            'applied': 0, 'skipped': 0, 'failed': 0, 'added': Counter(), 'removed': Counter(),
+            'not_in_guild': 0, 'errors': [], 'unassignable': [role.name for role in plan.unassignable],
+            'missing': len(plan.missing), 'seconds': 0.0,
+        }
+        last_progress = time.monotonic()
+        
+        async def progress(force: bool = False):
+            nonlocal last_progress
+            if on_progress is None or not (force or time.monotonic() - last_progress >= PROGRESS_SECONDS):
+                return
+            last_progress = time.monotonic()
+            summary['seconds'] = last_progress - started
+            try:
+                await on_progress(summary)
+            except discord.HTTPException as e:
+                print(f"⚠️  Failed to report role reconciliation progress: {e}")
+        
+        # Scan: diff every member (only out-of-sync members are kept)
+        changes = []
+        seen = set()
+        async for member in _guild_members(guild):
+            seen.add(member.id)
+            summary['scanned'] += 1
+            change = plan.diff(member)
+            if change is not None:
+                changes.append((member, change))
+            if summary['scanned'] % YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+                await progress()
+        summary['out_of_sync'] = len(changes)
+        summary['not_in_guild'] = sum(1 for discord_id in plan.desired if discord_id not in seen)
+        
+        report = io.StringIO()
+        writer = csv.writer(report)
+        writer.writerow(['discord_id', 'member', 'added', 'removed', 'status'])
+        
+        # Apply: one edit per member, re-diffed against the live cache first
+        summary['phase'] = 'dry run' if dry_run else 'applying'
+        await progress(force=True)
+        pacer = Pacer(config.role_reconcile_edits_per_second, "roles.reconcile_rate_limited")
+        for member, change in changes:
+            status = 'dry run'
+            if not dry_run:
+                member = guild.get_member(member.id) or member
+                change = plan.diff(member)
+                if change is None:
+                    summary['skipped'] += 1
+                    continue
+                status = await _apply(member, change, pacer)
+            
+            if status in ('applied', 'dry run'):
+                summary['added'].update(change['added'])
+                summary['removed'].update(change['removed'])
+                if status == 'applied':
+                    summary['applied'] += 1
+                    metrics.inc("roles.reconcile_edits")
+            elif status == 'left the server':
+                summary['skipped'] += 1
+            else:
+                summary['failed'] += 1
+                metrics.inc("roles.reconcile_failures")
+                if len(summary['errors']) < ERROR_PREVIEW:
+                    summary['errors'].append(f"{member}: {status}")
+            writer.writerow([
+                member.id, str(member), _role_names(guild, change['added']),
+                _role_names(guild, change['removed']), status
+            ])
+            await progress()
+        
+        summary['phase'] = 'done'
+        summary['seconds'] = time.monotonic() - started
+        summary['report'] = report.getvalue().encode()
+        return summary
@@ -0,0 +1,379 @@
+"""
+Match scheduler
+
+Places matches into fixed-length time slots (UTC) over a horizon of days:
+- both teams must be available (their weekly windows, or their region's
+  prime time when a team hasn't set any),
+- no team plays two matches at once or more than the daily maximum,
+- when caster/staff slots exist, every match gets a free caster and a free
+  staff member whose slot covers it (one match at a time each).
+
+Availability and bookings are Python int bitmasks over the slots, so the
+feasible slots of a match are a handful of AND/NOT operations. Matches are
+placed most-constrained first (fewest feasible slots), each in its earliest
+feasible slot - a greedy heuristic that handles thousands of matches without
+search. Moving one match only re-places the matches it now collides with.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+from database.db import db
+from utils.config import config
+from utils.team_index import team_index
+
+
+# Weekly availability windows: (weekday 0=Monday, start minute, end minute) in UTC
+Window = Tuple[int, int, int]
+
+# Evening prime time per region (see TeamRegionSelect), in UTC, used for teams without windows
+REGION_DEFAULT_WINDOWS: Dict[str, List[Window]] = {
+    'NA': [(day, 0, 300) for day in range(7)],              # 19:00-24:00 US Eastern
+    'EU': [(day, 1020, 1320) for day in range(7)],          # 18:00-23:00 CET
+    'AP': [(day, 600, 900) for day in range(7)],            # 18:00-23:00 SGT
+    'India': [(day, 750, 1050) for day in range(7)],        # 18:00-23:00 IST
+    'BR': [(day, 1320, 1440) for day in range(7)] + [(day, 0, 180) for day in range(7)],    # 19:00-24:00 BRT
+    'LATAM': [(day, 1380, 1440) for day in range(7)] + [(day, 0, 240) for day in range(7)], # 18:00-23:00 CST (MX)
+    'KR': [(day, 540, 840) for day in range(7)],            # 18:00-23:00 KST
+    'CN': [(day, 600, 900) for day in range(7)],            # 18:00-23:00 CST (CN)
+}
+
+CASTER = 'caster'
+STAFF = 'staff'
+STAFF_ROLES = (CASTER, STAFF)
+
+# Serializes schedule generation and moves (both read the booked slots, then write)
+_lock = asyncio.Lock()
+
+
+class ScheduleGrid:
+    """`days` days of `slot_minutes` slots from `start` (UTC midnight, so grid days are calendar days)"""
+    
+    def __init__(self, start: datetime, days: int, slot_minutes: int = 60):
+        self.start = start
+        self.slot_minutes = slot_minutes
+        self.slots_per_day = 24 * 60 // slot_minutes
+        self.slot_count = days * self.slots_per_day
+        self.day_masks = [
+            ((1 << self.slots_per_day) - 1) << (day * self.slots_per_day) for day in range(days)
+        ]
+        self._window_masks: Dict[Tuple[Window, ...], int] = {}
+    
+    def slot_time(self, slot: int) -> datetime:
+        return self.start + timedelta(minutes=slot * self.slot_minutes)
+    
+    def slot_of(self, when: datetime) -> Optional[int]:
+        """Slot starting exactly at `when` (None if off the grid)"""
+        minutes, remainder = divmod((when - self.start).total_seconds(), 60)
+        slot, offset = divmod(int(minutes), self.slot_minutes)
+        if remainder or offset or not 0 <= slot < self.slot_count:
+            return None
+        return slot
+    
+    def slot_at(self, when: datetime) -> int:
+        """Slot containing `when` (may be off the grid)"""
+        return int((when - self.start).total_seconds() // (self.slot_minutes * 60))
+    
+    def day_of(self, slot: int) -> int:
+        return slot // self.slots_per_day
+    
+    def range_mask(self, start: datetime, end: datetime) -> int:
+        """Slots that lie completely inside [start, end)"""
+        first = -(-(start - self.start).total_seconds() // (self.slot_minutes * 60))
+        last = (end - self.start).total_seconds() // (self.slot_minutes * 60)  # exclusive
+        first, last = max(int(first), 0), min(int(last), self.slot_count)
+        if last <= first:
+            return 0
+        return ((1 << (last - first)) - 1) << first
+    
+    def window_mask(self, windows: Iterable[Window]) -> int:
+        """Slots covered by weekly windows (teams of a region mostly share theirs)"""
+        windows = tuple(sorted(windows))
+        if windows in self._window_masks:
+            return self._window_masks[windows]
+        mask = 0
+        day_start = self.start.replace(hour=0, minute=0, second=0, microsecond=0)
+        day = day_start
+        while day < self.slot_time(self.slot_count):
+            for weekday, start_minute, end_minute in windows:
+                if weekday == day.weekday():
+                    mask |= self.range_mask(
+                        day + timedelta(minutes=start_minute), day + timedelta(minutes=end_minute)
+                    )
+            day += timedelta(days=1)
+        self._window_masks[windows] = mask
+        return mask
+
+
+def _slots(mask: int):
+    """Set bits of a mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Scheduler:
+    """
+    Greedy slot assignment. `matches` maps a match key to its (team1, team2);
+    `team_masks` is every team's availability; `people` maps a Discord ID to
+    {role: availability mask} for casters and staff.
+    """
+    
+    def __init__(
+        self,
+        grid: ScheduleGrid,
+        matches: Mapping[Hashable, Tuple[int, int]],
+        team_masks: Mapping[int, int],
+        people: Mapping[int, Mapping[str, int]],
+        max_per_day: int = 2
+    ):
+        self.grid = grid
+        self.matches = dict(matches)
+        self.team_masks = team_masks
+        self.people = people
+        self.max_per_day = max_per_day
+        self.required_roles = [role for role in STAFF_ROLES if any(role in roles for roles in people.values())]
+        
+        self.assignments: Dict[Hashable, Tuple[int, Optional[int], Optional[int]]] = {}  # key -> (slot, caster, staff)
+        self._team_busy: Dict[int, int] = {}
+        self._team_full_days: Dict[int, int] = {}
+        self._team_day_count: Dict[Tuple[int, int], int] = {}
+        self._person_busy: Dict[int, int] = {}
+        self._person_load: Dict[int, int] = {}
+    
+    # Bookkeeping
+    
+    def place(self, key: Hashable, slot: int, caster: Optional[int] = None, staff: Optional[int] = None):
+        """Book a match into a slot (also used for fixed/already scheduled matches)"""
+        self.assignments[key] = (slot, caster, staff)
+        bit = 1 << slot
+        day = self.grid.day_of(slot)
+        for team in self.matches[key]:
+            self._team_busy[team] = self._team_busy.get(team, 0) | bit
+            count = self._team_day_count.get((team, day), 0) + 1
+            self._team_day_count[(team, day)] = count
+            if count >= self.max_per_day:
+                self._team_full_days[team] = self._team_full_days.get(team, 0) | self.grid.day_masks[day]
+        for person in (caster, staff):
+            if person is not None:
+                self._person_busy[person] = self._person_busy.get(person, 0) | bit
+                self._person_load[person] = self._person_load.get(person, 0) + 1
+    
+    def unplace(self, key: Hashable):
+        slot, caster, staff = self.assignments.pop(key)
+        bit = 1 << slot
+        day = self.grid.day_of(slot)
+        for team in self.matches[key]:
+            self._team_busy[team] &= ~bit
+            self._team_day_count[(team, day)] -= 1
+            if self._team_day_count[(team, day)] < self.max_per_day:
+                self._team_full_days[team] = self._team_full_days.get(team, 0) & ~self.grid.day_masks[day]
+        for person in (caster, staff):
+            if person is not None:
+                self._person_busy[person] &= ~bit
+                self._person_load[person] -= 1
+    
+    # Feasibility
+    
+    def available_mask(self, key: Hashable) -> int:
+        """Slots both teams are available for (ignoring bookings)"""
+        team1, team2 = self.matches[key]
+        return self.team_masks.get(team1, 0) & self.team_masks.get(team2, 0)
+    
+    def free_mask(self, key: Hashable) -> int:
+        """Slots where both teams are available, unbooked and under the daily maximum"""
+        mask = self.available_mask(key)
+        for team in self.matches[key]:
+            mask &= ~(self._team_busy.get(team, 0) | self._team_full_days.get(team, 0))
+        return mask
+    
+    def _free_person(self, role: str, slot: int, exclude: Optional[int] = None) -> Optional[int]:
+        """Least-loaded person of a role who is available and unbooked at the slot"""
+        bit = 1 << slot
+        best = None
+        for person, roles in self.people.items():
+            if person != exclude and roles.get(role, 0) & bit and not self._person_busy.get(person, 0) & bit:
+                if best is None or self._person_load.get(person, 0) < self._person_load.get(best, 0):
+                    best = person
+        return best
+    
+    def _staff_for(self, slot: int) -> Optional[Tuple[Optional[int], Optional[int]]]:
+        crew = {role: None for role in STAFF_ROLES}
+        for role in self.required_roles:
+            crew[role] = self._free_person(role, slot, exclude=crew[CASTER])
+            if crew[role] is None:
+                return None
+        return crew[CASTER], crew[STAFF]
+    
+    def _place_earliest(self, key: Hashable, after: int = 0) -> bool:
+        for slot in _slots(self.free_mask(key) >> after << after):
+            crew = self._staff_for(slot)
+            if crew is not None:
+                self.place(key, slot, *crew)
+                return True
+        return False
+    
+    # Scheduling
+    
+    def schedule(self, keys: Iterable[Hashable], after: int = 0) -> List[Hashable]:
+        """Place matches most-constrained first; returns the keys that found no slot"""
+        ordered = sorted(keys, key=lambda key: (self.available_mask(key).bit_count(), str(key)))
+        return [key for key in ordered if not self._place_earliest(key, after)]
+    
+    def move(self, key: Hashable, slot: int, after: int = 0) -> Tuple[List[Hashable], List[Hashable]]:
+        """
+        Move one match to a slot (even outside team availability - it's a
+        manual decision) and re-place only the matches it now collides with.
+        Returns (moved_keys, unscheduled_keys): every match whose slot changed
+        and the displaced matches that found no new slot. Displaced matches are
+        re-placed from slot `after` on.
+        """
+        if key in self.assignments:
+            self.unplace(key)
+        bit = 1 << slot
+        day = self.grid.day_of(slot)
+        teams = set(self.matches[key])
+        
+        # Matches of the same teams at that time or over the daily maximum
+        displaced = []
+        for other, (other_slot, _, _) in sorted(self.assignments.items(), key=lambda item: -item[1][0]):
+            if teams.isdisjoint(self.matches[other]):
+                continue
+            over_limit = self.grid.day_of(other_slot) == day and any(
+                team in self.matches[other] and self._team_day_count.get((team, day), 0) >= self.max_per_day
+                for team in teams
+            )
+            if other_slot == slot or over_limit:
+                displaced.append(other)
+                self.unplace(other)
+        
+        crew = self._staff_for(slot)
+        if crew is None:
+            # Free the least disruptive crew: take over the crew of a match at that slot
+            crew = (None, None)
+            for other, (other_slot, caster, staff) in list(self.assignments.items()):
+                if other_slot == slot and (caster is not None or staff is not None):
+                    displaced.append(other)
+                    self.unplace(other)
+                    crew = self._staff_for(slot) or crew
+                    break
+        self.place(key, slot, *crew)
+        
+        unscheduled = self.schedule(displaced, after)
+        return [key] + [other for other in displaced if other not in unscheduled], unscheduled
+
+
+# Database glue
+
+def _midnight(when: datetime) -> datetime:
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def _load(start: datetime, days: int, extra: Iterable[Dict] = ()) -> Tuple[Scheduler, List[Dict]]:
+    """
+    Scheduler over the grid with every match already scheduled in it booked.
+    `extra` adds (unbooked) entries with source, match_id, team1_id, team2_id.
+    """
+    grid = ScheduleGrid(start, days, config.schedule_slot_minutes)
+    end = grid.slot_time(grid.slot_count)
+    booked = await db.get_scheduled_matches(start, end)
+    extra = list(extra)
+    
+    matches = {(m['source'], m['match_id']): (m['team1_id'], m['team2_id']) for m in booked + extra}
+    team_ids = sorted({team for pair in matches.values() for team in pair})
+    
+    windows: Dict[int, List[Window]] = {}
+    for row in await db.get_team_availability(team_ids):
+        windows.setdefault(row['team_id'], []).append((row['weekday'], row['start_minute'], row['end_minute']))
+    await team_index.ensure_loaded()
+    full = (1 << grid.slot_count) - 1
+    team_masks = {}
+    for team_id in team_ids:
+        team = team_index.get(team_id)
+        team_windows = windows.get(team_id) or REGION_DEFAULT_WINDOWS.get(team['region'] if team else None)
+        team_masks[team_id] = grid.window_mask(team_windows) if team_windows else full
+    
+    people: Dict[int, Dict[str, int]] = {}
+    for slot in await db.get_staff_slots(start, end):
+        roles = people.setdefault(slot['discord_id'], {})
+        roles[slot['role']] = roles.get(slot['role'], 0) | grid.range_mask(slot['starts_at'], slot['ends_at'])
+    
+    scheduler = Scheduler(grid, matches, team_masks, people, config.schedule_max_matches_per_day)
+    for entry in booked:
+        slot = grid.slot_at(entry['starts_at'])
+        if 0 <= slot < grid.slot_count:
+            scheduler.place((entry['source'], entry['match_id']), slot, entry['caster_discord_id'], entry['staff_discord_id'])
+    return scheduler, extra
+
+
+def _rows(scheduler: Scheduler, keys: Iterable[Hashable], unscheduled: Iterable[Hashable] = ()) -> List[Dict]:
+    """save_schedule rows for placed and unplaceable matches"""
+    rows = []
+    length = timedelta(minutes=scheduler.grid.slot_minutes)
+    for key in keys:
+        slot, caster, staff = scheduler.assignments[key]
+        starts_at = scheduler.grid.slot_time(slot)
+        rows.append({
+            'source': key[0], 'match_id': key[1],
+            'team1_id': scheduler.matches[key][0], 'team2_id': scheduler.matches[key][1],
+            'starts_at': starts_at, 'ends_at': starts_at + length,
+            'caster_discord_id': caster, 'staff_discord_id': staff, 'status': 'scheduled'
+        })
+    for key in unscheduled:
+        rows.append({
+            'source': key[0], 'match_id': key[1],
+            'team1_id': scheduler.matches[key][0], 'team2_id': scheduler.matches[key][1],
+            'starts_at': None, 'ends_at': None,
+            'caster_discord_id': None, 'staff_discord_id': None, 'status': 'unscheduled'
+        })
+    return rows
+
+
+async def generate_schedule(days: Optional[int] = None) -> Dict:
+    """Schedule every playable match that has no slot yet, from now over `days` days"""
+    now = datetime.utcnow()
+    async with _lock:
+        started = time.perf_counter()
+        scheduler, pending = await _load(_midnight(now), days or config.schedule_horizon_days, await db.get_unscheduled_matches())
+        keys = [(m['source'], m['match_id']) for m in pending]
+        unscheduled = scheduler.schedule(keys, after=scheduler.grid.slot_at(now) + 1)
+        placed = [key for key in keys if key in scheduler.assignments]
+        computed = time.perf_counter()
+        await db.save_schedule(_rows(scheduler, placed, unscheduled))
+    
+    return {
+        'scheduled': len(placed),
+        'unscheduled': len(unscheduled),
+        'compute_seconds': computed - started,
+        'first': scheduler.grid.slot_time(min(scheduler.assignments[key][0] for key in placed)) if placed else None,
+        'last': scheduler.grid.slot_time(max(scheduler.assignments[key][0] for key in placed)) if placed else None,
+    }
+
+
+async def move_scheduled_match(entry: Dict, when: datetime) -> Optional[Dict]:
+    """
+    Move one schedule entry to `when` (a slot start in the future) and
+    re-place only the matches that now collide with it. Returns None if
+    `when` isn't a slot start.
+    """
+    now = datetime.utcnow()
+    start = _midnight(now)
+    days = max(config.schedule_horizon_days, (_midnight(when) - start).days + 1)
+    async with _lock:
+        key = (entry['source'], entry['match_id'])
+        scheduler, _ = await _load(start, days, [entry])
+        slot = scheduler.grid.slot_of(when)
+        if slot is None or when <= now:
+            return None
+        moved, unscheduled = scheduler.move(key, slot, after=scheduler.grid.slot_at(now) + 1)
+        await db.save_schedule(_rows(scheduler, moved, unscheduled))
+    
+    return {
+        'moved': [dict(zip(('source', 'match_id'), other)) for other in moved if other != key],
+        'unscheduled': [dict(zip(('source', 'match_id'), other)) for other in unscheduled],
+        'caster_discord_id': scheduler.assignments[key][1],
+        'staff_discord_id': scheduler.assignments[key][2],
+    }
@@ -0,0 +1,153 @@
+"""
+Shard-aware runtime state
+
+Each gateway shard owns a subset of guilds ((guild_id >> 22) % shard_count).
+Runtime registries such as the active registration threads are partitioned by
+guild, so scans only touch one guild's entries and sizes can be reported per
+shard. Entries are still looked up by key alone, like a dict.
+
+When shards are split across processes (SHARD_IDS), each process only holds
+the state of its own shards; everything durable lives in the shared Postgres.
+"""
+
+import asyncio
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Tuple
+
+import discord
+
+from utils.config import config
+from utils.metrics import metrics
+
+
+# Shard count Discord recommended (SHARD_COUNT=auto), known once the bot connects
+_connected_shard_count: Optional[int] = None
+
+
+def shard_count() -> int:
+    return config.shard_count or _connected_shard_count or 1
+
+
+def set_connected_shard_count(count: Optional[int]):
+    global _connected_shard_count
+    _connected_shard_count = count
+
+
+def shard_for_guild(guild_id: int) -> int:
+    """The shard Discord routes a guild to"""
+    return (guild_id >> 22) % shard_count()
+
+
+class ShardState:
+    """Dict-like registry partitioned by guild, and so by shard"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._guilds: Dict[int, Dict[Hashable, Any]] = {}
+        self._key_guild: Dict[Hashable, int] = {}
+        _registries.append(self)
+    
+    def put(self, guild_id: int, key: Hashable, value: Any):
+        """Store an entry for a guild"""
+        previous = self._key_guild.get(key)
+        if previous is not None and previous != guild_id:
+            self._remove(previous, key)
+        self._guilds.setdefault(guild_id, {})[key] = value
+        self._key_guild[key] = guild_id
+    
+    def _remove(self, guild_id: int, key: Hashable) -> Any:
+        entries = self._guilds[guild_id]
+        value = entries.pop(key)
+        if not entries:
+            del self._guilds[guild_id]
+        return value
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        guild_id = self._key_guild.get(key)
+        if guild_id is None:
+            return default
+        return self._guilds[guild_id][key]
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        guild_id = self._key_guild.pop(key, None)
+        if guild_id is None:
+            return default
+        return self._remove(guild_id, key)
+    
+    def __getitem__(self, key: Hashable) -> Any:
+        return self._guilds[self._key_guild[key]][key]
+    
+    def __delitem__(self, key: Hashable):
+        self._remove(self._key_guild.pop(key), key)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._key_guild
+    
+    def __len__(self) -> int:
+        return len(self._key_guild)
+    
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(list(self._key_guild))
+    
+    def keys(self, guild_id: Optional[int] = None) -> List[Hashable]:
+        return [key for key, _ in self.items(guild_id)]
+    
+    def items(self, guild_id: Optional[int] = None) -> List[Tuple[Hashable, Any]]:
+        """Snapshot of one guild's entries, or of every entry"""
+        if guild_id is not None:
+            return list(self._guilds.get(guild_id, {}).items())
+        return [item for entries in self._guilds.values() for item in entries.items()]
+    
+    def guild_ids(self) -> List[int]:
+        return list(self._guilds)
+    
+    def has_guild(self, guild_id: int) -> bool:
+        return guild_id in self._guilds
+    
+    def pop_guild(self, guild_id: int) -> Dict[Hashable, Any]:
+        """Remove and return every entry of one guild"""
+        entries = self._guilds.pop(guild_id, {})
+        for key in entries:
+            self._key_guild.pop(key, None)
+        return entries
+    
+    def sizes(self) -> Dict[int, int]:
+        """Entries per shard"""
+        sizes: Dict[int, int] = {}
+        for guild_id, entries in self._guilds.items():
+            shard_id = shard_for_guild(guild_id)
+            sizes[shard_id] = sizes.get(shard_id, 0) + len(entries)
+        return sizes
+
+
+_registries: List[ShardState] = []
+
+
+def registries() -> List[ShardState]:
+    return list(_registries)
+
+
+def record_shard_event(shard_id: int, event: str):
+    """Count connects/disconnects/resumes per shard"""
+    metrics.inc(f"shard.{shard_id}.{event}")
+
+
+async def shard_metrics_loop(bot: discord.Client, interval: float = 30.0):
+    """Publish per-shard latency, guild counts and state sizes as gauges"""
+    await bot.wait_until_ready()
+    while not bot.is_closed():
+        guild_counts: Dict[int, int] = {}
+        for guild in bot.guilds:
+            shard_id = guild.shard_id if guild.shard_id is not None else 0
+            guild_counts[shard_id] = guild_counts.get(shard_id, 0) + 1
+        
+        latencies = getattr(bot, 'latencies', None) or [(0, bot.latency)]
+        for shard_id, latency in latencies:
+            if latency == latency and latency != float('inf'):  # skip NaN/inf before the first heartbeat
+                metrics.set_gauge(f"shard.{shard_id}.latency_ms", latency * 1000)
+            metrics.set_gauge(f"shard.{shard_id}.guilds", guild_counts.get(shard_id, 0))
+        
+        for registry in _registries:
+            for shard_id, size in registry.sizes().items():
+                metrics.set_gauge(f"state.{registry.name}.shard.{shard_id}", size)
+        
+        await asyncio.sleep(interval)
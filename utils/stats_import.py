@@ -0,0 +1,287 @@
+"""
+Bulk player stats import
+
+/admin-import-stats takes a CSV or JSON attachment with one row per player
+(discord_id and/or ign plus any of the stat columns). The upload is streamed
+to a temporary file and parsed incrementally - csv.reader for CSV, raw_decode
+over a sliding buffer for a JSON array or JSON Lines - so a 100k row file is
+never held in memory. Rows that fail validation are written straight to the
+report; the rest are fed to db.import_player_stats as an async iterator,
+which COPYs them into a staging table and merges them in one statement. The
+report (a CSV, gzipped when large) lists every rejected row and, per changed
+player, the old and new value of each stat - for a dry run it is the diff.
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+from typing import AsyncIterator, Dict, IO, Iterator, List, Optional, Tuple
+
+import aiohttp
+import discord
+
+from database.backend import PLAYER_STAT_COLUMNS
+from database.db import db
+
+
+# Largest attachment accepted (about 1M rows of CSV)
+MAX_IMPORT_BYTES = 64 * 1024 * 1024
+# Reports above this size are gzipped so they fit in a Discord upload
+REPORT_GZIP_BYTES = 8 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+# A JSON record that doesn't decode within this many characters is invalid
+MAX_RECORD_CHARS = 1024 * 1024
+# Rows parsed between yields to the event loop
+YIELD_EVERY = 1000
+# Rejected rows listed in the summary embed (the report has all of them)
+ERROR_PREVIEW = 5
+
+MAX_DISCORD_ID = 2 ** 63 - 1
+MAX_STAT = 2 ** 31 - 1
+
+_import_lock = asyncio.Lock()
+
+
+class ImportFileError(Exception):
+    """The upload as a whole can't be imported (too large, unreadable, missing columns)"""
+
+
+def _column(name: str) -> str:
+    return name.strip().lower().replace(" ", "_").replace("-", "_")
+
+
+class ImportReport:
+    """CSV report of rejected rows and per-player changes, kept in a temporary file"""
+    
+    def __init__(self):
+        self.file = tempfile.TemporaryFile("w+", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["row", "status", "discord_id", "ign", "detail", *PLAYER_STAT_COLUMNS])
+        self.invalid = 0
+        self.errors: List[str] = []
+    
+    def error(self, row: int, discord_id: Optional[int], ign: Optional[str], reason: str):
+        self.invalid += 1
+        if len(self.errors) < ERROR_PREVIEW:
+            self.errors.append(f"Row {row}: {reason}")
+        self.writer.writerow([row, "rejected", discord_id or "", ign or "", reason])
+    
+    def change(self, change: Dict):
+        self.writer.writerow([
+            "", "changed", change['discord_id'], change['ign'] or "", "",
+            *(
+                f"{change[f'{stat}_old']} -> {change[f'{stat}_new']}"
+                if change[f'{stat}_old'] != change[f'{stat}_new'] else ""
+                for stat in PLAYER_STAT_COLUMNS
+            )
+        ])
+    
+    def to_discord_file(self, filename: str) -> discord.File:
+        """Hand the report over as an upload (gzipped above REPORT_GZIP_BYTES)"""
+        data = self.file.detach()
+        data.seek(0)
+        if os.fstat(data.fileno()).st_size > REPORT_GZIP_BYTES:
+            compressed = tempfile.TemporaryFile()
+            with data, gzip.GzipFile(filename=filename, mode="wb", fileobj=compressed) as gz:
+                shutil.copyfileobj(data, gz, CHUNK_SIZE)
+            data = compressed
+            data.seek(0)
+            filename += ".gz"
+        return discord.File(data, filename=filename)
+    
+    def close(self):
+        self.file.close()
+
+
+async def download(attachment: discord.Attachment, file: IO[bytes]):
+    """Stream an attachment into a file without reading it into memory"""
+    if attachment.size > MAX_IMPORT_BYTES:
+        raise ImportFileError(f"The file is larger than {MAX_IMPORT_BYTES // (1024 * 1024)}MB.")
+    received = 0
+    async with aiohttp.ClientSession() as session:
+        async with session.get(attachment.url) as resp:
+            if resp.status != 200:
+                raise ImportFileError(f"Could not download the file (HTTP {resp.status}).")
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                received += len(chunk)
+                if received > MAX_IMPORT_BYTES:
+                    raise ImportFileError(f"The file is larger than {MAX_IMPORT_BYTES // (1024 * 1024)}MB.")
+                file.write(chunk)
+    file.seek(0)
+
+
+def _is_json(filename: str, text: IO[str]) -> bool:
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in (".json", ".jsonl", ".ndjson"):
+        return True
+    if extension == ".csv":
+        return False
+    # Unknown extension: sniff the first non-blank character
+    position = text.tell()
+    head = text.read(256).lstrip()
+    text.seek(position)
+    return head[:1] in ("[", "{")
+
+
+def _check_columns(columns) -> None:
+    columns = set(columns)
+    if not columns & {"discord_id", "ign"}:
+        raise ImportFileError("The file needs a `discord_id` or `ign` column.")
+    if not columns & set(PLAYER_STAT_COLUMNS):
+        raise ImportFileError(f"The file has none of the stat columns: {', '.join(PLAYER_STAT_COLUMNS)}.")
+
+
+def _csv_records(text: IO[str]) -> Iterator[Tuple[int, Dict]]:
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        raise ImportFileError("The file is empty.")
+    columns = [_column(name) for name in header]
+    _check_columns(columns)
+    return _csv_rows(reader, columns)
+
+
+def _csv_rows(reader, columns: List[str]) -> Iterator[Tuple[int, Dict]]:
+    for values in reader:
+        if not any(value.strip() for value in values):
+            continue
+        yield reader.line_num, dict(zip(columns, values))
+
+
+def _json_records(text: IO[str]) -> Iterator[Tuple[int, Dict]]:
+    """Records of a JSON array or JSON Lines file, decoded one at a time from a sliding buffer"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    in_array = None
+    row = 0
+    checked = False
+    
+    def fill() -> bool:
+        nonlocal buffer, position, eof
+        chunk = text.read(CHUNK_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        eof = not chunk
+        return bool(chunk)
+    
+    while True:
+        # Skip whitespace (and commas between array elements)
+        while True:
+            while position < len(buffer) and (buffer[position].isspace() or (in_array and buffer[position] == ",")):
+                position += 1
+            if position < len(buffer) or not fill():
+                break
+        if position >= len(buffer):
+            if in_array:
+                raise ImportFileError("The JSON array is not closed.")
+            return
+        if in_array is None:
+            in_array = buffer[position] == "["
+            if in_array:
+                position += 1
+                continue
+        if in_array and buffer[position] == "]":
+            return
+        
+        while True:
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+                break
+            except json.JSONDecodeError as e:
+                if eof or len(buffer) - position > MAX_RECORD_CHARS or not fill():
+                    raise ImportFileError(f"Invalid JSON after record {row}: {e.msg}.")
+        position = end
+        row += 1
+        if not isinstance(record, dict):
+            yield row, None
+            continue
+        record = {_column(key): value for key, value in record.items()}
+        if not checked:
+            _check_columns(record)
+            checked = True
+        yield row, record
+
+
+def _int(value, name: str, minimum: int, maximum: int) -> Optional[int]:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    if isinstance(value, bool) or isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"{name} must be a whole number")
+    try:
+        number = int(value.strip() if isinstance(value, str) else value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a whole number, not {str(value)[:20]!r}")
+    if not minimum <= number <= maximum:
+        raise ValueError(f"{name} is out of range ({number})")
+    return number
+
+
+def parse_record(record: Dict, mode: str) -> Tuple[Optional[int], Optional[str], List[Optional[int]]]:
+    """Validate one record; raises ValueError with the reason"""
+    discord_id = _int(record.get("discord_id"), "discord_id", 1, MAX_DISCORD_ID)
+    ign = record.get("ign")
+    if ign is not None:
+        ign = str(ign).strip() or None
+    if discord_id is None and ign is None:
+        raise ValueError("needs a discord_id or an ign")
+    # 'add' applies deltas, which may be negative corrections; 'set' writes absolute values
+    minimum = -MAX_STAT if mode == 'add' else 0
+    stats = [_int(record.get(stat), stat, minimum, MAX_STAT) for stat in PLAYER_STAT_COLUMNS]
+    if all(value is None for value in stats):
+        raise ValueError("no stat values")
+    return discord_id, ign, stats
+
+
+async def _rows(records: Iterator[Tuple[int, Dict]], mode: str, report: ImportReport) -> AsyncIterator[Tuple]:
+    """Valid rows as (row, discord_id, ign, *stats); invalid ones go to the report"""
+    for count, (row, record) in enumerate(records, 1):
+        if count % YIELD_EVERY == 0:
+            await asyncio.sleep(0)
+        if record is None:
+            report.error(row, None, None, "not a JSON object")
+            continue
+        try:
+            discord_id, ign, stats = parse_record(record, mode)
+        except ValueError as e:
+            report.error(row, None, record.get("ign") if isinstance(record.get("ign"), str) else None, str(e))
+            continue
+        yield (row, discord_id, ign, *stats)
+
+
+async def import_stats(attachment: discord.Attachment, mode: str, dry_run: bool) -> Tuple[Dict, ImportReport]:
+    """
+    Download, validate and import an attachment. Returns the summary from
+    db.import_player_stats (plus 'invalid') and the report; the caller sends
+    or closes the report. Raises ImportFileError for unusable files.
+    """
+    if _import_lock.locked():
+        raise ImportFileError("Another stats import is running, try again when it finishes.")
+    async with _import_lock:
+        report = ImportReport()
+        try:
+            with tempfile.TemporaryFile() as upload:
+                await download(attachment, upload)
+                text = io.TextIOWrapper(upload, encoding="utf-8-sig", newline="")
+                try:
+                    records = _json_records(text) if _is_json(attachment.filename, text) else _csv_records(text)
+                    summary = await db.import_player_stats(
+                        _rows(records, mode, report), mode, dry_run, report.error, report.change
+                    )
+                except UnicodeDecodeError:
+                    raise ImportFileError("The file is not UTF-8 text.")
+                except csv.Error as e:
+                    raise ImportFileError(f"Invalid CSV: {e}.")
+                finally:
+                    text.detach()
+        except BaseException:
+            report.close()
+            raise
+        summary['invalid'] = report.invalid - summary['rejected']
+        return summary, report
@@ -0,0 +1,137 @@
+"""
+Swiss pairing engine
+
+Pairs teams by standings without rematches and without two teams of the same
+organisation (teams sharing a captain or manager) meeting each other.
+
+Instead of backtracking over every possible pairing, each team in standings
+order takes the closest-ranked opponent it may play (O(n) when conflicts are
+rare). Teams left over are fixed with augmenting swaps: a stuck pair (s, t)
+and an existing pair (a, b) become (s, a) and (t, b) when both new pairs are
+allowed, trying the pairs ranked nearest to s first. Only when no swap exists
+is a conflict accepted, and the number of such forced pairs is reported.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+
+Pair = Tuple[int, int]
+
+
+def org_groups(staff_rows: Iterable[Mapping]) -> Dict[int, int]:
+    """
+    team_id -> organisation key from (team_id, discord_id) captain/manager rows.
+    Teams that share any captain or manager (directly or through a chain) get
+    the same key.
+    """
+    parent: Dict[int, int] = {}
+    
+    def find(team_id: int) -> int:
+        root = team_id
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[team_id] != root:
+            parent[team_id], team_id = root, parent[team_id]
+        return root
+    
+    first_team_of: Dict[int, int] = {}
+    for row in staff_rows:
+        team_id, discord_id = row['team_id'], row['discord_id']
+        find(team_id)
+        if discord_id in first_team_of:
+            parent[find(team_id)] = find(first_team_of[discord_id])
+        else:
+            first_team_of[discord_id] = team_id
+    return {team_id: find(team_id) for team_id in parent}
+
+
+def choose_bye(order: Sequence[int], had_bye: Set[int]) -> Optional[int]:
+    """Lowest-ranked team that hasn't had a bye yet (None for an even field)"""
+    if len(order) % 2 == 0:
+        return None
+    for team_id in reversed(order):
+        if team_id not in had_bye:
+            return team_id
+    return order[-1]
+
+
+def pair_round(
+    order: Sequence[int],
+    played: Set[frozenset],
+    orgs: Mapping[int, int],
+    had_bye: Set[int] = frozenset()
+) -> Tuple[List[Pair], Optional[int], int]:
+    """
+    Pair teams given in standings order.
+    
+    Returns (pairs, bye_team, forced): pairs with the higher-ranked team first,
+    the team getting a bye (odd fields), and how many pairs had to break the
+    rematch/organisation rules because no alternative existed.
+    """
+    bye = choose_bye(order, had_bye)
+    teams = [team_id for team_id in order if team_id != bye]
+    rank = {team_id: i for i, team_id in enumerate(teams)}
+    
+    def allowed(a: int, b: int) -> bool:
+        if frozenset((a, b)) in played:
+            return False
+        org = orgs.get(a)
+        return org is None or org != orgs.get(b)
+    
+    # Greedy: closest-ranked allowed opponent
+    partner: Dict[int, int] = {}
+    stuck: List[int] = []
+    for i, a in enumerate(teams):
+        if a in partner:
+            continue
+        for j in range(i + 1, len(teams)):
+            b = teams[j]
+            if b not in partner and allowed(a, b):
+                partner[a], partner[b] = b, a
+                break
+        else:
+            stuck.append(a)
+    
+    # Repair: pair stuck teams directly, or through one existing pair
+    forced = 0
+    while stuck:
+        s = stuck.pop(0)
+        for t in stuck:
+            if allowed(s, t):
+                stuck.remove(t)
+                partner[s], partner[t] = t, s
+                break
+        else:
+            if _swap_in(s, stuck, teams, rank, partner, allowed):
+                continue
+            # No legal pairing left for s - pair it with the closest stuck team anyway
+            t = min(stuck, key=lambda team_id: abs(rank[team_id] - rank[s]))
+            stuck.remove(t)
+            partner[s], partner[t] = t, s
+            forced += 1
+    
+    pairs = sorted(
+        {tuple(sorted((a, b), key=rank.get)) for a, b in partner.items()},
+        key=lambda pair: rank[pair[0]]
+    )
+    return pairs, bye, forced
+
+
+def _swap_in(s: int, stuck: List[int], teams: Sequence[int], rank: Mapping[int, int],
+             partner: Dict[int, int], allowed) -> bool:
+    """Break the nearest existing pair (a, b) that lets s and another stuck team both play"""
+    by_distance = sorted(
+        (team_id for team_id in teams if team_id in partner),
+        key=lambda team_id: abs(rank[team_id] - rank[s])
+    )
+    for a in by_distance:
+        if not allowed(s, a):
+            continue
+        b = partner[a]
+        for t in stuck:
+            if allowed(t, b):
+                stuck.remove(t)
+                partner[s], partner[a] = a, s
+                partner[t], partner[b] = b, t
+                return True
+    return False
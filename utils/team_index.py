@@ -0,0 +1,210 @@
+"""
+Team search index
+
+Every team is held in memory with sorted name/tag keys for prefix search and
+a trigram index for substring search, so team pickers can autocomplete over
+tens of thousands of teams within Discord's 3 second autocomplete deadline
+without querying the database. The index loads once and is kept current
+through the database change feed (team creates, updates and deletes from this
+process immediately, other processes and scripts through NOTIFY).
+"""
+
+import asyncio
+import heapq
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Set, Tuple
+
+import discord
+from discord import app_commands
+
+from database.db import db
+
+
+# Discord shows at most 25 autocomplete choices
+MAX_RESULTS = 25
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TeamIndex:
+    """In-memory team lookup by ID, name/tag prefix and name/tag substring"""
+    
+    def __init__(self):
+        self._teams: Dict[int, Dict] = {}
+        self._names: List[Tuple[str, int]] = []  # sorted (lower(team_name), id)
+        self._tags: List[Tuple[str, int]] = []   # sorted (lower(team_tag), id)
+        self._trigrams: Dict[str, Set[int]] = {}
+        self._loaded = False
+        self._changed_while_loading = False
+        self._lock = asyncio.Lock()
+        self._refreshes: Set[asyncio.Task] = set()
+        db.subscribe('teams', self._on_change)
+    
+    # Loading and maintenance
+    
+    async def load(self):
+        """(Re)build the index from the database"""
+        async with self._lock:
+            self._changed_while_loading = False
+            teams = await db.get_all_teams()
+            self._teams.clear()
+            self._names.clear()
+            self._tags.clear()
+            self._trigrams.clear()
+            for team in teams:
+                self._add(team)
+            # A write that landed after the SELECT may be missing - rebuild on next use
+            self._loaded = not self._changed_while_loading
+        print(f"✓ Team index loaded ({len(teams)} teams)")
+    
+    async def ensure_loaded(self):
+        if not self._loaded:
+            await self.load()
+    
+    def _add(self, team: Dict):
+        team_id = team['id']
+        self._teams[team_id] = team
+        name = team['team_name'].lower()
+        insort(self._names, (name, team_id))
+        keys = {name}
+        if team['team_tag']:
+            tag = team['team_tag'].lower()
+            insort(self._tags, (tag, team_id))
+            keys.add(tag)
+        for key in keys:
+            for trigram in _trigrams(key):
+                self._trigrams.setdefault(trigram, set()).add(team_id)
+    
+    def remove(self, team_id: int):
+        team = self._teams.pop(team_id, None)
+        if team is None:
+            return
+        name = team['team_name'].lower()
+        self._discard(self._names, (name, team_id))
+        keys = {name}
+        if team['team_tag']:
+            tag = team['team_tag'].lower()
+            self._discard(self._tags, (tag, team_id))
+            keys.add(tag)
+        for key in keys:
+            for trigram in _trigrams(key):
+                ids = self._trigrams.get(trigram)
+                if ids is not None:
+                    ids.discard(team_id)
+                    if not ids:
+                        del self._trigrams[trigram]
+    
+    @staticmethod
+    def _discard(keys: List[Tuple[str, int]], entry: Tuple[str, int]):
+        i = bisect_left(keys, entry)
+        if i < len(keys) and keys[i] == entry:
+            del keys[i]
+    
+    def upsert(self, team: Dict):
+        self.remove(team['id'])
+        self._add(dict(team))
+    
+    async def refresh(self, team_id: int):
+        """Re-read one team (after raw SQL updates or a change from another process)"""
+        team = await db.get_team_by_id(team_id)
+        if team:
+            self.upsert(team)
+        else:
+            self.remove(team_id)
+    
+    def _on_change(self, change: Dict):
+        if self._lock.locked():
+            self._changed_while_loading = True
+            return
+        if not self._loaded:
+            return
+        if change['op'] == 'RESET':
+            self._loaded = False
+        elif change['op'] == 'DELETE':
+            self.remove(change['id'])
+        elif 'row' in change:
+            self.upsert(change['row'])
+        else:
+            task = asyncio.create_task(self.refresh(change['id']))
+            self._refreshes.add(task)
+            task.add_done_callback(self._refreshes.discard)
+    
+    # Lookups
+    
+    def get(self, team_id: int) -> Optional[Dict]:
+        return self._teams.get(team_id)
+    
+    def newest(self, count: int = MAX_RESULTS) -> List[Dict]:
+        """The most recently created teams (what get_all_teams() lists first)"""
+        return heapq.nlargest(count, self._teams.values(), key=lambda team: team['id'])
+    
+    def teams(self) -> List[Dict]:
+        """Every team, newest first"""
+        return sorted(self._teams.values(), key=lambda team: team['id'], reverse=True)
+    
+    def _prefix(self, keys: List[Tuple[str, int]], prefix: str, limit: int) -> List[int]:
+        ids = []
+        for i in range(bisect_left(keys, (prefix,)), len(keys)):
+            key, team_id = keys[i]
+            if not key.startswith(prefix) or len(ids) >= limit:
+                break
+            ids.append(team_id)
+        return ids
+    
+    def search(self, query: str, limit: int = MAX_RESULTS) -> List[Dict]:
+        """
+        Teams matching `query`, best matches first: exact ID, tag prefix,
+        name prefix, then name/tag substring (3+ characters).
+        """
+        query = query.strip().lower()
+        if not query:
+            return self.newest(limit)
+        
+        ids: List[int] = []
+        if query.isdigit() and int(query) in self._teams:
+            ids.append(int(query))
+        ids += self._prefix(self._tags, query, limit)
+        ids += self._prefix(self._names, query, limit)
+        
+        if len(ids) < limit and len(query) >= 3:
+            trigram_sets = sorted((self._trigrams.get(t, set()) for t in _trigrams(query)), key=len)
+            candidates = set.intersection(*trigram_sets) if trigram_sets and trigram_sets[0] else set()
+            matches = []
+            for team_id in candidates:
+                team = self._teams[team_id]
+                if query in team['team_name'].lower() or query in (team['team_tag'] or '').lower():
+                    matches.append(team_id)
+            ids += sorted(matches, key=lambda team_id: self._teams[team_id]['team_name'].lower())
+        
+        results = []
+        seen = set()
+        for team_id in ids:
+            if team_id not in seen:
+                seen.add(team_id)
+                results.append(self._teams[team_id])
+                if len(results) == limit:
+                    break
+        return results
+    
+    def __len__(self) -> int:
+        return len(self._teams)
+
+
+# Global index instance
+team_index = TeamIndex()
+
+
+def team_choice_label(team: Dict) -> str:
+    label = f"{team['team_name']} [{team['team_tag']}] - {team['region']} (#{team['id']})"
+    return label[:100]  # Discord limit
+
+
+async def team_autocomplete(interaction: discord.Interaction, current: str) -> List[app_commands.Choice[int]]:
+    """Autocomplete callback for a team ID parameter (search by name, tag or ID)"""
+    await team_index.ensure_loaded()
+    return [
+        app_commands.Choice(name=team_choice_label(team), value=team['id'])
+        for team in team_index.search(current)
+    ]
@@ -0,0 +1,386 @@
+"""
+Team role and private channel provisioning
+
+When an event locks, /admin-provision-teams gives every team (db.get_all_teams)
+a role plus a private text and voice channel only the team and staff can see.
+The whole run is planned up front: objects that already exist are kept, the
+channels are packed into "Teams N" categories (at most 50 channels each) and
+the guild's role and channel limits are checked before anything is created.
+
+Creations go through a small executor - PROVISION_CONCURRENCY workers, paced
+(utils/pacing.py) at PROVISION_REQUESTS_PER_SECOND - roles and categories
+first, then the channels that need them. Each created object is checkpointed
+in provisioned_resources straight away, so a run that fails or is restarted
+picks up where it stopped, and the IDs are written to teams in one bulk
+UPDATE. The team's current members (db.get_role_assignments, loaded in
+batches when the member cache is lazy) are then given its role through the
+same paced workers - the channels are only visible to it - and a member who
+already holds it is left alone. /admin-teardown-teams deletes what provisioning created
+(the roles only on request) after detaching it from the teams.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import discord
+
+from database.db import db
+from utils.config import config
+from utils.member_cache import cache_members
+from utils.metrics import metrics
+from utils.pacing import Pacer
+
+
+PROVISION_REASON = "Team provisioning"
+CATEGORY_NAME = "Teams"
+# Discord limits
+CATEGORY_CHANNEL_LIMIT = 50
+GUILD_CHANNEL_LIMIT = 500
+GUILD_ROLE_LIMIT = 250
+# Seconds between progress callbacks
+PROGRESS_SECONDS = 5
+# Failures listed in the summary
+ERROR_PREVIEW = 5
+
+CHANNEL_KINDS = ('text', 'voice')
+# Team columns holding the provisioned IDs
+TEAM_COLUMNS = {'role': 'role_id', 'text': 'text_channel_id', 'voice': 'voice_channel_id'}
+
+_provision_lock = asyncio.Lock()
+
+
+class ProvisionError(Exception):
+    """Provisioning or teardown can't run (already running, missing permissions, over a Discord limit)"""
+
+
+def _staff_roles(guild: discord.Guild) -> List[discord.Role]:
+    return [role for role in (config.get_role(guild, key) for key in ('ADMINISTRATOR_ROLE_ID', 'STAFF_ROLE_ID')) if role]
+
+
+def _overwrites(guild: discord.Guild, team_role: Optional[discord.Role] = None) -> Dict:
+    """Hidden from @everyone; visible to the bot, staff and (for a channel) the team"""
+    visible = discord.PermissionOverwrite(view_channel=True, connect=True, send_messages=True, speak=True)
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(view_channel=False),
+        guild.me: discord.PermissionOverwrite(view_channel=True, connect=True, send_messages=True, manage_channels=True),
+    }
+    for role in _staff_roles(guild):
+        overwrites[role] = visible
+    if team_role is not None:
+        overwrites[team_role] = visible
+    return overwrites
+
+
+class ProvisionPlan:
+    """What is missing for every team, and which category each new channel goes into"""
+    
+    def __init__(self, guild: discord.Guild, teams: List[Dict], resources: List[Dict]):
+        checkpoints = {(row['kind'], row['key']): row['discord_id'] for row in resources}
+        self.teams = sorted(teams, key=lambda team: team['id'])
+        self.roles: Dict[int, discord.Role] = {}  # team id -> existing role
+        self.new_roles: List[Dict] = []
+        self.new_channels: List[Tuple[Dict, str, int]] = []  # (team, kind, category slot)
+        
+        # Existing categories from earlier runs, with their free room
+        self.categories: Dict[int, discord.CategoryChannel] = {}
+        free: Dict[int, int] = {}
+        for (kind, slot), channel_id in checkpoints.items():
+            category = guild.get_channel(channel_id) if kind == 'category' else None
+            if isinstance(category, discord.CategoryChannel):
+                self.categories[slot] = category
+                free[slot] = CATEGORY_CHANNEL_LIMIT - len(category.channels)
+        self.new_categories: List[int] = []
+        next_slot = max([slot for kind, slot in checkpoints if kind == 'category'], default=0) + 1
+        
+        for team in self.teams:
+            # A checkpointed object wins over the team column (a run may have stopped before the bulk update)
+            role = None
+            for role_id in (checkpoints.get(('role', team['id'])), team.get('role_id')):
+                role = guild.get_role(role_id) if role_id else None
+                if role is not None:
+                    break
+            if role is not None:
+                self.roles[team['id']] = role
+            else:
+                self.new_roles.append(team)
+            
+            missing = []
+            for kind in CHANNEL_KINDS:
+                channel_ids = (checkpoints.get((kind, team['id'])), team.get(TEAM_COLUMNS[kind]))
+                if not any(channel_id and guild.get_channel(channel_id) for channel_id in channel_ids):
+                    missing.append(kind)
+            if not missing:
+                continue
+            slot = next((slot for slot in sorted(free) if free[slot] >= len(missing)), None)
+            if slot is None:
+                slot = next_slot
+                next_slot += 1
+                free[slot] = CATEGORY_CHANNEL_LIMIT
+                self.new_categories.append(slot)
+            free[slot] -= len(missing)
+            self.new_channels.extend((team, kind, slot) for kind in missing)
+        
+        if len(guild.roles) + len(self.new_roles) > GUILD_ROLE_LIMIT:
+            raise ProvisionError(
+                f"{len(self.new_roles)} new team roles would put the server over Discord's {GUILD_ROLE_LIMIT} role limit."
+            )
+        new_channels = len(self.new_channels) + len(self.new_categories)
+        if len(guild.channels) + new_channels > GUILD_CHANNEL_LIMIT:
+            raise ProvisionError(
+                f"{new_channels} new channels and categories would put the server over Discord's "
+                f"{GUILD_CHANNEL_LIMIT} channel limit."
+            )
+    
+    async def member_grants(self, guild: discord.Guild, rows: List[Dict]) -> Tuple[List[Tuple[discord.Member, Dict]], int]:
+        """
+        (member, team) for every team member without the team's role (all of
+        them for a role still to be created), and how many members are not in
+        the server
+        """
+        teams = {team['id']: team for team in self.teams}
+        rows = [row for row in rows if row['discord_id'] is not None and row['team_id'] in teams]
+        await cache_members(guild, [row['discord_id'] for row in rows])
+        grants = []
+        not_in_guild = 0
+        for row in rows:
+            team = teams[row['team_id']]
+            role = self.roles.get(team['id'])
+            member = guild.get_member(row['discord_id'])
+            if member is None:
+                not_in_guild += 1
+            elif role is None or member.get_role(role.id) is None:
+                grants.append((member, team))
+        return grants, not_in_guild
+
+
+async def _run_jobs(
+    jobs: List[Tuple[str, Callable[[], Awaitable[None]]]],
+    pacer: Pacer,
+    summary: Dict,
+    progress: Callable[[], Awaitable[None]]
+):
+    """Run (label, job) pairs on PROVISION_CONCURRENCY workers, recording failures in summary"""
+    pending = iter(jobs)
+    
+    async def worker():
+        for label, job in pending:
+            await pacer.wait()
+            began = time.monotonic()
+            try:
+                await job()
+            except Exception as e:
+                pacer.done(began, rate_limited=getattr(e, 'status', None) == 429)
+                summary['failed'] += 1
+                metrics.inc("provisioning.failures")
+                print(f"✗ Provisioning failed for {label}: {e}")
+                if len(summary['errors']) < ERROR_PREVIEW:
+                    summary['errors'].append(f"{label}: {getattr(e, 'text', None) or e}")
+            else:
+                pacer.done(began)
+                summary['done'] += 1
+            await progress()
+    
+    workers = min(max(1, int(config.provision_concurrency)), len(jobs))
+    await asyncio.gather(*(worker() for _ in range(workers)))
+
+
+def _new_summary(dry_run: bool) -> Dict:
+    return {
+        'phase': 'planning', 'dry_run': dry_run, 'teams': 0, 'roles': 0, 'channels': 0, 'categories': 0,
+        'members': 0, 'total': 0, 'done': 0, 'failed': 0, 'skipped': 0, 'errors': [], 'updated': 0,
+        'assigned': 0, 'member_failures': 0, 'not_in_guild': 0, 'seconds': 0.0,
+    }
+
+
+def _progress_reporter(summary: Dict, on_progress: Optional[Callable[[Dict], Awaitable[None]]]):
+    started = time.monotonic()
+    last = started
+    
+    async def progress(force: bool = False):
+        nonlocal last
+        summary['seconds'] = time.monotonic() - started
+        if on_progress is None or not (force or time.monotonic() - last >= PROGRESS_SECONDS):
+            return
+        last = time.monotonic()
+        try:
+            await on_progress(summary)
+        except discord.HTTPException as e:
+            print(f"⚠️  Failed to report provisioning progress: {e}")
+    
+    return progress
+
+
+async def provision_teams(
+    guild: discord.Guild,
+    dry_run: bool,
+    on_progress: Optional[Callable[[Dict], Awaitable[None]]] = None
+) -> Dict:
+    """
+    Create whatever role, category and channels are missing for every team,
+    write the IDs to teams and give every team member the team's role. A dry
+    run only plans. Returns the summary.
+    """
+    if _provision_lock.locked():
+        raise ProvisionError("Team provisioning or teardown is already running, try again when it finishes.")
+    async with _provision_lock:
+        permissions = guild.me.guild_permissions
+        if not (permissions.manage_roles and permissions.manage_channels):
+            raise ProvisionError("The bot needs the Manage Roles and Manage Channels permissions.")
+        
+        summary = _new_summary(dry_run)
+        progress = _progress_reporter(summary, on_progress)
+        plan = ProvisionPlan(guild, await db.get_all_teams(), await db.get_provisioned_resources())
+        grants, not_in_guild = await plan.member_grants(guild, await db.get_role_assignments())
+        summary.update(
+            teams=len(plan.teams), roles=len(plan.new_roles), channels=len(plan.new_channels),
+            categories=len(plan.new_categories), members=len(grants), not_in_guild=not_in_guild,
+            total=len(plan.new_roles) + len(plan.new_channels) + len(plan.new_categories) + len(grants)
+        )
+        if dry_run or summary['total'] == 0:
+            summary['phase'] = 'done'
+            if not dry_run:
+                summary['updated'] = await db.apply_provisioned_resources()
+            await progress()
+            return summary
+        
+        pacer = Pacer(config.provision_requests_per_second, "provisioning.rate_limited")
+        
+        def create_role(team: Dict):
+            async def job():
+                role = await guild.create_role(
+                    name=team['team_name'],
+                    color=discord.Color.blue(),
+                    mentionable=True,
+                    reason=f"{PROVISION_REASON}: {team['team_name']}"
+                )
+                await db.add_provisioned_resource('role', team['id'], role.id)
+                plan.roles[team['id']] = role
+            return f"role for {team['team_name']}", job
+        
+        def create_category(slot: int):
+            async def job():
+                category = await guild.create_category(
+                    f"{CATEGORY_NAME} {slot}", overwrites=_overwrites(guild), reason=PROVISION_REASON
+                )
+                await db.add_provisioned_resource('category', slot, category.id)
+                plan.categories[slot] = category
+            return f"category {CATEGORY_NAME} {slot}", job
+        
+        def create_channel(team: Dict, kind: str, slot: int):
+            async def job():
+                role = plan.roles[team['id']]
+                create = guild.create_text_channel if kind == 'text' else guild.create_voice_channel
+                channel = await create(
+                    (team['team_tag'] or team['team_name']) if kind == 'text' else team['team_name'],
+                    category=plan.categories[slot],
+                    overwrites=_overwrites(guild, role),
+                    reason=f"{PROVISION_REASON}: {team['team_name']}"
+                )
+                await db.add_provisioned_resource(kind, team['id'], channel.id)
+            return f"{kind} channel for {team['team_name']}", job
+        
+        def grant_role(member: discord.Member, team: Dict):
+            async def job():
+                try:
+                    await member.add_roles(plan.roles[team['id']], reason=f"{PROVISION_REASON}: {team['team_name']}")
+                except discord.NotFound:
+                    summary['not_in_guild'] += 1
+                    return
+                summary['assigned'] += 1
+            return f"team role for {member} ({team['team_name']})", job
+        
+        # Roles and categories first: every channel needs its team's role and its category
+        summary['phase'] = 'creating roles and categories'
+        await progress(force=True)
+        await _run_jobs(
+            [create_role(team) for team in plan.new_roles] + [create_category(slot) for slot in plan.new_categories],
+            pacer, summary, progress
+        )
+        
+        summary['phase'] = 'creating channels'
+        await progress(force=True)
+        jobs = []
+        for team, kind, slot in plan.new_channels:
+            if team['id'] in plan.roles and slot in plan.categories:
+                jobs.append(create_channel(team, kind, slot))
+            else:
+                summary['skipped'] += 1
+        await _run_jobs(jobs, pacer, summary, progress)
+        summary['updated'] = await db.apply_provisioned_resources()
+        
+        # Re-read the rosters: members may have changed while the objects were created
+        summary['phase'] = 'assigning team roles'
+        await progress(force=True)
+        grants, summary['not_in_guild'] = await plan.member_grants(guild, await db.get_role_assignments())
+        summary['total'] += len(grants) - summary['members']
+        summary['members'] = len(grants)
+        jobs = []
+        for member, team in grants:
+            if team['id'] in plan.roles:
+                jobs.append(grant_role(member, team))
+            else:
+                summary['skipped'] += 1
+        failed = summary['failed']
+        await _run_jobs(jobs, pacer, summary, progress)
+        summary['member_failures'] = summary['failed'] - failed
+        
+        summary['phase'] = 'done'
+        await progress()
+        return summary
+
+
+async def teardown_teams(
+    guild: discord.Guild,
+    include_roles: bool,
+    dry_run: bool,
+    on_progress: Optional[Callable[[Dict], Awaitable[None]]] = None
+) -> Dict:
+    """
+    Delete the channels and categories provisioning created (and its roles
+    when include_roles), unsetting them on the teams first. Objects already
+    gone from the server only lose their checkpoint. Returns the summary.
+    """
+    if _provision_lock.locked():
+        raise ProvisionError("Team provisioning or teardown is already running, try again when it finishes.")
+    async with _provision_lock:
+        permissions = guild.me.guild_permissions
+        if not (permissions.manage_roles and permissions.manage_channels):
+            raise ProvisionError("The bot needs the Manage Roles and Manage Channels permissions.")
+        
+        kinds = list(CHANNEL_KINDS) + ['category'] + (['role'] if include_roles else [])
+        resources = [row for row in await db.get_provisioned_resources() if row['kind'] in kinds]
+        summary = _new_summary(dry_run)
+        progress = _progress_reporter(summary, on_progress)
+        for row in resources:
+            summary[{'role': 'roles', 'category': 'categories'}.get(row['kind'], 'channels')] += 1
+        summary['total'] = len(resources)
+        summary['teams'] = len({row['key'] for row in resources if row['kind'] != 'category'})
+        if dry_run or not resources:
+            summary['phase'] = 'done'
+            return summary
+        
+        # Detach first, so nothing reads a team channel or role that is about to disappear
+        summary['updated'] = await db.clear_provisioned_resources(kinds)
+        pacer = Pacer(config.provision_requests_per_second, "provisioning.rate_limited")
+        
+        def delete(row: Dict):
+            async def job():
+                target = guild.get_role(row['discord_id']) if row['kind'] == 'role' else guild.get_channel(row['discord_id'])
+                if target is not None:
+                    try:
+                        await target.delete(reason=PROVISION_REASON)
+                    except discord.NotFound:
+                        pass
+                await db.remove_provisioned_resource(row['kind'], row['key'])
+            return f"{row['kind']} {row['discord_id']}", job
+        
+        # Categories last, once their channels are gone
+        summary['phase'] = 'deleting'
+        await progress(force=True)
+        await _run_jobs([delete(row) for row in resources if row['kind'] != 'category'], pacer, summary, progress)
+        await _run_jobs([delete(row) for row in resources if row['kind'] == 'category'], pacer, summary, progress)
+        
+        summary['phase'] = 'done'
+        await progress()
+        return summary
@@ -4,12 +4,45 @@ Thread management utilities for registration processes
 
 import discord
 import asyncio
-import os
-from typing import Optional
+import time
+from typing import Dict, List, Optional
+from utils.config import config
+from utils.permissions import permissions
+from utils.shard_state import ShardState
 
 
-# Store threads waiting for Bot Access members
-_threads_waiting_for_bot_access = {}
+# thread_id -> thread waiting for a Bot Access member, grouped by guild (oldest first)
+_waiting_threads = ShardState("waiting_threads")
+
+# member_id -> monotonic time a Bot Access member was last active (poll mode only)
+_last_active: Dict[int, float] = {}
+
+# Concurrent thread.add_user calls when releasing a guild's waiting threads
+RELEASE_CONCURRENCY = 5
+
+
+def is_available(member: discord.Member) -> bool:
+    """
+    Whether a staff member counts as online.
+    
+    Events mode reads the member's presence. Poll mode runs without the
+    presences intent (status is always offline), so recent activity stands in.
+    """
+    if config.presence_mode == "poll":
+        last_active = _last_active.get(member.id)
+        return last_active is not None and time.monotonic() - last_active < config.presence_activity_window_minutes * 60
+    return member.status != discord.Status.offline
+
+
+def note_activity(member):
+    """Record that a Bot Access member just did something (poll mode)"""
+    if permissions.has_any(member, 'BOT_ACCESS_ROLE_ID'):
+        _last_active[member.id] = time.monotonic()
+
+
+def forget_thread(guild_id: int, thread_id: int):
+    """Stop waiting on a thread (deleted/archived)"""
+    _waiting_threads.pop(thread_id, None)
 
 
 async def add_staff_to_thread(thread: discord.Thread, guild: discord.Guild):
@@ -22,10 +55,9 @@ async def add_staff_to_thread(thread: discord.Thread, guild: discord.Guild):
     """
     
     # Add administrators (always, regardless of status)
-    administrator_role_id = os.getenv("ADMINISTRATOR_ROLE_ID")
-    if administrator_role_id:
+    if config.administrator_role_id:
         try:
-            admin_role = guild.get_role(int(administrator_role_id))
+            admin_role = config.get_role(guild, 'ADMINISTRATOR_ROLE_ID')
             if admin_role:
                 for member in admin_role.members:
                     try:
@@ -38,14 +70,14 @@ async def add_staff_to_thread(thread: discord.Thread, guild: discord.Guild):
             print(f"Error processing administrators: {e}")
     
     # Add bot access members (only if online)
-    bot_access_role_id = os.getenv("BOT_ACCESS_ROLE_ID")
+    bot_access_role_id = config.bot_access_role_id
     if bot_access_role_id:
         try:
-            bot_access_role = guild.get_role(int(bot_access_role_id))
+            bot_access_role = config.get_role(guild, 'BOT_ACCESS_ROLE_ID')
             if bot_access_role:
                 online_bot_access = [
                     member for member in bot_access_role.members
-                    if member.status != discord.Status.offline
+                    if is_available(member)
                 ]
                 
                 if online_bot_access:
@@ -60,66 +92,87 @@ async def add_staff_to_thread(thread: discord.Thread, guild: discord.Guild):
                 else:
                     # No bot access members online - register thread for waiting
                     print(f"⏳ No Bot Access members online. Thread {thread.name} will wait for one to come online.")
-                    _threads_waiting_for_bot_access[thread.id] = {
-                        'thread': thread,
-                        'guild': guild,
-                        'role_id': int(bot_access_role_id)
-                    }
+                    _waiting_threads.put(guild.id, thread.id, thread)
         except Exception as e:
             print(f"Error processing bot access members: {e}")
 
 
+async def release_waiting_threads(guild: discord.Guild, members: List[discord.Member]):
+    """Add newly available Bot Access members to every thread waiting in the guild"""
+    waiting = _waiting_threads.pop_guild(guild.id)
+    if not waiting:
+        return
+    
+    # Deleted and archived threads drop out of the guild cache - no API call needed
+    threads = [thread for thread_id, thread in waiting.items() if guild.get_thread(thread_id) is not None]
+    semaphore = asyncio.Semaphore(RELEASE_CONCURRENCY)
+    
+    async def add(thread: discord.Thread, member: discord.Member):
+        async with semaphore:
+            await thread.add_user(member)
+    
+    pairs = [(thread, member) for thread in threads for member in members]
+    results = await asyncio.gather(*(add(thread, member) for thread, member in pairs), return_exceptions=True)
+    
+    added = set()
+    for (thread, member), result in zip(pairs, results):
+        if isinstance(result, Exception):
+            print(f"✗ Failed to add {member.name} to thread {thread.name}: {result}")
+        else:
+            added.add(thread.id)
+    
+    # Threads nobody could be added to keep waiting
+    for thread in threads:
+        if thread.id not in added:
+            _waiting_threads.put(guild.id, thread.id, thread)
+    
+    if added:
+        print(f"✓ Processed {len(added)} waiting thread(s)")
+
+
 async def on_presence_update(before: discord.Member, after: discord.Member):
     """
     Event handler for presence updates. Call this from bot's on_presence_update event.
     
     When a Bot Access member comes online, adds them to any waiting threads.
     """
-    bot_access_role_id = os.getenv("BOT_ACCESS_ROLE_ID")
-    if not bot_access_role_id:
+    # Cheapest filters first - this runs for every presence change in the guild
+    if before.status != discord.Status.offline or after.status == discord.Status.offline:
         return
-    
-    # Check if member has Bot Access role and just came online
-    bot_access_role = after.guild.get_role(int(bot_access_role_id))
-    if not bot_access_role or bot_access_role not in after.roles:
+    if not _waiting_threads.has_guild(after.guild.id):
+        return
+    if not permissions.has_any(after, 'BOT_ACCESS_ROLE_ID'):
         return
     
-    # Check if they went from offline to online
-    if before.status == discord.Status.offline and after.status != discord.Status.offline:
-        print(f"✓ Bot Access member {after.name} came online!")
-        
-        # Add them to all waiting threads
-        threads_to_remove = []
-        for thread_id, thread_info in _threads_waiting_for_bot_access.items():
-            thread = thread_info['thread']
+    print(f"✓ Bot Access member {after.name} came online!")
+    await release_waiting_threads(after.guild, [after])
+
+
+async def poll_waiting_threads(bot: discord.Client):
+    """
+    Poll mode loop: check only Bot Access role members for guilds that have
+    waiting threads, instead of receiving every presence change.
+    """
+    await bot.wait_until_ready()
+    while not bot.is_closed():
+        await asyncio.sleep(config.presence_poll_interval_seconds)
+        for guild_id in _waiting_threads.guild_ids():
+            guild = bot.get_guild(guild_id)
+            if guild is None:
+                _waiting_threads.pop_guild(guild_id)
+                continue
             
-            try:
-                # Verify thread still exists
+            bot_access_role = config.get_role(guild, 'BOT_ACCESS_ROLE_ID')
+            if not bot_access_role:
+                continue
+            available = [member for member in bot_access_role.members if is_available(member)]
+            if available:
                 try:
-                    await thread.fetch_message(thread.id)  # Check if thread is accessible
-                except:
-                    # Thread no longer exists
-                    threads_to_remove.append(thread_id)
-                    continue
-                
-                # Add the online headmod to the thread
-                await thread.add_user(after)
-                print(f"✓ Added {after.name} to waiting thread: {thread.name}")
-                
-                # Remove from waiting list after successfully adding
-                threads_to_remove.append(thread_id)
-                
-            except Exception as e:
-                print(f"✗ Failed to add {after.name} to thread {thread.name}: {e}")
-        
-        # Clean up processed threads
-        for thread_id in threads_to_remove:
-            del _threads_waiting_for_bot_access[thread_id]
-        
-        if threads_to_remove:
-            print(f"✓ Processed {len(threads_to_remove)} waiting thread(s)")
+                    await release_waiting_threads(guild, available)
+                except Exception as e:
+                    print(f"✗ Error releasing waiting threads: {e}")
 
 
 def get_waiting_threads_count() -> int:
     """Get the number of threads currently waiting for a Bot Access member"""
-    return len(_threads_waiting_for_bot_access)
+    return len(_waiting_threads)